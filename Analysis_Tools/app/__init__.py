@@ -28,7 +28,12 @@ from .controllers.stock_controller import stock_bp
 
 from .controllers.voice_api_controller import voice_api_bp
 from .models.stock_model import cache as stock_cache
+from .utils.compression import init_compression
+from .utils.http_cache import init_http_cache
+from .utils.json_provider import init_json_provider
 from .utils.logger import setup_logger
+from .utils.perf_metrics import init_perf_metrics
+from .utils.static_assets import init_static_assets
 
 # In-memory active session tracker {username: last_seen_datetime}
 _active_sessions = {}
@@ -52,6 +57,12 @@ def create_app():
     app = Flask(__name__, template_folder=template_dir, static_folder=static_dir)
     app.secret_key = os.environ.get("APP_SECRET_KEY", "dev-secret-key-change-me")
 
+    # orjson-backed jsonify with ?shape=columns for tabular APIs
+    init_json_provider(app)
+
+    # Hashed, precompressed, immutable static URLs (Analysis_Tools/build_static.py)
+    init_static_assets(app)
+
     # Configure Logging
     setup_logger()
     app.logger.info("Flask application initialized")
@@ -66,6 +77,19 @@ def create_app():
     scanner_cache.init_app(app)
     stock_cache.init_app(app)
 
+    # New EOD data loaded (pipeline bumped the data epoch): drop everything
+    # memoized from the previous trading date in this worker
+    from .models import dashboard_model, insights_model, signal_scanner_model
+    from .models.data_epoch import on_data_epoch_change
+
+    @on_data_epoch_change
+    def clear_eod_caches():
+        for c in (gainers_cache, signal_cache, futures_cache, tech_cache, insights_cache, scanner_cache, stock_cache):
+            c.clear()
+        dashboard_model.clear_date_cache()
+        insights_model.clear_insights_cache()
+        signal_scanner_model.clear_scanner_cache()
+
     # Initialize authentication system (creates users table and default admin)
     from .models.auth_model import ensure_initialized
 
@@ -91,6 +115,11 @@ def create_app():
     app.register_blueprint(goldmine_bp)  # Goldmine at /scanner/goldmine
     app.register_blueprint(voice_api_bp)  # Voice API at /api/voice/
 
+    # Per-endpoint latency histograms + SQL counts (see /admin/performance)
+    from .models.db_config import engine, engine_cash
+
+    init_perf_metrics(app, {"fo": engine, "cash": engine_cash})
+
     # Add custom Jinja2 filter for expiry date formatting
     def format_expiry_date(date_str):
         """Format YYYY-MM-DD to DDMMMYY (e.g., 25NOV25)"""
@@ -149,6 +178,7 @@ def create_app():
             "auth.reset_verify_otp",
             "auth.reset_new_password",
             "health.health_check",
+            "admin.metrics",  # Bearer METRICS_TOKEN, checked in the view
             "static",
         ]:
             return None
@@ -170,4 +200,10 @@ def create_app():
             "user_display_name": get_user_display_name(username) if username else None,
         }
 
+    # gzip / brotli above COMPRESS_MIN_BYTES (registered first so it runs last)
+    init_compression(app)
+
+    # ETag / 304 for EOD pages and APIs (runs after require_login)
+    init_http_cache(app)
+
     return app
@@ -1,9 +1,21 @@
+import hmac
+import os
 import sys
 from datetime import datetime
 
-from flask import Blueprint, abort, jsonify, render_template, request, session
+from flask import Blueprint, Response, abort, jsonify, render_template, request, session
 
 from ..models.auth_model import get_all_users, toggle_user_active
+from ..models.nse_indices_model import get_refresh_stats
+from ..models.slow_query_log import SLOW_QUERY_LOG_ENABLED, SLOW_QUERY_MAX_SHAPES, get_slow_query_report
+from ..utils.perf_metrics import (
+    get_perf_snapshot,
+    render_prometheus,
+    render_single_flight_prometheus,
+    render_upstream_prometheus,
+    reset_perf_metrics,
+)
+from ..utils.single_flight import get_single_flight_stats, reset_single_flight_stats
 
 admin_bp = Blueprint("admin", __name__, url_prefix="/admin")
 
@@ -78,3 +90,51 @@ def toggle_user(username):
     require_admin()
     success, msg = toggle_user_active(username)
     return jsonify({"success": success, "message": msg})
+
+
+# ============================================================
+# PERFORMANCE - latency histograms + SQL counts per endpoint
+# ============================================================
+def _performance_data():
+    data = get_perf_snapshot()
+    data["slow_query_log"] = SLOW_QUERY_LOG_ENABLED
+    limit = request.args.get("limit", 20, type=int)  # non-numeric -> default
+    data["slow_queries"] = get_slow_query_report(limit=max(1, min(limit, SLOW_QUERY_MAX_SHAPES)))
+    data["upstream"] = get_refresh_stats()
+    data["single_flight"] = get_single_flight_stats()
+    return data
+
+
+@admin_bp.route("/performance")
+def performance_dashboard():
+    require_admin()
+    return render_template("admin/performance.html", snapshot=_performance_data())
+
+
+@admin_bp.route("/api/performance")
+def api_performance():
+    require_admin()
+    return jsonify(_performance_data())
+
+
+@admin_bp.route("/api/performance/reset", methods=["POST"])
+def reset_performance():
+    require_admin()
+    reset_perf_metrics()
+    reset_single_flight_stats()
+    return jsonify({"success": True})
+
+
+@admin_bp.route("/metrics")
+def metrics():
+    """Prometheus scrape endpoint: `Authorization: Bearer $METRICS_TOKEN`, or an admin session."""
+    token = os.getenv("METRICS_TOKEN", "")
+    auth = request.headers.get("Authorization", "")
+    if not (token and hmac.compare_digest(auth, f"Bearer {token}")):
+        require_admin()
+    body = (
+        render_prometheus()
+        + render_upstream_prometheus(get_refresh_stats())
+        + render_single_flight_prometheus(get_single_flight_stats())
+    )
+    return Response(body, mimetype="text/plain; version=0.0.4")
@@ -208,10 +208,10 @@ def api_dashboard_data():
                     row.get("call_vega_pos_pct", ""),
                     row.get("call_vega_neg_strike", ""),
                     row.get("call_vega_neg_pct", ""),
-                    f'{row.get("call_total_trad_val", 0):.2f}',
-                    f'{row.get("call_total_money", 0):.2f}',
-                    f'{row.get("closing_price", 0):.2f}',
-                    f'{row.get("rsi", 0):.2f}',
+                    f'{row.get("call_total_trad_val") or 0:.2f}',
+                    f'{row.get("call_total_money") or 0:.2f}',
+                    f'{row.get("closing_price") or 0:.2f}',
+                    f'{row.get("rsi") or 0:.2f}',
                     row.get("put_delta_pos_strike", ""),
                     row.get("put_delta_pos_pct", ""),
                     row.get("put_delta_neg_strike", ""),
@@ -220,8 +220,8 @@ def api_dashboard_data():
                     row.get("put_vega_pos_pct", ""),
                     row.get("put_vega_neg_strike", ""),
                     row.get("put_vega_neg_pct", ""),
-                    f'{row.get("put_total_trad_val", 0):.2f}',
-                    f'{row.get("put_total_money", 0):.2f}',
+                    f'{row.get("put_total_trad_val") or 0:.2f}',
+                    f'{row.get("put_total_money") or 0:.2f}',
                 ]
             )
 
@@ -6,18 +6,21 @@ Updated: 2026-02-02 - Added FII/DII API endpoint
 Updated: 2026-02-11 - Added Market Breadth API endpoint
 Updated: 2026-02-11 - Added dynamic sample stocks display
 Updated: 2026-02-19 - Added NSE API endpoints so charts always show data
+Updated: 2026-10-18 - Added SSE stream of live ticks from the shared-memory tick bus
 """
 
 from datetime import datetime, timedelta
 
-from flask import Blueprint, jsonify, render_template, request
+from flask import Blueprint, Response, jsonify, render_template, request, stream_with_context
 
 
 import os
 import json
+import time
 from ..models.insights_model import get_fii_dii_summary, get_market_stats, get_52_week_analysis, get_insights_dates, get_nifty_pe
 from ..models.market_breadth_model import get_latest_market_breadth
 from ..models.live_indices_model import get_live_indices
+from spot_data.tick_bus import get_tick_reader, tick_to_dict
 from ..models.stock_model import get_filtered_tickers
 from ..models.homepage_model import get_homepage_sample_stocks
 from ..models.nse_indices_model import get_nse_index_data, get_nse_chart_data, get_sensex_chart_data
@@ -25,6 +28,11 @@ from ..models.nse_indices_model import get_nse_index_data, get_nse_chart_data, g
 
 home_bp = Blueprint("home", __name__)
 
+# Live tick stream (SSE)
+SSE_POLL_INTERVAL = 0.2      # seconds between tick bus reads
+SSE_KEEPALIVE_SECONDS = 15   # comment line so proxies keep the connection open
+SSE_MAX_SECONDS = 300        # close and let EventSource reconnect, frees the worker
+
 def get_live_fii_dii():
     """Helper to get latest FII/DII summary (Live from Spot or DB Fallback)"""
     # 2. Fallback to Database
@@ -232,6 +240,49 @@ def api_live_indices():
         return jsonify({"success": True, "message": "Using fallback data", "indices": {}}), 200
 
 
+@home_bp.route("/api/live-indices/stream")
+def api_live_indices_stream():
+    """
+    Server-Sent Events push of live ticks from the shared-memory tick bus.
+    Each `tick` event carries the newest tick per index since the last event
+    ({index_key: {seq, timestamp, value, open, high, low}}), so a burst is
+    coalesced into one message. 204 when the streamer is not publishing,
+    which tells EventSource to stop and the page to keep polling.
+    """
+    reader = get_tick_reader()
+    if reader is None:
+        return Response(status=204)
+
+    def event_stream():
+        seq = reader.head()
+        latest = reader.latest_all()
+        yield "retry: 2000\n\n"
+        if latest:
+            yield f"event: tick\ndata: {json.dumps({k: tick_to_dict(t) for k, t in latest.items()})}\n\n"
+
+        started = last_sent = time.monotonic()
+        while time.monotonic() - started < SSE_MAX_SECONDS:
+            try:
+                seq, ticks = reader.read_since(seq)
+            except Exception as e:
+                yield f"event: error\ndata: {str(e)}\n\n"
+                return
+            if ticks:
+                changed = {t.instrument: tick_to_dict(t) for t in ticks}
+                yield f"event: tick\ndata: {json.dumps(changed)}\n\n"
+                last_sent = time.monotonic()
+            elif time.monotonic() - last_sent >= SSE_KEEPALIVE_SECONDS:
+                yield ": keepalive\n\n"
+                last_sent = time.monotonic()
+            time.sleep(SSE_POLL_INTERVAL)
+
+    return Response(
+        stream_with_context(event_stream()),
+        mimetype="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
 @home_bp.route("/api/nse-indices")
 def api_nse_indices():
     """
@@ -24,6 +24,7 @@ from ...models.index_model import (
     get_index_list,
     get_index_stocks,
 )
+from ...models.index_membership import clear_membership_cache, get_membership, normalize_index_name
 from ...models.insights_model import (
     clear_insights_cache,
     get_52_week_analysis,
@@ -41,6 +42,7 @@ from ...models.insights_model import (
 )
 from ...models.stock_model import get_filtered_tickers
 from ...models.pf_matrix_model import generate_rs_matrix_html, generate_stock_rs_matrix_html, generate_category_rs_matrix_html
+from ...services.symbol_search import clear_symbol_index
 
 # Blueprint setup
 insights_bp = Blueprint("insights", __name__, url_prefix="/neev", template_folder="../../views/insights")
@@ -741,6 +743,7 @@ def api_volume_breakouts():
 def api_sector_performance():
     """API endpoint for sector-wise performance."""
     selected_date = request.args.get("date")
+    period = request.args.get("period", "1D")
 
     if not selected_date:
         dates = get_insights_dates()
@@ -749,7 +752,7 @@ def api_sector_performance():
     if not selected_date:
         return jsonify({"error": "No data available"}), 404
 
-    sector_data = get_sector_performance(selected_date)
+    sector_data = get_sector_performance(selected_date, period=period)
 
     # NEW: Fallback mechanism if no data found for selected date (DB lag scenario)
     if not sector_data:
@@ -765,7 +768,7 @@ def api_sector_performance():
                 if fallback_date and str(fallback_date) != str(selected_date):
                     print(f"[INFO] Fallback (Sector): No data for {selected_date}, using {fallback_date}")
                     selected_date = str(fallback_date)
-                    sector_data = get_sector_performance(selected_date)
+                    sector_data = get_sector_performance(selected_date, period=period)
         except Exception as e:
             print(f"[ERROR] Sector performance fallback failed: {e}")
 
@@ -875,6 +878,20 @@ def api_rs_matrix_index_categories():
         })
 
 
+def _load_heatmap_day(date_str=None):
+    """(date, {symbol: (change_pct, close, turnover)}) from daily_market_heatmap; latest date by default."""
+    with engine_cash.connect() as conn:
+        day = date_str or conn.execute(text("SELECT MAX(date) FROM daily_market_heatmap")).scalar()
+        if not day:
+            return None, {}
+        rows = conn.execute(text("""
+            SELECT symbol, change_pct, close, turnover
+            FROM daily_market_heatmap
+            WHERE date = :dt
+        """), {"dt": day}).fetchall()
+    return day, {r[0]: (float(r[1] or 0), float(r[2] or 0), float(r[3] or 0)) for r in rows}
+
+
 @insights_bp.route("/api/rs-matrix/ad-ratio")
 def api_rs_matrix_ad_ratio():
     """
@@ -886,53 +903,41 @@ def api_rs_matrix_ad_ratio():
         return jsonify({"success": False, "error": "index_name is required"})
 
     try:
-        import re
-        def norm(s):
-            return re.sub(r'[^A-Z0-9]', '', str(s).upper())
-
-        from ...models.index_model import get_index_list, get_index_stocks
-        idx_key = None
-        norm_input = norm(index_name)
-        for info in get_index_list():
-            if norm(info.get("name", "")) == norm_input or norm(info.get("key", "")) == norm_input:
-                idx_key = info.get("key", "")
-                break
+        membership = get_membership()
+        idx_key = membership.resolve(index_name)
+        stocks = membership.constituents(idx_key) if idx_key else []
 
         if not idx_key:
-            return jsonify({"success": False, "error": f"Unknown index: {index_name}"})
+            # Indices outside index_constituents (static metadata / JSON fallback)
+            norm_input = normalize_index_name(index_name)
+            for info in get_index_list():
+                if normalize_index_name(info.get("name", "")) == norm_input or normalize_index_name(info.get("key", "")) == norm_input:
+                    idx_key = info.get("key", "")
+                    break
+            if not idx_key:
+                return jsonify({"success": False, "error": f"Unknown index: {index_name}"})
+            stocks = get_index_stocks(idx_key)
 
-        stocks = get_index_stocks(idx_key)
         if not stocks:
             return jsonify({"success": False, "error": "No constituents found"})
 
-        stock_list_str = str(tuple(stocks)) if len(stocks) > 1 else f"('{stocks[0]}')"
-
-        with engine_cash.connect() as conn:
-            latest_date = conn.execute(text(
-                "SELECT MAX(date) FROM daily_market_heatmap"
-            )).scalar()
-
-            if not latest_date:
-                return jsonify({"success": False, "error": "No heatmap data"})
-
-            rows = conn.execute(text(f"""
-                SELECT symbol, change_pct, close, volume
-                FROM daily_market_heatmap
-                WHERE date = :dt AND symbol IN {stock_list_str}
-            """), {"dt": latest_date}).fetchall()
+        latest_date, day = _load_heatmap_day()
+        if not latest_date:
+            return jsonify({"success": False, "error": "No heatmap data"})
 
+        rows = [(s, day[s][0], day[s][1]) for s in stocks if s in day]
         if not rows:
             return jsonify({"success": False, "error": "No constituent data for latest date"})
 
-        advances  = sum(1 for r in rows if (r[1] or 0) > 0)
-        declines  = sum(1 for r in rows if (r[1] or 0) < 0)
-        unchanged = sum(1 for r in rows if (r[1] or 0) == 0)
+        advances  = sum(1 for r in rows if r[1] > 0)
+        declines  = sum(1 for r in rows if r[1] < 0)
+        unchanged = sum(1 for r in rows if r[1] == 0)
         total     = len(rows)
         ad_ratio  = round(advances / declines, 2) if declines > 0 else float(advances)
 
-        sorted_rows = sorted(rows, key=lambda r: r[1] or 0)
-        losers  = [{"symbol": r[0], "change_pct": round(r[1] or 0, 2), "close": round(float(r[2] or 0), 2)} for r in sorted_rows[:5]]
-        gainers = [{"symbol": r[0], "change_pct": round(r[1] or 0, 2), "close": round(float(r[2] or 0), 2)} for r in sorted_rows[-5:][::-1]]
+        sorted_rows = sorted(rows, key=lambda r: r[1])
+        losers  = [{"symbol": r[0], "change_pct": round(r[1], 2), "close": round(r[2], 2)} for r in sorted_rows[:5]]
+        gainers = [{"symbol": r[0], "change_pct": round(r[1], 2), "close": round(r[2], 2)} for r in sorted_rows[-5:][::-1]]
 
         sentiment = "Bullish" if ad_ratio > 1.2 else ("Bearish" if ad_ratio < 0.8 else "Neutral")
 
@@ -1192,8 +1197,9 @@ def api_rs_matrix_category_breadth():
 @insights_bp.route("/api/rs-matrix/ad-ratio-batch")
 def api_rs_matrix_ad_ratio_batch():
     """
-    Batch A/D ratio endpoint — returns A/D for many indices in ONE DB query
-    instead of N individual calls.  Replaces the 140 parallel front-end fetches.
+    Batch A/D ratio endpoint — returns A/D for many indices from ONE heatmap
+    read and one sparse membership product (index_membership) instead of N
+    individual calls.  Replaces the 140 parallel front-end fetches.
 
     Params:
       - category: optional, filter to this category's indices (empty = all)
@@ -1204,71 +1210,26 @@ def api_rs_matrix_ad_ratio_batch():
 
     try:
         # Step 1 — resolve which index_keys belong to this category
-        if category:
-            with engine_cash.connect() as conn:
-                rows = conn.execute(text("""
-                    SELECT DISTINCT index_name, index_key
-                    FROM index_constituents
-                    WHERE index_category = :cat
-                    ORDER BY index_name
-                """), {"cat": category}).fetchall()
-        else:
-            with engine_cash.connect() as conn:
-                rows = conn.execute(text("""
-                    SELECT DISTINCT index_name, index_key
-                    FROM index_constituents
-                    WHERE index_name IS NOT NULL
-                    ORDER BY index_name
-                """)).fetchall()
-
-        if not rows:
+        membership = get_membership()
+        index_keys = membership.keys_in_category(category or None)
+        if not index_keys:
             return jsonify({"success": True, "indices": []})
 
-        # Step 2 — build {index_key: index_name} map
-        key_to_name = {r[1]: r[0] for r in rows}
+        # Step 2 — the day's per-symbol changes (latest date by default)
+        _, day = _load_heatmap_day(date_str or None)
+        changes = {s: v[0] for s, v in day.items()}
+        turnovers = {s: v[2] for s, v in day.items()}
 
-        # Step 3 — single query: advances, declines, unchanged per index
-        if date_str:
-            date_clause = "AND date = :dt"
-            params = {"dt": date_str}
-        else:
-            # Use the latest available date in the table
-            with engine_cash.connect() as conn:
-                latest = conn.execute(text("SELECT MAX(date) FROM daily_market_heatmap")).scalar()
-            date_clause = "AND date = :dt"
-            params = {"dt": str(latest) if latest else "2099-01-01"}
-
-        # We need to look up constituents in daily_market_heatmap
-        index_keys = list(key_to_name.keys())
-        placeholders = ", ".join([f"'{k}'" for k in index_keys])
-
-        query = text(f"""
-            SELECT
-                ic.index_key,
-                ic.index_name,
-                COUNT(*) FILTER (WHERE h.change_pct > 0)  AS advances,
-                COUNT(*) FILTER (WHERE h.change_pct < 0)  AS declines,
-                COUNT(*) FILTER (WHERE h.change_pct = 0)  AS unchanged,
-                COUNT(*) AS total
-            FROM index_constituents ic
-            JOIN daily_market_heatmap h
-                ON ic.symbol = h.symbol {date_clause}
-            WHERE ic.index_key IN ({placeholders})
-            GROUP BY ic.index_key, ic.index_name
-            ORDER BY ic.index_name
-        """)
-
-        with engine_cash.connect() as conn:
-            result = conn.execute(query, params).fetchall()
+        # Step 3 — advances / declines / unchanged for every index at once
+        breadth = membership.breadth(changes, turnovers)
 
         # Step 4 — format response
         indices_data = []
-        for row in result:
-            idx_key, idx_name, adv, dec, unch, total = row
-            adv   = adv   or 0
-            dec   = dec   or 0
-            unch  = unch  or 0
-            total = total or 1
+        for idx_key in index_keys:
+            row = breadth[idx_key]
+            if not row["total"]:
+                continue
+            adv, dec = row["advances"], row["declines"]
             ad_ratio = round(adv / dec, 2) if dec else (999.0 if adv else 0.0)
             if ad_ratio > 1.5:
                 sentiment = "Bullish"
@@ -1277,12 +1238,14 @@ def api_rs_matrix_ad_ratio_batch():
             else:
                 sentiment = "Neutral"
             indices_data.append({
-                "index_name": idx_name,
+                "index_name": row["index_name"],
                 "index_key":  idx_key,
-                "advances":   int(adv),
-                "declines":   int(dec),
-                "unchanged":  int(unch),
-                "total":      int(total),
+                "advances":   adv,
+                "declines":   dec,
+                "unchanged":  row["unchanged"],
+                "total":      row["total"],
+                "avg_change": row["avg_change"],
+                "turnover":   row["turnover"],
                 "ad_ratio":   ad_ratio,
                 "sentiment":  sentiment,
                 "success":    True,
@@ -1323,4 +1286,6 @@ def api_stock_delivery_history():
 def api_clear_cache():
     """Clear insights cache (admin only)."""
     clear_insights_cache()
+    clear_symbol_index()
+    clear_membership_cache()
     return jsonify({"success": True, "message": "Cache cleared"})
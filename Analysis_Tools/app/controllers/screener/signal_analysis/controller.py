@@ -15,6 +15,7 @@ from ....models.stock_model import get_filtered_tickers
 
 # Import from centralized signal service (SINGLE SOURCE OF TRUTH)
 from ....services.signal_service import compute_signals_with_breakdown
+from ....utils.single_flight import single_flight
 
 signal_analysis_bp = Blueprint("signal_analysis", __name__, url_prefix="/scanner/signal-analysis")
 
@@ -23,6 +24,7 @@ cache = Cache(config={"CACHE_TYPE": "simple", "CACHE_DEFAULT_TIMEOUT": 3600})
 
 
 @cache.memoize(timeout=3600)
+@single_flight
 def get_signal_data_formatted(selected_date):
     """
     Get formatted signal data for the signal analysis page.
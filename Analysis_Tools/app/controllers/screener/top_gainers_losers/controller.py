@@ -31,6 +31,7 @@ from ....models.technical_screener_model import get_heatmap_data
 
 # Import from centralized signal service (SINGLE SOURCE OF TRUTH)
 from ....services.signal_service import compute_signals_from_screener_data
+from ....utils.single_flight import single_flight
 
 gainers_losers_bp = Blueprint("gainers_losers", __name__, url_prefix="/scanner/top-gainers-losers")
 
@@ -56,6 +57,7 @@ def clear_cache():
 # ========================================================================
 
 
+@single_flight
 def get_screener_data_formatted(selected_date):
     """
     Single data fetch - cached manually for 1 hour.
@@ -9,8 +9,9 @@ import pandas as pd
 from flask import Blueprint, jsonify, request
 from sqlalchemy import text
 
-from ..models.db_config import engine, get_table_list
+from ..models.db_config import engine
 from ..models.stock_model import get_available_dates, get_stock_stats
+from ..services.symbol_search import get_alias_map, get_fo_tickers, is_fo_ticker, search_symbols
 
 voice_api_bp = Blueprint("voice_api", __name__, url_prefix="/api/voice")
 
@@ -22,18 +23,7 @@ def get_available_stocks():
     Returns list of tickers that can be searched
     """
     try:
-        tables = get_table_list()
-
-        # Extract stock tickers from table names (TBL_TICKER_DERIVED)
-        stocks = []
-        for table in tables:
-            if table.startswith("TBL_") and table.endswith("_DERIVED"):
-                ticker = table.replace("TBL_", "").replace("_DERIVED", "")
-                if ticker:
-                    stocks.append(ticker)
-
-        # Remove duplicates and sort
-        stocks = sorted(list(set(stocks)))
+        stocks = get_fo_tickers()
 
         return jsonify({"success": True, "stocks": stocks, "count": len(stocks)})
 
@@ -45,29 +35,14 @@ def get_available_stocks():
 @voice_api_bp.route("/search/stocks")
 def search_all_stocks():
     """
-    Search all NSE cash stocks by symbol prefix.
+    Search all NSE cash stocks by symbol prefix, company name or alias.
     Used by the universal header search to return all stocks (not just F&O).
+    Served from the in-memory symbol index (typo-tolerant).
     Query param: q (prefix to search)
     """
-    from ..models.db_config import engine_cash
-    q_param = request.args.get("q", "").strip().upper()
+    q_param = request.args.get("q", "").strip()
     try:
-        with engine_cash.connect() as conn:
-            result = conn.execute(
-                text("""
-                    SELECT DISTINCT symbol
-                    FROM daily_market_heatmap
-                    WHERE symbol ILIKE :prefix
-                      AND LENGTH(symbol) <= 15
-                      AND symbol ~ '^[A-Z]'
-                      AND symbol NOT LIKE '%GS20%'
-                      AND symbol NOT LIKE '%_RE'
-                    ORDER BY symbol
-                    LIMIT 15
-                """),
-                {"prefix": f"{q_param}%"}
-            )
-            symbols = [row[0] for row in result.fetchall()]
+        symbols = search_symbols(q_param) if q_param else []
         return jsonify({"success": True, "symbols": symbols})
     except Exception as e:
         print(f"[ERROR] search_all_stocks: {e}")
@@ -84,10 +59,9 @@ def get_stock_voice_data(ticker):
         ticker = ticker.upper()
 
         # Check if stock exists
-        tables = get_table_list()
         table_name = f"TBL_{ticker}_DERIVED"
 
-        if table_name not in tables:
+        if not is_fo_ticker(ticker):
             return jsonify(
                 {
                     "success": False,
@@ -165,11 +139,10 @@ def get_market_summary():
             return jsonify({"success": False, "speech": "Sorry, no market data available"})
 
         latest_date = dates[0]
-        tables = get_table_list()
 
         # Get Nifty data
         nifty_data = None
-        if "TBL_NIFTY_DERIVED" in tables:
+        if is_fo_ticker("NIFTY"):
             try:
                 q = text(
                     """
@@ -188,7 +161,7 @@ def get_market_summary():
 
         # Get Bank Nifty data
         banknifty_data = None
-        if "TBL_BANKNIFTY_DERIVED" in tables:
+        if is_fo_ticker("BANKNIFTY"):
             try:
                 q = text(
                     """
@@ -236,14 +209,7 @@ def get_page_context(page):
         context = {"page": page, "commands": [], "hints": [], "data": {}}
 
         # Get available stocks for search
-        tables = get_table_list()
-        stocks = []
-        for table in tables:
-            if table.startswith("TBL_") and table.endswith("_DERIVED"):
-                ticker = table.replace("TBL_", "").replace("_DERIVED", "")
-                if ticker:
-                    stocks.append(ticker)
-        stocks = sorted(list(set(stocks)))
+        stocks = get_fo_tickers()
         context["data"]["available_stocks"] = stocks
 
         # Get available dates
@@ -375,10 +341,7 @@ def validate_stock(ticker):
     """
     try:
         ticker = ticker.upper()
-        tables = get_table_list()
-        table_name = f"TBL_{ticker}_DERIVED"
-
-        exists = table_name in tables
+        exists = is_fo_ticker(ticker)
 
         return jsonify(
             {
@@ -400,114 +363,16 @@ def get_stock_aliases():
     Returns only aliases for stocks that exist in the database.
     """
     try:
-        # Get all available stocks from database
-        tables = get_table_list()
-        available_stocks = []
-        for table in tables:
-            if table.startswith("TBL_") and table.endswith("_DERIVED"):
-                ticker = table.replace("TBL_", "").replace("_DERIVED", "")
-                if ticker:
-                    available_stocks.append(ticker)
-
-        available_stocks = set(available_stocks)
-
-        # Common aliases - will be filtered to only include stocks in database
-        all_aliases = {
-            # Indices
-            "nifty": "NIFTY",
-            "bank nifty": "BANKNIFTY",
-            "banknifty": "BANKNIFTY",
-            "finnifty": "FINNIFTY",
-            # Top stocks with common names
-            "reliance": "RELIANCE",
-            "reli": "RELIANCE",
-            "tcs": "TCS",
-            "infosys": "INFY",
-            "infy": "INFY",
-            "hdfc bank": "HDFCBANK",
-            "hdfc": "HDFCBANK",
-            "hdfcbank": "HDFCBANK",
-            "icici bank": "ICICIBANK",
-            "icici": "ICICIBANK",
-            "sbi": "SBIN",
-            "state bank": "SBIN",
-            "tata motors": "TATAMOTORS",
-            "tatamotors": "TATAMOTORS",
-            "tata steel": "TATASTEEL",
-            "tatasteel": "TATASTEEL",
-            "bharti airtel": "BHARTIARTL",
-            "airtel": "BHARTIARTL",
-            "bharti": "BHARTIARTL",
-            "wipro": "WIPRO",
-            "itc": "ITC",
-            "kotak": "KOTAKBANK",
-            "kotak bank": "KOTAKBANK",
-            "axis bank": "AXISBANK",
-            "axis": "AXISBANK",
-            "maruti": "MARUTI",
-            "bajaj finance": "BAJFINANCE",
-            "bajaj": "BAJFINANCE",
-            "asian paints": "ASIANPAINT",
-            "asian paint": "ASIANPAINT",
-            "hindustan unilever": "HINDUNILVR",
-            "hul": "HINDUNILVR",
-            "larsen": "LT",
-            "l&t": "LT",
-            "lt": "LT",
-            "sun pharma": "SUNPHARMA",
-            "sunpharma": "SUNPHARMA",
-            "titan": "TITAN",
-            "adani enterprises": "ADANIENT",
-            "adani": "ADANIENT",
-            "adani ports": "ADANIPORTS",
-            "power grid": "POWERGRID",
-            "ntpc": "NTPC",
-            "ongc": "ONGC",
-            "coal india": "COALINDIA",
-            "bpcl": "BPCL",
-            "grasim": "GRASIM",
-            "ultratech": "ULTRACEMCO",
-            "nestle": "NESTLEIND",
-            "britannia": "BRITANNIA",
-            "cipla": "CIPLA",
-            "dr reddy": "DRREDDY",
-            "drreddy": "DRREDDY",
-            "divis": "DIVISLAB",
-            "divislab": "DIVISLAB",
-            "eicher": "EICHERMOT",
-            "eicher motors": "EICHERMOT",
-            "hero": "HEROMOTOCO",
-            "hero motocorp": "HEROMOTOCO",
-            "bajaj auto": "BAJAJ-AUTO",
-            "tech mahindra": "TECHM",
-            "techm": "TECHM",
-            "mahindra": "M&M",
-            "m&m": "M&M",
-            "hindalco": "HINDALCO",
-            "jswsteel": "JSWSTEEL",
-            "jsw steel": "JSWSTEEL",
-            "indusind": "INDUSINDBK",
-            "indusind bank": "INDUSINDBK",
-            "sbi life": "SBILIFE",
-            "hdfc life": "HDFCLIFE",
-        }
-
-        # Filter aliases to only include stocks in database
-        valid_aliases = {}
-        for alias, ticker in all_aliases.items():
-            if ticker in available_stocks:
-                valid_aliases[alias] = ticker
-
-        # Also add direct ticker matches (lowercase ticker -> uppercase ticker)
-        for ticker in available_stocks:
-            valid_aliases[ticker.lower()] = ticker
+        # Aliases are filtered to stocks in the database by the symbol index
+        available_stocks = get_fo_tickers()
+        valid_aliases = get_alias_map()
 
         return jsonify(
             {
                 "success": True,
                 "aliases": valid_aliases,
                 "stock_count": len(available_stocks),
-                "available_stocks": sorted(list(available_stocks)),
+                "available_stocks": available_stocks,
             }
         )
 
@@ -523,8 +388,7 @@ def get_voice_help():
     """
     # Get available stocks count
     try:
-        tables = get_table_list()
-        stock_count = len([t for t in tables if t.startswith("TBL_") and t.endswith("_DERIVED")])
+        stock_count = len(get_fo_tickers())
     except Exception:
         stock_count = 0
 
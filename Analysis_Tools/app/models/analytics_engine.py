@@ -0,0 +1,311 @@
+# =============================================================
+#  ANALYTICS ENGINE MODULE
+#  Purpose: Optional embedded DuckDB backend for Insights aggregations
+#
+#  The cash pipeline exports `cash_eod_data` (last SNAPSHOT_HISTORY_DAYS)
+#  and `daily_market_heatmap` to local Parquet snapshots after each EOD
+#  load (refresh_analytics_snapshots). The web app loads them into an
+#  in-process DuckDB database and runs the cross-sectional / time-window
+#  aggregations there (52-week range, 20-day volume average, sector
+#  rollups) as single vectorized, multi-threaded scans instead of one
+#  Postgres query per stock.
+#
+#  Entirely optional: without duckdb, without snapshots, or with
+#  INSIGHTS_BACKEND=postgres, is_available() is False and insights_model
+#  keeps using Postgres. The per-date aggregations also return None
+#  (Postgres fallback) when the snapshot ends before the requested date.
+# =============================================================
+
+import os
+import threading
+import time
+from datetime import date
+from typing import Dict, Optional
+
+import pandas as pd
+from sqlalchemy import text
+
+try:
+    import duckdb
+
+    DUCKDB_AVAILABLE = True
+except ImportError:
+    duckdb = None
+    DUCKDB_AVAILABLE = False
+
+# =============================================================
+# CONFIGURATION
+# =============================================================
+
+_PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..", ".."))
+SNAPSHOT_DIR = os.getenv("ANALYTICS_SNAPSHOT_PATH", os.path.join(_PROJECT_ROOT, "data_analytics"))
+
+# "auto" (DuckDB when snapshots exist), "duckdb" or "postgres"
+INSIGHTS_BACKEND = os.getenv("INSIGHTS_BACKEND", "auto").lower()
+
+SNAPSHOT_HISTORY_DAYS = 400  # Covers 52-week and 1Y windows
+SNAPSHOT_CHECK_TTL = 30  # How often to stat the snapshot files for changes
+DUCKDB_THREADS = int(os.getenv("ANALYTICS_THREADS", "4"))
+
+# snapshot name -> (source table, date column)
+SNAPSHOTS = {
+    "cash_eod": ("cash_eod_data", "trade_date"),
+    "heatmap": ("daily_market_heatmap", "date"),
+}
+
+
+def _snapshot_path(name: str) -> str:
+    return os.path.join(SNAPSHOT_DIR, f"{name}.parquet")
+
+
+# =============================================================
+# IN-PROCESS DUCKDB DATABASE
+# =============================================================
+
+
+class AnalyticsEngine:
+    """In-memory DuckDB database holding the latest Parquet snapshots."""
+
+    def __init__(self):
+        self._con = duckdb.connect(database=":memory:")
+        self._con.execute(f"SET threads TO {DUCKDB_THREADS}")
+        self._mtimes: Dict[str, float] = {}
+        self._max_dates: Dict[str, Optional[date]] = {}
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+
+    def _current_mtimes(self) -> Dict[str, float]:
+        mtimes = {}
+        for name in SNAPSHOTS:
+            path = _snapshot_path(name)
+            if os.path.exists(path):
+                mtimes[name] = os.path.getmtime(path)
+        return mtimes
+
+    def refresh(self, force: bool = False) -> bool:
+        """(Re)load snapshot tables whose file changed. Returns True when all are loaded."""
+        now = time.time()
+        if not force and (now - self._checked_at) < SNAPSHOT_CHECK_TTL:
+            return len(self._mtimes) == len(SNAPSHOTS)
+
+        with self._lock:
+            mtimes = self._current_mtimes()
+            for name, mtime in mtimes.items():
+                if force or self._mtimes.get(name) != mtime:
+                    path = _snapshot_path(name).replace("'", "''")
+                    self._con.execute(f"CREATE OR REPLACE TABLE {name} AS SELECT * FROM read_parquet('{path}')")
+                    date_col = SNAPSHOTS[name][1]
+                    self._max_dates[name] = self._con.execute(f"SELECT MAX({date_col}) FROM {name}").fetchone()[0]
+                    self._mtimes[name] = mtime
+                    print(f"[INFO] Analytics snapshot loaded: {name}")
+            self._checked_at = now
+            return len(self._mtimes) == len(SNAPSHOTS)
+
+    def covers(self, name: str, selected_date: str) -> bool:
+        """True when snapshot `name` has data up to selected_date (it is not behind Postgres)."""
+        max_date = self._max_dates.get(name)
+        return max_date is not None and max_date >= pd.Timestamp(selected_date).date()
+
+    def query_df(self, sql: str, params: Optional[list] = None) -> pd.DataFrame:
+        """Run a query on a per-call cursor (cursors are safe across threads)."""
+        cur = self._con.cursor()
+        try:
+            return cur.execute(sql, params or []).df()
+        finally:
+            cur.close()
+
+
+_engine: Optional[AnalyticsEngine] = None
+_engine_lock = threading.Lock()
+
+
+def get_analytics_engine() -> Optional[AnalyticsEngine]:
+    """Shared engine with snapshots loaded, or None when the backend is unavailable."""
+    global _engine
+    if not DUCKDB_AVAILABLE or INSIGHTS_BACKEND == "postgres":
+        return None
+    if _engine is None:
+        with _engine_lock:
+            if _engine is None:
+                try:
+                    _engine = AnalyticsEngine()
+                except Exception as e:
+                    print(f"[ERROR] get_analytics_engine(): {e}")
+                    return None
+    try:
+        return _engine if _engine.refresh() else None
+    except Exception as e:
+        print(f"[ERROR] Analytics snapshot load failed: {e}")
+        return None
+
+
+def is_available() -> bool:
+    return get_analytics_engine() is not None
+
+
+def reset_analytics_engine():
+    """Force a snapshot reload on next use."""
+    if _engine is not None:
+        _engine._checked_at = 0.0
+        _engine._mtimes.clear()
+        _engine._max_dates.clear()
+    print("[INFO] Analytics engine reset")
+
+
+# =============================================================
+# AGGREGATIONS (all return DataFrames; None = backend unavailable)
+# =============================================================
+
+
+def heatmap_for_date(selected_date: str) -> Optional[pd.DataFrame]:
+    eng = get_analytics_engine()
+    if eng is None:
+        return None
+    # SELECT * so snapshots taken before the ret_* columns existed still load
+    return eng.query_df("SELECT * FROM heatmap WHERE date = CAST(? AS DATE)", [selected_date])
+
+
+def sector_performance(
+    selected_date: str, start_date: Optional[str] = None, return_column: Optional[str] = None
+) -> Optional[pd.DataFrame]:
+    """
+    Per-sector average change / total turnover / count and the first five
+    symbols, from the heatmap snapshot. With start_date, the change is
+    recomputed against that date's close (0 when the stock is missing);
+    with return_column (ret_1w ..), the precomputed period return is used.
+    """
+    eng = get_analytics_engine()
+    if eng is None:
+        return None
+    if return_column and not start_date:
+        change_expr = f"COALESCE(c.{return_column}, 0)"
+        params = [selected_date, selected_date]
+    elif start_date and start_date != selected_date:
+        change_expr = """
+            CASE WHEN COALESCE(s.close, c.close) > 0
+                 THEN ROUND((c.close - COALESCE(s.close, c.close)) / COALESCE(s.close, c.close) * 100, 2)
+                 ELSE 0 END"""
+        params = [start_date, selected_date]
+    else:
+        change_expr = "c.change_pct"
+        params = [selected_date, selected_date]
+
+    return eng.query_df(
+        f"""
+        WITH s AS (SELECT symbol, close FROM heatmap WHERE date = CAST(? AS DATE)),
+        c AS (
+            SELECT c.symbol, c.sector, c.turnover, {change_expr} AS change_pct
+            FROM heatmap c LEFT JOIN s ON s.symbol = c.symbol
+            WHERE c.date = CAST(? AS DATE)
+        )
+        SELECT sector,
+               ROUND(AVG(change_pct), 2) AS avg_change,
+               SUM(turnover) AS total_turnover,
+               COUNT(*) AS stock_count,
+               list(symbol)[1:5] AS stocks
+        FROM c
+        GROUP BY sector
+        ORDER BY avg_change DESC
+        """,
+        params,
+    )
+
+
+def fifty_two_week_range(selected_date: str, start_date: str) -> Optional[pd.DataFrame]:
+    """symbol, high_52w, low_52w over [start_date, selected_date]."""
+    eng = get_analytics_engine()
+    if eng is None or not eng.covers("cash_eod", selected_date):
+        return None
+    return eng.query_df(
+        """
+        SELECT symbol, MAX(high) AS high_52w, MIN(low) AS low_52w
+        FROM cash_eod
+        WHERE trade_date BETWEEN CAST(? AS DATE) AND CAST(? AS DATE)
+        GROUP BY symbol
+        """,
+        [start_date, selected_date],
+    )
+
+
+def volume_stats(selected_date: str, start_date: str, lookback: int = 20) -> Optional[pd.DataFrame]:
+    """
+    symbol, today_volume, close_price, avg_volume, trading_days: today's
+    volume against the average of the last `lookback` non-zero sessions in
+    [start_date, selected_date).
+    """
+    eng = get_analytics_engine()
+    if eng is None or not eng.covers("cash_eod", selected_date):
+        return None
+    return eng.query_df(
+        """
+        WITH today AS (
+            SELECT symbol, any_value(volume) AS today_volume, any_value(close) AS close_price
+            FROM cash_eod
+            WHERE trade_date = CAST(? AS DATE) AND volume IS NOT NULL
+            GROUP BY symbol
+        ),
+        recent AS (
+            SELECT symbol, volume,
+                   ROW_NUMBER() OVER (PARTITION BY symbol ORDER BY trade_date DESC) AS rn
+            FROM cash_eod
+            WHERE trade_date >= CAST(? AS DATE) AND trade_date < CAST(? AS DATE) AND volume > 0
+        ),
+        hist AS (
+            SELECT symbol, AVG(volume) AS avg_volume, COUNT(*) AS trading_days
+            FROM recent
+            WHERE rn <= ?
+            GROUP BY symbol
+        )
+        SELECT t.symbol, t.today_volume, t.close_price, h.avg_volume, h.trading_days
+        FROM today t JOIN hist h ON h.symbol = t.symbol
+        """,
+        [selected_date, start_date, selected_date, lookback],
+    )
+
+
+# =============================================================
+# PIPELINE: EXPORT SNAPSHOTS
+# =============================================================
+
+
+def refresh_analytics_snapshots(engine_instance) -> bool:
+    """
+    Export cash_eod_data (recent history) and daily_market_heatmap to
+    Parquet. Called by the cash pipeline after the heatmap is rebuilt.
+    Files are written next to the target and renamed into place, so a
+    running app never loads a partial snapshot.
+    """
+    if not DUCKDB_AVAILABLE:
+        print("[WARN] duckdb not installed. Skipping analytics snapshots.")
+        return False
+
+    os.makedirs(SNAPSHOT_DIR, exist_ok=True)
+    con = duckdb.connect(database=":memory:")
+    try:
+        for name, (table, date_col) in SNAPSHOTS.items():
+            query = f"SELECT * FROM public.{table}"
+            params = {}
+            if name == "cash_eod":
+                query += f" WHERE {date_col} >= (SELECT MAX({date_col}) FROM public.{table}) - :days"
+                params["days"] = SNAPSHOT_HISTORY_DAYS
+
+            with engine_instance.connect() as conn:
+                df = pd.read_sql(text(query), conn, params=params)
+            df[date_col] = pd.to_datetime(df[date_col])
+
+            path = _snapshot_path(name)
+            tmp_path = f"{path}.tmp"
+            con.register("snapshot_df", df)
+            con.execute(
+                f"COPY (SELECT * REPLACE (CAST({date_col} AS DATE) AS {date_col}) FROM snapshot_df) "
+                f"TO '{tmp_path.replace(chr(39), chr(39) * 2)}' (FORMAT PARQUET, COMPRESSION ZSTD)"
+            )
+            con.unregister("snapshot_df")
+            os.replace(tmp_path, path)
+            print(f"[INFO] Analytics snapshot written: {path} ({len(df)} rows)")
+        return True
+    except Exception as e:
+        print(f"[ERROR] refresh_analytics_snapshots(): {e}")
+        return False
+    finally:
+        con.close()
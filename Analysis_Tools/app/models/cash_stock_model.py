@@ -13,6 +13,7 @@ import pandas as pd
 from sqlalchemy import text
 
 from .db_config import engine, engine_cash
+from .symbol_master import get_symbol_master
 
 
 #
@@ -25,6 +26,15 @@ def is_fo_stock(ticker: str, date: str = None) -> bool:
     If date is provided (YYYY-MM-DD), also checks if data exists for that specific date.
     """
     ticker = ticker.upper().strip()
+
+    # Registry answers "not F&O" (and "F&O" without a date) without a DB round trip
+    master = get_symbol_master()
+    fo = master.is_fo(ticker) if master is not None else None
+    if fo is False or (fo and not date):
+        return fo
+    if fo:
+        ticker = master.db_symbol(ticker)
+
     derived = f"TBL_{ticker}_DERIVED"
     base    = f"TBL_{ticker}"
 
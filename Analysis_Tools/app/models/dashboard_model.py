@@ -10,6 +10,7 @@ import pandas as pd
 from sqlalchemy import text
 
 from .db_config import engine, get_stock_list_from_excel
+from .symbol_master import get_symbol_master
 
 
 def _get_available_dates_cached():
@@ -96,9 +97,13 @@ def get_dashboard_data(selected_date, mtype="TOTAL"):
             # Update allowed_stocks_normalized with mapped values
             # logic: if "M&M" is in allowed, also add "M_M" (or replace it)
             mapped_additions = set()
-            for excel_sym, db_sym in symbol_map.items():
-                if excel_sym in allowed_stocks_normalized:
-                    mapped_additions.add(db_sym)
+            master = get_symbol_master()
+            if master is not None:
+                mapped_additions = {master.db_symbol(s) for s in allowed_stocks_normalized}
+            else:
+                for excel_sym, db_sym in symbol_map.items():
+                    if excel_sym in allowed_stocks_normalized:
+                        mapped_additions.add(db_sym)
 
             allowed_stocks_normalized.update(mapped_additions)
             # ---------------------------
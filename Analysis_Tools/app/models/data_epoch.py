@@ -0,0 +1,161 @@
+# =============================================================
+#  DATA EPOCH MODULE
+#  Purpose: One token that changes exactly when new EOD data has
+#  finished loading, for HTTP validators and cache invalidation.
+#
+#  The ingestion pipelines call bump_data_epoch() once their last
+#  cache builder is done; the row lives in `data_epoch` in the F&O
+#  database. Running apps poll it at most every DATA_EPOCH_CHECK_TTL
+#  seconds. When the table does not exist yet the latest F&O / Cash
+#  trading dates stand in for the version.
+#
+#  Callbacks registered with on_data_epoch_change() run once per
+#  process when the token moves, so in-process caches filled from the
+#  previous epoch are not served under the new one.
+# =============================================================
+
+import threading
+import time
+from datetime import datetime
+from typing import Callable, List, Optional, Tuple
+
+from sqlalchemy import text
+
+from .db_config import engine, engine_cash
+from .trading_calendar import get_calendar
+
+# =============================================================
+# CONFIGURATION
+# =============================================================
+
+DATA_EPOCH_CHECK_TTL = 30  # How often to poll the epoch row
+
+EPOCH_TABLE = "data_epoch"
+
+
+# =============================================================
+# READERS
+# =============================================================
+
+
+def _read_epoch(engine_instance) -> Optional[Tuple[int, datetime]]:
+    """(version, updated_at in UTC), or None when the epoch table does not exist."""
+    try:
+        with engine_instance.connect() as conn:
+            exists = conn.execute(text("SELECT to_regclass(:t)"), {"t": f"public.{EPOCH_TABLE}"}).scalar()
+            if not exists:
+                return None
+            row = conn.execute(text(f"SELECT version, updated_at FROM public.{EPOCH_TABLE} WHERE id = 1")).fetchone()
+            return (int(row[0]), row[1]) if row else None
+    except Exception as e:
+        print(f"[WARN] data_epoch._read_epoch(): {e}")
+        return None
+
+
+def _calendar_token() -> str:
+    """Fallback token from the newest F&O and Cash trading dates."""
+    try:
+        fo_latest = get_calendar(engine).latest()
+    except Exception:
+        fo_latest = None
+    try:
+        cash_latest = get_calendar(engine_cash).latest()
+    except Exception:
+        cash_latest = None
+    return f"cal:{fo_latest or '-'}:{cash_latest or '-'}"
+
+
+# =============================================================
+# SHARED STATE
+# =============================================================
+
+_token: Optional[str] = None
+_last_modified: Optional[datetime] = None
+_checked_at = 0.0
+_lock = threading.Lock()
+_callbacks: List[Callable[[], None]] = []
+
+
+def on_data_epoch_change(callback: Callable[[], None]):
+    """Register a callback run (once per process) whenever the epoch moves."""
+    _callbacks.append(callback)
+    return callback
+
+
+def _notify():
+    for callback in list(_callbacks):
+        try:
+            callback()
+        except Exception as e:
+            print(f"[WARN] data_epoch callback {getattr(callback, '__name__', callback)}: {e}")
+
+
+def get_data_epoch() -> Tuple[str, Optional[datetime]]:
+    """
+    Return (token, last_modified) for the currently loaded EOD data.
+    last_modified is None when only the calendar fallback is available.
+    """
+    global _token, _last_modified, _checked_at
+
+    now = time.time()
+    if _token is not None and (now - _checked_at) < DATA_EPOCH_CHECK_TTL:
+        return _token, _last_modified
+
+    changed = False
+    with _lock:
+        if _token is not None and (time.time() - _checked_at) < DATA_EPOCH_CHECK_TTL:
+            return _token, _last_modified
+
+        epoch = _read_epoch(engine)
+        if epoch is not None:
+            token, last_modified = f"v{epoch[0]}", epoch[1]
+        else:
+            token, last_modified = _calendar_token(), None
+
+        changed = _token is not None and token != _token
+        if changed:
+            print(f"[INFO] Data epoch moved {_token} -> {token}")
+        _token, _last_modified = token, last_modified
+        _checked_at = time.time()
+
+    if changed:
+        _notify()
+    return token, last_modified
+
+
+def bump_data_epoch(engine_instance=None) -> Optional[int]:
+    """
+    Called by the ingestion pipelines after new EOD data and its caches
+    are in place. Increments the epoch row so every running app drops
+    its in-process caches and its HTTP validators on the next poll.
+    """
+    engine_instance = engine_instance or engine
+    try:
+        with engine_instance.begin() as conn:
+            conn.execute(
+                text(
+                    f"""
+                    CREATE TABLE IF NOT EXISTS public.{EPOCH_TABLE} (
+                        id INTEGER PRIMARY KEY,
+                        version BIGINT NOT NULL,
+                        updated_at TIMESTAMP NOT NULL DEFAULT (NOW() AT TIME ZONE 'UTC')
+                    )
+                """
+                )
+            )
+            version = conn.execute(
+                text(
+                    f"""
+                    INSERT INTO public.{EPOCH_TABLE} (id, version, updated_at)
+                    VALUES (1, 1, date_trunc('second', NOW() AT TIME ZONE 'UTC'))
+                    ON CONFLICT (id) DO UPDATE
+                    SET version = {EPOCH_TABLE}.version + 1, updated_at = date_trunc('second', NOW() AT TIME ZONE 'UTC')
+                    RETURNING version
+                """
+                )
+            ).scalar()
+        print(f"[INFO] Data epoch bumped to {version}")
+        return version
+    except Exception as e:
+        print(f"[ERROR] bump_data_epoch(): {e}")
+        return None
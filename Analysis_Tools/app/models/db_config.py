@@ -50,50 +50,25 @@ engine_cash = create_engine(
     connect_args={"connect_timeout": 10, "application_name": "Cash_Analysis"},
 )
 
+# Opt-in slow query log with EXPLAIN per statement shape (SLOW_QUERY_LOG=1, see slow_query_log.py)
+from .slow_query_log import SLOW_QUERY_LOG_ENABLED, enable_slow_query_log
+
+if SLOW_QUERY_LOG_ENABLED:
+    enable_slow_query_log({"fo": engine, "cash": engine_cash})
+
 # =============================================================
 # DATABASE TABLE LIST HELPER
 # =============================================================
 
-_table_list_cache = []
-_table_list_cache_time = None
-TABLE_LIST_CACHE_TTL = 300  # Cache for 5 minutes
-
-
 def get_table_list():
     """
     Get list of all tables in the F&O database.
-    Results are cached for 5 minutes to avoid repeated queries.
+    Served from the shared schema catalog (see schema_catalog.py), which
+    reloads on a pipeline version bump or every 5 minutes.
     """
-    global _table_list_cache, _table_list_cache_time
-    import time
-
-    from sqlalchemy import text
-
-    current_time = time.time()
+    from .schema_catalog import get_catalog
 
-    # Check if cache is valid
-    if _table_list_cache_time is None or current_time - _table_list_cache_time > TABLE_LIST_CACHE_TTL:
-        try:
-            with engine.connect() as conn:
-                result = conn.execute(
-                    text(
-                        """
-                    SELECT table_name
-                    FROM information_schema.tables
-                    WHERE table_schema = 'public'
-                    ORDER BY table_name
-                """
-                    )
-                )
-                _table_list_cache = [row[0] for row in result.fetchall()]
-                _table_list_cache_time = current_time
-                # print(f"[INFO] Loaded {len(_table_list_cache)} tables from database")
-        except Exception as e:
-            print(f"[WARNING] Could not load table list: {e}")
-            if not _table_list_cache:
-                return []
-
-    return _table_list_cache.copy()
+    return get_catalog(engine).table_names()
 
 
 # =============================================================
@@ -171,6 +146,7 @@ def clear_excel_cache():
 def get_available_dates(engine_instance, limit=100) -> list:
     """
     Get sorted list of available trading dates from the database.
+    Served from the in-memory trading calendar (see trading_calendar.py).
 
     Args:
         engine_instance: SQLAlchemy engine (FO or Cash)
@@ -179,50 +155,10 @@ def get_available_dates(engine_instance, limit=100) -> list:
     Returns:
         List of date strings in 'YYYY-MM-DD' format, sorted descending.
     """
-    from sqlalchemy import text
-
-    # Priority tables to check for dates (High liquidity/reliability)
-    PRIORITY_TABLES = [
-        "TBL_NIFTY", "TBL_BANKNIFTY",  # Indices
-        "TBL_RELIANCE", "TBL_TCS", "TBL_INFY", "TBL_HDFCBANK", # Major Stocks
-        "TBL_SBIN", "TBL_ICICIBANK"
-    ]
+    from .trading_calendar import get_trading_dates
 
     try:
-        with engine_instance.connect() as conn:
-            # 1. Try Priority Tables
-            for table in PRIORITY_TABLES:
-                try:
-                    # Check if table exists first? Or just try-catch query
-                    # Let's try to query directly, it's faster than inspecting
-                    query = text(f'SELECT DISTINCT "BizDt" FROM public."{table}" ORDER BY "BizDt" DESC LIMIT :limit')
-                    result = conn.execute(query, {"limit": limit})
-                    dates = [str(row[0]) for row in result]
-                    if dates:
-                        # print(f"[INFO] Fetched dates from {table}")
-                        return dates
-                except Exception:
-                    continue # Try next table
-
-            # 2. Fallback: Find ANY valid table
-            # Exclude derived tables
-            query_any = text("""
-                SELECT table_name
-                FROM information_schema.tables
-                WHERE table_schema = 'public'
-                AND table_name LIKE 'TBL_%'
-                AND table_name NOT LIKE '%_DERIVED'
-                LIMIT 1
-            """)
-            fallback_table = conn.execute(query_any).scalar()
-
-            if fallback_table:
-                # print(f"[INFO] Fetched dates from fallback: {fallback_table}")
-                query = text(f'SELECT DISTINCT "BizDt" FROM public."{fallback_table}" ORDER BY "BizDt" DESC LIMIT :limit')
-                result = conn.execute(query, {"limit": limit})
-                return [str(row[0]) for row in result]
-
+        return get_trading_dates(engine_instance, limit)
     except Exception as e:
         print(f"[ERROR] get_available_dates failed: {e}")
-
     return []
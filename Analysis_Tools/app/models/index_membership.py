@@ -0,0 +1,233 @@
+# =============================================================
+#  INDEX MEMBERSHIP MODULE
+#  Purpose: Sparse symbol x index membership matrix for breadth
+#
+#  `index_constituents` is loaded once into a CSR matrix M
+#  (n_indices x n_symbols, 1 = member). Breadth for EVERY index on a
+#  date is then one sparse product M @ X, where X holds the day's
+#  per-symbol vectors (advance / decline / unchanged / present flags,
+#  change%, turnover). The matrix is rebuilt when the table's contents
+#  fingerprint changes (polled every MEMBERSHIP_CHECK_TTL seconds).
+# =============================================================
+
+import re
+import threading
+import time
+from typing import Dict, List, Optional
+
+import numpy as np
+from scipy import sparse
+from sqlalchemy import text
+
+from .db_config import engine_cash
+
+# =============================================================
+# CONFIGURATION
+# =============================================================
+
+MEMBERSHIP_CHECK_TTL = 300  # Re-check the constituents fingerprint every 5 minutes
+
+
+def normalize_index_name(name) -> str:
+    """'Nifty Bank' / 'NIFTY_BANK' / 'niftybank' -> 'NIFTYBANK'."""
+    return re.sub(r"[^A-Z0-9]", "", str(name).upper())
+
+
+# =============================================================
+# MEMBERSHIP MATRIX
+# =============================================================
+
+
+class IndexMembership:
+    """Immutable CSR membership matrix plus index / symbol lookups."""
+
+    def __init__(self, rows, fingerprint: Optional[str] = None):
+        # rows: iterable of (index_key, index_name, index_category, symbol)
+        self.fingerprint = fingerprint
+        self.loaded_at = time.time()
+
+        self.index_keys: List[str] = []
+        self.names: Dict[str, str] = {}
+        self.categories: Dict[str, str] = {}
+        self._index_pos: Dict[str, int] = {}
+        self.symbols: List[str] = []
+        self._symbol_pos: Dict[str, int] = {}
+
+        row_idx, col_idx = [], []
+        for index_key, index_name, category, symbol in rows:
+            if not index_key or not symbol:
+                continue
+            symbol = str(symbol).upper()
+            i = self._index_pos.get(index_key)
+            if i is None:
+                i = self._index_pos[index_key] = len(self.index_keys)
+                self.index_keys.append(index_key)
+                self.names[index_key] = index_name or index_key
+                self.categories[index_key] = category or ""
+            j = self._symbol_pos.get(symbol)
+            if j is None:
+                j = self._symbol_pos[symbol] = len(self.symbols)
+                self.symbols.append(symbol)
+            row_idx.append(i)
+            col_idx.append(j)
+
+        self.matrix = sparse.csr_matrix(
+            (np.ones(len(row_idx), dtype=np.float64), (row_idx, col_idx)),
+            shape=(len(self.index_keys), len(self.symbols)),
+        )
+        # Duplicate (index, symbol) rows would sum to 2; membership is 0/1
+        self.matrix.data[:] = 1.0
+
+        self._lookup: Dict[str, str] = {}
+        for key in self.index_keys:
+            self._lookup.setdefault(normalize_index_name(key), key)
+            self._lookup.setdefault(normalize_index_name(self.names[key]), key)
+
+    def __len__(self):
+        return len(self.index_keys)
+
+    # ---------------------------------------------------------
+    # Lookups
+    # ---------------------------------------------------------
+
+    def resolve(self, name_or_key: str) -> Optional[str]:
+        """Index key for a display name or key in any spelling."""
+        return self._lookup.get(normalize_index_name(name_or_key))
+
+    def constituents(self, index_key: str) -> List[str]:
+        i = self._index_pos.get(index_key)
+        if i is None:
+            return []
+        row = self.matrix.getrow(i)
+        return [self.symbols[j] for j in row.indices]
+
+    def keys_in_category(self, category: Optional[str] = None) -> List[str]:
+        """Index keys (sorted by display name), optionally for one category."""
+        keys = [k for k in self.index_keys if not category or self.categories.get(k) == category]
+        return sorted(keys, key=lambda k: self.names[k])
+
+    # ---------------------------------------------------------
+    # Breadth
+    # ---------------------------------------------------------
+
+    def breadth(self, changes: Dict[str, float], turnovers: Optional[Dict[str, float]] = None) -> Dict[str, dict]:
+        """
+        Advances / declines / unchanged / total, average change and total
+        turnover for every index, from one sparse product.
+
+        changes:   {symbol: change_pct} for the day (symbols absent from the
+                   day's data are not counted, like the old SQL join).
+        turnovers: optional {symbol: turnover}.
+        """
+        n = len(self.symbols)
+        present = np.zeros(n)
+        chg = np.zeros(n)
+        turn = np.zeros(n)
+        for symbol, value in changes.items():
+            j = self._symbol_pos.get(str(symbol).upper())
+            if j is None:
+                continue
+            present[j] = 1.0
+            chg[j] = float(value or 0)
+            if turnovers:
+                turn[j] = float(turnovers.get(symbol) or 0)
+
+        X = np.column_stack(
+            [present * (chg > 0), present * (chg < 0), present * (chg == 0), present, chg, turn]
+        )
+        agg = self.matrix @ X  # (n_indices x 6)
+
+        result = {}
+        for i, key in enumerate(self.index_keys):
+            adv, dec, unch, total, chg_sum, turnover = agg[i]
+            result[key] = {
+                "index_key": key,
+                "index_name": self.names[key],
+                "index_category": self.categories[key],
+                "advances": int(adv),
+                "declines": int(dec),
+                "unchanged": int(unch),
+                "total": int(total),
+                "avg_change": round(float(chg_sum) / total, 2) if total else 0.0,
+                "turnover": float(turnover),
+            }
+        return result
+
+
+# =============================================================
+# LOADERS
+# =============================================================
+
+
+def _read_fingerprint(engine_instance) -> Optional[str]:
+    """Cheap content fingerprint of index_constituents (row count + md5 of keys)."""
+    query = """
+        SELECT COUNT(*)::text || ':' ||
+               COALESCE(md5(string_agg({key}, ',' ORDER BY index_key, symbol)), '')
+        FROM index_constituents
+    """
+    with engine_instance.connect() as conn:
+        try:
+            return conn.execute(
+                text(query.format(key="index_key || '|' || symbol || '|' || COALESCE(index_category, '')"))
+            ).scalar()
+        except Exception:
+            # Old schema without index_category
+            conn.rollback()
+            return conn.execute(text(query.format(key="index_key || '|' || symbol"))).scalar()
+
+
+def _load_rows(engine_instance):
+    with engine_instance.connect() as conn:
+        try:
+            return conn.execute(
+                text("SELECT index_key, index_name, index_category, symbol FROM index_constituents")
+            ).fetchall()
+        except Exception:
+            # Old schema without index_category
+            conn.rollback()
+            rows = conn.execute(text("SELECT index_key, index_name, symbol FROM index_constituents")).fetchall()
+            return [(r[0], r[1], None, r[2]) for r in rows]
+
+
+# =============================================================
+# SHARED INSTANCE
+# =============================================================
+
+_membership: Optional[IndexMembership] = None
+_checked_at = 0.0
+_membership_lock = threading.Lock()
+
+
+def get_membership() -> IndexMembership:
+    """Shared membership matrix; rebuilt when index_constituents changes."""
+    global _membership, _checked_at
+
+    if _membership is not None and (time.time() - _checked_at) < MEMBERSHIP_CHECK_TTL:
+        return _membership
+
+    with _membership_lock:
+        if _membership is not None and (time.time() - _checked_at) < MEMBERSHIP_CHECK_TTL:
+            return _membership
+        try:
+            fingerprint = _read_fingerprint(engine_cash)
+            if _membership is None or fingerprint != _membership.fingerprint:
+                _membership = IndexMembership(_load_rows(engine_cash), fingerprint)
+                print(
+                    f"[INFO] Index membership built: {len(_membership)} indices x "
+                    f"{len(_membership.symbols)} symbols ({_membership.matrix.nnz} links)"
+                )
+        except Exception as e:
+            print(f"[ERROR] get_membership(): {e}")
+            if _membership is None:
+                return IndexMembership([])
+        _checked_at = time.time()
+        return _membership
+
+
+def clear_membership_cache():
+    global _membership, _checked_at
+    with _membership_lock:
+        _membership = None
+        _checked_at = 0.0
+    print("[INFO] Index membership cache cleared")
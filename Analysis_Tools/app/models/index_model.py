@@ -13,9 +13,10 @@ from typing import Dict, List, Optional
 
 import pandas as pd
 import requests
-from sqlalchemy import inspect, text
+from sqlalchemy import text
 
 from .db_config import engine, engine_cash
+from .schema_catalog import get_catalog
 
 
 INDEX_DATA_FILE = os.path.join(
@@ -26,6 +27,8 @@ INDEX_DATA_FILE = os.path.join(
 
 _prefetched_indices = {}
 
+PREV_PRICE_LOOKBACK_DAYS = 30  # Calendar days searched for the previous session's price
+
 
 def _load_prefetched_indices():
     """Load index data from database (primary) or pre-fetched JSON file (fallback)."""
@@ -408,65 +411,44 @@ def get_stocks_data_from_db(tickers: List[str], date: str = None) -> pd.DataFram
             print("[ERROR] No data available in futures_oi_cache")
             return pd.DataFrame()
 
-        placeholders = ",".join([f"'{ticker}'" for ticker in tickers])
+        # One windowed scan: the day's underlying price and the previous
+        # session's (LAG over each ticker's cache dates) for all tickers
         query = text(
-            f"""
-            SELECT DISTINCT ON (ticker)
+            """
+            WITH px AS (
+                SELECT DISTINCT ON (ticker, cache_date)
+                    ticker, cache_date, underlying_price
+                FROM public.futures_oi_cache
+                WHERE ticker = ANY(:tickers)
+                AND cache_date BETWEEN CAST(:date AS date) - :lookback AND CAST(:date AS date)
+                ORDER BY ticker, cache_date, expiry_type
+            ),
+            w AS (
+                SELECT ticker, cache_date, underlying_price,
+                       LAG(underlying_price) OVER (PARTITION BY ticker ORDER BY cache_date) AS prev_price
+                FROM px
+            )
+            SELECT
                 ticker,
-                underlying_price as price,
-                0 as change,
-                0 as change_pct,
+                underlying_price::float AS price,
+                COALESCE(underlying_price - prev_price, 0)::float AS change,
+                CASE WHEN prev_price > 0
+                     THEN ((underlying_price - prev_price) / prev_price * 100)::float
+                     ELSE 0 END AS change_pct,
                 0 as volume,
-                underlying_price as open,
-                underlying_price as high,
-                underlying_price as low,
-                underlying_price as prev_close
-            FROM public.futures_oi_cache
-            WHERE cache_date = :date
-            AND ticker IN ({placeholders})
-            ORDER BY ticker, expiry_type
+                underlying_price::float as open,
+                underlying_price::float as high,
+                underlying_price::float as low,
+                COALESCE(prev_price, underlying_price)::float AS prev_close
+            FROM w
+            WHERE cache_date = CAST(:date AS date)
+            ORDER BY ticker
         """
         )
 
-        df = pd.read_sql(query, engine, params={"date": date})
-
-        inspector = inspect(engine)
-        all_tables = inspector.get_table_names(schema="public")
-
-        for _, row in df.iterrows():
-            ticker = row["ticker"]
-            table_name = f"TBL_{ticker}_DERIVED"
-
-            if table_name in all_tables:
-                try:
-                    prev_query = text(
-                        f"""
-                        SELECT "UndrlygPric" as prev_price
-                        FROM public."{table_name}"
-                        WHERE "BizDt"::date < CAST(:date AS date)
-                        GROUP BY "UndrlygPric", "BizDt"
-                        ORDER BY "BizDt" DESC
-                        LIMIT 1
-                    """
-                    )
-
-                    prev_df = pd.read_sql(prev_query, engine, params={"date": date})
-                    if not prev_df.empty:
-                        prev_price = float(prev_df.iloc[0]["prev_price"])
-                        curr_price = float(row["price"])
-                        change = curr_price - prev_price
-                        change_pct = (change / prev_price * 100) if prev_price > 0 else 0
-
-                        df["change"] = df["change"].astype(float)
-                        df["change_pct"] = df["change_pct"].astype(float)
-                        df["prev_close"] = df["prev_close"].astype(float)
-
-                        df.loc[df["ticker"] == ticker, "change"] = float(change)
-                        df.loc[df["ticker"] == ticker, "change_pct"] = float(change_pct)
-                        df.loc[df["ticker"] == ticker, "prev_close"] = float(prev_price)
-                except Exception as e:
-                    print(f"[DEBUG] Could not get detailed data for {ticker}: {e}")
-                    continue
+        df = pd.read_sql(
+            query, engine, params={"tickers": list(tickers), "date": date, "lookback": PREV_PRICE_LOOKBACK_DAYS}
+        )
 
         print(f"[INFO] Fetched data for {len(df)} stocks from database for date {date}")
         return df
@@ -657,8 +639,7 @@ def get_index_stocks_with_data(index_key: str, date: str = None) -> List[Dict]:
             stocks_df["volume"] = 0
 
         try:
-            inspector = inspect(engine)
-            all_tables = set(inspector.get_table_names(schema="public"))
+            all_tables = get_catalog(engine).tables
 
             def ticker_to_table(ticker):
                 safe_ticker = ticker.replace("-", "_").replace("&", "_")
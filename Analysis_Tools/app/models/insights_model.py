@@ -15,7 +15,7 @@
 
 import json
 import os
-from datetime import datetime, timedelta
+from datetime import datetime
 from functools import lru_cache
 
 import pandas as pd
@@ -25,7 +25,12 @@ from sqlalchemy import text
 # Load environment variables from .env file
 load_dotenv()
 
+from . import analytics_engine
 from .db_config import engine, engine_cash
+from .schema_catalog import get_catalog
+from .symbol_master import clear_symbol_master, db_symbol, get_symbol_master
+from .trading_calendar import clear_calendar_cache, get_calendar
+from ..utils.single_flight import single_flight
 
 # =============================================================
 # SECTOR MAPPING FOR STOCKS
@@ -306,6 +311,10 @@ def _load_sector_master():
 
 def get_sector(symbol: str) -> str:
     """Get sector for a given stock symbol."""
+    master = get_symbol_master()
+    if master is not None and symbol in master:
+        return master.sector(symbol, DEFAULT_SECTOR)
+
     if not _sector_cache_loaded:
         _load_sector_master()
 
@@ -348,35 +357,9 @@ def _get_insights_dates_cached():
             print(f"[INFO] Found {len(fii_dates)} dates from FII/DII activity")
 
         # 2. Get dates from Cash Database (Primary Source for Heatmap)
-        query = text(
-            """
-            SELECT table_name
-            FROM information_schema.tables
-            WHERE table_schema = 'public'
-            AND table_name LIKE 'TBL_%'
-            ORDER BY table_name
-            LIMIT 1;
-        """
-        )
-        with engine_cash.connect() as conn:
-            result = conn.execute(query)
-            tables = [row[0] for row in result]
-
-            if tables:
-                sample_table = tables[0]
-                date_query = text(
-                    f"""
-                    SELECT DISTINCT CAST("BizDt" AS DATE)::text AS date
-                    FROM public."{sample_table}"
-                    WHERE "BizDt" IS NOT NULL
-                    ORDER BY date DESC
-                    LIMIT 100;
-                """
-                )
-                cash_dates = conn.execute(date_query).fetchall()
-                for row in cash_dates:
-                    all_dates.add(row[0])
-                print(f"[INFO] Found {len(cash_dates)} dates from Cash database")
+        cash_dates = get_calendar(engine_cash).dates(100)
+        all_dates.update(cash_dates)
+        print(f"[INFO] Found {len(cash_dates)} dates from Cash database")
 
     except Exception as e:
         print(f"[ERROR] _get_insights_dates_cached(): {e}")
@@ -397,6 +380,9 @@ def clear_insights_cache():
     """Clear all insights caches."""
     _get_insights_dates_cached.cache_clear()
     _get_fo_symbols_cached.cache_clear()
+    clear_symbol_master()
+    clear_calendar_cache(engine_cash)
+    analytics_engine.reset_analytics_engine()
     _get_heatmap_data_cached.cache_clear()
     _get_fii_dii_data_cached.cache_clear()
     _get_fii_derivatives_data_cached.cache_clear()
@@ -420,6 +406,11 @@ def _get_fo_symbols_cached():
     Get list of symbols that have F&O derivatives.
     Returns set of symbols that exist in BhavCopy_Database (F&O database).
     """
+    master = get_symbol_master()
+    if master is not None:
+        # Registry also carries the raw NSE names (M&M for TBL_M_M)
+        return master.fo_symbols()
+
     try:
         query = text("""
             SELECT table_name
@@ -445,6 +436,11 @@ def _get_fo_symbols_cached():
         return frozenset()
 
 
+# Precomputed period returns stored by Database/Cash/heatmap_cache.py
+HEATMAP_RETURN_COLUMNS = {"1W": "ret_1w", "1M": "ret_1m", "3M": "ret_3m", "6M": "ret_6m", "1Y": "ret_1y"}
+_RETURN_INDEX = {period: 8 + i for i, period in enumerate(HEATMAP_RETURN_COLUMNS)}
+
+
 @lru_cache(maxsize=32)
 def _get_heatmap_data_cached(selected_date: str):
     """
@@ -453,20 +449,32 @@ def _get_heatmap_data_cached(selected_date: str):
     Note: Table population is now handled by Database/Cash/heatmap_cache.py.
     This function is READ-ONLY.
 
-    Returns: tuple of (symbol, close, change_pct, volume, turnover, sector, high, low)
+    Returns: tuple of (symbol, close, change_pct, volume, turnover, sector, high, low,
+                       ret_1w, ret_1m, ret_3m, ret_6m, ret_1y)
+    The ret_* values are None on caches built before period returns existed.
     """
-    # Try Fetching from Cache Table
+    # Try Fetching from Cache Table (DuckDB snapshot first, when enabled)
     try:
-        query_cache = text(
+        try:
+            cached_df = analytics_engine.heatmap_for_date(selected_date)
+        except Exception as e:
+            print(f"[WARN] Analytics heatmap read failed, using Postgres: {e}")
+            cached_df = None
+
+        if cached_df is None or cached_df.empty:
+            catalog = get_catalog(engine_cash)
+            return_cols = [c for c in HEATMAP_RETURN_COLUMNS.values() if catalog.has_column("daily_market_heatmap", c)]
+            query_cache = text(
+                f"""
+                SELECT symbol, close, change_pct, volume, turnover, sector, high, low
+                       {"".join(", " + c for c in return_cols)}
+                FROM daily_market_heatmap
+                WHERE date = DATE :result_date
             """
-            SELECT symbol, close, change_pct, volume, turnover, sector, high, low
-            FROM daily_market_heatmap
-            WHERE date = DATE :result_date
-        """
-        )
+            )
 
-        with engine_cash.connect() as conn:
-            cached_df = pd.read_sql(query_cache, con=conn, params={"result_date": selected_date})
+            with engine_cash.connect() as conn:
+                cached_df = pd.read_sql(query_cache, con=conn, params={"result_date": selected_date})
 
         if not cached_df.empty:
             # OPTIMIZATION: Vectorized type conversion (100x faster than iterrows)
@@ -478,12 +486,19 @@ def _get_heatmap_data_cached(selected_date: str):
             cached_df["sector"] = cached_df["sector"].astype(str)
             cached_df["high"] = cached_df["high"].astype(float)
             cached_df["low"] = cached_df["low"].astype(float)
+            for col in HEATMAP_RETURN_COLUMNS.values():
+                if col in cached_df.columns:
+                    cached_df[col] = pd.to_numeric(cached_df[col], errors="coerce").astype(object)
+                    cached_df.loc[cached_df[col].isna(), col] = None
+                else:
+                    cached_df[col] = None
 
             # Convert to list of tuples directly
             return tuple(
-                cached_df[["symbol", "close", "change_pct", "volume", "turnover", "sector", "high", "low"]].itertuples(
-                    index=False, name=None
-                )
+                cached_df[
+                    ["symbol", "close", "change_pct", "volume", "turnover", "sector", "high", "low"]
+                    + list(HEATMAP_RETURN_COLUMNS.values())
+                ].itertuples(index=False, name=None)
             )
         else:
             print(f"[WARN] No heatmap data found for {selected_date} in cache table.")
@@ -538,41 +553,33 @@ def get_heatmap_data(selected_date: str, period: str = "1D", comparison_date: st
             )
         return result
 
-    # Calculate Start Date
+    # Precomputed period return: a column pick on the cached rows
+    ret_idx = _RETURN_INDEX.get(period)
+    if not comparison_date and ret_idx is not None and cached_data[0][ret_idx] is not None:
+        fo_symbols = _get_fo_symbols_cached() if filter_fo else None
+        return [
+            {
+                "symbol": row[0],
+                "close": row[1],
+                "change_pct": float(row[ret_idx]) if row[ret_idx] is not None else 0.0,
+                "volume": row[3],
+                "turnover": row[4],
+                "sector": row[5],
+                "high": row[6],
+                "low": row[7],
+            }
+            for row in cached_data
+            if not (filter_fo and fo_symbols and row[0] not in fo_symbols)
+        ]
+
+    # Calculate Start Date (comparison date, or caches without period returns)
     if comparison_date:
         start_date = comparison_date
     else:
         try:
-            date_obj = datetime.strptime(selected_date, "%Y-%m-%d")
-            delta_map = {"1W": 7, "1M": 30, "3M": 90, "6M": 180, "1Y": 365}
-            delta = delta_map.get(period, 0)
-            if delta == 0:
-                # Default fallback
-                start_date = selected_date
-            else:
-                target_date_obj = date_obj - timedelta(days=delta)
-                target_date = target_date_obj.strftime("%Y-%m-%d")
-
-                # NEW: Find nearest valid trading date from available dates
-                # This fixes the issue where target_date is a holiday/weekend
-                available_dates = get_insights_dates()
-
-                if target_date in available_dates:
-                    start_date = target_date
-                else:
-                    # Logic to find nearest date
-                    # valid_dates are strings YYYY-MM-DD
-                    if not available_dates:
-                        start_date = target_date # Fallback
-                    else:
-                        # Convert to datetime for comparison
-                        valid_dts = [datetime.strptime(d, "%Y-%m-%d") for d in available_dates]
-
-                        # Find closest date
-                        nearest_dt = min(valid_dts, key=lambda x: abs(x - target_date_obj))
-                        start_date = nearest_dt.strftime("%Y-%m-%d")
-
-                        print(f"[INFO] Period {period}: Target {target_date} unavailable. Using nearest: {start_date}")
+            # Nearest trading date to (selected_date - period) from the cash
+            # trading calendar; handles holidays/weekends via bisect.
+            start_date = get_calendar(engine_cash).period_start(selected_date, period) or selected_date
 
         except Exception as e:
             print(f"[ERROR] Date calculation error: {e}")
@@ -650,8 +657,27 @@ def get_heatmap_data(selected_date: str, period: str = "1D", comparison_date: st
     return result
 
 
-def get_sector_performance(selected_date: str, comparison_date: str = None):
+def get_sector_performance(selected_date: str, comparison_date: str = None, period: str = "1D"):
     """Get sector-wise performance aggregated from stock data."""
+    # One GROUP BY over the heatmap snapshot when the analytics backend is on
+    try:
+        sector_df = analytics_engine.sector_performance(
+            selected_date, comparison_date, return_column=None if comparison_date else HEATMAP_RETURN_COLUMNS.get(period)
+        )
+        if sector_df is not None and not sector_df.empty:
+            return [
+                {
+                    "sector": str(row.sector),
+                    "avg_change": float(row.avg_change),
+                    "total_turnover": float(row.total_turnover or 0),
+                    "stock_count": int(row.stock_count),
+                    "stocks": list(row.stocks),
+                }
+                for row in sector_df.itertuples(index=False)
+            ]
+    except Exception as e:
+        print(f"[WARN] Analytics sector performance failed, using Postgres: {e}")
+
     # Load sector master to get all sectors
     if not _sector_cache_loaded:
         _load_sector_master()
@@ -671,7 +697,7 @@ def get_sector_performance(selected_date: str, comparison_date: str = None):
         }
 
     # Get heatmap data
-    heatmap_data = get_heatmap_data(selected_date, comparison_date=comparison_date, filter_fo=False)
+    heatmap_data = get_heatmap_data(selected_date, period=period, comparison_date=comparison_date, filter_fo=False)
 
 
     # Populate with actual stock data
@@ -1339,6 +1365,7 @@ def get_market_stats(selected_date: str):
 
 
 @lru_cache(maxsize=32)
+@single_flight
 def _get_52_week_data_cached(selected_date: str):
     """Calculates 52-week High/Low for ALL cash-market stocks using CashStocks_Database."""
     try:
@@ -1357,6 +1384,16 @@ def _get_52_week_data_cached(selected_date: str):
 
         print(f"[INFO] Calculating 52-Week High/Low for {len(heatmap_data)} stocks...")
 
+        # All ranges in one scan when the analytics backend is on
+        ranges = None
+        try:
+            range_df = analytics_engine.fifty_two_week_range(selected_date, start_date)
+            if range_df is not None and not range_df.empty:
+                # cash_eod_data holds raw NSE symbols, the heatmap their table form
+                ranges = {db_symbol(r.symbol): (r.high_52w, r.low_52w) for r in range_df.itertuples(index=False)}
+        except Exception as e:
+            print(f"[WARN] Analytics 52-week scan failed, using Postgres: {e}")
+
         with engine_cash.connect() as conn:
             for stock in heatmap_data:
                 symbol = stock["symbol"]
@@ -1365,14 +1402,17 @@ def _get_52_week_data_cached(selected_date: str):
 
                 # Check if table exists (simple try-except specific to query failure)
                 try:
-                    query = text(
-                        f'SELECT MAX(CAST("HghPric" AS NUMERIC)) as high_52w, '
-                        f'MIN(CAST("LwPric" AS NUMERIC)) as low_52w '
-                        f'FROM public."{table_name}" '
-                        f'WHERE CAST("BizDt" AS DATE) BETWEEN CAST(:start_date AS DATE) AND CAST(:end_date AS DATE)'
-                    )
+                    if ranges is not None:
+                        row = ranges.get(symbol)
+                    else:
+                        query = text(
+                            f'SELECT MAX(CAST("HghPric" AS NUMERIC)) as high_52w, '
+                            f'MIN(CAST("LwPric" AS NUMERIC)) as low_52w '
+                            f'FROM public."{table_name}" '
+                            f'WHERE CAST("BizDt" AS DATE) BETWEEN CAST(:start_date AS DATE) AND CAST(:end_date AS DATE)'
+                        )
 
-                    row = conn.execute(query, {"start_date": start_date, "end_date": selected_date}).fetchone()
+                        row = conn.execute(query, {"start_date": start_date, "end_date": selected_date}).fetchone()
 
                     if row and row[0] is not None and row[1] is not None:
                         high_52w = float(row[0])
@@ -1431,7 +1471,47 @@ def get_52_week_analysis(selected_date: str):
 # =============================================================
 
 
+def _query_volume_stats(conn, table_name: str, selected_date: str, start_date: str):
+    """Today's volume and the 20-day average (excluding today) from one per-symbol table."""
+    query = text(
+        f"""
+        WITH today_data AS (
+            SELECT
+                CAST("TtlTradgVol" AS NUMERIC) as today_volume,
+                CAST("ClsPric" AS NUMERIC) as close_price
+            FROM public."{table_name}"
+            WHERE CAST("BizDt" AS DATE) = CAST(:selected_date AS DATE)
+            AND "TtlTradgVol" IS NOT NULL
+            LIMIT 1
+        ),
+        historical_avg AS (
+            SELECT
+                AVG(CAST("TtlTradgVol" AS NUMERIC)) as avg_volume,
+                COUNT(*) as trading_days
+            FROM (
+                SELECT "TtlTradgVol"
+                FROM public."{table_name}"
+                WHERE CAST("BizDt" AS DATE) >= CAST(:start_date AS DATE)
+                AND CAST("BizDt" AS DATE) < CAST(:selected_date AS DATE)
+                AND "TtlTradgVol" IS NOT NULL
+                AND CAST("TtlTradgVol" AS NUMERIC) > 0
+                ORDER BY "BizDt" DESC
+                LIMIT 20
+            ) as recent_data
+        )
+        SELECT
+            t.today_volume,
+            t.close_price,
+            h.avg_volume,
+            h.trading_days
+        FROM today_data t, historical_avg h
+    """
+    )
+    return conn.execute(query, {"selected_date": selected_date, "start_date": start_date}).fetchone()
+
+
 @lru_cache(maxsize=32)
+@single_flight
 def _get_volume_breakouts_cached(selected_date: str):
     """
     Get stocks with unusual volume by calculating REAL 20-day average volume.
@@ -1454,49 +1534,29 @@ def _get_volume_breakouts_cached(selected_date: str):
         processed = 0
         errors = 0
 
+        # Today's volume and 20-day averages for every symbol in one scan
+        # when the analytics backend is on
+        volume_rows = None
+        try:
+            volume_df = analytics_engine.volume_stats(selected_date, start_date)
+            if volume_df is not None and not volume_df.empty:
+                volume_rows = {
+                    db_symbol(r.symbol): (r.today_volume, r.close_price, r.avg_volume, r.trading_days)
+                    for r in volume_df.itertuples(index=False)
+                }
+        except Exception as e:
+            print(f"[WARN] Analytics volume scan failed, using Postgres: {e}")
+
         with engine_cash.connect() as conn:
             for stock in heatmap_data:
                 symbol = stock["symbol"]
                 table_name = f"TBL_{symbol}"
 
                 try:
-                    # Query to get today's volume AND 20-day average (excluding today)
-                    query = text(
-                        f"""
-                        WITH today_data AS (
-                            SELECT
-                                CAST("TtlTradgVol" AS NUMERIC) as today_volume,
-                                CAST("ClsPric" AS NUMERIC) as close_price
-                            FROM public."{table_name}"
-                            WHERE CAST("BizDt" AS DATE) = CAST(:selected_date AS DATE)
-                            AND "TtlTradgVol" IS NOT NULL
-                            LIMIT 1
-                        ),
-                        historical_avg AS (
-                            SELECT
-                                AVG(CAST("TtlTradgVol" AS NUMERIC)) as avg_volume,
-                                COUNT(*) as trading_days
-                            FROM (
-                                SELECT "TtlTradgVol"
-                                FROM public."{table_name}"
-                                WHERE CAST("BizDt" AS DATE) >= CAST(:start_date AS DATE)
-                                AND CAST("BizDt" AS DATE) < CAST(:selected_date AS DATE)
-                                AND "TtlTradgVol" IS NOT NULL
-                                AND CAST("TtlTradgVol" AS NUMERIC) > 0
-                                ORDER BY "BizDt" DESC
-                                LIMIT 20
-                            ) as recent_data
-                        )
-                        SELECT
-                            t.today_volume,
-                            t.close_price,
-                            h.avg_volume,
-                            h.trading_days
-                        FROM today_data t, historical_avg h
-                    """
-                    )
-
-                    result = conn.execute(query, {"selected_date": selected_date, "start_date": start_date}).fetchone()
+                    if volume_rows is not None:
+                        result = volume_rows.get(symbol)
+                    else:
+                        result = _query_volume_stats(conn, table_name, selected_date, start_date)
 
                     if result and result[0] and result[2] and result[2] > 0:
                         today_volume = float(result[0])
@@ -1605,70 +1665,15 @@ def get_volume_breakouts(selected_date: str, multiplier: float = 2.0):
 # =============================================================
 
 
-def get_enhanced_heatmap_data(selected_date: str):
+def get_enhanced_heatmap_data(selected_date: str, period: str = "1D"):
     """
     Get heatmap data with REAL high, low, and volume from cash database.
-    This function enriches the basic heatmap data with actual market data.
-    """
-    try:
-        # Get basic heatmap data first
-        basic_data = get_heatmap_data(selected_date)
-        if not basic_data:
-            return []
-
-        print(f"[INFO] Enhancing heatmap data with real high/low/volume for {len(basic_data)} stocks...")
-
-        enhanced_data = []
-        enriched_count = 0
-
-        with engine_cash.connect() as conn:
-            for stock in basic_data:
-                symbol = stock["symbol"]
-                table_name = f"TBL_{symbol}"
-
-                try:
-                    # Query real high, low, volume from cash database
-                    query = text(
-                        f"""
-                        SELECT
-                            CAST("HghPric" AS NUMERIC) as high,
-                            CAST("LwPric" AS NUMERIC) as low,
-                            CAST("TtlTradgVol" AS NUMERIC) as volume,
-                            CAST("ClsPric" AS NUMERIC) as close
-                        FROM public."{table_name}"
-                        WHERE CAST("BizDt" AS DATE) = CAST(:selected_date AS DATE)
-                        LIMIT 1
-                    """
-                    )
-
-                    result = conn.execute(query, {"selected_date": selected_date}).fetchone()
-
-                    if result and result[0] and result[1]:
-                        # Use real data from cash database
-                        stock_copy = stock.copy()
-                        stock_copy["high"] = float(result[0])
-                        stock_copy["low"] = float(result[1])
-                        stock_copy["volume"] = int(float(result[2])) if result[2] else stock["volume"]
-                        # Optionally update close if available
-                        if result[3]:
-                            stock_copy["close"] = float(result[3])
-                        enhanced_data.append(stock_copy)
-                        enriched_count += 1
-                    else:
-                        # Keep original data if cash data not available
-                        enhanced_data.append(stock)
-
-                except Exception:
-                    # Keep original data on error
-                    enhanced_data.append(stock)
-
-        print(f"[INFO] Enhanced {enriched_count}/{len(basic_data)} stocks with real high/low/volume")
-        return enhanced_data
 
-    except Exception as e:
-        print(f"[ERROR] get_enhanced_heatmap_data(): {e}")
-        # Fallback to basic data
-        return get_heatmap_data(selected_date)
+    daily_market_heatmap is built from cash_eod_data and already stores the
+    real close/high/low/volume (and period returns), so this is the cached
+    heatmap read; the old per-symbol TBL_ lookups are no longer needed.
+    """
+    return get_heatmap_data(selected_date, period=period)
 
 
 # =============================================================
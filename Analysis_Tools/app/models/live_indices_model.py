@@ -1,12 +1,146 @@
 """
 Live Indices Data Model
 Reads real-time data from spot files written by live_indices_streamer.py
+
+History files are append-only (one "YYYY-MM-DD HH:MM:SS,value" line per
+tick, all session). Each file is tailed through a HistoryTail: the first
+read seeks backwards from the end just far enough to cover the buffer and
+the current session, later polls read only the bytes appended since the
+last offset. The last lines and the session open/high/low are kept in
+memory, so a poll costs O(new lines) instead of re-reading the file.
+
+When the streamer is publishing to the shared-memory tick bus
+(spot_data/tick_bus.py), the current value and session open/high/low come from
+the bus's latest slot instead of the spot file.
 """
 
 import os
+import threading
+from collections import deque
 from datetime import datetime
 from typing import Dict, List, Optional
 
+from spot_data.tick_bus import get_tick_reader
+
+HISTORY_BUFFER_LINES = 1000  # Lines kept in memory per history file
+TAIL_BLOCK_SIZE = 64 * 1024
+
+
+def _parse_history_line(line: str) -> Optional[Dict]:
+    line = line.strip()
+    if not line or "," not in line:
+        return None
+    parts = line.split(",")
+    if len(parts) < 2:
+        return None
+    try:
+        return {"timestamp": parts[0], "value": float(parts[1])}
+    except ValueError:
+        return None
+
+
+def _session_of(timestamp: str) -> str:
+    """Trading day of a history timestamp ('' when the line carries no date)."""
+    return timestamp[:10] if len(timestamp) >= 10 and " " in timestamp else ""
+
+
+class HistoryTail:
+    """Incremental reader for one append-only history file."""
+
+    def __init__(self, path: str, max_lines: int = HISTORY_BUFFER_LINES):
+        self.path = path
+        self.max_lines = max_lines
+        self._lock = threading.Lock()
+        self._reset()
+
+    def _reset(self):
+        self.lines = deque(maxlen=self.max_lines)
+        self.offset = 0
+        self.inode = None
+        self._partial = b""
+        self.session = None
+        self.open = self.high = self.low = 0.0
+
+    def _consume(self, raw_lines):
+        for raw in raw_lines:
+            item = _parse_history_line(raw.decode("utf-8", errors="replace"))
+            if item is None:
+                continue
+            self.lines.append(item)
+            value = item["value"]
+            session = _session_of(item["timestamp"])
+            if session != self.session:
+                self.session = session
+                self.open = self.high = self.low = value
+            else:
+                self.high = max(self.high, value)
+                self.low = min(self.low, value)
+
+    def _read_tail(self, f, size):
+        """First read: walk back from EOF until the buffer and the current session are covered."""
+        pos, buf = size, b""
+        while pos > 0:
+            step = min(TAIL_BLOCK_SIZE, pos)
+            pos -= step
+            f.seek(pos)
+            buf = f.read(step) + buf
+            complete = buf.split(b"\n")[1:] if pos > 0 else buf.split(b"\n")
+            dated = [_parse_history_line(l.decode("utf-8", errors="replace")) for l in complete]
+            dated = [d for d in dated if d]
+            if len(dated) >= self.max_lines and dated and _session_of(dated[0]["timestamp"]) != _session_of(dated[-1]["timestamp"]):
+                break
+        lines = buf.split(b"\n")
+        if pos > 0:
+            lines = lines[1:]  # First piece may be cut mid-line
+        return lines
+
+    def poll(self):
+        """Pick up lines appended since the last poll (re-reads after truncation / rotation)."""
+        with self._lock:
+            try:
+                st = os.stat(self.path)
+            except OSError:
+                self._reset()
+                return
+            if st.st_ino != self.inode or st.st_size < self.offset:
+                self._reset()
+                self.inode = st.st_ino
+            if st.st_size == self.offset:
+                return
+
+            with open(self.path, "rb") as f:
+                if self.offset == 0:
+                    chunk_lines = self._read_tail(f, st.st_size)
+                else:
+                    f.seek(self.offset)
+                    chunk_lines = (self._partial + f.read(st.st_size - self.offset)).split(b"\n")
+            self._partial = chunk_lines.pop() if chunk_lines else b""
+            self._consume(chunk_lines)
+            self.offset = st.st_size
+
+    def tail(self, n: int) -> List[Dict]:
+        with self._lock:
+            items = list(self.lines)
+        return items[-n:] if n < len(items) else items
+
+    def ohlc(self) -> Optional[Dict]:
+        with self._lock:
+            if self.session is None:
+                return None
+            return {"open": round(self.open, 2), "high": round(self.high, 2), "low": round(self.low, 2)}
+
+
+_tails: Dict[str, HistoryTail] = {}
+_tails_lock = threading.Lock()
+
+
+def _get_tail(full_path: str) -> HistoryTail:
+    tail = _tails.get(full_path)
+    if tail is None:
+        with _tails_lock:
+            tail = _tails.setdefault(full_path, HistoryTail(full_path))
+    return tail
+
 
 class LiveIndicesReader:
     """Reads live market data from text files written by Python WebSocket streamer"""
@@ -68,36 +202,33 @@ class LiveIndicesReader:
 
     @staticmethod
     def read_history(filepath: str, lines: int = 100) -> List[Dict]:
-        """Read historical data from file (timestamp,value format)"""
+        """Read the last `lines` points (timestamp,value format), tailing only new bytes"""
         try:
             full_path = os.path.join(LiveIndicesReader.BASE_PATH, filepath)
             if not os.path.exists(full_path):
                 return []
 
-            with open(full_path, "r") as f:
-                all_lines = f.readlines()
-                recent_lines = all_lines[-lines:] if len(all_lines) > lines else all_lines
-
-            data = []
-            for line in recent_lines:
-                line = line.strip()
-                if not line or "," not in line:
-                    continue
+            tail = _get_tail(full_path)
+            tail.poll()
+            return tail.tail(lines)
 
-                parts = line.split(",")
-                if len(parts) >= 2:
-                    timestamp_str = parts[0]
-                    value_str = parts[1]
-
-                    try:
-                        data.append({"timestamp": timestamp_str, "value": float(value_str)})
-                    except ValueError:
-                        continue
+        except Exception:
+            return []
 
-            return data
+    @staticmethod
+    def get_session_ohlc(filepath: str) -> Optional[Dict]:
+        """Open/high/low of the latest session in the history file (kept incrementally)"""
+        tail = _tails.get(os.path.join(LiveIndicesReader.BASE_PATH, filepath))
+        return tail.ohlc() if tail else None
 
+    @staticmethod
+    def get_bus_tick(index_key: str):
+        """Latest tick for the index from the tick bus, or None"""
+        try:
+            reader = get_tick_reader()
+            return reader.latest(index_key) if reader else None
         except Exception:
-            return []
+            return None
 
     @staticmethod
     def calculate_change(current: float, previous: float) -> Dict:
@@ -132,14 +263,15 @@ class LiveIndicesReader:
 
         files = LiveIndicesReader.FILES[index_key]
 
-        # Try to read spot file
-        spot_str = LiveIndicesReader.read_file(files["spot"])
-
         # Try to read history
         history = LiveIndicesReader.read_history(files["history"], lines=100)
 
-        # Determine current value
-        current_value = None
+        # Latest tick from the shared-memory bus (streamer running)
+        tick = LiveIndicesReader.get_bus_tick(index_key)
+
+        # Determine current value (spot file only when the bus has nothing)
+        current_value = tick.ltp if tick else None
+        spot_str = None if tick else LiveIndicesReader.read_file(files["spot"])
         if spot_str:
             try:
                 current_value = float(spot_str)
@@ -159,9 +291,12 @@ class LiveIndicesReader:
                 previous_close = fallback["previousClose"]
             else:
                 return None
+        elif tick:
+            ohlc = {"open": round(tick.open, 2), "high": round(tick.high, 2), "low": round(tick.low, 2)}
+            previous_close = ohlc["open"] if ohlc["open"] > 0 else current_value
         else:
-            # Calculate open/high/low from history
-            ohlc = LiveIndicesReader.get_open_high_low(history)
+            # Session open/high/low (falls back to the returned history window)
+            ohlc = LiveIndicesReader.get_session_ohlc(files["history"]) or LiveIndicesReader.get_open_high_low(history)
             previous_close = ohlc["open"] if ohlc["open"] > 0 else current_value
 
         # Calculate changes
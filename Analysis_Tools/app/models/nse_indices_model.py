@@ -3,20 +3,41 @@ NSE Indices Model
 Fetches live index prices and 1D intraday chart data from NSE's public API.
 Used as a permanent data source so charts & prices always display — even outside
 Upstox streamer hours (9:10–15:35 IST).
+
+Caching is stale-while-revalidate: once an entry is past its TTL the stale
+value is returned immediately and a single background refresh per key runs
+(single-flight across threads). With NSE_CACHE_LOCK_DIR set, workers also
+share one refresh per key through lock files + a JSON copy of the result.
+Only a cold (or very old) entry makes the request wait for NSE. After
+a failed refresh the key backs off (NSE_BACKOFF_BASE seconds, doubling
+per consecutive failure up to NSE_BACKOFF_MAX) and keeps serving what it
+has, so an NSE outage is not hit with a fetch per request.
+
+NSE_API_BASE points the fetchers at another host, e.g. the local stand-in
+in spot_data/nse_api_stub_server.py.
 """
 
+import json
+import os
 import time
 import threading
 import requests
 
+try:
+    import fcntl
+    FCNTL_AVAILABLE = True
+except ImportError:  # Windows: no cross-worker single-flight
+    FCNTL_AVAILABLE = False
+
 #  NSE API endpoints
-_NSE_HOME      = "https://www.nseindia.com/"
+_NSE_BASE      = os.getenv("NSE_API_BASE", "https://www.nseindia.com").rstrip("/")
+_NSE_HOME      = _NSE_BASE + "/"
 _GRAPH_API     = (
-    "https://www.nseindia.com/api/NextApi/apiClient"
+    _NSE_BASE + "/api/NextApi/apiClient"
     "?functionName=getGraphChart&type={}&flag=1D"
 )
 _INDEX_API     = (
-    "https://www.nseindia.com/api/NextApi/apiClient"
+    _NSE_BASE + "/api/NextApi/apiClient"
     "?functionName=getIndexData&type=All"
 )
 
@@ -57,22 +78,223 @@ KEY_TO_NSE_URL: dict[str, str] = {
     "indiavix":   "India%20VIX",
 }
 
-#  Simple in-process cache
+#  Stale-while-revalidate cache
 _PRICE_CACHE_TTL   = 10   # seconds  – index price cards (near-real-time)
 _CHART_CACHE_TTL   = 60   # seconds  – chart series (minute-level NSE data)
 _SESSION_TTL       = 300  # seconds  – reuse one session to keep cookies fresh
-
-_price_cache: dict = {"data": None, "ts": 0.0}
-_chart_cache: dict[str, dict] = {}   # key → {"data": ..., "ts": float}
+_STALE_MAX_AGE     = int(os.getenv("NSE_STALE_MAX_AGE", "900"))  # older → refresh in the foreground
+_COLD_WAIT         = 15   # seconds  – max wait for another thread's foreground fetch
+_BACKOFF_BASE      = float(os.getenv("NSE_BACKOFF_BASE", "5"))   # seconds after the first failure
+_BACKOFF_MAX       = float(os.getenv("NSE_BACKOFF_MAX", "300"))  # cap for repeated failures
+_LOCK_DIR          = os.getenv("NSE_CACHE_LOCK_DIR", "")
 
 _session_lock   = threading.Lock()
-_price_lock     = threading.Lock()
-_chart_lock     = threading.Lock()
 
 _session: requests.Session | None = None
 _session_ts: float = 0.0
 
 
+class _SWRCache:
+    """
+    key → {"data": ..., "ts": float}. get() serves fresh entries directly,
+    stale ones immediately while one refresh per key runs in the
+    background, and makes only cold / too-old lookups wait for the fetch.
+    fetch() returns the new value or raises; on failure the old value is
+    kept, the failure counted, and no refresh is started for the key until
+    the backoff delay has passed.
+    """
+
+    def __init__(self, name: str, ttl: float):
+        self.name     = name
+        self.ttl      = ttl
+        self.entries: dict[str, dict] = {}
+        self.inflight: dict[str, threading.Event] = {}
+        self.stats: dict[str, dict] = {}
+        self.lock     = threading.Lock()
+
+    def get(self, key: str, fetch):
+        now = time.time()
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry and (now - entry["ts"]) < self.ttl:
+                return entry["data"]
+            if self._retry_in(key, now) > 0:
+                self._stat(key)["backoff_skips"] += 1
+                return entry["data"] if entry else None
+            usable = entry is not None and (now - entry["ts"]) < _STALE_MAX_AGE
+            event = self.inflight.get(key)
+            leader = event is None
+            if leader:
+                event = self.inflight[key] = threading.Event()
+            if usable:
+                self._stat(key)["stale_served"] += 1
+
+        if usable:
+            if leader:
+                threading.Thread(
+                    target=self._refresh, args=(key, fetch, event, False),
+                    name=f"nse-refresh-{self.name}-{key}", daemon=True,
+                ).start()
+            return entry["data"]
+
+        if leader:
+            self._refresh(key, fetch, event, True)
+        else:
+            event.wait(_COLD_WAIT)
+        with self.lock:
+            entry = self.entries.get(key)
+        return entry["data"] if entry else None
+
+    def last_error(self, key: str) -> str | None:
+        with self.lock:
+            return self.stats.get(key, {}).get("last_error")
+
+    def _stat(self, key: str) -> dict:
+        # caller holds self.lock
+        if key not in self.stats:
+            self.stats[key] = {
+                "refreshes": 0, "failures": 0, "consecutive_failures": 0,
+                "stale_served": 0, "shared_hits": 0, "backoff_skips": 0, "total_ms": 0.0,
+                "last_ms": None, "max_ms": 0.0, "last_error": None, "last_success": None,
+                "last_failure": None,
+            }
+        return self.stats[key]
+
+    def _retry_in(self, key: str, now: float) -> float:
+        """Seconds left before the key may be refreshed again (0 = now). Caller holds self.lock."""
+        st = self.stats.get(key)
+        if not st or not st["consecutive_failures"]:
+            return 0.0
+        delay = min(_BACKOFF_MAX, _BACKOFF_BASE * 2 ** (st["consecutive_failures"] - 1))
+        return max(0.0, st["last_failure"] + delay - now)
+
+    def _store(self, key: str, data, ts: float):
+        with self.lock:
+            current = self.entries.get(key)
+            if current is None or ts >= current["ts"]:
+                self.entries[key] = {"data": data, "ts": ts}
+
+    def _refresh(self, key: str, fetch, event: threading.Event, foreground: bool):
+        lock_fd = None
+        try:
+            if _LOCK_DIR and FCNTL_AVAILABLE:
+                # Another worker may have refreshed this key already
+                if self._adopt_shared(key):
+                    return
+                lock_fd = self._lock_shared(key, blocking=foreground)
+                if lock_fd is None:
+                    return                      # another worker is refreshing; keep serving stale
+                if self._adopt_shared(key):
+                    return
+
+            start = time.perf_counter()
+            try:
+                data = fetch()
+            except Exception as exc:
+                elapsed = (time.perf_counter() - start) * 1000
+                with self.lock:
+                    st = self._stat(key)
+                    st["failures"] += 1
+                    st["consecutive_failures"] += 1
+                    st["last_ms"] = round(elapsed, 1)
+                    st["last_error"] = str(exc)[:200]
+                    st["last_failure"] = time.time()
+                print(f"[NSE] {self.name} refresh failed for {key}: {exc}")
+                return
+
+            elapsed = (time.perf_counter() - start) * 1000
+            ts = time.time()
+            self._store(key, data, ts)
+            with self.lock:
+                st = self._stat(key)
+                st["refreshes"] += 1
+                st["consecutive_failures"] = 0
+                st["total_ms"] += elapsed
+                st["last_ms"] = round(elapsed, 1)
+                st["max_ms"] = round(max(st["max_ms"], elapsed), 1)
+                st["last_error"] = None
+                st["last_success"] = ts
+            if lock_fd is not None:
+                self._write_shared(key, data, ts)
+        finally:
+            if lock_fd is not None:
+                fcntl.flock(lock_fd, fcntl.LOCK_UN)
+                os.close(lock_fd)
+            with self.lock:
+                self.inflight.pop(key, None)
+            event.set()
+
+    # -- cross-worker single-flight (NSE_CACHE_LOCK_DIR) --
+
+    def _shared_path(self, key: str, ext: str) -> str:
+        safe = "".join(c if c.isalnum() else "_" for c in key)
+        return os.path.join(_LOCK_DIR, f"nse_{self.name}_{safe}.{ext}")
+
+    def _lock_shared(self, key: str, blocking: bool):
+        os.makedirs(_LOCK_DIR, exist_ok=True)
+        fd = os.open(self._shared_path(key, "lock"), os.O_CREAT | os.O_RDWR, 0o644)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX if blocking else fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            os.close(fd)
+            return None
+        return fd
+
+    def _adopt_shared(self, key: str) -> bool:
+        """Take another worker's result if it is fresh."""
+        try:
+            with open(self._shared_path(key, "json"), encoding="utf-8") as f:
+                shared = json.load(f)
+        except (OSError, ValueError):
+            return False
+        if (time.time() - shared.get("ts", 0)) >= self.ttl:
+            return False
+        self._store(key, shared["data"], shared["ts"])
+        with self.lock:
+            self._stat(key)["shared_hits"] += 1
+        return True
+
+    def _write_shared(self, key: str, data, ts: float):
+        path = self._shared_path(key, "json")
+        tmp = f"{path}.{os.getpid()}.tmp"
+        try:
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump({"data": data, "ts": ts}, f)
+            os.replace(tmp, path)
+        except OSError as exc:
+            print(f"[NSE] could not share {self.name}/{key}: {exc}")
+
+    def snapshot(self) -> dict:
+        now = time.time()
+        with self.lock:
+            out = {}
+            for key, st in self.stats.items():
+                entry = self.entries.get(key)
+                out[key] = {
+                    **{k: v for k, v in st.items() if k != "total_ms"},
+                    "avg_ms": round(st["total_ms"] / st["refreshes"], 1) if st["refreshes"] else None,
+                    "age_s": round(now - entry["ts"], 1) if entry else None,
+                    "refreshing": key in self.inflight,
+                    "retry_in_s": round(self._retry_in(key, now), 1) or None,
+                }
+            return out
+
+
+_price_cache = _SWRCache("prices", _PRICE_CACHE_TTL)
+_chart_cache = _SWRCache("chart", _CHART_CACHE_TTL)
+
+_PRICE_CACHE_KEY = "all"
+
+
+def get_refresh_stats() -> dict:
+    """Per-key refresh counters / latency for the admin performance page."""
+    return {
+        "lock_dir": _LOCK_DIR if (_LOCK_DIR and FCNTL_AVAILABLE) else None,
+        "prices": _price_cache.snapshot(),
+        "chart": _chart_cache.snapshot(),
+    }
+
+
 #  Session management
 
 def _get_session() -> requests.Session:
@@ -92,28 +314,26 @@ def _get_session() -> requests.Session:
         return _session
 
 
-#  Public: index prices
+def _reset_session():
+    """Drop the session so the next call re-seeds cookies (after 401/403)."""
+    global _session
+    with _session_lock:
+        _session = None
 
-def get_nse_index_data() -> dict:
-    """
-    Fetch current index prices from NSE.
-    Returns a dict keyed by app-key (e.g. 'nifty50') with fields:
-        value, change, percentChange, open, high, low, previousClose
-    Falls back gracefully to an empty dict on any error.
-    """
-    now = time.time()
-    with _price_lock:
-        if _price_cache["data"] and (now - _price_cache["ts"]) < _PRICE_CACHE_TTL:
-            return _price_cache["data"]
 
-    try:
-        session  = _get_session()
-        response = session.get(_INDEX_API, timeout=8)
-        response.raise_for_status()
-        raw_list = response.json().get("data", [])
-    except Exception as exc:
-        print(f"[NSE] index-data fetch failed: {exc}")
-        return _price_cache.get("data") or {}
+def _nse_get(url: str, timeout: float) -> dict:
+    session  = _get_session()
+    response = session.get(url, timeout=timeout)
+    if response.status_code in (401, 403):
+        _reset_session()
+    response.raise_for_status()
+    return response.json()
+
+
+#  Public: index prices
+
+def _fetch_index_data() -> dict:
+    raw_list = _nse_get(_INDEX_API, timeout=8).get("data", [])
 
     result: dict = {}
     for item in raw_list:
@@ -143,60 +363,30 @@ def get_nse_index_data() -> dict:
         except (TypeError, ValueError):
             continue
 
-    with _price_lock:
-        if result:                                # only update cache on success
-            _price_cache["data"] = result
-            _price_cache["ts"]   = now
-
-    return result or (_price_cache.get("data") or {})
-
+    if not result:                                # only update cache on success
+        raise ValueError("no known indices in NSE index payload")
+    return result
 
-#  Public: 1-day chart series
 
-def get_nse_chart_data(index_key: str) -> dict:
+def get_nse_index_data() -> dict:
     """
-    Fetch 1D intraday chart data for *index_key* (e.g. 'nifty50').
-    Returns:
-        {
-          "series":  [[timestamp_ms, price], ...],   # x-axis: epoch-ms
-          "open":    float,
-          "high":    float,
-          "low":     float,
-          "close":   float,
-          "change":  float,
-          "percent": float,
-        }
-    Returns an empty dict with an "error" key on failure.
+    Fetch current index prices from NSE.
+    Returns a dict keyed by app-key (e.g. 'nifty50') with fields:
+        value, change, percentChange, open, high, low, previousClose
+    Falls back gracefully to an empty dict on any error.
     """
-    now = time.time()
-    with _chart_lock:
-        cached = _chart_cache.get(index_key)
-        if cached and (now - cached["ts"]) < _CHART_CACHE_TTL:
-            return cached["data"]
+    return _price_cache.get(_PRICE_CACHE_KEY, _fetch_index_data) or {}
 
-    nse_param = KEY_TO_NSE_URL.get(index_key)
-    if not nse_param:
-        return {"error": f"Unknown index key: {index_key}"}
 
-    url = _GRAPH_API.format(nse_param)
+#  Public: 1-day chart series
 
-    try:
-        session  = _get_session()
-        response = session.get(url, timeout=10)
-        response.raise_for_status()
-        payload  = response.json()
-    except Exception as exc:
-        print(f"[NSE] chart fetch failed for {index_key}: {exc}")
-        # Return stale cache if available
-        with _chart_lock:
-            stale = _chart_cache.get(index_key)
-        return stale["data"] if stale else {"error": str(exc)}
+def _fetch_chart_data(index_key: str) -> dict:
+    payload = _nse_get(_GRAPH_API.format(KEY_TO_NSE_URL[index_key]), timeout=10)
 
     try:
         raw = payload["data"]["grapthData"]   # NSE typo is intentional
     except (KeyError, TypeError) as exc:
-        print(f"[NSE] unexpected chart payload for {index_key}: {exc}")
-        return {"error": "Unexpected NSE chart payload"}
+        raise ValueError(f"Unexpected NSE chart payload: {exc}")
 
     # gives the correct IST seconds-since-Unix-epoch equivalent.
     _MARKET_OPEN_TOT_MIN  = 9 * 60        # 09:00 IST → 540 mins
@@ -221,7 +411,7 @@ def get_nse_chart_data(index_key: str) -> dict:
         unique[ts_ms] = (ts_ms, price)
 
     if not unique:
-        return {"error": "No NM data points in NSE chart within market hours"}
+        raise ValueError("No NM data points in NSE chart within market hours")
 
     series = sorted(unique.values(), key=lambda x: x[0])  # sort by time
     prices = [p for _, p in series]
@@ -237,48 +427,44 @@ def get_nse_chart_data(index_key: str) -> dict:
                    if prices[0] != 0 else 0.0,
     }
 
-    with _chart_lock:
-        _chart_cache[index_key] = {"data": result, "ts": now}
-
     return result
 
 
-#  Public: SENSEX chart (BSE – via yfinance)
 
-_SENSEX_CACHE_KEY = "__sensex__"   # separate entry in _chart_cache
 
-def get_sensex_chart_data() -> dict:
+def get_nse_chart_data(index_key: str) -> dict:
     """
-    Fetch 1D intraday chart data for SENSEX using yfinance (^BSESN).
-    NSE's graph API returns 404 for SENSEX (it's a BSE index).
-    yfinance provides IST-aware 1-minute OHLC bars from ~9:15 AM IST.
-
-    Returns same shape as get_nse_chart_data():
+    Fetch 1D intraday chart data for *index_key* (e.g. 'nifty50').
+    Returns:
         {
-          "series":  [[epoch_ms_ist, close_price], ...],
-          "open", "high", "low", "close", "change", "percent"
+          "series":  [[timestamp_ms, price], ...],   # x-axis: epoch-ms
+          "open":    float,
+          "high":    float,
+          "low":     float,
+          "close":   float,
+          "change":  float,
+          "percent": float,
         }
-    Returns {"error": ...} on failure.
+    Returns an empty dict with an "error" key on failure.
     """
-    import yfinance as yf  # lazy import – only used for sensex
+    if index_key not in KEY_TO_NSE_URL:
+        return {"error": f"Unknown index key: {index_key}"}
 
-    now = time.time()
-    with _chart_lock:
-        cached = _chart_cache.get(_SENSEX_CACHE_KEY)
-        if cached and (now - cached["ts"]) < _CHART_CACHE_TTL:
-            return cached["data"]
+    data = _chart_cache.get(index_key, lambda: _fetch_chart_data(index_key))
+    return data if data is not None else {"error": _chart_cache.last_error(index_key) or "NSE chart unavailable"}
 
-    try:
-        ticker = yf.Ticker("^BSESN")
-        hist   = ticker.history(period="1d", interval="1m")
-    except Exception as exc:
-        print(f"[yfinance] SENSEX fetch failed: {exc}")
-        with _chart_lock:
-            stale = _chart_cache.get(_SENSEX_CACHE_KEY)
-        return stale["data"] if stale else {"error": str(exc)}
+
+#  Public: SENSEX chart (BSE – via yfinance)
+
+_SENSEX_CACHE_KEY = "__sensex__"   # separate entry in _chart_cache
+
+def _fetch_sensex_chart_data() -> dict:
+    import yfinance as yf  # lazy import – only used for sensex
+
+    hist = yf.Ticker("^BSESN").history(period="1d", interval="1m")
 
     if hist.empty:
-        return {"error": "yfinance returned empty SENSEX data"}
+        raise ValueError("yfinance returned empty SENSEX data")
 
     # Epoch-ms in IST = timestamp converted to UTC+5:30 numerically.
     _MARKET_OPEN_TOT_MIN  = 9 * 60 + 15   # 09:15 IST (BSE opens 9:15)
@@ -298,7 +484,7 @@ def get_sensex_chart_data() -> dict:
         series.append([epoch_ms_ist, round(price, 2)])
 
     if not series:
-        return {"error": "No SENSEX data within market hours"}
+        raise ValueError("No SENSEX data within market hours")
 
     prices = [p for _, p in series]
     result = {
@@ -312,7 +498,21 @@ def get_sensex_chart_data() -> dict:
                    if prices[0] != 0 else 0.0,
     }
 
-    with _chart_lock:
-        _chart_cache[_SENSEX_CACHE_KEY] = {"data": result, "ts": now}
-
     return result
+
+
+def get_sensex_chart_data() -> dict:
+    """
+    Fetch 1D intraday chart data for SENSEX using yfinance (^BSESN).
+    NSE's graph API returns 404 for SENSEX (it's a BSE index).
+    yfinance provides IST-aware 1-minute OHLC bars from ~9:15 AM IST.
+
+    Returns same shape as get_nse_chart_data():
+        {
+          "series":  [[epoch_ms_ist, close_price], ...],
+          "open", "high", "low", "close", "change", "percent"
+        }
+    Returns {"error": ...} on failure.
+    """
+    data = _chart_cache.get(_SENSEX_CACHE_KEY, _fetch_sensex_chart_data)
+    return data if data is not None else {"error": _chart_cache.last_error(_SENSEX_CACHE_KEY) or "SENSEX chart unavailable"}
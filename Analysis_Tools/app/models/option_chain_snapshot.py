@@ -0,0 +1,348 @@
+# =============================================================
+#  OPTION CHAIN SNAPSHOT MODULE
+#  Purpose: Per-(ticker, date) option-chain snapshot for stock pages
+#
+#  The FO pipeline (Database/FO/option_chain_snapshot_cache.py)
+#  materializes, for every ticker and trading day, one record holding:
+#    - the full chain with prev-day OI / price deltas and greeks,
+#      grouped by expiry
+#    - the per-expiry futures summary (price, change, volume, OI)
+#    - the OI / PCR / max-strike stats per expiry (and for all expiries)
+#  as zlib-compressed JSON in `option_chain_snapshot`. The stock page
+#  loads that single row and slices the selected expiry in memory;
+#  stock_model falls back to the live queries when no snapshot exists.
+#
+#  The row layouts are exactly the tuples stock_model caches, so both
+#  paths render identically.
+# =============================================================
+
+import json
+import zlib
+from typing import Dict, Optional
+
+import pandas as pd
+from sqlalchemy import text
+
+SNAPSHOT_TABLE = "option_chain_snapshot"
+SNAPSHOT_VERSION = 1
+
+GREEK_COLUMNS = ["Delta", "Vega", "Gamma", "Theta", "IV"]
+
+
+def expiry_key(value) -> str:
+    """Normalize an expiry (date / timestamp / text) to YYYY-MM-DD; '' for none."""
+    if value is None or value == "" or (not isinstance(value, str) and pd.isna(value)):
+        return ""
+    try:
+        return pd.to_datetime(value).strftime("%Y-%m-%d")
+    except Exception:
+        return str(value)
+
+
+# =============================================================
+# ROW BUILDERS (shared with stock_model's live path)
+# =============================================================
+
+
+def _safe_pct(curr, prev):
+    try:
+        if pd.isna(prev) or prev == 0:
+            return None
+        return round((curr - prev) / prev * 100, 2)
+    except Exception:
+        return None
+
+
+def chain_row_tuples(merged: pd.DataFrame) -> tuple:
+    """
+    Option-chain rows (current day merged with PrevOI / PrevLastPric) ->
+    tuples of (BizDt, Expiry, Strike, OptnTp, OI, OI chg, Volume, Close,
+    Underlying, Delta, Vega, Gamma, Theta, IV%, PrevOI, PrevPrice, OI chg%,
+    Price chg%).
+    """
+    result = []
+    for r in merged.to_dict("records"):
+        oi = int(r.get("OpnIntrst")) if pd.notna(r.get("OpnIntrst")) else None
+        prev_oi = int(r.get("PrevOI")) if pd.notna(r.get("PrevOI")) else None
+        prev_price = float(r.get("PrevLastPric")) if pd.notna(r.get("PrevLastPric")) else None
+        result.append(
+            (
+                str(r.get("BizDt")) if r.get("BizDt") is not None else None,
+                str(r.get("FininstrmActlXpryDt")) if r.get("FininstrmActlXpryDt") is not None else None,
+                r.get("StrkPric"),
+                r.get("OptnTp") if pd.notna(r.get("OptnTp")) else None,
+                oi,
+                int(r.get("ChngInOpnIntrst")) if pd.notna(r.get("ChngInOpnIntrst")) else None,
+                int(r.get("TtlTradgVol")) if pd.notna(r.get("TtlTradgVol")) else None,
+                float(r.get("ClsPric")) if pd.notna(r.get("ClsPric")) else None,
+                float(r.get("UndrlygPric")) if pd.notna(r.get("UndrlygPric")) else None,
+                round(float(r.get("Delta")), 4) if "Delta" in r and pd.notna(r.get("Delta")) else None,
+                round(float(r.get("Vega")), 4) if "Vega" in r and pd.notna(r.get("Vega")) else None,
+                round(float(r.get("Gamma")), 6) if "Gamma" in r and pd.notna(r.get("Gamma")) else None,
+                round(float(r.get("Theta")), 6) if "Theta" in r and pd.notna(r.get("Theta")) else None,
+                round(float(r.get("IV")) * 100, 2) if "IV" in r and pd.notna(r.get("IV")) else None,
+                prev_oi,
+                prev_price,
+                _safe_pct(oi, prev_oi),
+                _safe_pct(
+                    float(r.get("ClsPric"))
+                    if pd.notna(r.get("ClsPric"))
+                    else (r.get("LastPric") if r.get("LastPric") is not None else None),
+                    prev_price,
+                ),
+            )
+        )
+    return tuple(result)
+
+
+def _futures_by_expiry(df: pd.DataFrame) -> pd.DataFrame:
+    """One futures row per expiry (highest close), like DISTINCT ON (expiry) ... ClsPric DESC."""
+    fut = df[df["OptnTp"].isna() & df["FininstrmActlXpryDt"].notna()].copy()
+    fut["expiry"] = fut["FininstrmActlXpryDt"].map(expiry_key)
+    return fut.sort_values(["expiry", "ClsPric"], ascending=[True, False]).drop_duplicates("expiry")
+
+
+def expiry_row_tuples(df_curr: pd.DataFrame, df_prev: pd.DataFrame) -> tuple:
+    """(expiry, price, price_chg%, options volume, futures OI, futures OI chg) per expiry."""
+    fut = _futures_by_expiry(df_curr)
+    if fut.empty:
+        return tuple()
+
+    opts = df_curr[df_curr["OptnTp"].isin(["CE", "PE"]) & df_curr["FininstrmActlXpryDt"].notna()]
+    volume = opts.groupby(opts["FininstrmActlXpryDt"].map(expiry_key))["TtlTradgVol"].sum()
+
+    prev_prices = {}
+    if df_prev is not None and not df_prev.empty:
+        prev_fut = _futures_by_expiry(df_prev)
+        prev_prices = dict(zip(prev_fut["expiry"], prev_fut["ClsPric"].astype(float)))
+
+    result = []
+    for r in fut.to_dict("records"):
+        expiry = r["expiry"]
+        curr_price = float(r["ClsPric"]) if pd.notna(r["ClsPric"]) else 0
+        prev_price = prev_prices.get(expiry, 0)
+        price_chg = ((curr_price - prev_price) / prev_price) * 100 if prev_price > 0 and curr_price > 0 else 0
+        vol = volume.get(expiry)
+        result.append(
+            (
+                expiry,
+                curr_price,
+                round(price_chg, 2),
+                int(vol) if vol is not None and pd.notna(vol) else 0,
+                int(r["OpnIntrst"]) if pd.notna(r["OpnIntrst"]) else 0,
+                int(r["ChngInOpnIntrst"]) if pd.notna(r["ChngInOpnIntrst"]) else 0,
+            )
+        )
+    return tuple(result)
+
+
+def stats_tuple(df: pd.DataFrame) -> Optional[tuple]:
+    """
+    OI / PCR / trend / avg IV / max-strike stats over the given rows, in
+    the layout of stock_model._get_stock_stats_cached.
+    """
+    ce = df[df["OptnTp"] == "CE"]
+    pe = df[df["OptnTp"] == "PE"]
+
+    def _sum(frame, col):
+        return int(frame[col].fillna(0).round().sum()) if not frame.empty else 0
+
+    total_ce_oi, total_pe_oi = _sum(ce, "OpnIntrst"), _sum(pe, "OpnIntrst")
+    total_ce_oi_chg, total_pe_oi_chg = _sum(ce, "ChngInOpnIntrst"), _sum(pe, "ChngInOpnIntrst")
+    diff_pe_ce_oi = total_pe_oi - total_ce_oi
+    diff_pe_ce_oi_chg = total_pe_oi_chg - total_ce_oi_chg
+
+    if total_ce_oi == 0 and total_pe_oi == 0:
+        pcr_oi = 0
+        trend_oi = "Neutral"
+    else:
+        pcr_oi = total_pe_oi / total_ce_oi if total_ce_oi > 0 else 0
+        trend_oi = "Bullish" if pcr_oi > 1 else "Bearish" if pcr_oi < 1 else "Neutral"
+
+    if total_ce_oi_chg == 0 and total_pe_oi_chg == 0:
+        trend_oi_chg = "Neutral"
+    else:
+        trend_oi_chg = "Bullish" if diff_pe_ce_oi_chg > 0 else "Bearish" if diff_pe_ce_oi_chg < 0 else "Neutral"
+
+    def _strike(frame, col, by_abs=False):
+        values = frame[col].fillna(0).round()
+        values = values[values != 0] if by_abs else values[values > 0]
+        if values.empty:
+            return None
+        idx = (values.abs() if by_abs else values).idxmax()
+        strike = frame.at[idx, "StrkPric"]
+        return int(float(strike)) if pd.notna(strike) else None
+
+    max_strikes = (None, None, None, None)
+    if total_ce_oi > 0 or total_pe_oi > 0 or total_ce_oi_chg != 0 or total_pe_oi_chg != 0:
+        max_strikes = (
+            _strike(ce, "OpnIntrst"),
+            _strike(ce, "ChngInOpnIntrst", by_abs=True),
+            _strike(pe, "OpnIntrst"),
+            _strike(pe, "ChngInOpnIntrst", by_abs=True),
+        )
+
+    avg_iv = 0
+    if "IV" in df.columns:
+        iv = df.loc[df["OptnTp"].isin(["CE", "PE"]), "IV"].dropna()
+        avg_iv = round(float(iv.mean()), 2) if not iv.empty else 0
+
+    return (
+        total_ce_oi,
+        total_pe_oi,
+        total_ce_oi_chg,
+        total_pe_oi_chg,
+        diff_pe_ce_oi,
+        diff_pe_ce_oi_chg,
+        trend_oi,
+        trend_oi_chg,
+        pcr_oi,
+        avg_iv,
+    ) + max_strikes
+
+
+# =============================================================
+# SNAPSHOT PAYLOAD
+# =============================================================
+
+
+def _merge_prev(df_curr: pd.DataFrame, df_prev: pd.DataFrame) -> pd.DataFrame:
+    """Current rows + PrevOI / PrevLastPric from the same expiry, strike and option type."""
+    keys = ["_expiry", "StrkPric", "OptnTp"]
+    curr = df_curr.assign(_expiry=df_curr["FininstrmActlXpryDt"].map(expiry_key))
+    if df_prev is None or df_prev.empty:
+        return curr.assign(PrevOI=None, PrevLastPric=None)
+    prev = df_prev[df_prev["OptnTp"].notna()].assign(_expiry=df_prev["FininstrmActlXpryDt"].map(expiry_key))
+    prev = prev.rename(columns={"OpnIntrst": "PrevOI", "LastPric": "PrevLastPric"})
+    prev = prev[keys + ["PrevOI", "PrevLastPric"]].drop_duplicates(keys)
+    return curr.merge(prev, on=keys, how="left")
+
+
+def build_snapshot_payload(df_curr: pd.DataFrame, df_prev: Optional[pd.DataFrame], prev_date: str = "") -> dict:
+    """
+    df_curr / df_prev: one day's rows of TBL_<T>_DERIVED (or TBL_<T>) with
+    BizDt, FininstrmActlXpryDt, StrkPric, OptnTp, OpnIntrst, ChngInOpnIntrst,
+    TtlTradgVol, ClsPric, UndrlygPric, LastPric and any of GREEK_COLUMNS.
+    """
+    numeric = ["StrkPric", "OpnIntrst", "ChngInOpnIntrst", "TtlTradgVol", "ClsPric", "UndrlygPric", "LastPric"]
+    for frame in (df_curr, df_prev):
+        if frame is None:
+            continue
+        for c in numeric + GREEK_COLUMNS:
+            if c in frame.columns:
+                frame[c] = pd.to_numeric(frame[c], errors="coerce")
+
+    merged = _merge_prev(df_curr, df_prev).sort_values(["StrkPric", "OptnTp"], na_position="last")
+
+    chain: Dict[str, list] = {}
+    stats: Dict[str, tuple] = {"": stats_tuple(df_curr)}
+    for key, group in merged.groupby("_expiry", sort=True):
+        chain[key] = chain_row_tuples(group)
+        stats[key] = stats_tuple(group)
+
+    return {
+        "v": SNAPSHOT_VERSION,
+        "prev_date": prev_date or "",
+        "chain": chain,
+        "expiries": expiry_row_tuples(df_curr, df_prev),
+        "stats": stats,
+    }
+
+
+def _json_default(value):
+    if hasattr(value, "item"):
+        return value.item()  # numpy scalars
+    return str(value)
+
+
+def encode_payload(payload: dict) -> bytes:
+    # NaN round-trips as a JSON NaN token, matching what the live path returns
+    raw = json.dumps(payload, default=_json_default, separators=(",", ":"))
+    return zlib.compress(raw.encode("utf-8"), 6)
+
+
+class ChainSnapshot:
+    """Decoded snapshot; slices are returned as the tuples stock_model caches."""
+
+    def __init__(self, blob: bytes):
+        payload = json.loads(zlib.decompress(blob).decode("utf-8"))
+        self.prev_date = payload.get("prev_date", "")
+        self._chain = {k: [tuple(r) for r in rows] for k, rows in payload["chain"].items()}
+        self._expiries = tuple(tuple(r) for r in payload["expiries"])
+        self._stats = {k: (tuple(v) if v is not None else None) for k, v in payload["stats"].items()}
+
+    def chain(self, expiry: Optional[str] = None) -> tuple:
+        if expiry:
+            return tuple(self._chain.get(expiry_key(expiry), ()))
+        rows = [r for key in sorted(self._chain) for r in self._chain[key]]
+        # Strike then option type, futures / blank strikes last (ORDER BY "StrkPric", "OptnTp")
+        return tuple(sorted(rows, key=lambda r: (pd.isna(r[2]), 0 if pd.isna(r[2]) else r[2], r[3] is None, r[3] or "")))
+
+    def expiries(self) -> tuple:
+        return self._expiries
+
+    def stats(self, expiry: Optional[str] = None) -> Optional[tuple]:
+        return self._stats.get(expiry_key(expiry) if expiry else "")
+
+
+# =============================================================
+# STORAGE
+# =============================================================
+
+
+def create_snapshot_table(engine_instance):
+    with engine_instance.begin() as conn:
+        conn.execute(
+            text(
+                f"""
+                CREATE TABLE IF NOT EXISTS public.{SNAPSHOT_TABLE} (
+                    ticker VARCHAR(50) NOT NULL,
+                    biz_date DATE NOT NULL,
+                    prev_date DATE,
+                    payload BYTEA NOT NULL,
+                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                    PRIMARY KEY (ticker, biz_date)
+                )
+            """
+            )
+        )
+
+
+def save_snapshot(conn, ticker: str, biz_date: str, prev_date: str, payload: dict):
+    conn.execute(
+        text(
+            f"""
+            INSERT INTO public.{SNAPSHOT_TABLE} (ticker, biz_date, prev_date, payload, created_at)
+            VALUES (:ticker, :biz_date, :prev_date, :payload, CURRENT_TIMESTAMP)
+            ON CONFLICT (ticker, biz_date) DO UPDATE SET
+                prev_date = EXCLUDED.prev_date,
+                payload = EXCLUDED.payload,
+                created_at = EXCLUDED.created_at
+        """
+        ),
+        {"ticker": ticker, "biz_date": biz_date, "prev_date": prev_date or None, "payload": encode_payload(payload)},
+    )
+
+
+def load_snapshot(engine_instance, ticker: str, biz_date: str) -> Optional[ChainSnapshot]:
+    """Snapshot for (ticker, date), or None when absent / table missing."""
+    try:
+        with engine_instance.connect() as conn:
+            blob = conn.execute(
+                text(f"SELECT payload FROM public.{SNAPSHOT_TABLE} WHERE ticker = :t AND biz_date = :d"),
+                {"t": ticker, "d": biz_date},
+            ).scalar()
+        return ChainSnapshot(bytes(blob)) if blob is not None else None
+    except Exception as e:
+        print(f"[WARN] load_snapshot({ticker},{biz_date}): {e}")
+        return None
+
+
+def snapshot_keys(engine_instance) -> set:
+    """{(YYYY-MM-DD, ticker)} already materialized."""
+    try:
+        with engine_instance.connect() as conn:
+            rows = conn.execute(text(f"SELECT biz_date::text, ticker FROM public.{SNAPSHOT_TABLE}")).fetchall()
+        return {(r[0], r[1]) for r in rows}
+    except Exception:
+        return set()
@@ -0,0 +1,242 @@
+# =============================================================
+#  SCHEMA CATALOG MODULE
+#  Purpose: Single in-process catalog of tables, columns, tickers and
+#  greek availability for the F&O and Cash databases.
+#
+#  One information_schema.columns query loads the whole public schema;
+#  every lookup after that is a dict / set hit. The catalog reloads when
+#  the pipeline bumps the version row in `schema_catalog_version`
+#  (see bump_catalog_version), or after SCHEMA_CATALOG_TTL as a fallback
+#  on databases that do not have the version table yet.
+# =============================================================
+
+import threading
+import time
+from typing import Dict, FrozenSet, List, Optional
+
+from sqlalchemy import text
+
+from .db_config import engine, engine_cash
+
+# =============================================================
+# CONFIGURATION
+# =============================================================
+
+SCHEMA_CATALOG_TTL = 300  # Full reload at least every 5 minutes without a version table
+CATALOG_VERSION_CHECK_TTL = 30  # How often to poll the version row
+
+VERSION_TABLE = "schema_catalog_version"
+
+GREEK_COLUMNS = ("delta", "gamma", "vega", "theta", "rho", "iv")
+
+
+# =============================================================
+# CATALOG SNAPSHOT
+# =============================================================
+
+
+class SchemaCatalog:
+    """Immutable snapshot of one database's public schema."""
+
+    def __init__(self, columns_by_table: Dict[str, List[str]], version: Optional[int] = None):
+        self.version = version
+        self.loaded_at = time.time()
+
+        self._columns = {t: list(cols) for t, cols in columns_by_table.items()}
+        self._columns_lower = {t: frozenset(c.lower() for c in cols) for t, cols in self._columns.items()}
+        self.tables = frozenset(self._columns)
+        self._sorted_tables = sorted(self.tables)
+
+        self.derived_tables = sorted(t for t in self.tables if t.startswith("TBL_") and t.endswith("_DERIVED"))
+        self.base_tables = sorted(t for t in self.tables if t.startswith("TBL_") and not t.endswith("_DERIVED"))
+
+        # TBL_<TICKER>_DERIVED -> TICKER
+        self.tickers = [t[4:-8] for t in self.derived_tables]
+        self.base_tickers = [t[4:] for t in self.base_tables]
+        self._ticker_set = frozenset(self.tickers)
+
+        self._greeks = {
+            t[4:-8]: frozenset(g for g in GREEK_COLUMNS if g in self._columns_lower[t]) for t in self.derived_tables
+        }
+
+    # ---------------------------------------------------------
+    # Lookups
+    # ---------------------------------------------------------
+
+    def has_table(self, table_name: str) -> bool:
+        return table_name in self.tables
+
+    def columns(self, table_name: str) -> List[str]:
+        return list(self._columns.get(table_name, []))
+
+    def has_column(self, table_name: str, column: str) -> bool:
+        return column.lower() in self._columns_lower.get(table_name, frozenset())
+
+    def has_ticker(self, ticker: str) -> bool:
+        """True if TBL_<TICKER>_DERIVED exists."""
+        return ticker in self._ticker_set
+
+    def greeks(self, ticker: str) -> FrozenSet[str]:
+        """Lower-case greek columns available in TBL_<TICKER>_DERIVED."""
+        return self._greeks.get(ticker, frozenset())
+
+    def table_names(self) -> List[str]:
+        return list(self._sorted_tables)
+
+
+# =============================================================
+# LOADERS
+# =============================================================
+
+
+def _load_columns(engine_instance) -> Dict[str, List[str]]:
+    """All public tables/views with their columns in ordinal order."""
+    columns: Dict[str, List[str]] = {}
+    with engine_instance.connect() as conn:
+        rows = conn.execute(
+            text(
+                """
+                SELECT table_name, column_name
+                FROM information_schema.columns
+                WHERE table_schema = 'public'
+                ORDER BY table_name, ordinal_position
+            """
+            )
+        ).fetchall()
+    for table_name, column_name in rows:
+        columns.setdefault(table_name, []).append(column_name)
+    return columns
+
+
+def _read_version(engine_instance) -> Optional[int]:
+    """Current catalog version, or None when the version table does not exist."""
+    try:
+        with engine_instance.connect() as conn:
+            exists = conn.execute(text("SELECT to_regclass(:t)"), {"t": f"public.{VERSION_TABLE}"}).scalar()
+            if not exists:
+                return None
+            return conn.execute(text(f"SELECT version FROM public.{VERSION_TABLE} WHERE id = 1")).scalar()
+    except Exception as e:
+        print(f"[WARN] schema_catalog._read_version(): {e}")
+        return None
+
+
+# =============================================================
+# SHARED CATALOGS (one per engine)
+# =============================================================
+
+_catalogs: Dict[int, SchemaCatalog] = {}
+_catalog_checked_at: Dict[int, float] = {}
+_catalog_lock = threading.Lock()
+
+
+def _needs_reload(catalog: Optional[SchemaCatalog], version: Optional[int], now: float) -> bool:
+    if catalog is None:
+        return True
+    if version is None:
+        return (now - catalog.loaded_at) > SCHEMA_CATALOG_TTL
+    return version != catalog.version
+
+
+def get_catalog(engine_instance=None) -> SchemaCatalog:
+    """
+    Return the catalog for an engine (defaults to the F&O engine).
+    Polls the version row at most every CATALOG_VERSION_CHECK_TTL seconds.
+    """
+    engine_instance = engine_instance or engine
+    key = id(engine_instance)
+    now = time.time()
+
+    catalog = _catalogs.get(key)
+    if catalog is not None and (now - _catalog_checked_at.get(key, 0.0)) < CATALOG_VERSION_CHECK_TTL:
+        return catalog
+
+    with _catalog_lock:
+        catalog = _catalogs.get(key)
+        if catalog is not None and (time.time() - _catalog_checked_at.get(key, 0.0)) < CATALOG_VERSION_CHECK_TTL:
+            return catalog
+
+        version = _read_version(engine_instance)
+        if _needs_reload(catalog, version, now):
+            try:
+                catalog = SchemaCatalog(_load_columns(engine_instance), version)
+                _catalogs[key] = catalog
+            except Exception as e:
+                print(f"[WARNING] Could not load schema catalog: {e}")
+                if catalog is None:
+                    return SchemaCatalog({})
+        _catalog_checked_at[key] = time.time()
+        return catalog
+
+
+def clear_catalog_cache(engine_instance=None):
+    """Drop cached catalogs (all engines when engine_instance is None)."""
+    with _catalog_lock:
+        if engine_instance is None:
+            _catalogs.clear()
+            _catalog_checked_at.clear()
+        else:
+            _catalogs.pop(id(engine_instance), None)
+            _catalog_checked_at.pop(id(engine_instance), None)
+    print("[INFO] Schema catalog cache cleared")
+
+
+def bump_catalog_version(engine_instance=None) -> Optional[int]:
+    """
+    Called by the ingestion pipeline after creating/altering tables.
+    Increments the version row so every running app reloads its catalog
+    on the next poll.
+    """
+    engine_instance = engine_instance or engine
+    try:
+        with engine_instance.begin() as conn:
+            conn.execute(
+                text(
+                    f"""
+                    CREATE TABLE IF NOT EXISTS public.{VERSION_TABLE} (
+                        id INTEGER PRIMARY KEY,
+                        version BIGINT NOT NULL,
+                        updated_at TIMESTAMP NOT NULL DEFAULT NOW()
+                    )
+                """
+                )
+            )
+            version = conn.execute(
+                text(
+                    f"""
+                    INSERT INTO public.{VERSION_TABLE} (id, version, updated_at)
+                    VALUES (1, 1, NOW())
+                    ON CONFLICT (id) DO UPDATE
+                    SET version = {VERSION_TABLE}.version + 1, updated_at = NOW()
+                    RETURNING version
+                """
+                )
+            ).scalar()
+        clear_catalog_cache(engine_instance)
+        return version
+    except Exception as e:
+        print(f"[ERROR] bump_catalog_version(): {e}")
+        return None
+
+
+# =============================================================
+# CONVENIENCE WRAPPERS
+# =============================================================
+
+
+def table_exists(table_name: str, engine_instance=None) -> bool:
+    return get_catalog(engine_instance).has_table(table_name)
+
+
+def get_table_columns(table_name: str, engine_instance=None) -> List[str]:
+    return get_catalog(engine_instance).columns(table_name)
+
+
+def get_derived_tickers() -> List[str]:
+    """Tickers with a TBL_<TICKER>_DERIVED table in the F&O database."""
+    return list(get_catalog(engine).tickers)
+
+
+def get_cash_tickers() -> List[str]:
+    """Tickers with a TBL_<TICKER> table in the Cash database."""
+    return list(get_catalog(engine_cash).base_tickers)
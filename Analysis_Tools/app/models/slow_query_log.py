@@ -0,0 +1,295 @@
+# =============================================================
+#  SLOW QUERY LOG
+#  Purpose: Find the dynamic per-ticker SQL that misses indexes
+#
+#  Opt-in (SLOW_QUERY_LOG=1). db_config attaches cursor events to the
+#  shared engines; statements slower than SLOW_QUERY_MS are normalized
+#  into a "shape" (per-ticker table names collapsed to TBL_<T>,
+#  literals / bind params to ?, IN lists to IN (?+)) and aggregated.
+#
+#  The first time a SELECT shape is seen, a background thread runs
+#  EXPLAIN (ANALYZE off, FORMAT JSON) for it on a separate raw
+#  connection and keeps a plan summary (cost, node types, seq scans),
+#  so the request that hit it is not slowed down. Casts on columns
+#  (CAST("BizDt" AS DATE), "BizDt"::DATE) are listed as hints since
+#  they prevent plain btree index use.
+#
+#  get_slow_query_report() returns the top shapes by total time;
+#  SLOW_QUERY_LOG_PATH (optional) appends each new shape as JSON lines.
+# =============================================================
+
+import json
+import os
+import queue
+import re
+import threading
+import time
+from typing import Dict, List, Optional
+
+from sqlalchemy import event
+
+# =============================================================
+# CONFIGURATION
+# =============================================================
+
+SLOW_QUERY_LOG_ENABLED = os.getenv("SLOW_QUERY_LOG", "0") == "1"
+SLOW_QUERY_MS = float(os.getenv("SLOW_QUERY_MS", "200"))
+SLOW_QUERY_LOG_PATH = os.getenv("SLOW_QUERY_LOG_PATH", "")
+SLOW_QUERY_MAX_SHAPES = 500  # New shapes beyond this are ignored
+EXPLAIN_TIMEOUT_MS = 5000
+
+# =============================================================
+# NORMALIZATION
+# =============================================================
+
+_RE_TICKER_TABLE = re.compile(r'"TBL_[^"]*?(_DERIVED)?"')
+_RE_STRING = re.compile(r"'(?:[^']|'')*'")
+_RE_PARAM = re.compile(r"%\(\w+\)s|%s")  # psycopg2 paramstyle (text() :name is rendered to this)
+_RE_NUMBER = re.compile(r"(?<![\w\"])\d+(?:\.\d+)?\b")
+_RE_IN_LIST = re.compile(r"\bIN\s*\(\s*\?(?:\s*,\s*\?)*\s*\)", re.IGNORECASE)
+_RE_VALUES = re.compile(r"(\(\?(?:, \?)*\))(?:, \(\?(?:, \?)*\))+")
+_RE_SPACE = re.compile(r"\s+")
+
+_RE_CAST_FN = re.compile(r'CAST\(\s*"(\w+)"\s+AS\s+(\w+)', re.IGNORECASE)
+_RE_CAST_OP = re.compile(r'"(\w+)"\s*::\s*(\w+)')
+
+
+def normalize_sql(statement: str) -> str:
+    """Collapse a statement to its shape: same query for any ticker / literal values."""
+    sql = _RE_TICKER_TABLE.sub(lambda m: f'"TBL_<T>{m.group(1) or ""}"', statement)
+    sql = _RE_STRING.sub("?", sql)
+    sql = _RE_PARAM.sub("?", sql)
+    sql = _RE_NUMBER.sub("?", sql)
+    sql = _RE_SPACE.sub(" ", sql).strip()
+    sql = _RE_IN_LIST.sub("IN (?+)", sql)
+    sql = _RE_VALUES.sub(r"\1, ...", sql)
+    return sql
+
+
+def cast_hints(shape: str) -> List[str]:
+    """Columns wrapped in casts ("BizDt::DATE") - candidates for expression indexes or rewrites."""
+    hints = {f"{col}::{typ.upper()}" for col, typ in _RE_CAST_FN.findall(shape)}
+    hints.update(f"{col}::{typ.upper()}" for col, typ in _RE_CAST_OP.findall(shape))
+    return sorted(hints)
+
+
+# =============================================================
+# PLAN SUMMARY
+# =============================================================
+
+
+def summarize_plan(plan_json) -> Dict:
+    """Cost / rows of the root node, node types used, relations read by Seq Scan vs index."""
+    if isinstance(plan_json, str):
+        plan_json = json.loads(plan_json)
+    root = plan_json[0]["Plan"]
+    nodes, seq_scans, index_scans = set(), set(), set()
+
+    stack = [root]
+    while stack:
+        node = stack.pop()
+        node_type = node.get("Node Type", "")
+        nodes.add(node_type)
+        relation = node.get("Relation Name")
+        if relation:
+            if node_type == "Seq Scan":
+                seq_scans.add(relation)
+            elif "Index" in node_type or "Bitmap" in node_type:
+                index_scans.add(relation)
+        stack.extend(node.get("Plans", []))
+
+    return {
+        "total_cost": root.get("Total Cost"),
+        "plan_rows": root.get("Plan Rows"),
+        "nodes": sorted(nodes),
+        "seq_scans": sorted(seq_scans),
+        "index_scans": sorted(index_scans),
+    }
+
+
+# =============================================================
+# STORE
+# =============================================================
+
+
+class SlowQueryLog:
+    """Aggregated slow statements by normalized shape, with one EXPLAIN per shape."""
+
+    def __init__(self, threshold_ms: float = SLOW_QUERY_MS, log_path: str = SLOW_QUERY_LOG_PATH):
+        self.threshold = threshold_ms / 1000.0
+        self.log_path = log_path
+        self.shapes: Dict[str, Dict] = {}
+        self._lock = threading.Lock()
+        self._explain_queue: "queue.Queue" = queue.Queue()
+        self._worker: Optional[threading.Thread] = None
+
+    # ---------------------------------------------------------
+    # Capture
+    # ---------------------------------------------------------
+
+    def attach(self, engine, label: str):
+        """Time every cursor execute on `engine`; record the ones over the threshold."""
+
+        @event.listens_for(engine, "before_cursor_execute")
+        def _before(conn, cursor, statement, parameters, context, executemany):
+            conn.info.setdefault("slow_query_start", []).append(time.perf_counter())
+
+        @event.listens_for(engine, "after_cursor_execute")
+        def _after(conn, cursor, statement, parameters, context, executemany):
+            starts = conn.info.get("slow_query_start")
+            if not starts:
+                return
+            elapsed = time.perf_counter() - starts.pop()
+            if elapsed >= self.threshold:
+                self.record(engine, label, statement, parameters, elapsed, executemany)
+
+        @event.listens_for(engine, "handle_error")
+        def _error(context):
+            conn = context.connection
+            if conn is not None and conn.info.get("slow_query_start"):
+                conn.info["slow_query_start"].pop()
+
+    def record(self, engine, label: str, statement: str, parameters, elapsed: float, executemany: bool = False):
+        shape = normalize_sql(statement)
+        key = f"{label}:{shape}"
+        is_new = False
+        with self._lock:
+            entry = self.shapes.get(key)
+            if entry is None:
+                if len(self.shapes) >= SLOW_QUERY_MAX_SHAPES:
+                    return
+                entry = self.shapes[key] = {
+                    "db": label,
+                    "shape": shape,
+                    "count": 0,
+                    "total_s": 0.0,
+                    "max_s": 0.0,
+                    "first_seen": time.strftime("%Y-%m-%d %H:%M:%S"),
+                    "sample": statement.strip()[:2000],
+                    "hints": cast_hints(shape),
+                    "plan": None,
+                }
+                is_new = True
+            entry["count"] += 1
+            entry["total_s"] += elapsed
+            entry["max_s"] = max(entry["max_s"], elapsed)
+            entry["last_seen"] = time.strftime("%Y-%m-%d %H:%M:%S")
+
+        if is_new:
+            print(f"[WARN] Slow query ({elapsed * 1000:.0f}ms, {label}): {shape[:160]}")
+            if not executemany and shape.lstrip("( ").upper().startswith(("SELECT", "WITH")):
+                self._explain_queue.put((engine, key, statement, parameters))
+                self._ensure_worker()
+            else:
+                self._write_log(key)
+
+    # ---------------------------------------------------------
+    # EXPLAIN (background)
+    # ---------------------------------------------------------
+
+    def _ensure_worker(self):
+        if self._worker is None or not self._worker.is_alive():
+            self._worker = threading.Thread(target=self._explain_loop, name="slow-query-explain", daemon=True)
+            self._worker.start()
+
+    def _explain_loop(self):
+        while True:
+            engine, key, statement, parameters = self._explain_queue.get()
+            plan = self._explain(engine, statement, parameters)
+            with self._lock:
+                if key in self.shapes:
+                    self.shapes[key]["plan"] = plan
+            self._write_log(key)
+
+    @staticmethod
+    def _explain(engine, statement: str, parameters) -> Dict:
+        # Raw DBAPI connection: no engine events, so EXPLAIN is not timed / logged itself
+        raw = engine.raw_connection()
+        try:
+            cur = raw.cursor()
+            cur.execute(f"SET LOCAL statement_timeout = {EXPLAIN_TIMEOUT_MS}")
+            cur.execute("EXPLAIN (ANALYZE off, FORMAT JSON) " + statement, parameters or None)
+            plan = summarize_plan(cur.fetchone()[0])
+            cur.close()
+            return plan
+        except Exception as e:
+            return {"error": str(e).strip().splitlines()[0] if str(e).strip() else type(e).__name__}
+        finally:
+            try:
+                raw.rollback()
+            except Exception:
+                pass
+            raw.close()
+
+    def _write_log(self, key: str):
+        if not self.log_path:
+            return
+        with self._lock:
+            entry = dict(self.shapes.get(key) or {})
+        if not entry:
+            return
+        try:
+            with open(self.log_path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(entry, default=str) + "\n")
+        except Exception as e:
+            print(f"[WARN] Could not write slow query log {self.log_path}: {e}")
+
+    # ---------------------------------------------------------
+    # Report
+    # ---------------------------------------------------------
+
+    def report(self, limit: int = 20) -> List[Dict]:
+        """Top shapes by total time spent above the threshold."""
+        with self._lock:
+            entries = [dict(e) for e in self.shapes.values()]
+        entries.sort(key=lambda e: e["total_s"], reverse=True)
+        for e in entries:
+            e["total_ms"] = round(e.pop("total_s") * 1000, 1)
+            e["max_ms"] = round(e.pop("max_s") * 1000, 1)
+            e["avg_ms"] = round(e["total_ms"] / e["count"], 1) if e["count"] else 0.0
+        return entries[:limit]
+
+    def reset(self):
+        with self._lock:
+            self.shapes.clear()
+
+
+_log: Optional[SlowQueryLog] = None
+
+
+def enable_slow_query_log(engines: Dict[str, object], threshold_ms: float = SLOW_QUERY_MS) -> SlowQueryLog:
+    """Attach the (process-wide) slow query log to each {label: engine}."""
+    global _log
+    if _log is None:
+        _log = SlowQueryLog(threshold_ms)
+    for label, eng in engines.items():
+        _log.attach(eng, label)
+    print(f"[INFO] Slow query log enabled (>= {threshold_ms:.0f}ms) on: {', '.join(engines)}")
+    return _log
+
+
+def get_slow_query_report(limit: int = 20) -> List[Dict]:
+    return _log.report(limit) if _log else []
+
+
+def format_slow_query_report(limit: int = 20) -> str:
+    """Plain-text table of the top offenders (for scripts / logs)."""
+    rows = get_slow_query_report(limit)
+    if not rows:
+        return "No slow queries recorded." if _log else "Slow query log is disabled (set SLOW_QUERY_LOG=1)."
+    lines = []
+    for i, r in enumerate(rows, 1):
+        plan = r.get("plan") or {}
+        lines.append(f"{i:>2}. [{r['db']}] total {r['total_ms']:.0f}ms | {r['count']}x | avg {r['avg_ms']:.0f}ms | max {r['max_ms']:.0f}ms")
+        lines.append(f"    {r['shape'][:300]}")
+        if r["hints"]:
+            lines.append(f"    casts on columns: {', '.join(r['hints'])}")
+        if plan.get("error"):
+            lines.append(f"    plan: error - {plan['error']}")
+        elif plan:
+            lines.append(
+                f"    plan: cost {plan.get('total_cost')} | rows {plan.get('plan_rows')} | "
+                f"seq scans: {', '.join(plan.get('seq_scans') or []) or '-'} | "
+                f"index: {', '.join(plan.get('index_scans') or []) or '-'}"
+            )
+    return "\n".join(lines)
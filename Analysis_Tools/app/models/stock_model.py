@@ -15,9 +15,13 @@ from functools import lru_cache
 
 import pandas as pd
 from flask_caching import Cache
-from sqlalchemy import inspect, text
+from sqlalchemy import text
 
 from .db_config import engine, get_stock_list_from_excel
+from .option_chain_snapshot import chain_row_tuples, load_snapshot
+from .schema_catalog import clear_catalog_cache, get_catalog
+from .trading_calendar import clear_calendar_cache, get_calendar
+from ..utils.single_flight import single_flight
 
 # Initialize cache with 5-minute timeout
 cache = Cache(config={"CACHE_TYPE": "SimpleCache", "CACHE_DEFAULT_TIMEOUT": 300})
@@ -27,82 +31,30 @@ cache = Cache(config={"CACHE_TYPE": "SimpleCache", "CACHE_DEFAULT_TIMEOUT": 300}
 # -------------------------
 
 
-# Cache for table existence and column info
-_table_cache = {}  # {table_name: exists}
-_column_cache = {}  # {table_name: [column_names]}
-_inspector_cache = None  # Cached inspector instance
-
-
-def _get_inspector():
-    """Get cached inspector instance."""
-    global _inspector_cache
-    if _inspector_cache is None:
-        _inspector_cache = inspect(engine)
-    return _inspector_cache
+# Table existence / column info come from the shared schema catalog
 
 
 def _table_exists(table_name: str) -> bool:
-    """Check if table exists (cached)."""
-    if table_name not in _table_cache:
-        try:
-            inspector = _get_inspector()
-            _table_cache[table_name] = table_name in inspector.get_table_names(schema="public")
-        except Exception as e:
-            print(f"[ERROR] _table_exists({table_name}): {e}")
-            _table_cache[table_name] = False
-    return _table_cache[table_name]
+    """Check if table exists (schema catalog lookup)."""
+    return get_catalog().has_table(table_name)
 
 
 def _get_table_columns(table_name: str) -> list:
-    """Get table columns (cached)."""
-    if table_name not in _column_cache:
-        try:
-            inspector = _get_inspector()
-            cols = [c["name"] for c in inspector.get_columns(table_name, schema="public")]
-            _column_cache[table_name] = cols
-        except Exception as e:
-            print(f"[ERROR] _get_table_columns({table_name}): {e}")
-            _column_cache[table_name] = []
-    return _column_cache[table_name]
+    """Get table columns (schema catalog lookup)."""
+    return get_catalog().columns(table_name)
 
 
 def clear_table_cache():
     """Clear table and column cache - useful when tables are added/modified."""
-    global _table_cache, _column_cache, _inspector_cache
-    _table_cache = {}
-    _column_cache = {}
-    _inspector_cache = None
+    clear_catalog_cache(engine)
     print("[INFO] Table cache cleared")
 
 
-@cache.memoize(timeout=300)
-def _get_table_list_cached():
-    """Cached table list to avoid repeated inspector calls."""
-    try:
-        inspector = _get_inspector()
-        tables = [t for t in inspector.get_table_names(schema="public") if t.endswith("_DERIVED")]
-        if not tables:
-            tables = [t for t in inspector.get_table_names(schema="public") if t.startswith("TBL_")]
-        return tables[0] if tables else None
-    except Exception as e:
-        print(f"[ERROR] _get_table_list_cached(): {e}")
-        return None
-
-
 @cache.memoize(timeout=300)
 def _get_available_dates_stock_cached():
-    """Internal cached function for dates."""
+    """Internal cached function for dates (F&O trading calendar, newest first)."""
     try:
-        sample = _get_table_list_cached()
-        if not sample:
-            return tuple()
-
-        # Query distinct BizDt from the sample derived table
-        q = text(f'SELECT DISTINCT "BizDt" FROM public."{sample}" WHERE "BizDt" IS NOT NULL ORDER BY "BizDt" DESC')
-        df = pd.read_sql(q, con=engine)
-        # convert to string yyyy-mm-dd
-        dates = [d.strftime("%Y-%m-%d") if hasattr(d, "strftime") else str(d) for d in df["BizDt"]]
-        return tuple(dates)
+        return tuple(get_calendar(engine).dates())
     except Exception as e:
         print(f"[ERROR] _get_available_dates_stock_cached(): {e}")
         return tuple()
@@ -124,21 +76,26 @@ def clear_date_cache():
 
     # Also clear internal python caches just in case
     _get_available_dates_stock_cached.delete_memoized()
-    _get_table_list_cached.delete_memoized()
     _get_all_tickers_cached.delete_memoized()
     _get_stock_chart_data_cached.delete_memoized()
     _get_stock_expiry_data_cached.delete_memoized()
     _get_stock_stats_cached.delete_memoized()
     _get_stock_detail_data_cached.delete_memoized()
+    _get_chain_snapshot_cached.delete_memoized()
 
     clear_table_cache()  # Also clear table cache
+    clear_calendar_cache(engine)
     print("[INFO] Stock cache cleared")
 
 
 def _get_prev_date(selected_date, dates_list):
     """
     Given selected_date (YYYY-MM-DD) and dates_list sorted desc, find the immediate previous date.
+    Uses the trading calendar's O(1) lookup when the date is a known trading day.
     """
+    cal = get_calendar(engine)
+    if selected_date in cal:
+        return cal.prev(selected_date)
     try:
         i = dates_list.index(selected_date)
         if i + 1 < len(dates_list):
@@ -165,6 +122,12 @@ def _clean_ticker(ticker: str) -> str:
     return "".join(c for c in ticker if c.isalnum() or c in ["&", "-"])
 
 
+@cache.memoize(timeout=300)
+def _get_chain_snapshot_cached(ticker: str, selected_date: str):
+    """Pipeline-built option-chain snapshot for (ticker, date), or None."""
+    return load_snapshot(engine, _clean_ticker(ticker), selected_date)
+
+
 def _derived_table_name(ticker: str) -> str:
     ticker = _clean_ticker(ticker)
     return f"TBL_{ticker}_DERIVED"
@@ -182,6 +145,7 @@ def _base_table_name(ticker: str) -> str:
 # Core functions
 # -------------------------
 @cache.memoize(timeout=300)
+@single_flight
 def _get_stock_detail_data_cached(
     ticker: str,
     selected_date: str,
@@ -467,56 +431,35 @@ def _get_stock_detail_data_cached(
                 merged["PrevLastPric"] = None
 
         # Build result as tuple for caching
-        def safe_pct(curr, prev):
-            try:
-                if pd.isna(prev) or prev == 0:
-                    return None
-                return round((curr - prev) / prev * 100, 2)
-            except Exception:
-                return None
-
-        result = []
-        for _, r in merged.iterrows():
-            # Convert row to tuple (hashable for caching)
-            row_tuple = (
-                str(r.get("BizDt")) if r.get("BizDt") is not None else None,
-                str(r.get("FininstrmActlXpryDt")) if r.get("FininstrmActlXpryDt") is not None else None,
-                r.get("StrkPric"),
-                r.get("OptnTp"),
-                int(r.get("OpnIntrst")) if pd.notna(r.get("OpnIntrst")) else None,
-                int(r.get("ChngInOpnIntrst")) if pd.notna(r.get("ChngInOpnIntrst")) else None,
-                int(r.get("TtlTradgVol")) if pd.notna(r.get("TtlTradgVol")) else None,
-                float(r.get("ClsPric")) if pd.notna(r.get("ClsPric")) else None,
-                float(r.get("UndrlygPric")) if pd.notna(r.get("UndrlygPric")) else None,
-                round(float(r.get("Delta")), 4) if "Delta" in r and pd.notna(r.get("Delta")) else None,
-                round(float(r.get("Vega")), 4) if "Vega" in r and pd.notna(r.get("Vega")) else None,
-                round(float(r.get("Gamma")), 6) if "Gamma" in r and pd.notna(r.get("Gamma")) else None,
-                round(float(r.get("Theta")), 6) if "Theta" in r and pd.notna(r.get("Theta")) else None,
-                round(float(r.get("IV")) * 100, 2)
-                if "IV" in r and pd.notna(r.get("IV"))
-                else None,
-                int(r.get("PrevOI")) if pd.notna(r.get("PrevOI")) else None,
-                float(r.get("PrevLastPric")) if pd.notna(r.get("PrevLastPric")) else None,
-                safe_pct(
-                    int(r.get("OpnIntrst")) if pd.notna(r.get("OpnIntrst")) else None,
-                    int(r.get("PrevOI")) if pd.notna(r.get("PrevOI")) else None,
-                ),
-                safe_pct(
-                    float(r.get("ClsPric"))
-                    if pd.notna(r.get("ClsPric"))
-                    else (r.get("LastPric") if r.get("LastPric") is not None else None),
-                    float(r.get("PrevLastPric")) if pd.notna(r.get("PrevLastPric")) else None,
-                ),
-            )
-            result.append(row_tuple)
-
-        return tuple(result)
+        return chain_row_tuples(merged)
 
     except Exception as e:
         print(f"[ERROR] _get_stock_detail_data_cached({ticker},{selected_date}): {e}")
         return tuple()
 
 
+_DETAIL_FIELDS = (
+    "BizDt",
+    "FininstrmActlXpryDt",
+    "StrkPric",
+    "OptnTp",
+    "OpnIntrst",
+    "ChngInOpnIntrst",
+    "TtlTradgVol",
+    "ClsPric",
+    "UndrlygPric",
+    "Delta",
+    "Vega",
+    "Gamma",
+    "Theta",
+    "IV",
+    "PrevOI",
+    "PrevPrice",
+    "OI_Chg_%",
+    "Price_Chg_%",
+)
+
+
 def get_stock_detail_data(ticker: str, selected_date: str, selected_expiry: str = None):
     """
     Fetch option-chain rows merged with derived greeks (if available).
@@ -531,6 +474,11 @@ def get_stock_detail_data(ticker: str, selected_date: str, selected_expiry: str
         f"[DEBUG] Fetching stock detail for ticker={ticker}, selected_date={selected_date}, selected_expiry={selected_expiry}"
     )
     try:
+        snapshot = _get_chain_snapshot_cached(ticker, selected_date) if selected_date else None
+        if snapshot is not None:
+            cached_data = snapshot.chain(selected_expiry)
+            return [dict(zip(_DETAIL_FIELDS, row_tuple)) for row_tuple in cached_data]
+
         # prepare names and dates
         derived_table = _derived_table_name(ticker)
         base_table = _base_table_name(ticker)
@@ -610,29 +558,7 @@ def get_stock_detail_data(ticker: str, selected_date: str, selected_expiry: str
             return []
 
         # Convert tuple back to dict format
-        result = []
-        for row_tuple in cached_data:
-            row = {
-                "BizDt": row_tuple[0],
-                "FininstrmActlXpryDt": row_tuple[1],
-                "StrkPric": row_tuple[2],
-                "OptnTp": row_tuple[3],
-                "OpnIntrst": row_tuple[4],
-                "ChngInOpnIntrst": row_tuple[5],
-                "TtlTradgVol": row_tuple[6],
-                "ClsPric": row_tuple[7],
-                "UndrlygPric": row_tuple[8],
-                "Delta": row_tuple[9],
-                "Vega": row_tuple[10],
-                "Gamma": row_tuple[11],
-                "Theta": row_tuple[12],
-                "IV": row_tuple[13],
-                "PrevOI": row_tuple[14],
-                "PrevPrice": row_tuple[15],
-                "OI_Chg_%": row_tuple[16],
-                "Price_Chg_%": row_tuple[17],
-            }
-            result.append(row)
+        result = [dict(zip(_DETAIL_FIELDS, row_tuple)) for row_tuple in cached_data]
 
         print(f"[DEBUG] {ticker} rows fetched: {len(result)}")
         return result
@@ -743,20 +669,24 @@ def get_stock_expiry_data(ticker: str, selected_date: str):
     Uses caching to avoid repeated queries.
     """
     try:
-        derived_table = _derived_table_name(ticker)
-        base_table = _base_table_name(ticker)
-        table_to_use = derived_table if _table_exists(derived_table) else base_table
+        snapshot = _get_chain_snapshot_cached(ticker, selected_date) if selected_date else None
+        if snapshot is not None:
+            cached_data = snapshot.expiries()
+        else:
+            derived_table = _derived_table_name(ticker)
+            base_table = _base_table_name(ticker)
+            table_to_use = derived_table if _table_exists(derived_table) else base_table
 
-        if not _table_exists(table_to_use):
-            print(f"[WARN] Table {table_to_use} does not exist for ticker {ticker}")
-            return []
+            if not _table_exists(table_to_use):
+                print(f"[WARN] Table {table_to_use} does not exist for ticker {ticker}")
+                return []
 
-        # Get previous date
-        dates = get_available_dates()
-        prev_date = _get_prev_date(selected_date, dates) or ""
+            # Get previous date
+            dates = get_available_dates()
+            prev_date = _get_prev_date(selected_date, dates) or ""
 
-        # Get cached data
-        cached_data = _get_stock_expiry_data_cached(ticker, selected_date, table_to_use, prev_date)
+            # Get cached data
+            cached_data = _get_stock_expiry_data_cached(ticker, selected_date, table_to_use, prev_date)
 
         if not cached_data:
             return []
@@ -933,13 +863,17 @@ def get_stock_stats(ticker: str, selected_date: str, selected_expiry: str = None
     Uses caching to avoid repeated queries.
     """
     try:
-        derived_table = _derived_table_name(ticker)
-        base_table = _base_table_name(ticker)
-        table_to_use = derived_table if _table_exists(derived_table) else base_table
+        snapshot = _get_chain_snapshot_cached(ticker, selected_date) if selected_date else None
+        if snapshot is not None:
+            cached_data = snapshot.stats(selected_expiry)
+        else:
+            derived_table = _derived_table_name(ticker)
+            base_table = _base_table_name(ticker)
+            table_to_use = derived_table if _table_exists(derived_table) else base_table
 
-        # Get cached data
-        expiry_key = selected_expiry or ""
-        cached_data = _get_stock_stats_cached(ticker, selected_date, expiry_key, table_to_use)
+            # Get cached data
+            expiry_key = selected_expiry or ""
+            cached_data = _get_stock_stats_cached(ticker, selected_date, expiry_key, table_to_use)
 
         if cached_data is None:
             return {}
@@ -1043,125 +977,95 @@ def _get_stock_chart_data_cached(ticker: str, days: int, table_name: str):
 
         # Sort relevant_dates in ascending order
         relevant_dates_sorted = sorted(relevant_dates)
+        prev_of = dict(zip(relevant_dates_sorted[1:], relevant_dates_sorted[:-1]))
+
+        # Separate Options and Underlying (Cash/Futures)
+        # Options have OptnTp='CE' or 'PE'; Underlying/Futures have OptnTp=None or other values
+        is_option = df_all["OptnTp"].isin(["CE", "PE"])
+        df_options = df_all[is_option]
+
+        # OHLC: prefer the first 'others' row (Cash/Futures) of each date
+        ohlc_cols = ["OpnPric", "HghPric", "LwPric", "ClsPric"]
+        ohlc = (
+            df_all[~is_option].drop_duplicates("date").set_index("date")[ohlc_cols]
+            .reindex(relevant_dates_sorted).fillna(0)
+        )
 
-        # Calculate metrics for each date (skip first date as it has no previous)
-        result = []
-        for i in range(1, len(relevant_dates_sorted)):  # Start from index 1
-            curr_date = relevant_dates_sorted[i]
-            prev_date = relevant_dates_sorted[i - 1]
-
-            # Current date data
-            df_curr = df_all[df_all["date"] == curr_date].copy()
-            if df_curr.empty:
-                continue
-
-            # Basic aggregations
-            # Separate Options and Underlying (Cash/Futures)
-            # Options have OptnTp='CE' or 'PE'
-            # Underlying/Futures have OptnTp=None or other values
-            df_options = df_curr[df_curr["OptnTp"].isin(["CE", "PE"])]
-            df_others = df_curr[~df_curr["OptnTp"].isin(["CE", "PE"])]
-
-            # Basic aggregations
-            # For Close/OHLC: Prefer 'df_others' (Cash/Futures) which has real OHLC
-            # If not available, fallback to 'UndrlygPric' from options (which is Spot Close)
-
-            open_price = 0
-            high_price = 0
-            low_price = 0
-            close_price = 0
-
-            if not df_others.empty:
-                # Use the first row from others (assuming it's the valid underlying/future)
-                # Ideally, we should filter for EQ or 'XX' if multiple exist
-                row = df_others.iloc[0]
-                open_price = float(row["OpnPric"]) if pd.notna(row["OpnPric"]) else 0
-                high_price = float(row["HghPric"]) if pd.notna(row["HghPric"]) else 0
-                low_price = float(row["LwPric"]) if pd.notna(row["LwPric"]) else 0
-                close_price = float(row["ClsPric"]) if pd.notna(row["ClsPric"]) else 0
-
-            # If df_others is empty (common for F&O tables), query Cash market table for OHLC
-            if (open_price == 0 or high_price == 0 or low_price == 0 or close_price == 0):
-                try:
-                    from .db_config import engine_cash
-
-                    # Query cash market table for this ticker and date
-                    cash_query = text(f'''
-                        SELECT "OpnPric", "HghPric", "LwPric", "ClsPric"
-                        FROM public."TBL_{ticker}"
-                        WHERE "BizDt" = '{curr_date}'
-                        LIMIT 1
-                    ''')
-
-                    with engine_cash.connect() as cash_conn:
-                        cash_result = cash_conn.execute(cash_query)
-                        cash_row = cash_result.fetchone()
-
-                        if cash_row:
-                            # Use cash market OHLC data
-                            if open_price == 0 and cash_row[0]:
-                                open_price = float(cash_row[0])
-                            if high_price == 0 and cash_row[1]:
-                                high_price = float(cash_row[1])
-                            if low_price == 0 and cash_row[2]:
-                                low_price = float(cash_row[2])
-                            if close_price == 0 and cash_row[3]:
-                                close_price = float(cash_row[3])
-                except Exception:
-                    # If cash table query fails, continue with fallback
-                    pass
-
-            # Final fallback: Use spot close from options if still no data
-            if close_price == 0 and not df_options.empty:
-                spot_close = df_options["UndrlygPric"].max()
-                close_price = float(spot_close) if pd.notna(spot_close) else 0
-                # Only set OHLC to close if we have absolutely no other data
-                if open_price == 0: open_price = close_price
-                if high_price == 0: high_price = close_price
-                if low_price == 0: low_price = close_price
-
-            # Metrics
-            oi = df_options["OpnIntrst"].sum()
-            volume = df_options["TtlTradgVol"].sum()
-
-            # Use df_options for IV and PCR logic
-            # IV calculation
-            iv_values = df_options[df_options["iv"].notna() & (df_options["iv"] > 0)]["iv"]
-            avg_iv = iv_values.mean() if not iv_values.empty else 0
-            if avg_iv > 0:
-                avg_iv *= 100
-
-            # PCR calculation
-            ce_oi = df_options[df_options["OptnTp"] == "CE"]["OpnIntrst"].sum()
-            pe_oi = df_options[df_options["OptnTp"] == "PE"]["OpnIntrst"].sum()
-            pcr = pe_oi / ce_oi if ce_oi > 0 else 0
-
-            # Moneyness change calculation
-            moneyness_change = 0
-            df_prev_options = pd.DataFrame()
-            df_prev = df_all[df_all["date"] == prev_date].copy()
-
-            if not df_prev.empty:
-                df_prev_options = df_prev[df_prev["OptnTp"].isin(["CE", "PE"])]
-
-            if not df_options.empty and not df_prev_options.empty:
-                # Merge curr and prev on Strike and OptionType
-                dm = pd.merge(
-                    df_options[["StrkPric", "OptnTp", "UndrlygPric"]],
-                    df_prev_options[["StrkPric", "OptnTp", "UndrlygPric"]],
-                    on=["StrkPric", "OptnTp"],
-                    suffixes=("_c", "_p"),
-                    how="inner",
+        # Missing OHLC (common for F&O tables): one Cash market query for the whole window
+        if (ohlc == 0).any(axis=None):
+            try:
+                from .db_config import engine_cash
+
+                cash_query = text(f"""
+                    SELECT "BizDt"::date::text AS date, "OpnPric", "HghPric", "LwPric", "ClsPric"
+                    FROM public."TBL_{ticker}"
+                    WHERE "BizDt" BETWEEN :start AND :end
+                """)
+                df_cash = pd.read_sql(
+                    cash_query,
+                    con=engine_cash,
+                    params={"start": relevant_dates_sorted[0], "end": relevant_dates_sorted[-1]},
                 )
+                if not df_cash.empty:
+                    cash = (
+                        df_cash.drop_duplicates("date").set_index("date")[ohlc_cols]
+                        .apply(pd.to_numeric, errors="coerce")
+                        .reindex(relevant_dates_sorted).fillna(0)
+                    )
+                    ohlc = ohlc.where(ohlc != 0, cash)
+            except Exception:
+                # If cash table query fails, continue with fallback
+                pass
+
+        # Per-date option aggregates in one groupby
+        opt = df_options.assign(
+            ce_oi=df_options["OpnIntrst"].where(df_options["OptnTp"] == "CE", 0),
+            pe_oi=df_options["OpnIntrst"].where(df_options["OptnTp"] == "PE", 0),
+            iv_pos=df_options["iv"].where(df_options["iv"] > 0),
+        )
+        agg = opt.groupby("date").agg(
+            oi=("OpnIntrst", "sum"),
+            volume=("TtlTradgVol", "sum"),
+            avg_iv=("iv_pos", "mean"),
+            ce_oi=("ce_oi", "sum"),
+            pe_oi=("pe_oi", "sum"),
+            spot=("UndrlygPric", "max"),
+        )
 
-                if not dm.empty:
-                    # Calculate moneyness for current and previous
-                    dm["moneyness_curr"] = (dm["UndrlygPric_c"] - dm["StrkPric"]) / dm["UndrlygPric_c"]
-                    dm["moneyness_prev"] = (dm["UndrlygPric_p"] - dm["StrkPric"]) / dm["UndrlygPric_p"]
-                    dm["money_chg"] = dm["moneyness_curr"] - dm["moneyness_prev"]
+        # Moneyness change: join each date's strikes to the previous date's in one merge
+        money_cols = ["date", "StrkPric", "OptnTp", "UndrlygPric"]
+        curr_opts = df_options[money_cols].assign(prev_date=df_options["date"].map(prev_of))
+        prev_opts = df_options[money_cols].rename(columns={"date": "prev_date"})
+        dm = curr_opts.dropna(subset=["prev_date"]).merge(
+            prev_opts, on=["prev_date", "StrkPric", "OptnTp"], suffixes=("_c", "_p"), how="inner"
+        )
+        dm["money_chg"] = (dm["UndrlygPric_c"] - dm["StrkPric"]) / dm["UndrlygPric_c"] - (
+            dm["UndrlygPric_p"] - dm["StrkPric"]
+        ) / dm["UndrlygPric_p"]
+        moneyness = dm.groupby("date")["money_chg"].sum()
 
-                    # Sum total moneyness change
-                    moneyness_change = dm["money_chg"].sum()
+        # Assemble one row per date (skip first date as it has no previous)
+        present_dates = set(df_all["date"])
+        result = []
+        for curr_date in relevant_dates_sorted[1:]:
+            if curr_date not in present_dates:
+                continue
+
+            open_price, high_price, low_price, close_price = (float(v) for v in ohlc.loc[curr_date])
+            oi = volume = avg_iv = pcr = 0
+            if curr_date in agg.index:
+                a_row = agg.loc[curr_date]
+                # Final fallback: Use spot close from options if still no data
+                if close_price == 0 and pd.notna(a_row["spot"]):
+                    close_price = float(a_row["spot"])
+                    # Only set OHLC to close if we have absolutely no other data
+                    if open_price == 0: open_price = close_price
+                    if high_price == 0: high_price = close_price
+                    if low_price == 0: low_price = close_price
+                oi, volume = a_row["oi"], a_row["volume"]
+                avg_iv = a_row["avg_iv"] * 100 if pd.notna(a_row["avg_iv"]) and a_row["avg_iv"] > 0 else 0
+                pcr = a_row["pe_oi"] / a_row["ce_oi"] if a_row["ce_oi"] > 0 else 0
+            moneyness_change = moneyness.get(curr_date, 0)
 
             result.append(
                 (
@@ -1245,12 +1149,7 @@ def get_stock_chart_data(ticker: str, days: int = 40):
 def _get_all_tickers_cached():
     """Cached function to get all tickers."""
     try:
-        inspector = _get_inspector()
-        tables = [
-            t for t in inspector.get_table_names(schema="public") if t.startswith("TBL_") and t.endswith("_DERIVED")
-        ]
-        tickers = sorted([t.replace("TBL_", "").replace("_DERIVED", "") for t in tables])
-        return tuple(tickers)
+        return tuple(sorted(get_catalog().tickers))
     except Exception as e:
         print(f"[ERROR] get_all_tickers(): {e}")
         return tuple()
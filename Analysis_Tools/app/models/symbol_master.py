@@ -0,0 +1,335 @@
+# =============================================================
+#  SYMBOL MASTER MODULE
+#  Purpose: One shared symbol registry (sector, F&O flag, index
+#           membership, aliases) for every worker
+#
+#  The cash pipeline builds it once per EOD run (build_symbol_master)
+#  into an uncompressed Arrow IPC file. Web workers open the file with
+#  a memory map, so all processes share the same OS pages (zero-copy)
+#  and get O(1) symbol -> attributes lookups plus vectorized masks
+#  ("F&O stocks in NIFTY BANK") without touching Postgres.
+#
+#  Optional: without pyarrow or before the first build,
+#  get_symbol_master() returns None and callers keep their old
+#  CSV / information_schema lookups.
+# =============================================================
+
+import os
+import re
+import threading
+import time
+from typing import Dict, List, Optional
+
+import numpy as np
+from sqlalchemy import text
+
+try:
+    import pyarrow as pa
+    import pyarrow.ipc as ipc
+
+    PYARROW_AVAILABLE = True
+except ImportError:
+    pa = None
+    ipc = None
+    PYARROW_AVAILABLE = False
+
+# =============================================================
+# CONFIGURATION
+# =============================================================
+
+_PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..", ".."))
+SYMBOL_MASTER_PATH = os.getenv(
+    "SYMBOL_MASTER_PATH", os.path.join(_PROJECT_ROOT, "data_analytics", "symbol_master.arrow")
+)
+SYMBOL_MASTER_CHECK_TTL = 60  # How often to stat the file for a newer build
+DEFAULT_SECTOR = "Others"
+
+SECTOR_MASTER_PATHS = [
+    os.getenv("SECTOR_MASTER_PATH"),
+    os.path.join(os.getcwd(), "nse_sector_master.csv"),
+    os.path.join(_PROJECT_ROOT, "nse_sector_master.csv"),
+]
+
+
+def db_symbol(symbol: str) -> str:
+    """NSE symbol -> per-ticker table form ('M&M' -> 'M_M', 'BAJAJ-AUTO' -> 'BAJAJ_AUTO')."""
+    return re.sub(r"\W+", "_", str(symbol)).strip("_").upper()
+
+
+# =============================================================
+# READER
+# =============================================================
+
+
+class SymbolMaster:
+    """Memory-mapped symbol registry with O(1) lookups by symbol or alias."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.mtime = os.path.getmtime(path)
+        self._source = pa.memory_map(path, "r")
+        self.table = ipc.open_file(self._source).read_all()
+
+        self.symbols: List[str] = self.table.column("symbol").to_pylist()
+        self._pos: Dict[str, int] = {}
+        for i, aliases in enumerate(self.table.column("aliases").to_pylist()):
+            for alias in aliases or ():
+                self._pos.setdefault(alias, i)
+        for i, symbol in enumerate(self.symbols):
+            self._pos[symbol] = i
+
+        self._is_fo = self.table.column("is_fo").to_numpy(zero_copy_only=False)
+        self._index_rows: Optional[Dict[str, np.ndarray]] = None
+
+    def __len__(self):
+        return len(self.symbols)
+
+    def __contains__(self, symbol):
+        return self.position(symbol) is not None
+
+    def position(self, symbol) -> Optional[int]:
+        if symbol is None:
+            return None
+        key = str(symbol).strip().upper()
+        pos = self._pos.get(key)
+        return pos if pos is not None else self._pos.get(db_symbol(key))
+
+    # ---------------------------------------------------------
+    # Scalar lookups
+    # ---------------------------------------------------------
+
+    def get(self, symbol) -> Optional[dict]:
+        pos = self.position(symbol)
+        return None if pos is None else self.table.slice(pos, 1).to_pylist()[0]
+
+    def sector(self, symbol, default: str = DEFAULT_SECTOR) -> str:
+        pos = self.position(symbol)
+        if pos is None:
+            return default
+        return self.table.column("sector")[pos].as_py() or default
+
+    def is_fo(self, symbol) -> Optional[bool]:
+        """True / False for known symbols, None when the symbol is not registered."""
+        pos = self.position(symbol)
+        return None if pos is None else bool(self._is_fo[pos])
+
+    def db_symbol(self, symbol) -> str:
+        pos = self.position(symbol)
+        return db_symbol(symbol) if pos is None else self.table.column("db_symbol")[pos].as_py()
+
+    def aliases(self, symbol) -> List[str]:
+        pos = self.position(symbol)
+        return [] if pos is None else self.table.column("aliases")[pos].as_py()
+
+    # ---------------------------------------------------------
+    # Vectorized masks
+    # ---------------------------------------------------------
+
+    def fo_mask(self) -> np.ndarray:
+        return self._is_fo.astype(bool)
+
+    def index_mask(self, index_key: str) -> np.ndarray:
+        if self._index_rows is None:
+            rows: Dict[str, list] = {}
+            for i, keys in enumerate(self.table.column("indices").to_pylist()):
+                for key in keys or ():
+                    rows.setdefault(key, []).append(i)
+            self._index_rows = {k: np.asarray(v, dtype=np.int64) for k, v in rows.items()}
+        mask = np.zeros(len(self.symbols), dtype=bool)
+        mask[self._index_rows.get(index_key, np.empty(0, dtype=np.int64))] = True
+        return mask
+
+    def sector_mask(self, sector: str) -> np.ndarray:
+        return self.table.column("sector").to_numpy(zero_copy_only=False) == sector
+
+    def select(self, index_key: Optional[str] = None, fo: Optional[bool] = None, sector: Optional[str] = None) -> List[str]:
+        """Symbols matching every given filter, e.g. select("NIFTYBANK", fo=True)."""
+        mask = np.ones(len(self.symbols), dtype=bool)
+        if index_key:
+            mask &= self.index_mask(index_key)
+        if fo is not None:
+            mask &= self.fo_mask() == fo
+        if sector:
+            mask &= self.sector_mask(sector)
+        return [self.symbols[i] for i in np.flatnonzero(mask)]
+
+    def fo_symbols(self) -> frozenset:
+        """Every name (symbol and aliases) of F&O stocks."""
+        names = set()
+        aliases = self.table.column("aliases").to_pylist()
+        for i in np.flatnonzero(self.fo_mask()):
+            names.add(self.symbols[i])
+            names.update(aliases[i] or ())
+        return frozenset(names)
+
+
+_master: Optional[SymbolMaster] = None
+_checked_at = 0.0
+_master_lock = threading.Lock()
+
+
+def get_symbol_master() -> Optional[SymbolMaster]:
+    """Shared registry, reopened when a newer build lands; None when unavailable."""
+    global _master, _checked_at
+
+    if not PYARROW_AVAILABLE:
+        return None
+    now = time.time()
+    if (now - _checked_at) < SYMBOL_MASTER_CHECK_TTL:
+        return _master
+
+    with _master_lock:
+        if (time.time() - _checked_at) < SYMBOL_MASTER_CHECK_TTL:
+            return _master
+        try:
+            if os.path.exists(SYMBOL_MASTER_PATH):
+                if _master is None or os.path.getmtime(SYMBOL_MASTER_PATH) != _master.mtime:
+                    _master = SymbolMaster(SYMBOL_MASTER_PATH)
+                    print(f"[INFO] Symbol master loaded: {len(_master)} symbols")
+            else:
+                _master = None
+        except Exception as e:
+            print(f"[ERROR] get_symbol_master(): {e}")
+        _checked_at = time.time()
+        return _master
+
+
+def clear_symbol_master():
+    global _master, _checked_at
+    with _master_lock:
+        _master = None
+        _checked_at = 0.0
+
+
+# =============================================================
+# PIPELINE: BUILD THE REGISTRY
+# =============================================================
+
+
+def _read_sector_csv() -> Dict[str, tuple]:
+    """SYMBOL -> (sector, industry) from the first nse_sector_master.csv found."""
+    import pandas as pd
+
+    for path in SECTOR_MASTER_PATHS:
+        if not path or not os.path.exists(path):
+            continue
+        try:
+            df = pd.read_csv(path, encoding="utf-8-sig")
+            df.columns = df.columns.str.strip().str.upper()
+            sector_col = "SECTOR" if "SECTOR" in df.columns else None
+            industry_col = next((c for c in df.columns if "INDUSTRY" in c), None)
+            out = {}
+            df = df.fillna("")
+            for row in df.to_dict("records"):
+                symbol = str(row.get("SYMBOL", "")).strip().upper()
+                if not symbol:
+                    continue
+                industry = str(row[industry_col]).strip() if industry_col else ""
+                sector = str(row[sector_col]).strip() if sector_col else ""
+                if not sector and industry:
+                    from .insights_model import classify_industry
+
+                    sector = classify_industry(industry)
+                out[symbol] = (sector or DEFAULT_SECTOR, industry)
+            print(f"[INFO] Symbol master: {len(out)} sector rows from {path}")
+            return out
+        except Exception as e:
+            print(f"[WARN] Could not read sector master {path}: {e}")
+    return {}
+
+
+def build_symbol_master(engine_fo, engine_cash, path: Optional[str] = None) -> bool:
+    """
+    Build the registry from nse_sector_master.csv, the F&O per-ticker
+    tables, index_constituents and the recent cash_eod_data universe.
+    Written next to the target and renamed into place.
+    """
+    if not PYARROW_AVAILABLE:
+        print("[WARN] pyarrow not installed. Skipping symbol master.")
+        return False
+
+    path = path or SYMBOL_MASTER_PATH
+    try:
+        sectors = _read_sector_csv()
+
+        with engine_fo.connect() as conn:
+            fo_tables = conn.execute(
+                text(
+                    """
+                    SELECT table_name FROM information_schema.tables
+                    WHERE table_schema = 'public'
+                      AND table_name LIKE 'TBL_%'
+                      AND table_name NOT LIKE '%_DERIVED'
+                """
+                )
+            ).fetchall()
+        fo_db_symbols = {r[0][4:] for r in fo_tables if r[0].startswith("TBL_")}
+
+        with engine_cash.connect() as conn:
+            cash_symbols = [
+                r[0]
+                for r in conn.execute(
+                    text(
+                        """
+                        SELECT DISTINCT symbol FROM cash_eod_data
+                        WHERE trade_date >= (SELECT MAX(trade_date) FROM cash_eod_data) - 30
+                    """
+                    )
+                ).fetchall()
+            ]
+            try:
+                constituents = conn.execute(text("SELECT index_key, symbol FROM index_constituents")).fetchall()
+            except Exception:
+                conn.rollback()
+                constituents = []
+
+        indices: Dict[str, set] = {}
+        for index_key, symbol in constituents:
+            if index_key and symbol:
+                indices.setdefault(str(symbol).strip().upper(), set()).add(index_key)
+
+        universe = {str(s).strip().upper() for s in cash_symbols if s}
+        universe.update(sectors)
+        universe.update(indices)
+        # F&O tables only keep the sanitized name; add those with no raw symbol
+        known_db = {db_symbol(s) for s in universe}
+        universe.update(s for s in fo_db_symbols if s not in known_db)
+
+        rows = {k: [] for k in ("symbol", "db_symbol", "sector", "industry", "is_fo", "indices", "aliases")}
+        for symbol in sorted(universe):
+            dbs = db_symbol(symbol)
+            sector, industry = sectors.get(symbol) or sectors.get(dbs) or (DEFAULT_SECTOR, "")
+            rows["symbol"].append(symbol)
+            rows["db_symbol"].append(dbs)
+            rows["sector"].append(sector)
+            rows["industry"].append(industry)
+            rows["is_fo"].append(dbs in fo_db_symbols)
+            rows["indices"].append(sorted(indices.get(symbol, ())))
+            rows["aliases"].append([dbs] if dbs != symbol else [])
+
+        table = pa.table(
+            rows,
+            schema=pa.schema(
+                [
+                    ("symbol", pa.string()),
+                    ("db_symbol", pa.string()),
+                    ("sector", pa.string()),
+                    ("industry", pa.string()),
+                    ("is_fo", pa.bool_()),
+                    ("indices", pa.list_(pa.string())),
+                    ("aliases", pa.list_(pa.string())),
+                ]
+            ),
+        )
+
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.tmp"
+        with pa.OSFile(tmp_path, "wb") as sink:
+            with ipc.new_file(sink, table.schema) as writer:
+                writer.write_table(table)
+        os.replace(tmp_path, path)
+        print(f"[INFO] Symbol master written: {path} ({table.num_rows} symbols, {len(fo_db_symbols)} F&O)")
+        return True
+    except Exception as e:
+        print(f"[ERROR] build_symbol_master(): {e}")
+        return False
@@ -0,0 +1,301 @@
+# =============================================================
+#  TRADING CALENDAR MODULE
+#  Purpose: Maintained `trading_calendar` table + in-process date service
+#
+#  The ingestion jobs call sync_trading_calendar() after each load. It
+#  appends new trading dates and recomputes prev/next links. The app
+#  loads the (small) table once into a sorted list, so "latest date",
+#  previous/next trading date and period start dates (1W/1M/...) are
+#  answered in memory instead of running SELECT DISTINCT "BizDt" over a
+#  full option-chain table.
+#
+#  One calendar per database (F&O and Cash each have their own table),
+#  since the two databases can be at different load points.
+# =============================================================
+
+import threading
+import time
+from bisect import bisect_left, bisect_right
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+
+from sqlalchemy import text
+
+from .db_config import engine, engine_cash
+
+# =============================================================
+# CONFIGURATION
+# =============================================================
+
+CALENDAR_TABLE = "trading_calendar"
+CALENDAR_CACHE_TTL = 300  # Reload from DB every 5 minutes
+
+# Calendar-day offsets used by heatmap / returns periods
+PERIOD_DAYS = {"1W": 7, "1M": 30, "3M": 90, "6M": 180, "1Y": 365}
+
+# Tables probed (in order) when the calendar table has not been built yet
+FO_SOURCE_TABLES = ["TBL_NIFTY_DERIVED", "TBL_BANKNIFTY_DERIVED", "TBL_NIFTY", "TBL_BANKNIFTY"]
+CASH_SOURCE_TABLES = ["cash_eod_data", "TBL_RELIANCE", "TBL_TCS", "TBL_INFY", "TBL_HDFCBANK"]
+
+
+def _source_date_column(table_name: str) -> str:
+    return "trade_date" if table_name == "cash_eod_data" else "BizDt"
+
+
+# =============================================================
+# IN-MEMORY CALENDAR
+# =============================================================
+
+
+class TradingCalendar:
+    """Sorted (ascending) list of trading dates with O(1)/O(log n) lookups."""
+
+    def __init__(self, dates: List[str]):
+        self._dates = sorted(set(dates))
+        self._pos = {d: i for i, d in enumerate(self._dates)}
+        self._desc = list(reversed(self._dates))
+        self.loaded_at = time.time()
+
+    def __len__(self):
+        return len(self._dates)
+
+    def __contains__(self, date_str):
+        return date_str in self._pos
+
+    def latest(self) -> Optional[str]:
+        return self._dates[-1] if self._dates else None
+
+    def dates(self, limit: Optional[int] = None) -> List[str]:
+        """Trading dates sorted descending (same order as the old DISTINCT queries)."""
+        return self._desc[:limit] if limit else list(self._desc)
+
+    def prev(self, date_str: str) -> Optional[str]:
+        """Trading date strictly before date_str."""
+        i = self._pos.get(date_str)
+        if i is None:
+            i = bisect_left(self._dates, date_str)
+        return self._dates[i - 1] if i > 0 else None
+
+    def next(self, date_str: str) -> Optional[str]:
+        """Trading date strictly after date_str."""
+        i = bisect_right(self._dates, date_str)
+        return self._dates[i] if i < len(self._dates) else None
+
+    def on_or_before(self, date_str: str) -> Optional[str]:
+        i = bisect_right(self._dates, date_str)
+        return self._dates[i - 1] if i > 0 else None
+
+    def nearest(self, date_str: str) -> Optional[str]:
+        """Closest trading date to date_str (ties go to the earlier date)."""
+        if not self._dates:
+            return None
+        if date_str in self._pos:
+            return date_str
+        i = bisect_left(self._dates, date_str)
+        if i == 0:
+            return self._dates[0]
+        if i == len(self._dates):
+            return self._dates[-1]
+        before, after = self._dates[i - 1], self._dates[i]
+        target = datetime.strptime(date_str, "%Y-%m-%d")
+        d_before = target - datetime.strptime(before, "%Y-%m-%d")
+        d_after = datetime.strptime(after, "%Y-%m-%d") - target
+        return before if d_before <= d_after else after
+
+    def period_start(self, date_str: str, period: str) -> Optional[str]:
+        """Nearest trading date to date_str minus the period's calendar days."""
+        days = PERIOD_DAYS.get(period, 0)
+        if not days:
+            return date_str
+        target = (datetime.strptime(date_str, "%Y-%m-%d") - timedelta(days=days)).strftime("%Y-%m-%d")
+        return self.nearest(target)
+
+
+# =============================================================
+# LOADERS
+# =============================================================
+
+
+def _load_from_calendar_table(engine_instance) -> Optional[List[str]]:
+    with engine_instance.connect() as conn:
+        exists = conn.execute(text("SELECT to_regclass(:t)"), {"t": f"public.{CALENDAR_TABLE}"}).scalar()
+        if not exists:
+            return None
+        rows = conn.execute(text(f"SELECT trade_date::text FROM public.{CALENDAR_TABLE}")).fetchall()
+    return [r[0] for r in rows]
+
+
+def _load_from_source_tables(engine_instance, source_tables) -> List[str]:
+    """Fallback used until the pipeline has built the calendar table."""
+    with engine_instance.connect() as conn:
+        for table in source_tables:
+            col = _source_date_column(table)
+            exists = conn.execute(text("SELECT to_regclass(:t)"), {"t": f'public."{table}"'}).scalar()
+            if not exists:
+                continue
+            rows = conn.execute(
+                text(f'SELECT DISTINCT "{col}"::date::text FROM public."{table}" WHERE "{col}" IS NOT NULL')
+            ).fetchall()
+            if rows:
+                return [r[0] for r in rows]
+    return []
+
+
+# =============================================================
+# SHARED CALENDARS
+# =============================================================
+
+_calendars: Dict[int, TradingCalendar] = {}
+_calendar_lock = threading.Lock()
+
+
+def get_calendar(engine_instance=None) -> TradingCalendar:
+    """Return the cached calendar for an engine (defaults to the F&O engine)."""
+    engine_instance = engine_instance or engine
+    key = id(engine_instance)
+
+    cal = _calendars.get(key)
+    if cal is not None and (time.time() - cal.loaded_at) < CALENDAR_CACHE_TTL:
+        return cal
+
+    with _calendar_lock:
+        cal = _calendars.get(key)
+        if cal is not None and (time.time() - cal.loaded_at) < CALENDAR_CACHE_TTL:
+            return cal
+        try:
+            dates = _load_from_calendar_table(engine_instance)
+            if not dates:
+                sources = CASH_SOURCE_TABLES if engine_instance is engine_cash else FO_SOURCE_TABLES
+                dates = _load_from_source_tables(engine_instance, sources)
+            cal = TradingCalendar(dates)
+            _calendars[key] = cal
+        except Exception as e:
+            print(f"[ERROR] get_calendar(): {e}")
+            if cal is None:
+                return TradingCalendar([])
+        return cal
+
+
+def clear_calendar_cache(engine_instance=None):
+    """Drop cached calendars (all engines when engine_instance is None)."""
+    with _calendar_lock:
+        if engine_instance is None:
+            _calendars.clear()
+        else:
+            _calendars.pop(id(engine_instance), None)
+    print("[INFO] Trading calendar cache cleared")
+
+
+# =============================================================
+# CONVENIENCE WRAPPERS
+# =============================================================
+
+
+def get_trading_dates(engine_instance=None, limit: Optional[int] = None) -> List[str]:
+    return get_calendar(engine_instance).dates(limit)
+
+
+def get_latest_trading_date(engine_instance=None) -> Optional[str]:
+    return get_calendar(engine_instance).latest()
+
+
+def get_prev_trading_date(date_str: str, engine_instance=None) -> Optional[str]:
+    return get_calendar(engine_instance).prev(date_str)
+
+
+def get_next_trading_date(date_str: str, engine_instance=None) -> Optional[str]:
+    return get_calendar(engine_instance).next(date_str)
+
+
+def get_period_start_date(date_str: str, period: str, engine_instance=None) -> Optional[str]:
+    return get_calendar(engine_instance).period_start(date_str, period)
+
+
+# =============================================================
+# PIPELINE: BUILD / SYNC
+# =============================================================
+
+
+def create_calendar_table(engine_instance):
+    with engine_instance.begin() as conn:
+        conn.execute(
+            text(
+                f"""
+                CREATE TABLE IF NOT EXISTS public.{CALENDAR_TABLE} (
+                    trade_date DATE PRIMARY KEY,
+                    prev_trade_date DATE,
+                    next_trade_date DATE,
+                    updated_at TIMESTAMP DEFAULT NOW()
+                )
+            """
+            )
+        )
+
+
+def sync_trading_calendar(engine_instance, source_table: Optional[str] = None) -> int:
+    """
+    Append trading dates newer than the calendar's last date from
+    source_table, then recompute prev/next links. Returns rows added.
+
+    Only the first run scans the full source table; afterwards the
+    "> last date" filter keeps it to the newly loaded days.
+    """
+    if source_table is None:
+        sources = CASH_SOURCE_TABLES if engine_instance is engine_cash else FO_SOURCE_TABLES
+    else:
+        sources = [source_table]
+
+    try:
+        create_calendar_table(engine_instance)
+        added = 0
+        with engine_instance.begin() as conn:
+            last = conn.execute(text(f"SELECT MAX(trade_date) FROM public.{CALENDAR_TABLE}")).scalar()
+
+            for table in sources:
+                exists = conn.execute(text("SELECT to_regclass(:t)"), {"t": f'public."{table}"'}).scalar()
+                if not exists:
+                    continue
+                col = _source_date_column(table)
+                result = conn.execute(
+                    text(
+                        f"""
+                        INSERT INTO public.{CALENDAR_TABLE} (trade_date)
+                        SELECT DISTINCT "{col}"::date
+                        FROM public."{table}"
+                        WHERE "{col}" IS NOT NULL
+                          AND (:last IS NULL OR "{col}"::date > :last)
+                        ON CONFLICT (trade_date) DO NOTHING
+                    """
+                    ),
+                    {"last": last},
+                )
+                added = result.rowcount or 0
+                break
+
+            if added:
+                conn.execute(
+                    text(
+                        f"""
+                        UPDATE public.{CALENDAR_TABLE} c
+                        SET prev_trade_date = l.prev_d,
+                            next_trade_date = l.next_d,
+                            updated_at = NOW()
+                        FROM (
+                            SELECT trade_date,
+                                   LAG(trade_date) OVER (ORDER BY trade_date) AS prev_d,
+                                   LEAD(trade_date) OVER (ORDER BY trade_date) AS next_d
+                            FROM public.{CALENDAR_TABLE}
+                        ) l
+                        WHERE c.trade_date = l.trade_date
+                          AND (c.prev_trade_date IS DISTINCT FROM l.prev_d
+                               OR c.next_trade_date IS DISTINCT FROM l.next_d)
+                    """
+                    )
+                )
+
+        clear_calendar_cache(engine_instance)
+        print(f"[INFO] Trading calendar synced: {added} new date(s)")
+        return added
+    except Exception as e:
+        print(f"[ERROR] sync_trading_calendar(): {e}")
+        return 0
@@ -0,0 +1,463 @@
+"""
+=============================================================
+SYMBOL SEARCH SERVICE
+=============================================================
+In-memory symbol index shared by the universal header search
+and the voice assistant endpoints.
+
+The index is built once per data refresh (whenever the latest
+date in daily_market_heatmap or the F&O schema catalog version
+moves, or after clear_symbol_index())
+and answers lookups without touching the database:
+
+    - Prefix lookup: bisect over a sorted array of symbols and
+      normalised company names / voice aliases.
+    - Fuzzy lookup: trigram index over the same keys, ranked by
+      trigram overlap, so typos like "RELAINCE" still resolve.
+
+USAGE:
+------
+    from app.services.symbol_search import search_symbols
+    search_symbols("relia")       # ['RELIANCE', 'RELIGARE', ...]
+    search_symbols("tata motr")   # ['TATAMOTORS', ...]
+
+    from app.services.symbol_search import get_fo_tickers, get_alias_map
+    get_fo_tickers()              # ['AARTIIND', 'ABB', ...]
+    get_alias_map()               # {'infosys': 'INFY', ...}
+=============================================================
+"""
+
+import os
+import re
+import threading
+import time
+from bisect import bisect_left
+from collections import defaultdict
+from typing import Dict, List, Optional, Set
+
+import pandas as pd
+from sqlalchemy import text
+
+from ..models.db_config import engine, engine_cash
+from ..models.schema_catalog import get_catalog, get_derived_tickers
+
+# =============================================================
+# CONSTANTS
+# =============================================================
+
+# How often (seconds) to check whether the underlying data has moved
+SYMBOL_INDEX_CHECK_TTL = 300
+
+# Default number of results returned to the header search
+DEFAULT_SEARCH_LIMIT = 15
+
+# Minimum trigram overlap (0..1) for a fuzzy match to be returned
+FUZZY_MIN_SCORE = 0.3
+
+# Company name suffixes dropped before indexing ("Reliance Industries Limited")
+_NAME_STOPWORDS = {"limited", "ltd", "ltd.", "the", "and", "&", "of", "india", "(india)"}
+
+# Common spoken / colloquial names -> ticker.
+# Filtered against the tickers actually present when served.
+STOCK_ALIASES = {
+    # Indices
+    "nifty": "NIFTY",
+    "bank nifty": "BANKNIFTY",
+    "banknifty": "BANKNIFTY",
+    "finnifty": "FINNIFTY",
+    # Top stocks with common names
+    "reliance": "RELIANCE",
+    "reli": "RELIANCE",
+    "tcs": "TCS",
+    "infosys": "INFY",
+    "infy": "INFY",
+    "hdfc bank": "HDFCBANK",
+    "hdfc": "HDFCBANK",
+    "hdfcbank": "HDFCBANK",
+    "icici bank": "ICICIBANK",
+    "icici": "ICICIBANK",
+    "sbi": "SBIN",
+    "state bank": "SBIN",
+    "tata motors": "TATAMOTORS",
+    "tatamotors": "TATAMOTORS",
+    "tata steel": "TATASTEEL",
+    "tatasteel": "TATASTEEL",
+    "bharti airtel": "BHARTIARTL",
+    "airtel": "BHARTIARTL",
+    "bharti": "BHARTIARTL",
+    "wipro": "WIPRO",
+    "itc": "ITC",
+    "kotak": "KOTAKBANK",
+    "kotak bank": "KOTAKBANK",
+    "axis bank": "AXISBANK",
+    "axis": "AXISBANK",
+    "maruti": "MARUTI",
+    "bajaj finance": "BAJFINANCE",
+    "bajaj": "BAJFINANCE",
+    "asian paints": "ASIANPAINT",
+    "asian paint": "ASIANPAINT",
+    "hindustan unilever": "HINDUNILVR",
+    "hul": "HINDUNILVR",
+    "larsen": "LT",
+    "l&t": "LT",
+    "lt": "LT",
+    "sun pharma": "SUNPHARMA",
+    "sunpharma": "SUNPHARMA",
+    "titan": "TITAN",
+    "adani enterprises": "ADANIENT",
+    "adani": "ADANIENT",
+    "adani ports": "ADANIPORTS",
+    "power grid": "POWERGRID",
+    "ntpc": "NTPC",
+    "ongc": "ONGC",
+    "coal india": "COALINDIA",
+    "bpcl": "BPCL",
+    "grasim": "GRASIM",
+    "ultratech": "ULTRACEMCO",
+    "nestle": "NESTLEIND",
+    "britannia": "BRITANNIA",
+    "cipla": "CIPLA",
+    "dr reddy": "DRREDDY",
+    "drreddy": "DRREDDY",
+    "divis": "DIVISLAB",
+    "divislab": "DIVISLAB",
+    "eicher": "EICHERMOT",
+    "eicher motors": "EICHERMOT",
+    "hero": "HEROMOTOCO",
+    "hero motocorp": "HEROMOTOCO",
+    "bajaj auto": "BAJAJ-AUTO",
+    "tech mahindra": "TECHM",
+    "techm": "TECHM",
+    "mahindra": "M&M",
+    "m&m": "M&M",
+    "hindalco": "HINDALCO",
+    "jswsteel": "JSWSTEEL",
+    "jsw steel": "JSWSTEEL",
+    "indusind": "INDUSINDBK",
+    "indusind bank": "INDUSINDBK",
+    "sbi life": "SBILIFE",
+    "hdfc life": "HDFCLIFE",
+}
+
+_SECTOR_MASTER_PATHS = [
+    os.getenv("SECTOR_MASTER_PATH"),
+    os.path.join(os.getcwd(), "nse_sector_master.csv"),
+    os.path.join(os.path.dirname(__file__), "..", "..", "..", "nse_sector_master.csv"),
+]
+
+
+# =============================================================
+# NORMALISATION HELPERS
+# =============================================================
+
+
+def _normalize(value: str) -> str:
+    """Lowercase and collapse everything that is not a letter/digit/& into single spaces."""
+    value = re.sub(r"[^a-z0-9&]+", " ", str(value).lower())
+    return " ".join(value.split())
+
+
+def _normalize_name(name: str) -> str:
+    """Normalise a company name and drop filler words like 'Limited'."""
+    words = [w for w in _normalize(name).split() if w not in _NAME_STOPWORDS]
+    return " ".join(words)
+
+
+def _trigrams(value: str) -> Set[str]:
+    """Padded character trigrams of a key (spaces removed)."""
+    compact = value.replace(" ", "")
+    if not compact:
+        return set()
+    padded = f"  {compact} "
+    return {padded[i : i + 3] for i in range(len(padded) - 2)}
+
+
+# =============================================================
+# INDEX
+# =============================================================
+
+
+class SymbolSearchIndex:
+    """
+    Immutable lookup structure built from a symbol universe.
+
+    keys      : sorted list of (normalised key, symbol) pairs used for prefix lookup.
+                Contains the lowercase symbol itself, the normalised company name
+                and every voice alias.
+    trigrams  : trigram -> set of key ids for fuzzy matching.
+    gram_counts : trigram count per key id (the Jaccard denominator).
+    """
+
+    def __init__(
+        self,
+        symbols: List[str],
+        fo_tickers: List[str],
+        company_names: Optional[Dict[str, str]] = None,
+        aliases: Optional[Dict[str, str]] = None,
+        data_version: Optional[str] = None,
+    ):
+        self.symbols = sorted(set(symbols))
+        self.fo_tickers = sorted(set(fo_tickers))
+        self.fo_set = frozenset(self.fo_tickers)
+        self.data_version = data_version
+        self.built_at = time.time()
+
+        known = set(self.symbols) | self.fo_set
+        self.aliases = {a: t for a, t in (aliases or {}).items() if t in known}
+
+        pairs = set()
+        for sym in self.symbols:
+            pairs.add((_normalize(sym), sym))
+        for sym, name in (company_names or {}).items():
+            if sym in known:
+                key = _normalize_name(name)
+                if key:
+                    pairs.add((key, sym))
+        for alias, sym in self.aliases.items():
+            pairs.add((_normalize(alias), sym))
+
+        self._keys = sorted(pairs)
+        self._key_strings = [k for k, _ in self._keys]
+
+        self._trigrams: Dict[str, Set[int]] = defaultdict(set)
+        self._gram_counts: List[int] = []
+        for idx, (key, _) in enumerate(self._keys):
+            grams = _trigrams(key)
+            self._gram_counts.append(len(grams))
+            for gram in grams:
+                self._trigrams[gram].add(idx)
+
+    # ---------------------------------------------------------
+    # Lookups
+    # ---------------------------------------------------------
+
+    def prefix(self, query: str, limit: int = DEFAULT_SEARCH_LIMIT) -> List[str]:
+        """Symbols whose ticker, company name or alias starts with query."""
+        q = _normalize(query)
+        if not q:
+            return []
+
+        # Exact ticker prefix first (this is what the old ILIKE query returned)
+        upper = query.strip().upper()
+        start = bisect_left(self.symbols, upper)
+        results = []
+        for sym in self.symbols[start:]:
+            if not sym.startswith(upper) or len(results) >= limit:
+                break
+            results.append(sym)
+
+        if len(results) >= limit:
+            return results
+
+        seen = set(results)
+        start = bisect_left(self._key_strings, q)
+        for key, sym in self._keys[start:]:
+            if not key.startswith(q) or len(results) >= limit:
+                break
+            if sym not in seen:
+                seen.add(sym)
+                results.append(sym)
+        return results
+
+    def fuzzy(self, query: str, limit: int = DEFAULT_SEARCH_LIMIT, exclude: Optional[Set[str]] = None) -> List[str]:
+        """Typo-tolerant lookup ranked by trigram overlap."""
+        grams = _trigrams(_normalize(query))
+        if not grams:
+            return []
+
+        hits: Dict[int, int] = defaultdict(int)
+        for gram in grams:
+            for idx in self._trigrams.get(gram, ()):
+                hits[idx] += 1
+
+        best: Dict[str, float] = {}
+        for idx, shared in hits.items():
+            sym = self._keys[idx][1]
+            if exclude and sym in exclude:
+                continue
+            score = shared / (len(grams) + self._gram_counts[idx] - shared)
+            if score >= FUZZY_MIN_SCORE and score > best.get(sym, 0.0):
+                best[sym] = score
+
+        ranked = sorted(best.items(), key=lambda kv: (-kv[1], kv[0]))
+        return [sym for sym, _ in ranked[:limit]]
+
+    def search(self, query: str, limit: int = DEFAULT_SEARCH_LIMIT, fuzzy: bool = True) -> List[str]:
+        """Prefix matches first, topped up with fuzzy matches."""
+        results = self.prefix(query, limit)
+        if fuzzy and len(results) < limit:
+            results += self.fuzzy(query, limit - len(results), exclude=set(results))
+        return results
+
+    def resolve(self, phrase: str) -> Optional[str]:
+        """Resolve a spoken phrase / ticker to a single symbol, or None."""
+        upper = phrase.strip().upper()
+        if upper in self.fo_set or upper in self.symbols:
+            return upper
+        alias = self.aliases.get(_normalize(phrase))
+        if alias:
+            return alias
+        matches = self.search(phrase, limit=1)
+        return matches[0] if matches else None
+
+    def alias_map(self) -> Dict[str, str]:
+        """Aliases for F&O tickers plus lowercase ticker -> ticker."""
+        valid = {a: t for a, t in self.aliases.items() if t in self.fo_set}
+        for ticker in self.fo_tickers:
+            valid[ticker.lower()] = ticker
+        return valid
+
+
+# =============================================================
+# LOADERS
+# =============================================================
+
+
+def _load_cash_symbols() -> List[str]:
+    """All tradeable cash symbols from the heatmap (same filters as the old header query)."""
+    try:
+        with engine_cash.connect() as conn:
+            rows = conn.execute(
+                text(
+                    """
+                    SELECT DISTINCT symbol
+                    FROM daily_market_heatmap
+                    WHERE LENGTH(symbol) <= 15
+                      AND symbol ~ '^[A-Z]'
+                      AND symbol NOT LIKE '%GS20%'
+                      AND symbol NOT LIKE '%_RE'
+                """
+                )
+            ).fetchall()
+        return [r[0] for r in rows]
+    except Exception as e:
+        print(f"[ERROR] symbol_search._load_cash_symbols(): {e}")
+        return []
+
+
+def _load_fo_tickers() -> List[str]:
+    """F&O tickers from TBL_<TICKER>_DERIVED table names."""
+    return get_derived_tickers()
+
+
+def _load_company_names() -> Dict[str, str]:
+    """SYMBOL -> company name from nse_sector_master.csv (if present)."""
+    for path in _SECTOR_MASTER_PATHS:
+        if not path or not os.path.exists(path):
+            continue
+        try:
+            df = pd.read_csv(path, encoding="utf-8-sig")
+            df.columns = df.columns.str.strip().str.upper()
+            name_col = next((c for c in df.columns if "COMPANY" in c or c == "NAME"), None)
+            if "SYMBOL" not in df.columns or not name_col:
+                continue
+            df = df[["SYMBOL", name_col]].dropna()
+            return dict(zip(df["SYMBOL"].astype(str).str.strip().str.upper(), df[name_col].astype(str)))
+        except Exception as e:
+            print(f"[WARN] symbol_search: failed to read company names from {path}: {e}")
+    return {}
+
+
+def _get_data_version() -> str:
+    """
+    Latest heatmap date + F&O schema catalog version - the index is rebuilt
+    whenever either moves (new cash symbols / new TBL_<TICKER>_DERIVED tables).
+    Without the catalog version table, the ticker list itself is compared.
+    """
+    heatmap_date = None
+    try:
+        with engine_cash.connect() as conn:
+            heatmap_date = conn.execute(text("SELECT MAX(date) FROM daily_market_heatmap")).scalar()
+    except Exception as e:
+        print(f"[WARN] symbol_search._get_data_version(): {e}")
+
+    catalog = get_catalog(engine)
+    schema = catalog.version if catalog.version is not None else hash(tuple(catalog.tickers))
+    return f"{heatmap_date}|{schema}"
+
+
+# =============================================================
+# SHARED INSTANCE
+# =============================================================
+
+_index: Optional[SymbolSearchIndex] = None
+_index_checked_at = 0.0
+_index_lock = threading.Lock()
+
+
+def build_symbol_index(data_version: Optional[str] = None) -> SymbolSearchIndex:
+    """Build a fresh index from the database and sector master."""
+    start = time.time()
+    index = SymbolSearchIndex(
+        symbols=_load_cash_symbols(),
+        fo_tickers=_load_fo_tickers(),
+        company_names=_load_company_names(),
+        aliases=STOCK_ALIASES,
+        data_version=data_version,
+    )
+    print(
+        f"[INFO] Symbol search index built: {len(index.symbols)} symbols, "
+        f"{len(index.fo_tickers)} F&O tickers in {time.time() - start:.2f}s"
+    )
+    return index
+
+
+def get_symbol_index() -> SymbolSearchIndex:
+    """
+    Return the shared index, rebuilding it when the data version changes.
+    The version check itself runs at most once every SYMBOL_INDEX_CHECK_TTL seconds.
+    """
+    global _index, _index_checked_at
+
+    now = time.time()
+    if _index is not None and (now - _index_checked_at) < SYMBOL_INDEX_CHECK_TTL:
+        return _index
+
+    with _index_lock:
+        if _index is not None and (time.time() - _index_checked_at) < SYMBOL_INDEX_CHECK_TTL:
+            return _index
+
+        version = _get_data_version()
+        if _index is None or version != _index.data_version:
+            _index = build_symbol_index(version)
+        _index_checked_at = time.time()
+        return _index
+
+
+def clear_symbol_index():
+    """Drop the shared index - next lookup rebuilds it."""
+    global _index, _index_checked_at
+    with _index_lock:
+        _index = None
+        _index_checked_at = 0.0
+    print("[INFO] Symbol search index cleared")
+
+
+# =============================================================
+# CONVENIENCE WRAPPERS
+# =============================================================
+
+
+def search_symbols(query: str, limit: int = DEFAULT_SEARCH_LIMIT, fuzzy: bool = True) -> List[str]:
+    """Header search: prefix + fuzzy matches over symbols, names and aliases."""
+    return get_symbol_index().search(query, limit=limit, fuzzy=fuzzy)
+
+
+def get_fo_tickers() -> List[str]:
+    """Sorted list of F&O tickers."""
+    return list(get_symbol_index().fo_tickers)
+
+
+def is_fo_ticker(ticker: str) -> bool:
+    """True if TBL_<TICKER>_DERIVED exists."""
+    return ticker.strip().upper() in get_symbol_index().fo_set
+
+
+def resolve_symbol(phrase: str) -> Optional[str]:
+    """Resolve a spoken phrase / ticker to a symbol."""
+    return get_symbol_index().resolve(phrase)
+
+
+def get_alias_map() -> Dict[str, str]:
+    """Voice alias map filtered to F&O tickers."""
+    return get_symbol_index().alias_map()
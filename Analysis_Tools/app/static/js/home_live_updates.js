@@ -5,6 +5,8 @@
  *   1. NSE API  (/api/nse-indices)      → always-on price cards  (every 5 s)
  *   2. NSE API  (/api/nse-chart/<idx>)  → always-on chart series (on load + click + every 60 s)
  *   3. Upstox   (/api/live-indices)     → tick-precision override ONLY when today's data exists (every 1 s)
+ *   4. Upstox   (/api/live-indices/stream) → SSE push of ticks from the shared-memory tick bus;
+ *                                            while it is open the 1 s poll drops to a slow history refresh
  *
  * Key rule: Upstox history files persist from the previous session, so we
  * only use Upstox chart data if its latest history timestamp is from TODAY.
@@ -53,12 +55,15 @@ function makeGradient(ctx, canvas, isPositive) {
 class LiveIndicesUpdater {
     constructor() {
         this.upstoxInterval = 1000;   // ms
+        this.upstoxStreamInterval = 30000;  // ms, history refresh while the SSE stream is open
+        this.maxStreamHistory = 1000;  // points kept per index from streamed ticks
         this.nsePriceInterval = 5000;   // ms
         this.nseChartInterval = 60000;  // ms
 
         this._upstoxTimer = null;
         this._nsePriceTimer = null;
         this._nseChartTimer = null;
+        this._stream = null;
 
         this.isRunning = false;
         this.selectedIndex = 'nifty50';
@@ -322,6 +327,10 @@ class LiveIndicesUpdater {
         const data = await this.fetchUpstoxData();
         if (!data) return;
         this.latestUpstoxData = data;
+        this._renderUpstox(data);
+    }
+
+    _renderUpstox(data) {
 
         const sel = data[this.selectedIndex];
         if (!sel) return;
@@ -354,6 +363,62 @@ class LiveIndicesUpdater {
         // (if not today → NSE is primary, do nothing here)
     }
 
+    //  SSE tick stream
+
+    _setUpstoxInterval(ms) {
+        clearInterval(this._upstoxTimer);
+        this._upstoxTimer = setInterval(() => this._pollUpstox(), ms);
+    }
+
+    _startStream() {
+        if (!window.EventSource || this._stream) return;
+        const es = new EventSource('/api/live-indices/stream');
+        this._stream = es;
+
+        es.onopen = () => this._setUpstoxInterval(this.upstoxStreamInterval);
+        es.addEventListener('tick', (e) => {
+            try { this._applyTicks(JSON.parse(e.data)); } catch { /* ignore malformed event */ }
+        });
+        es.onerror = () => {
+            // CONNECTING = EventSource retries by itself; CLOSED = 204 / gave up → back to polling
+            if (es.readyState === EventSource.CLOSED) {
+                this._stream = null;
+                if (this.isRunning) this._setUpstoxInterval(this.upstoxInterval);
+            }
+        };
+    }
+
+    _stopStream() {
+        if (this._stream) this._stream.close();
+        this._stream = null;
+    }
+
+    _applyTicks(ticks) {
+        // Needs a polled snapshot (history) to extend
+        if (!this.latestUpstoxData) return;
+        for (const [key, tick] of Object.entries(ticks)) {
+            const entry = this.latestUpstoxData[key];
+            if (!entry) continue;
+            const history = entry.history || (entry.history = []);
+            const last = history[history.length - 1];
+            if (!last || last.timestamp < tick.timestamp) {
+                history.push({ timestamp: tick.timestamp, value: tick.value });
+                if (history.length > this.maxStreamHistory) history.shift();
+            }
+            const change = tick.open > 0 ? tick.value - tick.open : 0;
+            Object.assign(entry, {
+                value: tick.value,
+                open: tick.open,
+                high: tick.high,
+                low: tick.low,
+                previousClose: tick.open,
+                change: Math.round(change * 100) / 100,
+                percentChange: tick.open > 0 ? Math.round(change / tick.open * 10000) / 100 : 0,
+            });
+        }
+        this._renderUpstox(this.latestUpstoxData);
+    }
+
     //  Card click handlers
 
     setupCardClickHandlers() {
@@ -435,11 +500,15 @@ class LiveIndicesUpdater {
         this._nsePriceTimer = setInterval(() => this._pollNsePrices(), this.nsePriceInterval);
         this._nseChartTimer = setInterval(() => this._pollNseChart(), this.nseChartInterval);
         this._upstoxTimer = setInterval(() => this._pollUpstox(), this.upstoxInterval);
+
+        // 4. Push ticks over SSE when the streamer publishes to the tick bus
+        this._startStream();
     }
 
     stop() {
         if (!this.isRunning) return;
         this.isRunning = false;
+        this._stopStream();
         clearInterval(this._upstoxTimer);
         clearInterval(this._nsePriceTimer);
         clearInterval(this._nseChartTimer);
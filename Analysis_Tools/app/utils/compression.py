@@ -0,0 +1,109 @@
+# =============================================================
+#  RESPONSE COMPRESSION
+#  Purpose: gzip / brotli for JSON, HTML, CSS and JS responses above
+#           a size threshold
+#
+#  init_compression(app) registers an after_request hook. Brotli is
+#  preferred when the client accepts it and the `brotli` package is
+#  installed (BROTLI_AVAILABLE); gzip otherwise. Streamed responses
+#  (SSE) and file responses (send_file / static, direct_passthrough)
+#  are left alone.
+#
+#  A compressed body is a different representation of the same data,
+#  so its ETag (utils/http_cache.py) is sent weak: W/"<tag>". Weak
+#  tags still match If-None-Match, so 304s keep working.
+#
+#  Register before init_http_cache so this hook runs after it (Flask
+#  runs after_request hooks in reverse order).
+# =============================================================
+
+import gzip
+import os
+
+from flask import request
+
+try:
+    import brotli
+
+    BROTLI_AVAILABLE = True
+except ImportError:
+    brotli = None
+    BROTLI_AVAILABLE = False
+
+# =============================================================
+# CONFIGURATION
+# =============================================================
+
+COMPRESS_ENABLED = os.getenv("COMPRESS", "1") != "0"
+COMPRESS_MIN_BYTES = int(os.getenv("COMPRESS_MIN_BYTES", "1024"))  # smaller bodies fit in one packet anyway
+GZIP_LEVEL = int(os.getenv("COMPRESS_GZIP_LEVEL", "4"))  # 2.5x faster than 6 on multi-MB JSON, ~10% larger
+BROTLI_QUALITY = int(os.getenv("COMPRESS_BROTLI_QUALITY", "4"))
+
+COMPRESSIBLE_MIMETYPES = {
+    "application/json",
+    "text/html",
+    "text/css",
+    "text/plain",
+    "text/csv",
+    "text/javascript",
+    "application/javascript",
+    "image/svg+xml",
+}
+
+
+def choose_encoding() -> str:
+    """'br', 'gzip' or '' for the current request's Accept-Encoding."""
+    accept = request.accept_encodings
+    if BROTLI_AVAILABLE and accept["br"]:
+        return "br"
+    if accept["gzip"]:
+        return "gzip"
+    return ""
+
+
+def compress_body(data: bytes, encoding: str) -> bytes:
+    if encoding == "br":
+        return brotli.compress(data, quality=BROTLI_QUALITY)
+    return gzip.compress(data, compresslevel=GZIP_LEVEL, mtime=0)
+
+
+def _weaken_etag(response):
+    etag, weak = response.get_etag()
+    if etag and not weak:
+        response.set_etag(etag, weak=True)
+
+
+def init_compression(app):
+    """Register the compression hook on `app`."""
+    if not COMPRESS_ENABLED:
+        return
+
+    @app.after_request
+    def _compress_response(response):
+        if response.status_code == 304:
+            if choose_encoding():
+                _weaken_etag(response)
+            return response
+
+        if (
+            response.status_code != 200
+            or response.is_streamed
+            or response.direct_passthrough
+            or response.mimetype not in COMPRESSIBLE_MIMETYPES
+            or "Content-Encoding" in response.headers
+        ):
+            return response
+
+        data = response.get_data()
+        if len(data) < COMPRESS_MIN_BYTES:
+            return response
+
+        response.vary.add("Accept-Encoding")
+        encoding = choose_encoding()
+        if not encoding:
+            return response
+
+        response.set_data(compress_body(data, encoding))
+        response.headers["Content-Encoding"] = encoding
+        _weaken_etag(response)
+        return response
@@ -0,0 +1,166 @@
+# =============================================================
+#  HTTP CACHE VALIDATORS
+#  Purpose: ETag / Last-Modified / Cache-Control for EOD-derived
+#           pages and APIs, answered with 304 before any model runs
+#
+#  EOD screens only change when the pipeline loads a new trading date
+#  (see models/data_epoch.py). For GET requests to those endpoints the
+#  ETag is derived up front from
+#
+#    (build id, data epoch, user, path, query args)
+#
+#  so a matching If-None-Match is answered with 304 in before_request
+#  without rendering or serializing anything. The user is part of the
+#  key because every page sits behind the login and shows the user's
+#  name; responses are therefore `private` (browser cache only, never
+#  a shared proxy). Live endpoints (NSE quotes, SSE stream, breadth)
+#  are marked no-store.
+#
+#  init_http_cache(app) must be called after require_login is
+#  registered so a 304 is never returned to an anonymous request.
+# =============================================================
+
+import hashlib
+import os
+from datetime import timezone
+from typing import Optional
+
+from flask import g, request, session
+
+from ..models.data_epoch import get_data_epoch
+
+# =============================================================
+# CONFIGURATION
+# =============================================================
+
+HTTP_CACHE_ENABLED = os.getenv("HTTP_CACHE", "1") != "0"
+HTTP_CACHE_MAX_AGE = int(os.getenv("HTTP_CACHE_MAX_AGE", "60"))  # seconds a browser may reuse without asking
+ERROR_PROBE_BYTES = 4096  # JSON bodies below this size are checked for an error payload
+
+# Blueprints whose GET responses depend only on EOD tables
+EOD_BLUEPRINTS = {
+    "insights",
+    "dashboard",
+    "stock",
+    "screener",
+    "gainers_losers",
+    "signal_analysis",
+    "signal_scanner",
+    "futures_oi",
+    "technical_screener",
+    "index_screener",
+    "goldmine",
+}
+
+# Live data: never stored by the browser or a proxy
+LIVE_ENDPOINTS = {
+    "home.api_live_indices",
+    "home.api_live_indices_stream",
+    "home.api_nse_indices",
+    "home.api_nse_chart",
+    "home.api_live_fii_dii",
+    "home.api_market_breadth",
+    "home.advance_decline",
+    "dashboard.api_live_indices",
+}
+
+# Inside EOD blueprints but with side effects or non-EOD inputs
+UNCACHED_ENDPOINTS = {
+    "insights.api_clear_cache",
+    "gainers_losers.clear_cache",
+    "gainers_losers.export_screener_pdf",
+    "signal_scanner.api_clear_cache",
+    "dashboard.export_dashboard",
+    "stock.stock_fundamental",  # scraped JSON files, not the EOD tables
+}
+
+
+def _build_id(root: str) -> str:
+    """Newest mtime of the app's code and templates, so a deploy changes every ETag."""
+    newest = 0.0
+    for dirpath, _dirs, files in os.walk(root):
+        for name in files:
+            if name.endswith((".py", ".html", ".js", ".css")):
+                try:
+                    newest = max(newest, os.path.getmtime(os.path.join(dirpath, name)))
+                except OSError:
+                    pass
+    return f"{newest:.0f}"
+
+
+def _policy(endpoint: Optional[str]) -> Optional[str]:
+    """'eod', 'live' or None (leave the response alone)."""
+    if not endpoint:
+        return None
+    if endpoint in LIVE_ENDPOINTS:
+        return "live"
+    if endpoint in UNCACHED_ENDPOINTS:
+        return None
+    if endpoint.partition(".")[0] in EOD_BLUEPRINTS:
+        return "eod"
+    return None
+
+
+def _is_error_payload(response) -> bool:
+    """Small 200 JSON bodies carrying an error must not be pinned for the whole epoch."""
+    if not response.is_json or (response.content_length or ERROR_PROBE_BYTES) >= ERROR_PROBE_BYTES:
+        return False
+    data = response.get_json(silent=True)
+    return isinstance(data, dict) and ("error" in data or data.get("success") is False)
+
+
+def _etag_for(build_id: str, token: str) -> str:
+    args = sorted(request.args.items(multi=True))
+    key = f"{build_id}|{token}|{session.get('user', '')}|{request.path}|{args!r}"
+    return hashlib.sha1(key.encode("utf-8")).hexdigest()
+
+
+def init_http_cache(app):
+    """Register the conditional-GET hooks on `app`."""
+    if not HTTP_CACHE_ENABLED:
+        return
+
+    build_id = _build_id(app.root_path)
+
+    @app.before_request
+    def _http_cache_check():
+        if request.method not in ("GET", "HEAD") or _policy(request.endpoint) != "eod":
+            return None
+        try:
+            token, last_modified = get_data_epoch()
+        except Exception as e:
+            print(f"[WARN] http_cache: data epoch unavailable: {e}")
+            return None
+
+        etag = _etag_for(build_id, token)
+        g.http_etag = etag
+        g.http_last_modified = last_modified.replace(tzinfo=timezone.utc) if last_modified else None
+
+        if request.if_none_match.contains_weak(etag):
+            response = app.response_class(status=304)
+            _set_validators(response)
+            return response
+        return None
+
+    @app.after_request
+    def _http_cache_headers(response):
+        policy = _policy(request.endpoint)
+        if policy == "live":
+            response.headers["Cache-Control"] = "no-store"
+        elif (
+            policy == "eod"
+            and "http_etag" in g
+            and response.status_code == 200
+            and not response.is_streamed
+            and not _is_error_payload(response)
+        ):
+            _set_validators(response)
+        return response
+
+
+def _set_validators(response):
+    response.set_etag(g.http_etag)
+    if g.http_last_modified is not None:
+        response.last_modified = g.http_last_modified
+    response.headers["Cache-Control"] = f"private, max-age={HTTP_CACHE_MAX_AGE}, must-revalidate"
+    response.vary.add("Cookie")
@@ -0,0 +1,162 @@
+# =============================================================
+#  JSON PROVIDER
+#  Purpose: Faster jsonify() for the large tabular APIs, with an
+#           optional column-oriented response shape
+#
+#  init_json_provider(app) replaces Flask's json provider with
+#  FastJSONProvider:
+#
+#  * orjson (optional, ORJSON_AVAILABLE) encodes straight to bytes,
+#    serializes numpy arrays / scalars natively, Decimal as a number and
+#    NaN / inf as null (the stdlib encoder emits bare NaN, which
+#    JSON.parse rejects). date / datetime keep Flask's HTTP-date format
+#    so existing clients see the same strings. Without orjson the
+#    stdlib encoder is used with the same Decimal / numpy handling.
+#
+#  * ?shape=columns on any JSON endpoint turns every list of row dicts
+#    in the payload (the payload itself, or a top-level value such as
+#    "signals", "stocks", "data") into
+#
+#        {"columns": ["symbol", "close", ...], "data": [["TCS", 4120.5, ...], ...]}
+#
+#    which drops the repeated keys (about half the bytes for 35-key
+#    scanner rows). Clients opt in; the default shape is unchanged.
+#
+#  Measured with:  python -m benchmarks.json_payloads
+# =============================================================
+
+import os
+from decimal import Decimal
+from operator import itemgetter
+from typing import Any, Dict, List
+
+from flask import has_request_context, request
+from flask.json.provider import DefaultJSONProvider
+
+try:
+    import orjson
+
+    ORJSON_AVAILABLE = os.getenv("ORJSON", "1") != "0"
+except ImportError:
+    orjson = None
+    ORJSON_AVAILABLE = False
+
+try:
+    import numpy as np
+
+    NUMPY_AVAILABLE = True
+except ImportError:
+    np = None
+    NUMPY_AVAILABLE = False
+
+COLUMNS_PARAM = "shape"  # ?shape=columns
+
+
+# =============================================================
+# COLUMN-ORIENTED SHAPE
+# =============================================================
+
+
+def _is_rows(value) -> bool:
+    return isinstance(value, list) and bool(value) and isinstance(value[0], dict) and all(
+        isinstance(r, dict) for r in value
+    )
+
+
+def to_columns(rows: List[Dict]) -> Dict[str, List]:
+    """List of row dicts → {"columns": [...], "data": [[...], ...]}; missing keys become null."""
+    columns = list(rows[0])
+    seen = set(columns)
+    for row in rows:
+        if len(row) != len(columns) or row.keys() != seen:
+            for key in row:
+                if key not in seen:
+                    seen.add(key)
+                    columns.append(key)
+
+    if len(columns) == 1:
+        key = columns[0]
+        return {"columns": columns, "data": [[row.get(key)] for row in rows]}
+    try:
+        get = itemgetter(*columns)
+        data = [list(get(row)) for row in rows]
+    except KeyError:
+        data = [[row.get(c) for c in columns] for row in rows]
+    return {"columns": columns, "data": data}
+
+
+def columnar(obj):
+    """Apply to_columns() to the payload or its top-level row lists."""
+    if _is_rows(obj):
+        return to_columns(obj)
+    if isinstance(obj, dict) and any(_is_rows(v) for v in obj.values()):
+        return {k: to_columns(v) if _is_rows(v) else v for k, v in obj.items()}
+    return obj
+
+
+def wants_columns() -> bool:
+    return has_request_context() and request.args.get(COLUMNS_PARAM) == "columns"
+
+
+# =============================================================
+# PROVIDER
+# =============================================================
+
+
+def _default(o):
+    if isinstance(o, Decimal):
+        return float(o)
+    if NUMPY_AVAILABLE:
+        if isinstance(o, np.ndarray):
+            return o.tolist()
+        if isinstance(o, np.generic):
+            return o.item()
+    return DefaultJSONProvider.default(o)
+
+
+class FastJSONProvider(DefaultJSONProvider):
+    """orjson-backed provider (stdlib fallback) with ?shape=columns support."""
+
+    default = staticmethod(_default)
+    sort_keys = False
+
+    _ORJSON_OPTS = (
+        (orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME)
+        if orjson is not None
+        else 0
+    )
+
+    def _encode(self, obj: Any, indent: bool = False) -> bytes:
+        opts = self._ORJSON_OPTS | (orjson.OPT_INDENT_2 if indent else 0)
+        return orjson.dumps(obj, default=_default, option=opts)
+
+    def dumps(self, obj: Any, **kwargs: Any) -> str:
+        # Callers passing stdlib-only options (cls, ensure_ascii, ...) get the stdlib encoder
+        if ORJSON_AVAILABLE and set(kwargs) <= {"indent", "separators", "sort_keys"} and not kwargs.get("sort_keys"):
+            return self._encode(obj, indent=bool(kwargs.get("indent"))).decode("utf-8")
+        return super().dumps(obj, **kwargs)
+
+    def loads(self, s, **kwargs: Any) -> Any:
+        if ORJSON_AVAILABLE and not kwargs:
+            return orjson.loads(s)
+        return super().loads(s, **kwargs)
+
+    def response(self, *args: Any, **kwargs: Any):
+        obj = self._prepare_response_obj(args, kwargs)
+        if wants_columns():
+            obj = columnar(obj)
+        indent = (self.compact is None and self._app.debug) or self.compact is False
+
+        if ORJSON_AVAILABLE:
+            body = self._encode(obj, indent=indent) + b"\n"
+        else:
+            dump_args = {"indent": 2} if indent else {"separators": (",", ":")}
+            body = f"{super().dumps(obj, **dump_args)}\n"
+        return self._app.response_class(body, mimetype=self.mimetype)
+
+
+def init_json_provider(app):
+    """Install FastJSONProvider as app.json (used by jsonify and the tojson filter)."""
+    app.json = FastJSONProvider(app)
+    if not ORJSON_AVAILABLE:
+        print("[INFO] orjson not installed - JSON responses use the stdlib encoder")
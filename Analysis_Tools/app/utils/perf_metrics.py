@@ -0,0 +1,336 @@
+# =============================================================
+#  REQUEST PERFORMANCE METRICS
+#  Purpose: Per-endpoint latency histograms and SQL statement
+#           counts / DB time per request
+#
+#  init_perf_metrics(app, engines) hooks Flask before/after_request
+#  and SQLAlchemy cursor events on each engine. Statements executed
+#  on the request thread are attributed to the current endpoint;
+#  requests over PERF_QUERY_THRESHOLD statements are flagged (N+1).
+#
+#  Exposed through the admin blueprint:
+#    /admin/performance       dashboard (admin only)
+#    /admin/api/performance   JSON snapshot
+#    /admin/metrics           Prometheus text format
+#
+#  Counters live in the worker process (one set per gunicorn worker;
+#  Prometheus sums them across scrape targets). Queries run from
+#  ThreadPoolExecutor workers inside a request are not attributed.
+# =============================================================
+
+import os
+import threading
+import time
+from collections import deque
+from typing import Dict, List
+
+from flask import g, request
+from sqlalchemy import event
+
+# =============================================================
+# CONFIGURATION
+# =============================================================
+
+PERF_METRICS_ENABLED = os.getenv("PERF_METRICS", "1") != "0"
+PERF_QUERY_THRESHOLD = int(os.getenv("PERF_QUERY_THRESHOLD", "25"))  # statements per request
+FLAGGED_HISTORY = 200  # Recent over-threshold requests kept for the admin page
+
+# Prometheus-style latency buckets (seconds, upper bounds)
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, float("inf"))
+
+# Endpoints not worth measuring
+SKIP_ENDPOINTS = {"static", "admin.metrics", "home.api_live_indices_stream"}
+
+
+class EndpointStats:
+    """Latency histogram plus SQL totals for one endpoint."""
+
+    __slots__ = ("count", "errors", "total_time", "max_time", "buckets", "sql_count", "sql_time", "sql_max", "flagged", "db")
+
+    def __init__(self):
+        self.count = 0
+        self.errors = 0
+        self.total_time = 0.0
+        self.max_time = 0.0
+        self.buckets = [0] * len(LATENCY_BUCKETS)
+        self.sql_count = 0
+        self.sql_time = 0.0
+        self.sql_max = 0
+        self.flagged = 0
+        self.db: Dict[str, list] = {}  # label -> [statements, seconds]
+
+    def observe(self, duration: float, status: int, sql: Dict[str, list]):
+        self.count += 1
+        if status >= 500:
+            self.errors += 1
+        self.total_time += duration
+        self.max_time = max(self.max_time, duration)
+        for i, bound in enumerate(LATENCY_BUCKETS):
+            if duration <= bound:
+                self.buckets[i] += 1
+                break
+
+        statements = 0
+        for label, (n, seconds) in sql.items():
+            totals = self.db.setdefault(label, [0, 0.0])
+            totals[0] += n
+            totals[1] += seconds
+            statements += n
+            self.sql_time += seconds
+        self.sql_count += statements
+        self.sql_max = max(self.sql_max, statements)
+        if statements > PERF_QUERY_THRESHOLD:
+            self.flagged += 1
+
+    def quantile(self, q: float) -> float:
+        """Quantile estimated from the histogram (linear within a bucket)."""
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen, lower = 0, 0.0
+        for bound, n in zip(LATENCY_BUCKETS, self.buckets):
+            if n and seen + n >= rank:
+                upper = min(bound, self.max_time)
+                return min(lower + (upper - lower) * ((rank - seen) / n), self.max_time)
+            seen += n
+            lower = bound
+        return self.max_time
+
+
+_stats: Dict[str, EndpointStats] = {}
+_flagged = deque(maxlen=FLAGGED_HISTORY)
+_stats_lock = threading.Lock()
+_started_at = time.time()
+
+# Per-thread SQL accumulator for the request being served ({label: [n, seconds]})
+_local = threading.local()
+
+
+# =============================================================
+# SQLALCHEMY HOOKS
+# =============================================================
+
+
+def instrument_engine(engine, label: str):
+    """Count statements and cursor time on `engine` into the current request."""
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _before(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("perf_start", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _after(conn, cursor, statement, parameters, context, executemany):
+        starts = conn.info.get("perf_start")
+        if not starts:
+            return
+        elapsed = time.perf_counter() - starts.pop()
+        sql = getattr(_local, "sql", None)
+        if sql is not None:
+            totals = sql.get(label)
+            if totals is None:
+                totals = sql[label] = [0, 0.0]
+            totals[0] += 1
+            totals[1] += elapsed
+
+    @event.listens_for(engine, "handle_error")
+    def _error(context):
+        conn = context.connection
+        if conn is not None and conn.info.get("perf_start"):
+            conn.info["perf_start"].pop()
+
+
+# =============================================================
+# FLASK HOOKS
+# =============================================================
+
+
+def _record(status: int):
+    start = g.pop("perf_start", None)
+    sql = getattr(_local, "sql", None)
+    _local.sql = None
+    if start is None or sql is None:
+        return None
+    duration = time.perf_counter() - start
+    endpoint = request.endpoint or "<unmatched>"
+
+    with _stats_lock:
+        stats = _stats.get(endpoint)
+        if stats is None:
+            stats = _stats[endpoint] = EndpointStats()
+        stats.observe(duration, status, sql)
+
+    statements = sum(n for n, _ in sql.values())
+    db_time = sum(s for _, s in sql.values())
+    if statements > PERF_QUERY_THRESHOLD:
+        _flagged.append(
+            {
+                "time": time.strftime("%Y-%m-%d %H:%M:%S"),
+                "endpoint": endpoint,
+                "path": request.full_path.rstrip("?"),
+                "statements": statements,
+                "db_ms": round(db_time * 1000, 1),
+                "duration_ms": round(duration * 1000, 1),
+            }
+        )
+        print(f"[WARN] {endpoint}: {statements} SQL statements in one request "
+              f"({db_time * 1000:.0f}ms DB / {duration * 1000:.0f}ms total) - {request.path}")
+    return duration, statements, db_time
+
+
+def init_perf_metrics(app, engines: Dict[str, object]):
+    """Register request hooks on `app` and cursor hooks on each {label: engine}."""
+    if not PERF_METRICS_ENABLED:
+        return
+
+    for label, eng in engines.items():
+        instrument_engine(eng, label)
+
+    @app.before_request
+    def _perf_start():
+        if request.endpoint in SKIP_ENDPOINTS:
+            return None
+        g.perf_start = time.perf_counter()
+        _local.sql = {}
+        return None
+
+    @app.after_request
+    def _perf_finish(response):
+        result = _record(response.status_code)
+        if result is not None:
+            duration, statements, db_time = result
+            response.headers["Server-Timing"] = (
+                f'db;dur={db_time * 1000:.1f};desc="{statements} queries", app;dur={duration * 1000:.1f}'
+            )
+        return response
+
+    @app.teardown_request
+    def _perf_teardown(exc):
+        # Unhandled exceptions skip after_request
+        if exc is not None and "perf_start" in g:
+            _record(500)
+        _local.sql = None
+
+
+# =============================================================
+# REPORTING
+# =============================================================
+
+
+def get_perf_snapshot() -> Dict:
+    """Per-endpoint summary (slowest p95 first) plus recent flagged requests."""
+    with _stats_lock:
+        rows = []
+        for endpoint, s in _stats.items():
+            rows.append(
+                {
+                    "endpoint": endpoint,
+                    "count": s.count,
+                    "errors": s.errors,
+                    "avg_ms": round(s.total_time / s.count * 1000, 1) if s.count else 0.0,
+                    "p50_ms": round(s.quantile(0.5) * 1000, 1),
+                    "p95_ms": round(s.quantile(0.95) * 1000, 1),
+                    "max_ms": round(s.max_time * 1000, 1),
+                    "avg_queries": round(s.sql_count / s.count, 1) if s.count else 0.0,
+                    "max_queries": s.sql_max,
+                    "db_share": round(s.sql_time / s.total_time * 100, 1) if s.total_time else 0.0,
+                    "flagged": s.flagged,
+                    "db": {label: {"statements": n, "ms": round(t * 1000, 1)} for label, (n, t) in s.db.items()},
+                }
+            )
+        flagged = list(_flagged)[::-1]
+
+    rows.sort(key=lambda r: r["p95_ms"], reverse=True)
+    return {
+        "endpoints": rows,
+        "flagged": flagged,
+        "query_threshold": PERF_QUERY_THRESHOLD,
+        "uptime_s": int(time.time() - _started_at),
+        "pid": os.getpid(),
+    }
+
+
+def _label(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"')
+
+
+def render_prometheus() -> str:
+    """All counters in the Prometheus text exposition format."""
+    lines = [
+        "# HELP goldmine_http_request_duration_seconds Request latency by endpoint.",
+        "# TYPE goldmine_http_request_duration_seconds histogram",
+    ]
+    with _stats_lock:
+        items = sorted(_stats.items())
+        for endpoint, s in items:
+            ep = _label(endpoint)
+            cumulative = 0
+            for bound, n in zip(LATENCY_BUCKETS, s.buckets):
+                cumulative += n
+                le = "+Inf" if bound == float("inf") else f"{bound:g}"
+                lines.append(f'goldmine_http_request_duration_seconds_bucket{{endpoint="{ep}",le="{le}"}} {cumulative}')
+            lines.append(f'goldmine_http_request_duration_seconds_sum{{endpoint="{ep}"}} {s.total_time:.6f}')
+            lines.append(f'goldmine_http_request_duration_seconds_count{{endpoint="{ep}"}} {s.count}')
+
+        lines += ["# HELP goldmine_http_request_errors_total Responses with status >= 500.",
+                  "# TYPE goldmine_http_request_errors_total counter"]
+        lines += [f'goldmine_http_request_errors_total{{endpoint="{_label(e)}"}} {s.errors}' for e, s in items]
+
+        lines += ["# HELP goldmine_sql_statements_total SQL statements executed while serving requests.",
+                  "# TYPE goldmine_sql_statements_total counter"]
+        for endpoint, s in items:
+            for label, (n, _) in sorted(s.db.items()):
+                lines.append(f'goldmine_sql_statements_total{{endpoint="{_label(endpoint)}",db="{_label(label)}"}} {n}')
+
+        lines += ["# HELP goldmine_sql_seconds_total Cursor execution time while serving requests.",
+                  "# TYPE goldmine_sql_seconds_total counter"]
+        for endpoint, s in items:
+            for label, (_, t) in sorted(s.db.items()):
+                lines.append(f'goldmine_sql_seconds_total{{endpoint="{_label(endpoint)}",db="{_label(label)}"}} {t:.6f}')
+
+        lines += ["# HELP goldmine_requests_over_query_threshold_total Requests above PERF_QUERY_THRESHOLD statements.",
+                  "# TYPE goldmine_requests_over_query_threshold_total counter"]
+        lines += [f'goldmine_requests_over_query_threshold_total{{endpoint="{_label(e)}"}} {s.flagged}' for e, s in items]
+
+    return "\n".join(lines) + "\n"
+
+
+def render_upstream_prometheus(stats: Dict) -> str:
+    """Refresh counters of the stale-while-revalidate upstream caches (nse_indices_model.get_refresh_stats)."""
+    lines = []
+    metrics = [
+        ("goldmine_upstream_refreshes_total", "counter", "Successful upstream refreshes.", "refreshes"),
+        ("goldmine_upstream_refresh_failures_total", "counter", "Failed upstream refreshes.", "failures"),
+        ("goldmine_upstream_stale_served_total", "counter", "Lookups answered from a stale entry.", "stale_served"),
+        ("goldmine_upstream_backoff_skips_total", "counter", "Lookups that skipped a refresh during failure backoff.",
+         "backoff_skips"),
+        ("goldmine_upstream_refresh_last_ms", "gauge", "Latency of the last refresh.", "last_ms"),
+        ("goldmine_upstream_cache_age_seconds", "gauge", "Age of the cached entry.", "age_s"),
+    ]
+    for name, kind, help_text, field in metrics:
+        lines += [f"# HELP {name} {help_text}", f"# TYPE {name} {kind}"]
+        for cache_name in ("prices", "chart"):
+            for key, s in sorted(stats.get(cache_name, {}).items()):
+                if s.get(field) is not None:
+                    lines.append(f'{name}{{cache="{cache_name}",key="{_label(key)}"}} {s[field]}')
+    return "\n".join(lines) + "\n"
+
+
+def render_single_flight_prometheus(stats: List[Dict]) -> str:
+    """Coalescing counters per @single_flight function (utils/single_flight.get_single_flight_stats)."""
+    lines = []
+    metrics = [
+        ("goldmine_single_flight_executions_total", "counter", "Computations run on a cache miss.", "executions"),
+        ("goldmine_single_flight_coalesced_total", "counter", "Callers that waited on an in-flight computation.", "coalesced"),
+        ("goldmine_single_flight_errors_total", "counter", "Computations that raised.", "errors"),
+        ("goldmine_single_flight_max_wait_ms", "gauge", "Longest coalesced wait.", "max_wait_ms"),
+    ]
+    for name, kind, help_text, field in metrics:
+        lines += [f"# HELP {name} {help_text}", f"# TYPE {name} {kind}"]
+        lines += [f'{name}{{function="{_label(s["function"])}"}} {s[field]}' for s in stats]
+    return "\n".join(lines) + "\n"
+
+
+def reset_perf_metrics():
+    with _stats_lock:
+        _stats.clear()
+        _flagged.clear()
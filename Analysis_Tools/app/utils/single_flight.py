@@ -0,0 +1,192 @@
+# =============================================================
+#  SINGLE-FLIGHT
+#  Purpose: Coalesce concurrent cache misses on heavy memoized
+#           functions into one computation per key
+#
+#  When a new EOD date lands every thread misses the memoized
+#  functions at once and runs the same multi-second computation in
+#  parallel, exhausting the DB pool. The first caller for a key
+#  computes; concurrent callers with equal arguments wait for it and
+#  share its result (or exception).
+#
+#  Goes *under* the cache decorator so it only sees misses:
+#
+#    @cache.memoize(timeout=300)        # or @lru_cache(maxsize=32)
+#    @single_flight
+#    def _get_stock_detail_data_cached(ticker, selected_date, ...):
+#
+#  Coalescing is per process, like the caches themselves. Counters
+#  per function (and the most-coalesced keys) are shown on
+#  /admin/performance and exported on /admin/metrics.
+# =============================================================
+
+import functools
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, List
+
+SINGLE_FLIGHT_WAIT = 120  # seconds a follower waits before computing on its own
+_KEY_HISTORY = 200        # per-key counters kept (most recently coalesced)
+
+_registry: Dict[str, "_FlightGroup"] = {}
+_registry_lock = threading.Lock()
+
+
+class _Call:
+    __slots__ = ("event", "thread", "result", "error", "waiters")
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.thread = threading.get_ident()
+        self.result = None
+        self.error = None
+        self.waiters = 0
+
+
+class _FlightGroup:
+    """In-flight calls and counters for one decorated function."""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.lock = threading.Lock()
+        self.calls: Dict[object, _Call] = {}
+        self.executions = 0
+        self.coalesced = 0
+        self.errors = 0
+        self.timeouts = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+        self.max_waiters = 0
+        self.keys: "OrderedDict[str, Dict]" = OrderedDict()
+
+    def _note_key(self, key, wait: float):
+        # caller holds self.lock
+        label = _key_label(key)
+        k = self.keys.pop(label, None) or {"coalesced": 0, "wait_ms": 0.0}
+        k["coalesced"] += 1
+        k["wait_ms"] += wait * 1000
+        self.keys[label] = k
+        while len(self.keys) > _KEY_HISTORY:
+            self.keys.popitem(last=False)
+
+    def run(self, key, fn: Callable, args, kwargs):
+        with self.lock:
+            call = self.calls.get(key)
+            if call is None:
+                call = self.calls[key] = _Call()
+                leader = True
+                self.executions += 1
+            elif call.thread == threading.get_ident():
+                leader = None       # re-entrant call from the computing thread
+            else:
+                leader = False
+                call.waiters += 1
+                self.max_waiters = max(self.max_waiters, call.waiters)
+
+        if leader is None:
+            return fn(*args, **kwargs)
+
+        if leader:
+            try:
+                call.result = fn(*args, **kwargs)
+                return call.result
+            except BaseException as e:
+                call.error = e
+                with self.lock:
+                    self.errors += 1
+                raise
+            finally:
+                with self.lock:
+                    self.calls.pop(key, None)
+                call.event.set()
+
+        start = time.perf_counter()
+        finished = call.event.wait(SINGLE_FLIGHT_WAIT)
+        waited = time.perf_counter() - start
+        with self.lock:
+            self.coalesced += 1
+            self.wait_total += waited
+            self.wait_max = max(self.wait_max, waited)
+            self._note_key(key, waited)
+            if not finished:
+                self.timeouts += 1
+        if not finished:
+            print(f"[WARN] single_flight {self.name}: waited {waited:.0f}s, computing independently")
+            return fn(*args, **kwargs)
+        if call.error is not None:
+            raise call.error
+        return call.result
+
+    def snapshot(self) -> Dict:
+        with self.lock:
+            top = sorted(self.keys.items(), key=lambda kv: kv[1]["coalesced"], reverse=True)[:10]
+            return {
+                "function": self.name,
+                "executions": self.executions,
+                "coalesced": self.coalesced,
+                "errors": self.errors,
+                "timeouts": self.timeouts,
+                "in_flight": len(self.calls),
+                "max_waiters": self.max_waiters,
+                "avg_wait_ms": round(self.wait_total / self.coalesced * 1000, 1) if self.coalesced else 0.0,
+                "max_wait_ms": round(self.wait_max * 1000, 1),
+                "top_keys": [
+                    {"key": label, "coalesced": k["coalesced"], "wait_ms": round(k["wait_ms"], 1)}
+                    for label, k in top
+                ],
+            }
+
+    def reset(self):
+        with self.lock:
+            self.executions = self.coalesced = self.errors = self.timeouts = self.max_waiters = 0
+            self.wait_total = self.wait_max = 0.0
+            self.keys.clear()
+
+
+def _make_key(args, kwargs):
+    key = (args, tuple(sorted(kwargs.items()))) if kwargs else args
+    try:
+        hash(key)
+        return key
+    except TypeError:
+        return repr(key)
+
+
+def _key_label(key) -> str:
+    if isinstance(key, tuple) and len(key) == 1:
+        key = key[0]
+    label = ",".join(map(str, key)) if isinstance(key, tuple) else str(key)
+    return label[:120]
+
+
+def single_flight(fn: Callable = None, *, name: str = None):
+    """Decorator: concurrent calls with equal arguments share one execution."""
+
+    def decorate(f):
+        group_name = name or f"{f.__module__.rsplit('.', 1)[-1]}.{f.__qualname__}"
+        with _registry_lock:
+            group = _registry.setdefault(group_name, _FlightGroup(group_name))
+
+        @functools.wraps(f)
+        def wrapper(*args, **kwargs):
+            return group.run(_make_key(args, kwargs), f, args, kwargs)
+
+        wrapper.single_flight_group = group
+        return wrapper
+
+    return decorate(fn) if fn is not None else decorate
+
+
+def get_single_flight_stats() -> List[Dict]:
+    """Per-function counters, most-coalesced first."""
+    with _registry_lock:
+        groups = list(_registry.values())
+    return sorted((g.snapshot() for g in groups), key=lambda s: s["coalesced"], reverse=True)
+
+
+def reset_single_flight_stats():
+    with _registry_lock:
+        groups = list(_registry.values())
+    for g in groups:
+        g.reset()
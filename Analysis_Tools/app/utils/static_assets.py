@@ -0,0 +1,114 @@
+# =============================================================
+#  FINGERPRINTED STATIC ASSETS
+#  Purpose: Serve the hashed, minified, precompressed copies built
+#           by Analysis_Tools/build_static.py
+#
+#  init_static_assets(app) loads static/dist/manifest.json and
+#
+#  * adds a url_defaults hook so url_for('static', filename='js/x.js')
+#    returns /static/dist/js/x.<hash>.js (templates are unchanged);
+#  * replaces the static view: files under dist/ are sent with
+#    `Cache-Control: public, max-age=31536000, immutable` and, when the
+#    client accepts it, from their .br / .gz sibling, so repeat page
+#    loads never ask for them again. Everything else is served exactly
+#    as before.
+#
+#  Without a manifest (build not run) or with STATIC_HASHED=0 nothing
+#  changes, which is how to see edits to static files directly; a
+#  warning is printed at startup when the manifest is older than the
+#  sources. app.debug plays no part: run.py always runs with it on.
+# =============================================================
+
+import json
+import mimetypes
+import os
+
+from flask import request, send_from_directory
+
+# =============================================================
+# CONFIGURATION
+# =============================================================
+
+STATIC_HASHED_ENABLED = os.getenv("STATIC_HASHED", "1") != "0"
+IMMUTABLE_MAX_AGE = 365 * 24 * 3600
+
+DIST_PREFIX = "dist/"
+MANIFEST_PATH = ("dist", "manifest.json")
+
+
+def load_manifest(static_folder: str) -> dict:
+    path = os.path.join(static_folder, *MANIFEST_PATH)
+    try:
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {}
+    except (OSError, ValueError) as e:
+        print(f"[WARN] static_assets: unreadable manifest {path}: {e}")
+        return {}
+
+
+def _stale_sources(static_folder: str, manifest: dict) -> int:
+    built_at = os.path.getmtime(os.path.join(static_folder, *MANIFEST_PATH))
+    stale = 0
+    for source in manifest:
+        try:
+            if os.path.getmtime(os.path.join(static_folder, source)) > built_at:
+                stale += 1
+        except OSError:
+            stale += 1
+    return stale
+
+
+def _precompressed(static_folder: str, filename: str):
+    """(sibling filename, Content-Encoding) of the best variant the client accepts."""
+    accept = request.accept_encodings
+    for suffix, encoding in ((".br", "br"), (".gz", "gzip")):
+        if accept[encoding] and os.path.isfile(os.path.join(static_folder, filename + suffix)):
+            return filename + suffix, encoding
+    return filename, None
+
+
+def init_static_assets(app):
+    """Register the hashed-URL hook and the immutable static view on `app`."""
+    if not STATIC_HASHED_ENABLED or not app.static_folder:
+        return
+
+    manifest = load_manifest(app.static_folder)
+    if not manifest:
+        print("[INFO] No static manifest - run Analysis_Tools/build_static.py for hashed static URLs")
+        return
+
+    stale = _stale_sources(app.static_folder, manifest)
+    if stale:
+        print(f"[WARN] {stale} static file(s) changed since the last build_static.py run - serving the old build")
+    print(f"[INFO] Static assets: {len(manifest)} fingerprinted files")
+
+    @app.url_defaults
+    def hashed_static_url(endpoint, values):
+        if endpoint == "static":
+            hashed = manifest.get(values.get("filename"))
+            if hashed:
+                values["filename"] = hashed
+
+    plain_static = app.view_functions["static"]
+
+    def static(filename):
+        if not filename.startswith(DIST_PREFIX):
+            return plain_static(filename=filename)
+
+        source, encoding = _precompressed(app.static_folder, filename)
+        response = send_from_directory(
+            app.static_folder,
+            source,
+            mimetype=mimetypes.guess_type(filename)[0] or "application/octet-stream",
+            max_age=IMMUTABLE_MAX_AGE,
+        )
+        if encoding:
+            response.headers["Content-Encoding"] = encoding
+        response.vary.add("Accept-Encoding")
+        response.cache_control.public = True
+        response.cache_control.immutable = True
+        return response
+
+    app.view_functions["static"] = static
@@ -0,0 +1,290 @@
+"""
+BUILD STATIC ASSETS
+===================
+Minifies and content-hashes Analysis_Tools/app/static into static/dist/,
+writes .gz / .br siblings for text assets and a manifest that the app
+(app/utils/static_assets.py) uses to rewrite url_for('static', ...) to
+the hashed file, served with year-long immutable caching.
+
+    static/js/home_live_updates.js  →  static/dist/js/home_live_updates.3f9c2a71d0.js
+                                        static/dist/js/home_live_updates.3f9c2a71d0.js.gz
+                                        static/dist/js/home_live_updates.3f9c2a71d0.js.br
+    static/dist/manifest.json          {"js/home_live_updates.js": "dist/js/home_live_updates.3f9c2a71d0.js", ...}
+
+Minification uses rjsmin / rcssmin when installed (optional). Without
+them JS is copied as-is and CSS only loses comments and indentation.
+Files that are already minified (*.min.js, vendor bundles such as
+highcharts.js) are hashed but not re-minified. Relative url(...)
+references inside CSS are rewritten to the hashed targets.
+
+Files from the previous build that the new manifest no longer needs are
+removed, except those referenced by the previous manifest, so pages
+rendered just before a deploy can still load their assets.
+
+Usage:
+    python Analysis_Tools/build_static.py            # build
+    python Analysis_Tools/build_static.py --check    # exit 1 if the manifest is stale
+    python Analysis_Tools/build_static.py --clean    # remove static/dist
+"""
+
+import argparse
+import gzip
+import hashlib
+import json
+import os
+import posixpath
+import re
+import shutil
+import sys
+import time
+
+try:
+    import rjsmin
+
+    RJSMIN_AVAILABLE = True
+except ImportError:
+    rjsmin = None
+    RJSMIN_AVAILABLE = False
+
+try:
+    import rcssmin
+
+    RCSSMIN_AVAILABLE = True
+except ImportError:
+    rcssmin = None
+    RCSSMIN_AVAILABLE = False
+
+try:
+    import brotli
+
+    BROTLI_AVAILABLE = True
+except ImportError:
+    brotli = None
+    BROTLI_AVAILABLE = False
+
+STATIC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "app", "static")
+DIST_NAME = "dist"
+MANIFEST_NAME = "manifest.json"
+
+ASSET_EXTENSIONS = {".js", ".css", ".png", ".jpg", ".jpeg", ".gif", ".svg", ".ico", ".webp", ".woff", ".woff2"}
+TEXT_EXTENSIONS = {".js", ".css", ".svg"}
+HASH_LENGTH = 10
+MIN_PRECOMPRESS_BYTES = 512
+MINIFIED_LINE_LENGTH = 500  # average chars per line above which a file counts as already minified
+
+CSS_URL_RE = re.compile(r"""url\(\s*(['"]?)([^'")]+)\1\s*\)""")
+CSS_COMMENT_RE = re.compile(r"/\*(?!!).*?\*/", re.S)
+
+
+# ===========================================
+# 🔧 Helpers
+# ===========================================
+def source_files(static_dir):
+    """Relative posix paths of every asset outside dist/."""
+    files = []
+    for dirpath, dirnames, filenames in os.walk(static_dir):
+        rel_dir = os.path.relpath(dirpath, static_dir)
+        if rel_dir == DIST_NAME or rel_dir.startswith(DIST_NAME + os.sep):
+            dirnames[:] = []
+            continue
+        for name in filenames:
+            if os.path.splitext(name)[1].lower() in ASSET_EXTENSIONS:
+                files.append(posixpath.normpath(posixpath.join(rel_dir.replace(os.sep, "/"), name)))
+    # CSS last so the files it references are already hashed
+    return sorted(files, key=lambda f: (f.endswith(".css"), f))
+
+
+def already_minified(rel_path, text):
+    if ".min." in rel_path:
+        return True
+    lines = text.count("\n") + 1
+    return len(text) / lines > MINIFIED_LINE_LENGTH
+
+
+def minify_js(text):
+    return rjsmin.jsmin(text, keep_bang_comments=True) if RJSMIN_AVAILABLE else text
+
+
+def minify_css(text):
+    if RCSSMIN_AVAILABLE:
+        return rcssmin.cssmin(text, keep_bang_comments=True)
+    text = CSS_COMMENT_RE.sub("", text)
+    return "\n".join(line.strip() for line in text.splitlines() if line.strip()) + "\n"
+
+
+def rewrite_css_urls(text, rel_path, manifest):
+    """Point relative url(...) references at the hashed files (paths relative to dist/)."""
+    css_dir = posixpath.dirname(rel_path)
+
+    def replace(match):
+        quote, url = match.group(1), match.group(2).strip()
+        if url.startswith(("data:", "http:", "https:", "//", "#")):
+            return match.group(0)
+        path, sep, suffix = url.partition("?")
+        if not sep:
+            path, sep, suffix = url.partition("#")
+        if path.startswith("/static/"):
+            target = path[len("/static/"):]
+        elif path.startswith("/"):
+            return match.group(0)
+        else:
+            target = posixpath.normpath(posixpath.join(css_dir, path))
+        hashed = manifest.get(target)
+        if hashed is None:
+            return match.group(0)
+        new_url = posixpath.relpath(hashed, posixpath.join(DIST_NAME, css_dir))
+        return f"url({quote}{new_url}{sep}{suffix}{quote})"
+
+    return CSS_URL_RE.sub(replace, text)
+
+
+def hashed_name(rel_path, data):
+    digest = hashlib.sha256(data).hexdigest()[:HASH_LENGTH]
+    stem, ext = posixpath.splitext(rel_path)
+    return posixpath.join(DIST_NAME, f"{stem}.{digest}{ext}")
+
+
+def write_file(path, data):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    if os.path.exists(path):
+        return  # content-addressed: same name, same bytes
+    tmp = f"{path}.tmp"
+    with open(tmp, "wb") as f:
+        f.write(data)
+    os.replace(tmp, path)
+
+
+def precompress(path, data):
+    """Write .gz (and .br) siblings when they are meaningfully smaller."""
+    written = {}
+    variants = [(".gz", lambda d: gzip.compress(d, compresslevel=9, mtime=0))]
+    if BROTLI_AVAILABLE:
+        variants.append((".br", lambda d: brotli.compress(d, quality=11)))
+    for suffix, compress in variants:
+        packed = compress(data)
+        if len(packed) < len(data) * 0.9:
+            write_file(path + suffix, packed)
+            written[suffix] = len(packed)
+    return written
+
+
+def load_manifest(dist_dir):
+    try:
+        with open(os.path.join(dist_dir, MANIFEST_NAME), encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+# ===========================================
+# 🏗 Build
+# ===========================================
+def build(static_dir=STATIC_DIR):
+    start = time.time()
+    dist_dir = os.path.join(static_dir, DIST_NAME)
+    previous = load_manifest(dist_dir)
+    manifest = {}
+    totals = {"files": 0, "source": 0, "output": 0, "gz": 0, "br": 0}
+
+    print(f"🏗 Building static assets from {static_dir}")
+    print(f"   minify: js={'rjsmin' if RJSMIN_AVAILABLE else 'copy'}, "
+          f"css={'rcssmin' if RCSSMIN_AVAILABLE else 'basic'}; brotli: {'yes' if BROTLI_AVAILABLE else 'no'}")
+
+    for rel_path in source_files(static_dir):
+        with open(os.path.join(static_dir, rel_path), "rb") as f:
+            data = f.read()
+        ext = posixpath.splitext(rel_path)[1].lower()
+        source_size = len(data)
+
+        if ext in (".js", ".css"):
+            text = data.decode("utf-8")
+            if ext == ".css":
+                text = rewrite_css_urls(text, rel_path, manifest)
+            if not already_minified(rel_path, text):
+                text = minify_js(text) if ext == ".js" else minify_css(text)
+            data = text.encode("utf-8")
+
+        target = hashed_name(rel_path, data)
+        target_path = os.path.join(static_dir, *target.split("/"))
+        write_file(target_path, data)
+        manifest[rel_path] = target
+
+        packed = precompress(target_path, data) if ext in TEXT_EXTENSIONS and len(data) >= MIN_PRECOMPRESS_BYTES else {}
+        totals["files"] += 1
+        totals["source"] += source_size
+        totals["output"] += len(data)
+        totals["gz"] += packed.get(".gz", len(data))
+        totals["br"] += packed.get(".br", packed.get(".gz", len(data)))
+
+        if source_size > 50_000 or len(data) < source_size * 0.8:
+            extra = ", ".join(f"{s[1:]} {n:,}" for s, n in packed.items())
+            print(f"   {rel_path}: {source_size:,} → {len(data):,} bytes{f' ({extra})' if extra else ''}")
+
+    manifest_path = os.path.join(dist_dir, MANIFEST_NAME)
+    os.makedirs(dist_dir, exist_ok=True)
+    with open(manifest_path + ".tmp", "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    os.replace(manifest_path + ".tmp", manifest_path)
+
+    removed = prune(dist_dir, set(manifest.values()) | set(previous.values()))
+
+    sizes = f"gzip {totals['gz']:,}" + (f", brotli {totals['br']:,}" if BROTLI_AVAILABLE else "")
+    print(f"\n✅ {totals['files']} assets hashed in {time.time() - start:.1f}s: "
+          f"{totals['source']:,} → {totals['output']:,} bytes ({sizes}); {removed} stale file(s) removed")
+    print(f"📝 Manifest: {manifest_path}")
+    return manifest
+
+
+def prune(dist_dir, keep):
+    """Delete hashed files (and their .gz/.br) that no manifest references."""
+    removed = 0
+    static_dir = os.path.dirname(dist_dir)
+    for dirpath, _dirs, filenames in os.walk(dist_dir):
+        for name in filenames:
+            if name == MANIFEST_NAME:
+                continue
+            rel = os.path.relpath(os.path.join(dirpath, name), static_dir).replace(os.sep, "/")
+            base = rel[:-3] if rel.endswith((".gz", ".br")) else rel
+            if base not in keep:
+                os.remove(os.path.join(dirpath, name))
+                removed += 1
+    return removed
+
+
+def check(static_dir=STATIC_DIR):
+    """True when every source asset is in the manifest and older than it."""
+    dist_dir = os.path.join(static_dir, DIST_NAME)
+    manifest_path = os.path.join(dist_dir, MANIFEST_NAME)
+    manifest = load_manifest(dist_dir)
+    if not manifest:
+        print("❌ No manifest - run build_static.py")
+        return False
+    built_at = os.path.getmtime(manifest_path)
+    stale = [
+        f for f in source_files(static_dir)
+        if f not in manifest or os.path.getmtime(os.path.join(static_dir, f)) > built_at
+    ]
+    for f in stale:
+        print(f"   stale: {f}")
+    print("✅ Static manifest is up to date" if not stale else f"❌ {len(stale)} asset(s) changed since the last build")
+    return not stale
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Minify, fingerprint and precompress static assets")
+    parser.add_argument("--static-dir", default=STATIC_DIR)
+    parser.add_argument("--check", action="store_true", help="Exit 1 when the manifest is missing or stale")
+    parser.add_argument("--clean", action="store_true", help="Remove the dist directory")
+    args = parser.parse_args()
+
+    if args.clean:
+        shutil.rmtree(os.path.join(args.static_dir, DIST_NAME), ignore_errors=True)
+        print("🧹 Removed static/dist")
+        return
+    if args.check:
+        sys.exit(0 if check(args.static_dir) else 1)
+    build(args.static_dir)
+
+
+if __name__ == "__main__":
+    main()
@@ -9,6 +9,12 @@ import json
 import pandas as pd
 from typing import List, Dict
 
+try:
+    # Shared registry built by the cash pipeline (preferred when present)
+    from Analysis_Tools.app.models.symbol_master import get_symbol_master
+except ImportError:
+    get_symbol_master = None
+
 # =============================================================
 # CONFIGURATION
 # =============================================================
@@ -198,6 +204,10 @@ def load_sector_master(force_reload=False):
 
 def get_sector(symbol: str) -> str:
     """Get the sector for a given symbol."""
+    master = get_symbol_master() if get_symbol_master else None
+    if master is not None and symbol in master:
+        return master.sector(symbol, DEFAULT_SECTOR)
+
     if not _sector_cache_loaded:
         load_sector_master()
 
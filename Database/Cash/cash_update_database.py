@@ -19,8 +19,8 @@ sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".
 from dotenv import load_dotenv
 
 load_dotenv()
+import io
 import re
-import socket
 import sys
 
 # Reconfigure stdout for UTF-8 support (Windows console workaround)
@@ -30,17 +30,20 @@ except AttributeError:
     pass
 
 import time
-import urllib.error
-import urllib.request
 from datetime import datetime, timedelta
 from urllib.parse import quote_plus
 from Analysis_Tools.app.utils.logger import logger
 
 import pandas as pd
-from sqlalchemy import create_engine, inspect, text
+from sqlalchemy import create_engine, text
 
 # Import shared database engine
 from Analysis_Tools.app.models.db_config import engine_cash as engine
+from Analysis_Tools.app.models.data_epoch import bump_data_epoch
+from Analysis_Tools.app.models.schema_catalog import bump_catalog_version, get_catalog
+from Analysis_Tools.app.models.trading_calendar import sync_trading_calendar
+from Database.bhavcopy_downloader import cash_archive_url, download_bhavcopies, trading_days_between
+from Database.eod_archive import archive_cash_rows
 
 # ===========================================
 # 🔧 Configuration
@@ -60,38 +63,6 @@ MAX_RETRIES = 2
 RETRY_DELAY = 2
 
 
-# ===========================================
-# 📥 Download Helper Function
-# ===========================================
-def download_with_timeout(url, filepath, timeout=DOWNLOAD_TIMEOUT):
-    """Download file with timeout and headers"""
-    socket.setdefaulttimeout(timeout)
-
-    try:
-        req = urllib.request.Request(url)
-        req.add_header("User-Agent", "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36")
-        req.add_header("Accept", "text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8")
-
-        with urllib.request.urlopen(req, timeout=timeout) as response:
-            with open(filepath, "wb") as out_file:
-                out_file.write(response.read())
-
-        return True
-
-    except socket.timeout:
-        raise TimeoutError(f"Download timeout after {timeout}s")
-
-    except urllib.error.HTTPError as e:
-        if e.code == 404:
-            raise FileNotFoundError("File not available (404)")
-        else:
-            raise Exception(f"HTTP Error {e.code}")
-
-    except Exception as e:
-        logger.error(f"❌ Download failed: {str(e)[:50]}")
-        raise Exception(f"Download failed: {str(e)[:50]}")
-
-
 # ===========================================
 # 📥 STEP 1: Download CSV Data
 # ===========================================
@@ -108,8 +79,7 @@ def download_csv_data():
     latest_db_date = None
 
     try:
-        inspector = inspect(engine)
-        existing_tables = inspector.get_table_names()
+        existing_tables = get_catalog(engine).tables
         base_tables = [t for t in existing_tables if t.startswith("TBL_")]
 
         if base_tables:
@@ -154,123 +124,58 @@ def download_csv_data():
     # Create save folder
     os.makedirs(save_folder, exist_ok=True)
 
-    # Generate weekday dates
-    date_range = []
-    delta_days = (end_date - start_date).days
-
-    for i in range(delta_days + 1):
-        d = start_date + timedelta(days=i)
-        date_range.append(d)
+    # Trading dates only (skip weekends / NSE holidays)
+    date_range = trading_days_between(start_date, end_date)
 
     if not date_range:
-        logger.info("✅ No new weekday dates to download.")
+        logger.info("✅ No new trading dates to download.")
         return True
 
-    logger.info(f"📅 Downloading data for {len(date_range)} date(s)")
-    print(f"⏱️  Timeout: {DOWNLOAD_TIMEOUT}s per file | Retries: {MAX_RETRIES}\n")
-    print("=" * 80)
-
-    downloaded_files = []
-    skipped_dates = []
-    failed_dates = []
-
-    start_time = time.time()
-
-    for idx, date_obj in enumerate(date_range, 1):
-        date_display = date_obj.strftime("%d-%m-%Y")
-        date_str_ddmmyyyy = date_obj.strftime("%d%m%Y")
-
-        progress = f"[{idx}/{len(date_range)}]"
-        print(f"{progress:12} {date_display}...", end=" ", flush=True)
-
-        # Build URL - NSE format: sec_bhavdata_full_DDMMYYYY.csv
-        url = f"https://nsearchives.nseindia.com/products/content/sec_bhavdata_full_{date_str_ddmmyyyy}.csv"
-
-        filename = f"sec_bhavdata_full_{date_str_ddmmyyyy}.csv"
-        filepath = os.path.join(save_folder, filename)
-
-        # Check if already downloaded
+    # Files already on disk are not fetched again
+    existing = {}
+    pending = []
+    for date_obj in date_range:
+        filepath = os.path.join(save_folder, f"sec_bhavdata_full_{date_obj.strftime('%d%m%Y')}.csv")
         if os.path.exists(filepath):
             try:
-                df = pd.read_csv(filepath)
-                row_count = len(df)
-                file_size = os.path.getsize(filepath)
-                size_str = f"{file_size/1024:.1f} KB" if file_size < 1024 * 1024 else f"{file_size/(1024*1024):.2f} MB"
-
-                print(f"⏭️  Already exists ({row_count} stocks, {size_str})")
-                downloaded_files.append(
-                    {
-                        "date": date_display,
-                        "filename": filename,
-                        "filepath": filepath,
-                        "rows": row_count,
-                        "status": "existing",
-                    }
-                )
+                existing[date_obj] = len(pd.read_csv(filepath))
                 continue
             except Exception:
                 os.remove(filepath)
+        pending.append(date_obj)
 
-        # Try download with retries
-        success = False
-        last_error = None
-
-        for attempt in range(MAX_RETRIES + 1):
-            try:
-                if attempt > 0:
-                    print(f"\n{'':12}          Retry {attempt}/{MAX_RETRIES}...", end=" ", flush=True)
-                    time.sleep(RETRY_DELAY)
-
-                download_with_timeout(url, filepath, timeout=DOWNLOAD_TIMEOUT)
-
-                # Verify file
-                df = pd.read_csv(filepath)
-                row_count = len(df)
-                file_size = os.path.getsize(filepath)
-                size_str = f"{file_size/1024:.1f} KB" if file_size < 1024 * 1024 else f"{file_size/(1024*1024):.2f} MB"
-
-                print(f"✅ ({row_count} stocks, {size_str})")
-
-                downloaded_files.append(
-                    {
-                        "date": date_display,
-                        "filename": filename,
-                        "filepath": filepath,
-                        "rows": row_count,
-                        "status": "downloaded",
-                    }
-                )
-
-                success = True
-                break
-
-            except FileNotFoundError:
-                print(f"⚠️  Not available (holiday)")
-                skipped_dates.append(date_display)
-                success = True
-                break
-
-            except TimeoutError:
-                last_error = "Timeout"
-                if attempt == MAX_RETRIES:
-                    print(f"❌ Timeout after {MAX_RETRIES} retries")
-
-            except Exception as e:
-                last_error = str(e)[:30]
-                if attempt == MAX_RETRIES:
-                    print(f"❌ {last_error}")
+    logger.info(f"📅 Downloading data for {len(pending)} trading date(s) ({len(existing)} already on disk)")
+    print(f"⏱️  Timeout: {DOWNLOAD_TIMEOUT}s per file | Retries: {MAX_RETRIES}\n")
+    print("=" * 80)
 
-        if not success:
-            failed_dates.append((date_display, last_error))
+    def save_payload(date_obj, payload):
+        # Validate in memory before the file lands in the save folder
+        pd.read_csv(io.BytesIO(payload), nrows=5)
+        filepath = os.path.join(save_folder, f"sec_bhavdata_full_{date_obj.strftime('%d%m%Y')}.csv")
+        with open(filepath, "wb") as f:
+            f.write(payload)
 
+    start_time = time.time()
+    summary = download_bhavcopies(
+        pending,
+        cash_archive_url,
+        save_payload,
+        timeout=DOWNLOAD_TIMEOUT,
+        retries=MAX_RETRIES,
+        backoff=RETRY_DELAY,
+    )
     total_time = time.time() - start_time
 
+    downloaded_files = summary["downloaded"] + list(existing)
+    skipped_dates = summary["missing"]
+    failed_dates = summary["failed"]
+
     print("\n" + "=" * 80)
     print("DOWNLOAD SUMMARY")
     print("=" * 80)
     print(f"\n⏱️  Total time: {int(total_time)}s")
-    print(f"✅ Successfully downloaded: {len([f for f in downloaded_files if f['status']=='downloaded'])} new file(s)")
-    print(f"⏭️  Already existed: {len([f for f in downloaded_files if f['status']=='existing'])} file(s)")
+    print(f"✅ Successfully downloaded: {len(summary['downloaded'])} new file(s)")
+    print(f"⏭️  Already existed: {len(existing)} file(s)")
     print(f"⚠️  Skipped (holidays): {len(skipped_dates)} date(s)")
     print(f"❌ Failed: {len(failed_dates)} date(s)")
     print(f"\n📁 Location: {save_folder}")
@@ -320,8 +225,7 @@ def upload_to_database():
         return True
 
     # Get existing tables
-    inspector = inspect(engine)
-    existing_tables = set(inspector.get_table_names())
+    existing_tables = set(get_catalog(engine).tables)
 
     # Find latest BizDt from database (ONLY from per-symbol tables, not old TBL_BHAVCOPY_CASH)
     latest_db_date = None
@@ -547,6 +451,9 @@ def upload_to_database():
             except Exception as e:
                 print(f"   ❌ Failed to upload to centralized table: {e}")
 
+            # Columnar copy for cache rebuilds (no-op without pyarrow)
+            archive_cash_rows(df[df["BizDt"].astype(str).isin(csv_unique_dates)])
+
 
 
         except Exception as e:
@@ -555,6 +462,12 @@ def upload_to_database():
 
             logger.error(traceback.format_exc())
 
+    if tables_created:
+        bump_catalog_version(engine)
+
+    # Record the newly loaded dates in the trading calendar
+    sync_trading_calendar(engine)
+
     logger.info(f"\n✅ Upload complete!")
     logger.info(f"   Files processed: {upload_count}")
     logger.info(f"   Tables created: {tables_created}")
@@ -595,6 +508,21 @@ def main():
         logger.info(f"\nYour CashStocks_Database is now updated!")
         logger.info(f"Tables: TBL_RELIANCE, TBL_TCS, TBL_INFY, etc.")
 
+        # ===========================================
+        # 🚀 STEP 2B: REBUILD SYMBOL MASTER
+        # ===========================================
+        print("\n" + "=" * 80)
+        logger.info("🚀 STEP 2B: REBUILDING SYMBOL MASTER (sector / F&O / index registry)")
+        print("=" * 80 + "\n")
+        try:
+            from Analysis_Tools.app.models.db_config import engine as engine_fo
+            from Analysis_Tools.app.models.symbol_master import build_symbol_master
+
+            if build_symbol_master(engine_fo, engine):
+                logger.info("\n✅ Symbol master rebuilt")
+        except Exception as e:
+            logger.error(f"⚠️ Failed to rebuild symbol master: {e}")
+
         # ===========================================
         # 🚀 STEP 3: UPDATE HEATMAP CACHE
         # ===========================================
@@ -613,6 +541,20 @@ def main():
         except Exception as e:
             logger.error(f"⚠️ Failed to run heatmap cache update: {e}")
 
+        # ===========================================
+        # 🚀 STEP 3B: REFRESH INSIGHTS ANALYTICS SNAPSHOTS
+        # ===========================================
+        print("\n" + "=" * 80)
+        logger.info("🚀 STEP 3B: REFRESHING ANALYTICS SNAPSHOTS (DuckDB backend for Insights)")
+        print("=" * 80 + "\n")
+        try:
+            from Analysis_Tools.app.models.analytics_engine import refresh_analytics_snapshots
+
+            if refresh_analytics_snapshots(engine):
+                logger.info("\n✅ Analytics snapshots refreshed")
+        except Exception as e:
+            logger.error(f"⚠️ Failed to refresh analytics snapshots: {e}")
+
         # ===========================================
         # 🚀 STEP 4: UPDATE DELIVERY CACHE
         # ===========================================
@@ -664,6 +606,9 @@ def main():
         except Exception as e:
             logger.error(f"⚠️ Failed to run market breadth EOD update: {e}")
 
+        # Running apps drop their EOD caches and HTTP validators
+        bump_data_epoch()
+
         return True
 
     except Exception as e:
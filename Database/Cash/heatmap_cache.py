@@ -2,10 +2,25 @@
 HEATMAP CACHE BUILDER
 ================================================================================
 Pre-calculates heatmap data for Insights Dashboard.
-Source: CashStocks_Database (TBL_EQUITY_*)
+Source: CashStocks_Database (cash_eod_data)
 Target: daily_market_heatmap table in CashStocks_Database
+
+Set-based: all symbols for a chunk of dates come from one indexed query on
+cash_eod_data, change%/sector are computed vectorized, and rows are upserted
+with a COPY into a staging table. A one-year backfill is a few queries.
+
+Each row also stores 1W/1M/3M/6M/1Y returns (ret_1w .. ret_1y), so the
+Insights period switch is a column pick instead of a second snapshot join.
+
+Symbols are stored in per-ticker table form (M&M -> M_M, BAJAJ-AUTO ->
+BAJAJ_AUTO) so readers can build TBL_<symbol> from them.
+
+Usage:
+    python Database/Cash/heatmap_cache.py                                   # missing dates only
+    python Database/Cash/heatmap_cache.py --rebuild --from 2024-01-01       # recompute a range
 """
 
+import argparse
 import os
 import sys
 
@@ -25,6 +40,15 @@ from sqlalchemy import create_engine, text
 # =============================================================
 # Database Config
 from Analysis_Tools.app.models.db_config import engine_cash as engine_cash
+from Analysis_Tools.app.models.schema_catalog import bump_catalog_version, get_catalog
+from Analysis_Tools.app.models.symbol_master import db_symbol
+from Analysis_Tools.app.models.trading_calendar import get_calendar, get_trading_dates
+from Database.pg_bulk import copy_upsert
+
+CHUNK_DAYS = 60  # Dates per query / COPY batch during backfills
+
+# Precomputed period returns (% change vs the period start's close)
+RETURN_COLUMNS = {"1W": "ret_1w", "1M": "ret_1m", "3M": "ret_3m", "6M": "ret_6m", "1Y": "ret_1y"}
 
 # Hardcoded constants removed - using shared engine
 # db_user = "postgres"
@@ -77,10 +101,24 @@ def create_heatmap_table():
                     PRIMARY KEY (date, symbol)
                 );
                 CREATE INDEX IF NOT EXISTS idx_heatmap_date ON daily_market_heatmap(date);
+                CREATE INDEX IF NOT EXISTS idx_cash_eod_trade_date ON cash_eod_data(trade_date);
             """
                 )
             )
             conn.commit()
+
+        # Period-return columns (added in place on existing installs)
+        catalog = get_catalog(engine_cash)
+        missing = [c for c in RETURN_COLUMNS.values() if not catalog.has_column("daily_market_heatmap", c)]
+        if missing:
+            with engine_cash.begin() as conn:
+                for col in missing:
+                    conn.execute(text(f"ALTER TABLE daily_market_heatmap ADD COLUMN IF NOT EXISTS {col} NUMERIC"))
+            bump_catalog_version(engine_cash)
+            print(f"[INFO] Added return columns: {missing}")
+
+        migrate_raw_symbols()
+
         print("[SUCCESS] Table verified.")
         return True
     except Exception as e:
@@ -88,49 +126,51 @@ def create_heatmap_table():
         return False
 
 
-def get_all_cash_dates():
-    """Get all unique dates available in the database (using any available TBL_ table)."""
+def _table_form_sql(column):
+    """SQL twin of db_symbol() for a symbol column."""
+    return rf"UPPER(BTRIM(REGEXP_REPLACE({column}, '\W+', '_', 'g'), '_'))"
+
+
+def migrate_raw_symbols():
+    """
+    Rows written under raw NSE symbols (M&M) by builds that skipped
+    db_symbol(): drop them where the table-form row (M_M) exists for the
+    date, rename the rest. Table-form symbols never contain non-word chars.
+    """
     try:
-        # First, find a valid table to check dates from
-        query_tables = text(
+        with engine_cash.begin() as conn:
+            dropped = conn.execute(
+                text(
+                    rf"""
+                DELETE FROM daily_market_heatmap h
+                WHERE h.symbol ~ '\W'
+                  AND EXISTS (
+                      SELECT 1 FROM daily_market_heatmap t
+                      WHERE t.date = h.date AND t.symbol = {_table_form_sql("h.symbol")}
+                  )
             """
-            SELECT table_name
-            FROM information_schema.tables
-            WHERE table_schema = 'public'
-            AND table_name LIKE 'TBL_%'
-            AND table_name != 'TBL_NIFTY'  -- Avoid if not present, though loop handles it
-            LIMIT 1;
-        """
-        )
-
-        with engine_cash.connect() as conn:
-            # Try specific known tables first for reliability
-            for table_name in ["TBL_RELIANCE", "TBL_TCS", "TBL_INFY", "TBL_SBIN"]:
-                try:
-                    result = conn.execute(
-                        text(f'SELECT DISTINCT "BizDt" FROM public."{table_name}" ORDER BY "BizDt" DESC')
-                    )
-                    dates = [str(row[0]) for row in result]
-                    if dates:
-                        print(f"[INFO] Using {table_name} for date reference")
-                        return dates
-                except Exception:
-                    continue
-
-            # Fallback to any table
-            result = conn.execute(query_tables)
-            fallback_table = result.scalar()
-
-            if fallback_table:
-                print(f"[INFO] Using {fallback_table} for date reference")
-                result = conn.execute(
-                    text(f'SELECT DISTINCT "BizDt" FROM public."{fallback_table}" ORDER BY "BizDt" DESC')
                 )
-                dates = [str(row[0]) for row in result]
-                return dates
+            ).rowcount
+            renamed = conn.execute(
+                text(rf"UPDATE daily_market_heatmap SET symbol = {_table_form_sql('symbol')} WHERE symbol ~ '\W'")
+            ).rowcount
+        if dropped or renamed:
+            print(f"[INFO] Heatmap symbols migrated to table form: {dropped} duplicate rows dropped, {renamed} renamed")
+    except Exception as e:
+        print(f"[WARN] Heatmap symbol migration failed: {e}")
 
-        print("[WARN] No suitable tables found for date retrieval")
-        return []
+
+def get_all_cash_dates():
+    """All trading dates in the Cash DB (newest first), from the trading calendar."""
+    try:
+        dates = get_trading_dates(engine_cash)
+        if dates:
+            return dates
+
+        # Calendar not built yet: read the centralized table directly
+        with engine_cash.connect() as conn:
+            result = conn.execute(text("SELECT DISTINCT trade_date FROM public.cash_eod_data ORDER BY trade_date DESC"))
+            return [str(row[0]) for row in result]
 
     except Exception as e:
         print(f"[ERROR] Date retrieval failed: {e}")
@@ -138,9 +178,15 @@ def get_all_cash_dates():
 
 
 def get_cached_heatmap_dates():
-    """Get dates already present in the heatmap cache."""
+    """
+    Get dates already present (and complete) in the heatmap cache.
+    Dates cached before the return columns existed count as missing.
+    """
     try:
-        query = text("SELECT DISTINCT date FROM daily_market_heatmap ORDER BY date DESC")
+        query = text(
+            f"SELECT date FROM daily_market_heatmap GROUP BY date "
+            f"HAVING COUNT({RETURN_COLUMNS['1Y']}) > 0 ORDER BY date DESC"
+        )
         with engine_cash.connect() as conn:
             result = conn.execute(query)
             dates = [str(row[0]) for row in result]
@@ -149,144 +195,127 @@ def get_cached_heatmap_dates():
         return []
 
 
-def calculate_heatmap_for_date(selected_date):
-    """Calculate and insert heatmap data for a specific date."""
-    print(f"[INFO] Calculating heatmap for {selected_date}...")
-    start_time = time.time()
-
-    # 1. Get all table names
-    query_tables = text(
+def load_eod_rows(dates):
+    """
+    Every symbol's EOD row for the given dates from cash_eod_data in one
+    query (served by the trade_date index). One row per (date, symbol),
+    symbol in table form (db_symbol).
+    """
+    query = text(
         """
-        SELECT table_name
-        FROM information_schema.tables
-        WHERE table_schema = 'public'
-        AND table_name LIKE 'TBL_%'
-        AND table_name != 'TBL_NIFTY_DERIVED'
-        ORDER BY table_name;
+        SELECT DISTINCT ON (trade_date, symbol)
+            trade_date AS date, symbol, close, high, low, volume,
+            COALESCE(turnover, 0) AS turnover,
+            COALESCE(prev_close, 0) AS prev_close
+        FROM public.cash_eod_data
+        WHERE trade_date = ANY(CAST(:dates AS DATE[]))
+          AND close IS NOT NULL AND close > 0
+        ORDER BY trade_date, symbol, volume DESC NULLS LAST
     """
     )
-
     with engine_cash.connect() as conn:
-        result = conn.execute(query_tables)
-        tables = [row[0] for row in result]
+        df = pd.read_sql(query, conn, params={"dates": [str(d) for d in dates]})
+    df["symbol"] = df["symbol"].map(db_symbol)
+    # Distinct NSE symbols can share a table form; keep the most traded row like the query does
+    return (
+        df.sort_values("volume", ascending=False, na_position="last", kind="stable")
+        .drop_duplicates(["date", "symbol"])
+        .sort_values(["date", "symbol"], kind="stable")
+        .reset_index(drop=True)
+    )
 
-    if not tables:
-        print("[WARN] No tables found in DB.")
-        return False
 
-    # 2. Process in batches
-    BATCH_SIZE = 100
-    all_data = []
+def build_heatmap_frame(df):
+    """Vectorized change% / sector for raw EOD rows (same rules as the old per-row loop)."""
+    if df.empty:
+        return df
 
-    for batch_start in range(0, len(tables), BATCH_SIZE):
-        batch_tables = tables[batch_start : batch_start + BATCH_SIZE]
-        union_parts = []
+    out = pd.DataFrame()
+    out["date"] = pd.to_datetime(df["date"]).dt.strftime("%Y-%m-%d")
+    out["symbol"] = df["symbol"].astype(str)
 
-        for table in batch_tables:
-            symbol_name = table.replace("TBL_", "")
-            if not symbol_name or symbol_name in ["NIFTY_DERIVED"]:
-                continue
+    close = pd.to_numeric(df["close"], errors="coerce").fillna(0).astype(float)
+    prev_close = pd.to_numeric(df["prev_close"], errors="coerce")
+    prev_close = prev_close.where(prev_close > 0, close)
 
-            union_parts.append(
-                f"""
-                (SELECT
-                    '{symbol_name}' as symbol,
-                    CAST("ClsPric" AS NUMERIC) as close,
-                    CAST("HghPric" AS NUMERIC) as high,
-                    CAST("LwPric" AS NUMERIC) as low,
-                    CAST("TtlTradgVol" AS NUMERIC) as volume,
-                    CAST(COALESCE("TtlTrfVal", 0) AS NUMERIC) as turnover,
-                    CAST(COALESCE("PrvsClsgPric", 0) AS NUMERIC) as prev_close
-                FROM public."{table}"
-                WHERE CAST("BizDt" AS DATE) = DATE '{selected_date}'
-                AND "ClsPric" IS NOT NULL
-                AND CAST("ClsPric" AS NUMERIC) > 0
-                LIMIT 1)
-            """
-            )
+    out["close"] = close
+    out["prev_close"] = prev_close
+    out["high"] = pd.to_numeric(df["high"], errors="coerce").fillna(close)
+    out["low"] = pd.to_numeric(df["low"], errors="coerce").fillna(close)
+    out["volume"] = pd.to_numeric(df["volume"], errors="coerce").fillna(0).astype("int64")
+    out["turnover"] = pd.to_numeric(df["turnover"], errors="coerce").fillna(0).astype(float)
+    out["change_pct"] = ((close - prev_close) / prev_close * 100).where(prev_close > 0, 0.0).round(2)
 
-        if not union_parts:
-            continue
+    sectors = {sym: get_sector(sym) for sym in out["symbol"].unique()}
+    out["sector"] = out["symbol"].map(sectors)
 
-        batch_query = "\nUNION ALL\n".join(union_parts)
+    return out[out["close"] > 0].reset_index(drop=True)
 
-        try:
-            with engine_cash.connect() as conn:
-                df_batch = pd.read_sql(batch_query, con=conn)
-                if not df_batch.empty:
-                    all_data.append(df_batch)
-        except Exception as e:
-            # print(f"[WARN] Batch error: {str(e)[:50]}")
-            pass
 
-    if not all_data:
-        print(f"[WARN] No data aggregated for {selected_date}")
-        return False
+def add_period_returns(frame, closes, calendar):
+    """
+    Fill ret_1w .. ret_1y for every (date, symbol) in frame.
+    closes: Series of close indexed by (date, symbol) covering the target
+    dates and every period start date. Same rules as the old on-request
+    calculation: period start = nearest trading date to (date - period),
+    0 when the symbol has no start close, daily change when start == date.
+    """
+    dates = frame["date"]
+    for period, col in RETURN_COLUMNS.items():
+        start_map = {d: (calendar.period_start(d, period) or d) for d in dates.unique()}
+        start_dates = dates.map(start_map)
+        start_close = closes.reindex(pd.MultiIndex.from_arrays([start_dates, frame["symbol"]])).to_numpy()
+        start_close = pd.Series(start_close, index=frame.index)
 
-    df = pd.concat(all_data, ignore_index=True)
+        ret = ((frame["close"] - start_close) / start_close * 100).where(start_close > 0, 0.0).round(2)
+        frame[col] = ret.where(start_dates != dates, frame["change_pct"])
+    return frame
 
-    # 3. Transform and Prepare
-    cache_records = []
-    for _, row in df.iterrows():
-        try:
-            symbol = str(row["symbol"])
-            close = float(row["close"]) if pd.notna(row["close"]) else 0
-            if close <= 0:
-                continue
 
-            high = float(row["high"]) if pd.notna(row["high"]) else close
-            low = float(row["low"]) if pd.notna(row["low"]) else close
-            volume = int(float(row["volume"])) if pd.notna(row["volume"]) else 0
-            turnover = float(row["turnover"]) if pd.notna(row["turnover"]) else 0
-            prev_close = float(row["prev_close"]) if pd.notna(row["prev_close"]) and row["prev_close"] > 0 else close
-
-            change_pct = round(((close - prev_close) / prev_close) * 100, 2) if prev_close > 0 else 0.0
-            sector = get_sector(symbol)
-
-            cache_records.append(
-                {
-                    "date": selected_date,
-                    "symbol": symbol,
-                    "close": close,
-                    "prev_close": prev_close,
-                    "high": high,
-                    "low": low,
-                    "volume": volume,
-                    "turnover": turnover,
-                    "change_pct": change_pct,
-                    "sector": sector,
-                }
-            )
-        except Exception:
-            continue
+def calculate_heatmap_for_dates(dates, chunk_days=CHUNK_DAYS):
+    """
+    Build and upsert heatmap rows for many dates: one query + one COPY
+    upsert per chunk of `chunk_days` dates. Returns rows written.
+    """
+    dates = sorted(set(str(d) for d in dates))
+    if not dates:
+        return 0
 
-    # 4. Bulk Insert
-    if cache_records:
+    start_time = time.time()
+    total = 0
+    calendar = get_calendar(engine_cash)
+
+    for i in range(0, len(dates), chunk_days):
+        chunk = dates[i : i + chunk_days]
         try:
-            insert_query = text(
-                """
-                INSERT INTO daily_market_heatmap
-                (date, symbol, close, prev_close, high, low, volume, turnover, change_pct, sector)
-                VALUES (:date, :symbol, :close, :prev_close, :high, :low, :volume, :turnover, :change_pct, :sector)
-                ON CONFLICT (date, symbol) DO UPDATE SET
-                    close = EXCLUDED.close,
-                    change_pct = EXCLUDED.change_pct,
-                    volume = EXCLUDED.volume,
-                    turnover = EXCLUDED.turnover;
-            """
-            )
+            # Target dates + every period start date in one query
+            start_dates = {calendar.period_start(d, p) for d in chunk for p in RETURN_COLUMNS}
+            rows = load_eod_rows(sorted(set(chunk) | {d for d in start_dates if d}))
+            if rows.empty:
+                print(f"[WARN] No data aggregated for {chunk[0]} .. {chunk[-1]}")
+                continue
+            rows["date"] = pd.to_datetime(rows["date"]).dt.strftime("%Y-%m-%d")
+            closes = rows.set_index(["date", "symbol"])["close"].astype(float)
 
-            with engine_cash.begin() as conn:
-                conn.execute(insert_query, cache_records)
-            print(
-                f"[SUCCESS] Saved {len(cache_records)} records for {selected_date} in {time.time() - start_time:.2f}s"
-            )
-            return True
+            frame = build_heatmap_frame(rows[rows["date"].isin(chunk)])
+            if frame.empty:
+                print(f"[WARN] No data aggregated for {chunk[0]} .. {chunk[-1]}")
+                continue
+            frame = add_period_returns(frame, closes, calendar)
+            written = copy_upsert(engine_cash, frame, "daily_market_heatmap", ["date", "symbol"])
+            total += written
+            print(f"[SUCCESS] {chunk[0]} .. {chunk[-1]}: {written} records ({frame['date'].nunique()} dates)")
         except Exception as e:
-            print(f"[ERROR] Save failed: {e}")
-            return False
+            print(f"[ERROR] Heatmap build failed for {chunk[0]} .. {chunk[-1]}: {e}")
 
-    return False
+    print(f"[INFO] Heatmap: {total} records for {len(dates)} date(s) in {time.time() - start_time:.2f}s")
+    return total
+
+
+def calculate_heatmap_for_date(selected_date):
+    """Calculate and insert heatmap data for a specific date."""
+    print(f"[INFO] Calculating heatmap for {selected_date}...")
+    return calculate_heatmap_for_dates([selected_date]) > 0
 
 
 def update_heatmap_cache():
@@ -309,10 +338,29 @@ def update_heatmap_cache():
 
     print(f"[INFO] Found {len(missing_dates)} dates to process: {missing_dates[:5]}...")
 
-    # Process newest first
-    for date in missing_dates:
-        calculate_heatmap_for_date(date)
+    calculate_heatmap_for_dates(missing_dates)
+
+
+def rebuild_heatmap_range(start_date=None, end_date=None):
+    """Recompute (upsert) every trading date in [start_date, end_date]."""
+    if not create_heatmap_table():
+        return
+    dates = [
+        d for d in get_all_cash_dates()
+        if (not start_date or d >= start_date) and (not end_date or d <= end_date)
+    ]
+    print(f"[INFO] Rebuilding heatmap for {len(dates)} date(s)")
+    calculate_heatmap_for_dates(dates)
 
 
 if __name__ == "__main__":
-    update_heatmap_cache()
+    parser = argparse.ArgumentParser(description="Build daily_market_heatmap from cash_eod_data")
+    parser.add_argument("--rebuild", action="store_true", help="Recompute existing dates too (use with --from/--to)")
+    parser.add_argument("--from", dest="start_date", help="First date (YYYY-MM-DD) for --rebuild")
+    parser.add_argument("--to", dest="end_date", help="Last date (YYYY-MM-DD) for --rebuild")
+    args = parser.parse_args()
+
+    if args.rebuild:
+        rebuild_heatmap_range(args.start_date, args.end_date)
+    else:
+        update_heatmap_cache()
@@ -32,6 +32,7 @@ from sqlalchemy import create_engine, inspect, text
 
 # Database config
 from Analysis_Tools.app.models.db_config import engine_cash as engine
+from Database.eod_archive import CASH_EOD_SERIES, read_archive
 
 
 def create_technical_screener_table():
@@ -202,6 +203,23 @@ def get_ticker_symbols():
         print(f"Warning reading symbols from cash_eod_data: {e}")
         return []
 
+
+def load_archive_histories():
+    """
+    OHLCV history per symbol from the Parquet EOD archive (cash segment),
+    in one memory-mapped read instead of two queries per symbol. Only the
+    series kept in cash_eod_data are used.
+    Returns {symbol: DataFrame[date, close, open, high, low, volume]}.
+    """
+    df = read_archive("cash", columns=["trade_date", "symbol", "series", "open", "high", "low", "close", "volume"])
+    df = df[df["series"].isin(CASH_EOD_SERIES)].drop(columns=["series"])
+    df = df.rename(columns={"trade_date": "date"})
+    df = df.drop_duplicates().sort_values(["symbol", "date"], kind="stable")
+    return {
+        sym: part.drop(columns=["symbol"]).reset_index(drop=True)
+        for sym, part in df.groupby("symbol", sort=True)
+    }
+
 # Technical indicator calculations
 def calculate_rsi(close, period=14):
     delta = close.diff()
@@ -287,10 +305,12 @@ def calculate_momentum_score(close, lookback=10):
     return price_change_pct
 
 
-def precalculate_technical_screener_cache():
+def precalculate_technical_screener_cache(from_archive=False):
     """
     INCREMENTAL: Processes missing (date, ticker) pairs
     OPTIMIZED: Per-ticker cache checks preventing partial commits.
+    from_archive=True reads price history from the Parquet EOD archive
+    instead of cash_eod_data (full rebuilds without loading the database).
     """
     print("\n" + "=" * 70)
     print("TECHNICAL SCREENER CACHE BUILDER (OPTIMIZED INCREMENTAL)")
@@ -301,7 +321,16 @@ def precalculate_technical_screener_cache():
 
     # Get cached keys (Date, Ticker)
     cached_keys = get_cached_keys()
-    symbols = get_ticker_symbols()
+
+    histories = None
+    if from_archive:
+        try:
+            histories = load_archive_histories()
+            print(f"📦 Loaded {len(histories)} symbols from the EOD archive")
+        except Exception as e:
+            print(f"⚠ Archive read failed ({str(e)[:60]}). Falling back to cash_eod_data.")
+
+    symbols = sorted(histories) if histories else get_ticker_symbols()
 
     if not symbols:
         print("✗ No data available in central table")
@@ -319,10 +348,14 @@ def precalculate_technical_screener_cache():
         print(f"\n[{ticker_idx}/{len(symbols)}] {ticker}...", end=" ", flush=True)
 
         try:
-            q_dates = text('SELECT DISTINCT trade_date FROM public.cash_eod_data WHERE symbol = :sym ORDER BY trade_date')
+            if histories:
+                df = histories[ticker]
+                df_dates = df[["date"]].rename(columns={"date": "trade_date"}).drop_duplicates()
+            else:
+                q_dates = text('SELECT DISTINCT trade_date FROM public.cash_eod_data WHERE symbol = :sym ORDER BY trade_date')
 
-            # Using read_sql to get dates is fast
-            df_dates = pd.read_sql(q_dates, engine, params={"sym": ticker})
+                # Using read_sql to get dates is fast
+                df_dates = pd.read_sql(q_dates, engine, params={"sym": ticker})
             if df_dates.empty:
                 print("⚠ No dates", end="")
                 continue
@@ -336,16 +369,17 @@ def precalculate_technical_screener_cache():
                 print("✓ Up to date", end="")
                 continue
 
-            q = text(
+            if not histories:
+                q = text(
+                    """
+                    SELECT trade_date AS date, close,
+                           open, high, low, volume
+                    FROM public.cash_eod_data
+                    WHERE symbol = :sym
+                    ORDER BY trade_date
                 """
-                SELECT trade_date AS date, close,
-                       open, high, low, volume
-                FROM public.cash_eod_data
-                WHERE symbol = :sym
-                ORDER BY trade_date
-            """
-            )
-            df = pd.read_sql(q, engine, params={"sym": ticker})
+                )
+                df = pd.read_sql(q, engine, params={"sym": ticker})
 
             if df.empty or len(df) < min_days:
                 print(f"⚠ Low data ({len(df)})", end="")
@@ -645,4 +679,5 @@ def precalculate_technical_screener_cache():
 
 
 if __name__ == "__main__":
-    precalculate_technical_screener_cache()
+    # --from-archive: rebuild from the Parquet EOD archive (Database/eod_archive.py)
+    precalculate_technical_screener_cache(from_archive="--from-archive" in sys.argv)
@@ -43,6 +43,7 @@ from sqlalchemy import create_engine, text
 # DATABASE CONFIGURATION
 # =============================================================
 from Analysis_Tools.app.models.db_config import engine
+from Analysis_Tools.app.models.data_epoch import bump_data_epoch
 
 # =============================================================
 # NSE CONFIGURATION
@@ -955,6 +956,10 @@ def run_historical_fo_download():
     print(f"   Records Saved: {total_records}")
     print("=" * 60 + "\n")
 
+    if total_records:
+        # Running apps drop their EOD caches and HTTP validators
+        bump_data_epoch(engine)
+
 
 def run_update():
     """Fetch and save latest Cash Market data (Daily API)."""
@@ -997,6 +1002,9 @@ def run_update():
         print(f"   Total:   ₹{r['total_net_value']:+,.2f} Cr")
     print(f"   Records saved: {saved}")
     print("=" * 60 + "\n")
+
+    # Running apps drop their EOD caches and HTTP validators
+    bump_data_epoch(engine)
     return True
 
 
@@ -1133,6 +1141,9 @@ def run_refill_fo(days=15):
     print("✅ REFILL COMPLETE")
     print("=" * 60 + "\n")
 
+    if total_records:
+        bump_data_epoch(engine)
+
 
 # =============================================================
 # CLI ENTRY POINT
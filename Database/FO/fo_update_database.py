@@ -7,13 +7,16 @@ This script performs all steps:
 4. Pre-calculate screener cache data
 5. Pre-calculate dashboard data
 6. Fetch index constituents from NSE (for instant web app loading)
+
+Steps run as a dependency graph with per-step checkpoints
+(Database/pipeline_dag.py): the cache builders run in parallel once the
+DERIVED tables are ready, and a rerun skips steps whose inputs are
+unchanged. Flags: --from-archive, --force, --workers N, --dry-run
 """
 
 import os
 import sys
 import re
-import shutil
-import socket
 
 # Reconfigure stdout for UTF-8 support (Windows console workaround)
 try:
@@ -21,8 +24,6 @@ try:
 except AttributeError:
     pass
 
-import urllib.error
-import zipfile
 import numpy as np
 import pandas as pd
 from dotenv import load_dotenv
@@ -35,7 +36,7 @@ from datetime import datetime, timedelta
 from urllib.parse import quote_plus
 from py_vollib.black_scholes.greeks.analytical import delta, gamma, rho, theta, vega
 from py_vollib.black_scholes.implied_volatility import implied_volatility
-from sqlalchemy import create_engine, inspect, text
+from sqlalchemy import create_engine, text
 
 load_dotenv()
 
@@ -45,45 +46,23 @@ load_dotenv()
 # Import shared database engine
 
 from Analysis_Tools.app.models.db_config import engine
-output_folder = os.getenv("FO_TEMP_PATH", "temp_fo_data")
+from Analysis_Tools.app.models.data_epoch import bump_data_epoch
+from Analysis_Tools.app.models.schema_catalog import bump_catalog_version, get_catalog
+from Analysis_Tools.app.models.trading_calendar import sync_trading_calendar
+from Database.bhavcopy_downloader import download_bhavcopies, fo_archive_url, read_zip_csv, trading_days_between
+from Database.eod_archive import archive_fo_rows, read_archive_by_symbol
+from Database.pipeline_dag import DEFAULT_WORKERS, Step, family_rows, max_value, run_pipeline, table_rows
 save_fo_eod = os.getenv("FO_DATA_PATH", "data_fo_eod")
 
 
+def sanitize_table_name(name):
+    clean = re.sub(r"\W+", "_", name).strip("_").upper()
+    return f"TBL_{clean}" if clean else "TBL_UNKNOWN"
+
+
 # ===========================================
 # 📥 STEP 1: Download CSV Data
 # ===========================================
-# ===========================================
-# 📥 Download Helper Function
-# ===========================================
-def download_with_timeout(url, filepath, timeout=25):
-    """Download file with timeout and headers"""
-    socket.setdefaulttimeout(timeout)
-
-    try:
-        req = urllib.request.Request(url)
-        req.add_header("User-Agent", "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36")
-        req.add_header("Accept", "text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8")
-
-        with urllib.request.urlopen(req, timeout=timeout) as response:
-            with open(filepath, "wb") as out_file:
-                out_file.write(response.read())
-
-        return True
-
-    except socket.timeout:
-        raise TimeoutError(f"Download timeout after {timeout}s")
-
-    except urllib.error.HTTPError as e:
-        if e.code == 404:
-            raise FileNotFoundError("File not available (404)")
-        else:
-            raise Exception(f"HTTP Error {e.code}")
-
-    except Exception as e:
-        logger.error(f"❌ Download failed: {str(e)[:50]}")
-        raise Exception(f"Download failed: {str(e)[:50]}")
-
-
 def download_csv_data():
     print("\n" + "=" * 80)
     print("STEP 1: DOWNLOADING CSV DATA FROM NSE")
@@ -92,8 +71,7 @@ def download_csv_data():
     # -------------------------------------------
     # 1️⃣  CONNECT TO DATABASE TO GET LATEST DATE
     # -------------------------------------------
-    inspector = inspect(engine)
-    base_tables = [t for t in inspector.get_table_names() if t.startswith("TBL_") and not t.endswith("_DERIVED")]
+    base_tables = get_catalog(engine).base_tables
 
     latest_db_date = None
 
@@ -128,83 +106,37 @@ def download_csv_data():
         print("✅ Database is already up to date. No download needed.")
         return True
 
-    # -------------------------------------------
-    # 3️⃣  CREATE TEMP FOLDER FOR DOWNLOAD
-    # -------------------------------------------
-    if os.path.exists(output_folder):
-        shutil.rmtree(output_folder)
-    os.makedirs(output_folder)
-
     if not os.path.exists(save_fo_eod):
         os.makedirs(save_fo_eod, exist_ok=True)
 
     # -------------------------------------------
-    # 4️⃣  GENERATE WEEKDAY DATES
+    # 3️⃣  TRADING DATES ONLY (skip weekends / NSE holidays)
     # -------------------------------------------
-    date_range = []
-    delta_days = (end_date - start_date).days
-
-    for i in range(delta_days + 1):
-        d = start_date + timedelta(days=i)
-        date_range.append(d)
+    date_range = trading_days_between(start_date, end_date)
 
     if not date_range:
-        logger.info("✅ No new weekday dates to download.")
+        logger.info("✅ No new trading dates to download.")
         return True
 
-    logger.info(f"📅 Downloading data for {len(date_range)} date(s)")
+    logger.info(f"📅 Downloading data for {len(date_range)} trading date(s)")
 
     # -------------------------------------------
-    # 5️⃣  DOWNLOAD FILES
+    # 4️⃣  DOWNLOAD CONCURRENTLY, UNZIP IN MEMORY
     # -------------------------------------------
-    socket.setdefaulttimeout(25)
-    downloaded_files = []
+    # The CSV stays on disk: it is the hand-off to the separately checkpointed
+    # upload step (and this step's watermark), so a failed upload resumes from
+    # it without downloading again
+    def save_payload(d, payload):
+        _, csv_bytes = read_zip_csv(payload)
+        with open(os.path.join(save_fo_eod, d.strftime("%Y-%m-%d") + "-NSE-FO.csv"), "wb") as f:
+            f.write(csv_bytes)
 
-    for d in date_range:
-        date_str = d.strftime("%Y%m%d")
-        filename = f"BhavCopy_NSE_FO_0_0_0_{date_str}_F_0000.csv.zip"
-        url = f"https://archives.nseindia.com/content/fo/{filename}"
+    summary = download_bhavcopies(date_range, fo_archive_url, save_payload, timeout=25)
 
-        try:
-            output_path = os.path.join(output_folder, filename)
-            download_with_timeout(url, output_path, timeout=25)
-            downloaded_files.append(output_path)
-            print(f"   ✅ {d} downloaded")
-        except Exception:
-            print(f"   ⚠️  Skipped {d} (holiday or missing)")
-
-    if not downloaded_files:
+    if not summary["downloaded"]:
         print("⚠️  No files downloaded")
         return True
 
-    # -------------------------------------------
-    # 6️⃣  EXTRACT + RENAME
-    # -------------------------------------------
-    for file in downloaded_files:
-        try:
-            with zipfile.ZipFile(file, "r") as z:
-                z.extractall(output_folder)
-            os.remove(file)
-        except Exception as e:
-            print(f"❌ Error extracting {file}")
-
-    files = os.listdir(output_folder)
-    for file in files:
-        if file.endswith("0000.csv"):
-            date = file[22:30]
-            date_obj = datetime.strptime(date, "%Y%m%d")
-            new_name = date_obj.strftime("%Y-%m-%d") + "-NSE-FO.csv"
-            os.rename(os.path.join(output_folder, file), os.path.join(output_folder, new_name))
-
-    # -------------------------------------------
-    # 7️⃣  MOVE TO FINAL FOLDER
-    # -------------------------------------------
-    for filename in os.listdir(output_folder):
-        if filename.endswith("-NSE-FO.csv"):
-            shutil.copy2(os.path.join(output_folder, filename), os.path.join(save_fo_eod, filename))
-
-    shutil.rmtree(output_folder)
-
     print(f"\n✅ CSV download complete! Saved to {save_fo_eod}")
     return True
 
@@ -273,12 +205,7 @@ def upload_to_database():
             return False
         return True
 
-    def sanitize_table_name(name):
-        clean = re.sub(r"\W+", "_", name).strip("_").upper()
-        return f"TBL_{clean}" if clean else "TBL_UNKNOWN"
-
-    inspector = inspect(engine)
-    existing_tables = inspector.get_table_names()
+    existing_tables = set(get_catalog(engine).tables)
 
     latest_db_date = None
     base_tables = [t for t in existing_tables if t.startswith("TBL_") and not t.endswith("_DERIVED")]
@@ -301,6 +228,7 @@ def upload_to_database():
         return False
 
     upload_count = 0
+    tables_created = 0
 
     for file_name in sorted(csv_files):
         file_path = os.path.join(save_fo_eod, file_name)
@@ -366,9 +294,8 @@ def upload_to_database():
                     """
                     with engine.begin() as conn:
                         conn.execute(text(create_sql))
-                    existing_tables.append(table_name)
-            inspector = inspect(engine)
-            existing_tables = inspector.get_table_names()
+                    existing_tables.add(table_name)
+                    tables_created += 1
 
             for d in csv_unique_dates:
                 curr_date_obj = datetime.strptime(d, "%Y-%m-%d").date()
@@ -394,6 +321,9 @@ def upload_to_database():
 
                     print(f"   ✅ Committed data for {d}")
 
+                    # Columnar copy for cache rebuilds (no-op without pyarrow)
+                    archive_fo_rows(df_d)
+
                 except Exception as e:
                     logger.error(f"   ❌ Failed to upload date {d}. Transaction rolled back. Error: {e}")
                     raise e
@@ -404,6 +334,9 @@ def upload_to_database():
         except Exception as e:
             print(f"   ❌ Error: {e}")
 
+    if tables_created:
+        bump_catalog_version(engine)
+
     print(f"\n✅ Upload complete. {upload_count} file(s) uploaded.")
     return True
 
@@ -411,17 +344,20 @@ def upload_to_database():
 # ===========================================
 # 🧮 STEP 3: Calculate Greeks
 # ===========================================
-def calculate_greeks():
+def calculate_greeks(from_archive=False):
+    """
+    from_archive=True reads each date's rows from the Parquet archive
+    (Database/eod_archive.py) in one memory-mapped read instead of one
+    SELECT per base table.
+    """
     print("\n" + "=" * 80)
     print("STEP 3: CALCULATING GREEKS AND CREATING DERIVED TABLES")
     print("=" * 80 + "\n")
 
     def get_dates_to_process():
         try:
-            inspector = inspect(engine)
-            base_tables = [
-                t for t in inspector.get_table_names() if t.startswith("TBL_") and not t.endswith("_DERIVED")
-            ]
+            catalog = get_catalog(engine)
+            base_tables = catalog.base_tables
 
             if not base_tables:
                 return []
@@ -445,7 +381,7 @@ def calculate_greeks():
 
             derived_table = f"{sample_table}_DERIVED"
 
-            if derived_table in inspector.get_table_names():
+            if catalog.has_table(derived_table):
                 query_derived = text(
                     f"""
                     SELECT DISTINCT "BizDt"
@@ -513,8 +449,12 @@ def calculate_greeks():
 
     print(f"📅 Found {len(dates_to_process)} date(s) to process\n")
 
-    inspector = inspect(engine)
-    ticker_tables = [t for t in inspector.get_table_names() if t.startswith("TBL_") and not t.endswith("_DERIVED")]
+    # One catalog lookup for the whole run; newly created DERIVED tables are
+    # tracked locally instead of re-inspecting the schema after every CREATE.
+    catalog = get_catalog(engine)
+    ticker_tables = catalog.base_tables
+    existing_tables = set(catalog.tables)
+    tables_created = 0
 
     with engine.connect() as conn:
         for idx, bizdt in enumerate(dates_to_process, 1):
@@ -523,20 +463,35 @@ def calculate_greeks():
 
             processed = 0
 
+            archived = None
+            if from_archive:
+                try:
+                    archived = {
+                        sanitize_table_name(sym): part
+                        for sym, part in read_archive_by_symbol("fo", dates=[bizdt]).items()
+                    }
+                except Exception as e:
+                    print(f"  ⚠️ Archive read failed ({str(e)[:60]}). Falling back to database.")
+                if not archived:
+                    archived = None
+
             for table_name in ticker_tables:
                 try:
                     ticker = table_name.replace("TBL_", "")
                     print(f"  {ticker:15s}...", end=" ")
 
-                    query = text(
-                        f"""
-                        SELECT *
-                        FROM public."{table_name}"
-                        WHERE "BizDt" = :d
-                    """
-                    )
+                    if archived is not None:
+                        df = archived.get(table_name, pd.DataFrame()).copy()
+                    else:
+                        query = text(
+                            f"""
+                            SELECT *
+                            FROM public."{table_name}"
+                            WHERE "BizDt" = :d
+                        """
+                        )
 
-                    df = pd.read_sql(query, conn, params={"d": bizdt})
+                        df = pd.read_sql(query, conn, params={"d": bizdt})
 
                     if df.empty:
                         print("⚠️")
@@ -611,7 +566,7 @@ def calculate_greeks():
 
                     derived_table = f"{table_name}_DERIVED"
 
-                    if derived_table not in inspector.get_table_names():
+                    if derived_table not in existing_tables:
                         ddl = f"""
                         CREATE TABLE public."{derived_table}" (
                             LIKE public."{table_name}" INCLUDING ALL,
@@ -629,7 +584,8 @@ def calculate_greeks():
                         """
                         with engine.begin() as exe:
                             exe.execute(text(ddl))
-                        inspector = inspect(engine)
+                        existing_tables.add(derived_table)
+                        tables_created += 1
 
                     df.to_sql(derived_table, engine, if_exists="append", index=False)
                     processed += 1
@@ -640,141 +596,150 @@ def calculate_greeks():
 
             print(f"\n  📊 Date summary: {processed} tickers processed")
 
+    if tables_created:
+        bump_catalog_version(engine)
+
+    # Record the newly derived dates in the trading calendar
+    sync_trading_calendar(engine)
+
     print(f"\n✅ Greeks calculation complete!")
     return True
 
 
 # ===========================================
-# 🚀 MAIN EXECUTION
+# 🧩 STEP 3B-6: Centralized table + cache builders
 # ===========================================
-def main():
-    print("\n" + "=" * 80)
-    print("             🚀 BHAVCOPY COMPLETE DATA PIPELINE")
-    print("=" * 80)
-    print("\nThis script will:")
-    print("  1. Download latest CSV data from NSE")
-    print("  2. Upload data to PostgreSQL database")
-    print("  3. Calculate Greeks and create DERIVED tables")
+def update_centralized_fo_table():
+    script_dir = os.path.dirname(os.path.abspath(__file__))
+    migration_script = os.path.join(os.path.dirname(os.path.dirname(script_dir)), "migrate_fo_to_centralized.py")
+    if not os.path.exists(migration_script):
+        print("⏭ migrate_fo_to_centralized.py not found. Skipping centralized FO update.")
+        return True
     print("\n" + "=" * 80)
+    print("STEP 3B: UPDATING CENTRALIZED FO_EOD_DATA TABLE")
+    print("=" * 80 + "\n")
+    import subprocess
+    return subprocess.run([sys.executable, migration_script], check=False).returncode == 0
 
-    try:
-        download_result = download_csv_data()
-        if download_result is False:
-            print("\n❌ CSV download failed!")
-            return False
-        upload_result = upload_to_database()
-        if upload_result is False:
-            print("\n❌ Database upload failed!")
-            return False
 
-        greeks_result = calculate_greeks()
-        if greeks_result is False:
-            print("\n❌ Greeks calculation failed!")
-            return False
+def build_screener_cache():
+    import screener_cache
+    return screener_cache.precalculate_screener_cache()
 
-        try:
-            print("\n" + "=" * 80)
-            print("STEP 3B: UPDATING CENTRALIZED FO_EOD_DATA TABLE")
-            print("=" * 80 + "\n")
-            import subprocess
-            script_dir = os.path.dirname(os.path.abspath(__file__))
-            migration_script = os.path.join(os.path.dirname(os.path.dirname(script_dir)), "migrate_fo_to_centralized.py")
-            subprocess.run([sys.executable, migration_script], check=False)
-            print("✓ Centralized Table Update Triggered")
-        except Exception as e:
-            print(f"\n⚠️ Centralized FO update error: {e}")
-            print("   Continuing with pipeline...")
 
-        try:
-            import screener_cache
-
-            precalculate_screener_cache = screener_cache.precalculate_screener_cache
-            print("\n" + "=" * 80)
-            print("STEP 4: PRE-CALCULATING SCREENER CACHE (OPTIONAL)")
-            print("=" * 80 + "\n")
-            precalculate_screener_cache()
-            print("✓ Screener cache pre-calculated")
-        except ImportError:
-            print("\n⚠️ screener_cache module not found. Skipping Step 4.")
-        except Exception as e:
-            print(f"\n⚠️ Screener cache error: {e}")
-            print("   Continuing with pipeline...")
+def build_futures_oi_cache():
+    import futures_oi_cache
+    return futures_oi_cache.precalculate_futures_oi_cache()
 
-        try:
-            import futures_oi_cache
-
-            precalculate_futures_oi_cache = futures_oi_cache.precalculate_futures_oi_cache
-            print("\n" + "=" * 80)
-            print("STEP 4b: PRE-CALCULATING FUTURES OI CACHE (OPTIONAL)")
-            print("=" * 80 + "\n")
-            precalculate_futures_oi_cache()
-            print("✓ Futures OI cache pre-calculated")
-        except ImportError:
-            print("\n⚠️ futures_oi_cache module not found. Skipping Step 4b.")
-        except Exception as e:
-            print(f"\n⚠️ Futures OI cache error: {e}")
-            print("   Continuing with pipeline...")
 
-        try:
-            import signal_scanner_cache
-
-            print("\n" + "=" * 80)
-            print("STEP 4d: PRE-CALCULATING SIGNAL SCANNER CACHE")
-            print("=" * 80 + "\n")
-            signal_scanner_cache.update_signal_scanner_cache()
-            print("✓ Signal Scanner cache updated")
-        except ImportError:
-            print("\n⚠️ signal_scanner_cache module not found. Skipping Step 4d.")
-        except Exception as e:
-            print(f"\n⚠️ Signal Scanner cache error: {e}")
-            print("   Continuing with pipeline...")
+def build_option_chain_snapshots():
+    import option_chain_snapshot_cache
+    return option_chain_snapshot_cache.precalculate_option_chain_snapshots()
 
-        try:
-            print("\n" + "=" * 80)
-            print("STEP 5: PRE-CALCULATING DASHBOARD DATA (OPTIONAL)")
-            print("=" * 80 + "\n")
 
-            import precalculate_data
+def build_signal_scanner_cache():
+    import signal_scanner_cache
+    return signal_scanner_cache.update_signal_scanner_cache()
 
-            create_precalculated_tables = precalculate_data.create_precalculated_tables
-            precalculate_all_dates = precalculate_data.precalculate_all_dates
 
-            if True:
-                create_precalculated_tables()
-                precalculate_all_dates()
-                print("✓ Dashboard data pre-calculated")
-            else:
-                print("⚠️ Analysis_Tools directory not found. Skipping Step 5.")
-        except ImportError:
-            print("\n⚠️ precalculate_data module not found. Skipping Step 5.")
-        except Exception as e:
-            print(f"\n⚠️ Dashboard data error: {e}")
-            print("   Continuing with pipeline...")
+def build_technical_screener_cache(from_archive=False):
+    import technical_screener_cache
+    return technical_screener_cache.precalculate_technical_screener_cache(from_archive=from_archive)
 
-        try:
-            import index_constituents_cache
-
-            fetch_index_constituents = index_constituents_cache.fetch_index_constituents_cache
-            print("\n" + "=" * 80)
-            logger.info("STEP 6: FETCHING INDEX CONSTITUENTS FROM NSE")
-            print("=" * 80 + "\n")
-            fetch_index_constituents()
-            logger.info("✓ Index constituents cache updated")
-        except ImportError:
-            logger.warning("\n⚠️ index_constituents_cache module not found. Skipping Step 6.")
-        except Exception as e:
-            logger.error(f"\n⚠️ Index constituents error: {e}")
-            logger.info("   Continuing with pipeline...")
 
-        print("\n" + "=" * 80)
-        logger.info("             ✅ PIPELINE COMPLETE!")
-        print("=" * 80)
-        logger.info("\n✓ All steps completed successfully")
-        logger.info("\nYour database is up to date!")
-        print("=" * 80 + "\n")
+def build_dashboard_cache():
+    print("\n" + "=" * 80)
+    print("STEP 5: PRE-CALCULATING DASHBOARD DATA")
+    print("=" * 80 + "\n")
+    import precalculate_data
+    precalculate_data.create_precalculated_tables()
+    return precalculate_data.precalculate_all_dates()
 
-        return True
 
+def fetch_index_constituents():
+    import index_constituents_cache
+    print("\n" + "=" * 80)
+    logger.info("STEP 6: FETCHING INDEX CONSTITUENTS FROM NSE")
+    print("=" * 80 + "\n")
+    return index_constituents_cache.fetch_index_constituents_cache()
+
+
+def latest_downloaded_date():
+    """Newest BhavCopy CSV in save_fo_eod (files are named YYYY-MM-DD-NSE-FO.csv)."""
+    if not os.path.isdir(save_fo_eod):
+        return None
+    dates = [f[:10] for f in os.listdir(save_fo_eod) if f.endswith("-NSE-FO.csv")]
+    return max(dates) if dates else None
+
+
+def latest_fo_date(derived=False):
+    """Newest BizDt in the NIFTY (or first available) base / DERIVED table."""
+    base_tables = get_catalog(engine).base_tables
+    if not base_tables:
+        return None
+    sample_table = next((t for t in ["TBL_NIFTY", "TBL_BANKNIFTY"] if t in base_tables), base_tables[0])
+    return max_value(engine, f"{sample_table}_DERIVED" if derived else sample_table, "BizDt")()
+
+
+def build_steps(from_archive=False):
+    """
+    download → upload → greeks → {screener, futures OI, option chain,
+    signal scanner, technical, dashboard} in parallel. The cache builders
+    only need the DERIVED tables, not each other. The data epoch is bumped
+    once the data-bearing steps are done, whatever the side steps
+    (index constituents) do.
+    """
+    data_steps = ["upload", "greeks", "fo_eod_centralized", "screener_cache", "futures_oi_cache",
+                  "option_chain_snapshots", "signal_scanner", "technical_screener", "dashboard_cache"]
+    return [
+        Step("download", download_csv_data, watermark=latest_downloaded_date, always=True),
+        Step("upload", upload_to_database, deps=["download"],
+             watermark=latest_fo_date, rows=family_rows(engine)),
+        Step("greeks", lambda: calculate_greeks(from_archive=from_archive), deps=["upload"],
+             watermark=lambda: latest_fo_date(derived=True), rows=family_rows(engine, suffix="_DERIVED")),
+        Step("fo_eod_centralized", update_centralized_fo_table, deps=["upload"]),
+        Step("screener_cache", build_screener_cache, deps=["greeks"],
+             rows=table_rows(engine, "screener_cache")),
+        Step("futures_oi_cache", build_futures_oi_cache, deps=["greeks"],
+             rows=table_rows(engine, "futures_oi_cache")),
+        Step("option_chain_snapshots", build_option_chain_snapshots, deps=["greeks"],
+             rows=table_rows(engine, "option_chain_snapshot")),
+        Step("signal_scanner", build_signal_scanner_cache, deps=["greeks"],
+             rows=table_rows(engine, "daily_signal_scanner")),
+        Step("technical_screener", lambda: build_technical_screener_cache(from_archive), deps=["greeks"],
+             rows=table_rows(engine, "technical_screener_cache")),
+        Step("dashboard_cache", build_dashboard_cache, deps=["greeks"],
+             rows=table_rows(engine, "options_dashboard_cache")),
+        Step("index_constituents", fetch_index_constituents, always=True),
+        # Running apps drop their EOD caches and HTTP validators
+        Step("data_epoch", lambda: bump_data_epoch(engine), deps=data_steps, always=True),
+    ]
+
+
+# ===========================================
+# 🚀 MAIN EXECUTION
+# ===========================================
+def main(from_archive=False, force=False, workers=DEFAULT_WORKERS, dry_run=False):
+    """
+    Runs the pipeline as a dependency graph (Database/pipeline_dag.py).
+    Steps whose inputs have not moved since their last success are
+    skipped, so a rerun after a failure resumes where it stopped;
+    force=True rebuilds everything.
+    """
+    print("\n" + "=" * 80)
+    print("             🚀 BHAVCOPY COMPLETE DATA PIPELINE")
+    print("=" * 80)
+    print("\nThis script will:")
+    print("  1. Download latest CSV data from NSE")
+    print("  2. Upload data to PostgreSQL database")
+    print("  3. Calculate Greeks and create DERIVED tables")
+    print("  4. Rebuild the screener / dashboard caches (in parallel)")
+    print("\n" + "=" * 80)
+
+    try:
+        success = run_pipeline(
+            "fo", build_steps(from_archive), engine, max_workers=workers, force=force, dry_run=dry_run
+        )
     except Exception as e:
         logger.error(f"\n❌ Fatal Error: {e}")
         import traceback
@@ -782,8 +747,27 @@ def main():
         logger.error(traceback.format_exc())
         return False
 
+    if success and not dry_run:
+        print("\n" + "=" * 80)
+        logger.info("             ✅ PIPELINE COMPLETE!")
+        print("=" * 80)
+        logger.info("\nYour database is up to date!")
+        print("=" * 80 + "\n")
+    elif not success:
+        logger.error("\n❌ Pipeline finished with failed steps - rerun to resume from them")
+    return success
+
 
 if __name__ == "__main__":
-    success = main()
+    import argparse
+
+    parser = argparse.ArgumentParser(description="F&O BhavCopy pipeline")
+    parser.add_argument("--from-archive", action="store_true", help="compute DERIVED rows from the Parquet archive")
+    parser.add_argument("--force", action="store_true", help="ignore step checkpoints and rerun every step")
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS, help="parallel cache builders")
+    parser.add_argument("--dry-run", action="store_true", help="show the step graph and last checkpoints")
+    args = parser.parse_args()
+
+    success = main(from_archive=args.from_archive, force=args.force, workers=args.workers, dry_run=args.dry_run)
     input("\nPress Enter to exit...")
     sys.exit(0 if success else 1)
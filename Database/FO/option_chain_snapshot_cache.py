@@ -0,0 +1,154 @@
+"""
+OPTION CHAIN SNAPSHOT BUILDER
+=============================
+Materializes one compressed option-chain snapshot per (ticker, BizDt)
+into option_chain_snapshot (BhavCopy_Database): the chain with prev-day
+OI / price deltas and greeks, per-expiry futures summary and OI stats.
+The /stock/<ticker> page loads that single row instead of running the
+detail / expiry / stats queries (see app/models/option_chain_snapshot.py).
+
+INCREMENTAL MODE: Only builds missing (date, ticker) pairs within the
+last --days trading dates. --force rebuilds them all.
+OPTIMIZED: One query per ticker covering every pending date and its
+previous trading day.
+
+Usage:
+    python Database/FO/option_chain_snapshot_cache.py [--days 30] [--force]
+"""
+
+import argparse
+import os
+import sys
+
+import pandas as pd
+from dotenv import load_dotenv
+from sqlalchemy import inspect, text
+
+load_dotenv()
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+from Analysis_Tools.app.models.db_config import engine
+from Analysis_Tools.app.models.option_chain_snapshot import (
+    GREEK_COLUMNS,
+    build_snapshot_payload,
+    create_snapshot_table,
+    save_snapshot,
+    snapshot_keys,
+)
+from Analysis_Tools.app.models.trading_calendar import get_calendar
+
+SNAPSHOT_DAYS = 30
+
+BASE_COLUMNS = [
+    "BizDt",
+    "FininstrmActlXpryDt",
+    "StrkPric",
+    "OptnTp",
+    "OpnIntrst",
+    "ChngInOpnIntrst",
+    "TtlTradgVol",
+    "ClsPric",
+    "UndrlygPric",
+    "LastPric",
+]
+
+
+def get_option_tables():
+    """{ticker: table} preferring TBL_<T>_DERIVED (greeks) over TBL_<T>."""
+    tables = set(inspect(engine).get_table_names())
+    result = {}
+    for t in sorted(tables):
+        if not t.startswith("TBL_"):
+            continue
+        if t.endswith("_DERIVED"):
+            result[t[4:-8]] = t
+        elif f"{t}_DERIVED" not in tables:
+            result[t[4:]] = t
+    return result
+
+
+def _select_list(table):
+    """Base columns plus whichever greek columns the table has, aliased to GREEK_COLUMNS."""
+    cols = {c["name"] for c in inspect(engine).get_columns(table)}
+    select = [f'"{c}"' for c in BASE_COLUMNS]
+    for greek in GREEK_COLUMNS:
+        if greek.lower() in cols:
+            select.append(f'"{greek.lower()}" AS "{greek}"')
+        elif greek in cols:
+            select.append(f'"{greek}"')
+    return ", ".join(select)
+
+
+def precalculate_option_chain_snapshots(days=SNAPSHOT_DAYS, force=False):
+    print("\n" + "=" * 70)
+    print("OPTION CHAIN SNAPSHOT BUILDER (INCREMENTAL)")
+    print("=" * 70)
+
+    create_snapshot_table(engine)
+
+    calendar = get_calendar(engine)
+    dates = calendar.dates(days)
+    if not dates:
+        print("✗ No trading dates available")
+        return
+    prev_of = {d: calendar.prev(d) for d in dates}
+
+    cached = set() if force else snapshot_keys(engine)
+    print(f"📂 Cached snapshots: {len(cached)}")
+
+    tables = get_option_tables()
+    print(f"📊 Tickers to scan: {len(tables)} | Dates: {dates[-1]} → {dates[0]}")
+
+    built = 0
+    for idx, (ticker, table) in enumerate(tables.items(), 1):
+        pending = [d for d in dates if (d, ticker) not in cached]
+        if not pending:
+            continue
+        print(f"\n[{idx}/{len(tables)}] {ticker}...", end=" ", flush=True)
+
+        try:
+            needed = sorted(set(pending) | {prev_of[d] for d in pending if prev_of[d]})
+            q = text(
+                f"""
+                SELECT {_select_list(table)}
+                FROM public."{table}"
+                WHERE "BizDt" = ANY(CAST(:dates AS DATE[]))
+            """
+            )
+            df = pd.read_sql(q, engine, params={"dates": needed})
+            if df.empty:
+                print("⚠ No rows", end="")
+                continue
+
+            df["_date"] = pd.to_datetime(df["BizDt"]).dt.strftime("%Y-%m-%d")
+            by_date = {d: g.drop(columns="_date").reset_index(drop=True) for d, g in df.groupby("_date")}
+
+            count = 0
+            with engine.begin() as conn:
+                for d in pending:
+                    df_curr = by_date.get(d)
+                    if df_curr is None:
+                        continue
+                    prev_date = prev_of[d] or ""
+                    df_prev = by_date.get(prev_date)
+                    payload = build_snapshot_payload(
+                        df_curr.copy(), df_prev.copy() if df_prev is not None else None, prev_date
+                    )
+                    save_snapshot(conn, ticker, d, prev_date, payload)
+                    count += 1
+
+            built += count
+            print(f"✓ {count} snapshots", end="")
+        except Exception as e:
+            print(f"✗ Error: {e}", end="")
+
+    print("\n\n" + "=" * 70)
+    print(f"✓ OPTION CHAIN SNAPSHOTS COMPLETE! ({built} built)")
+    print("=" * 70)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build per-(ticker, date) option-chain snapshots")
+    parser.add_argument("--days", type=int, default=SNAPSHOT_DAYS, help="Trading dates to cover (newest first)")
+    parser.add_argument("--force", action="store_true", help="Rebuild snapshots that already exist")
+    args = parser.parse_args()
+    precalculate_option_chain_snapshots(args.days, args.force)
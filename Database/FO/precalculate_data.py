@@ -37,6 +37,7 @@ except ImportError:
 
 # Database config
 from Analysis_Tools.app.models.db_config import engine
+from Analysis_Tools.app.models.trading_calendar import get_prev_trading_date, get_trading_dates
 
 # Hardcoded constants removed - using shared engine
 # db_user = "postgres"
@@ -113,25 +114,15 @@ def calculate_rsi_from_database(table_name, current_date, all_dates, rsi_period=
 
 def get_available_dates():
     try:
-        inspector = inspect(engine)
-        tables = [t for t in inspector.get_table_names() if t.endswith("_DERIVED")]
-        if not tables:
-            return []
-        sample = next((t for t in ["TBL_NIFTY_DERIVED", "TBL_BANKNIFTY_DERIVED"] if t in tables), tables[0])
-        result = pd.read_sql(
-            text(f'SELECT DISTINCT "BizDt" FROM "{sample}" WHERE "BizDt" IS NOT NULL ORDER BY "BizDt" DESC'),
-            engine,
-        )
-        return (
-            [d.strftime("%Y-%m-%d") if hasattr(d, "strftime") else str(d) for d in result["BizDt"]]
-            if not result.empty
-            else []
-        )
+        return get_trading_dates(engine)
     except Exception:
         return []
 
 
 def get_prev_date(curr, dates):
+    prev = get_prev_trading_date(curr, engine)
+    if prev:
+        return prev
     try:
         i = dates.index(curr)
         return dates[i + 1] if i + 1 < len(dates) else None
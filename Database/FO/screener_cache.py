@@ -19,10 +19,12 @@ from datetime import datetime
 from urllib.parse import quote_plus
 
 import pandas as pd
-from sqlalchemy import create_engine, inspect, text
+from sqlalchemy import create_engine, text
 
 # Database config
 from Analysis_Tools.app.models.db_config import engine
+from Analysis_Tools.app.models.schema_catalog import get_catalog
+from Analysis_Tools.app.models.trading_calendar import get_trading_dates
 
 # Hardcoded constants removed - using shared engine
 # db_user = "postgres"
@@ -194,9 +196,7 @@ def get_prev_date(selected_date: str, all_dates: list):
 def get_all_tables(engine):
     """Get all derived tables"""
     try:
-        inspector = inspect(engine)
-        all_tables = [t for t in inspector.get_table_names(schema="public") if t.endswith("_DERIVED")]
-        return all_tables
+        return [t for t in get_catalog(engine).tables if t.endswith("_DERIVED")]
     except Exception as e:
         print(f"❌ Error getting tables: {e}")
         return []
@@ -747,27 +747,19 @@ def precalculate_screener_cache():
             return False
 
         # Get all available dates
-        inspector = inspect(engine)
-        base_tables = [t for t in inspector.get_table_names() if t.startswith("TBL_") and not t.endswith("_DERIVED")]
+        base_tables = get_catalog(engine).base_tables
 
         if not base_tables:
             print("⚠️  No base tables found")
             return False
 
-        sample_table = next((t for t in ["TBL_NIFTY", "TBL_BANKNIFTY"] if t in base_tables), base_tables[0])
+        # Get all dates (trading calendar, newest first)
+        all_dates = get_trading_dates(engine)
 
-        # Get all dates
-        query_base = text(
-            f'SELECT DISTINCT "BizDt" FROM public."{sample_table}" WHERE "BizDt" IS NOT NULL ORDER BY "BizDt" DESC'
-        )
-        base_dates = pd.read_sql(query_base, engine)
-
-        if base_dates.empty:
+        if not all_dates:
             print("⚠️  No dates found in database")
             return False
 
-        all_dates = [str(d.date()) if hasattr(d, "date") else str(d) for d in base_dates["BizDt"].tolist()]
-
         # Get already cached dates
         try:
             query_cache = text("SELECT DISTINCT cache_date FROM public.screener_cache ORDER BY cache_date DESC")
@@ -26,6 +26,7 @@ logger = logging.getLogger(__name__)
 
 load_dotenv()
 from Analysis_Tools.app.models.db_config import engine
+from Analysis_Tools.app.models.trading_calendar import get_trading_dates
 
 
 def calc_rsi(series, period=14):
@@ -219,9 +220,7 @@ def get_cached_keys():
 def get_available_dates(engine):
     """Get all unique trade dates"""
     try:
-        query = text('SELECT DISTINCT "BizDt" FROM "TBL_NIFTY_DERIVED" ORDER BY "BizDt" DESC')
-        df = pd.read_sql(query, engine)
-        return [d.strftime('%Y-%m-%d') for d in df['BizDt']]
+        return get_trading_dates(engine)
     except Exception as e:
         logger.error(f"Error fetching dates: {e}")
         return []
@@ -26,6 +26,8 @@ from sqlalchemy import create_engine, inspect, text
 
 # Database config
 from Analysis_Tools.app.models.db_config import engine
+from Analysis_Tools.app.models.symbol_master import db_symbol
+from Database.eod_archive import read_archive
 
 
 def create_technical_screener_table():
@@ -192,6 +194,32 @@ def get_derived_tables():
     return sorted(tables)
 
 
+def load_archive_histories():
+    """
+    STF (stock futures) OHLCV history per ticker from the Parquet EOD
+    archive, in one memory-mapped read instead of two queries per table.
+    Returns {ticker: DataFrame[date, close, open, high, low, volume]}.
+    """
+    df = read_archive(
+        "fo", columns=["BizDt", "TckrSymb", "FinInstrmTp", "UndrlygPric", "OpnPric", "HghPric", "LwPric", "TtlTradgVol"]
+    )
+    df = df[df["FinInstrmTp"] == "STF"].drop(columns=["FinInstrmTp"])
+    df = df.rename(
+        columns={
+            "BizDt": "date",
+            "UndrlygPric": "close",
+            "OpnPric": "open",
+            "HghPric": "high",
+            "LwPric": "low",
+            "TtlTradgVol": "volume",
+        }
+    )
+    # Same key as the pipeline's TBL_<TICKER> table names
+    df["ticker"] = df["TckrSymb"].map(db_symbol)
+    df = df.drop(columns=["TckrSymb"]).drop_duplicates().sort_values(["ticker", "date"], kind="stable")
+    return {t: part.drop(columns=["ticker"]).reset_index(drop=True) for t, part in df.groupby("ticker", sort=True)}
+
+
 # Technical indicator calculations
 def calculate_rsi(close, period=14):
     delta = close.diff()
@@ -283,10 +311,12 @@ def calculate_momentum_score(close, lookback=10):
     return price_change_pct
 
 
-def precalculate_technical_screener_cache():
+def precalculate_technical_screener_cache(from_archive=False):
     """
     INCREMENTAL: Processes missing (date, ticker) pairs
     OPTIMIZED: Per-ticker cache checks preventing partial commits.
+    from_archive=True reads price history from the Parquet EOD archive
+    instead of the DERIVED tables (full rebuilds without loading the database).
     """
     print("\n" + "=" * 70)
     print("TECHNICAL SCREENER CACHE BUILDER (OPTIMIZED INCREMENTAL)")
@@ -297,7 +327,16 @@ def precalculate_technical_screener_cache():
 
     # Get cached keys (Date, Ticker)
     cached_keys = get_cached_keys()
-    tables = get_derived_tables()
+
+    histories = None
+    if from_archive:
+        try:
+            histories = load_archive_histories()
+            print(f"📦 Loaded {len(histories)} tickers from the EOD archive")
+        except Exception as e:
+            print(f"⚠ Archive read failed ({str(e)[:60]}). Falling back to DERIVED tables.")
+
+    tables = [f"TBL_{t}_DERIVED" for t in sorted(histories)] if histories else get_derived_tables()
 
     if not tables:
         print("✗ No data available")
@@ -320,10 +359,14 @@ def precalculate_technical_screener_cache():
             # It's hard to know *missing* dates without fetching available dates for this ticker.
             # So we fetch "BizDt" from DB for this ticker first.
 
-            q_dates = text(f'SELECT DISTINCT "BizDt" FROM "{table}" WHERE "FinInstrmTp" = \'STF\' AND "BizDt" IS NOT NULL ORDER BY "BizDt"')
+            if histories:
+                df = histories[ticker]
+                df_dates = df[["date"]].rename(columns={"date": "BizDt"}).drop_duplicates()
+            else:
+                q_dates = text(f'SELECT DISTINCT "BizDt" FROM "{table}" WHERE "FinInstrmTp" = \'STF\' AND "BizDt" IS NOT NULL ORDER BY "BizDt"')
 
-            # Using read_sql to get dates is fast
-            df_dates = pd.read_sql(q_dates, engine)
+                # Using read_sql to get dates is fast
+                df_dates = pd.read_sql(q_dates, engine)
             if df_dates.empty:
                 print("⚠ No dates", end="")
                 continue
@@ -345,16 +388,17 @@ def precalculate_technical_screener_cache():
             # Optimization: If history is HUGE (10 years), we might want to limit.
             # But let's assume < 3000 rows is fine.
 
-            q = text(
-                f"""
-                SELECT DISTINCT "BizDt" AS date, "UndrlygPric" AS close,
-                       "OpnPric" AS open, "HghPric" AS high, "LwPric" AS low, "TtlTradgVol" AS volume
-                FROM "{table}"
-                WHERE "BizDt" IS NOT NULL AND "FinInstrmTp" = 'STF'
-                ORDER BY "BizDt"
-            """
-            )
-            df = pd.read_sql(q, engine)
+            if not histories:
+                q = text(
+                    f"""
+                    SELECT DISTINCT "BizDt" AS date, "UndrlygPric" AS close,
+                           "OpnPric" AS open, "HghPric" AS high, "LwPric" AS low, "TtlTradgVol" AS volume
+                    FROM "{table}"
+                    WHERE "BizDt" IS NOT NULL AND "FinInstrmTp" = 'STF'
+                    ORDER BY "BizDt"
+                """
+                )
+                df = pd.read_sql(q, engine)
 
             if df.empty or len(df) < min_days:
                 print(f"⚠ Low data ({len(df)})", end="")
@@ -654,4 +698,5 @@ def precalculate_technical_screener_cache():
 
 
 if __name__ == "__main__":
-    precalculate_technical_screener_cache()
+    # --from-archive: rebuild from the Parquet EOD archive (Database/eod_archive.py)
+    precalculate_technical_screener_cache(from_archive="--from-archive" in sys.argv)
@@ -0,0 +1,218 @@
+"""
+BHAVCOPY DOWNLOADER - Shared by the F&O and Cash pipelines
+==========================================================
+Holiday-aware, concurrent downloader for NSE bhavcopy archives.
+
+- Skips weekends and NSE trading holidays before making any request,
+  so a long weekend no longer costs one timeout per calendar day.
+- Fetches the remaining dates with a bounded thread pool. Transient
+  errors (timeouts, 5xx) are retried with exponential backoff; a 404
+  is treated as "not published" and is not retried.
+- Payloads are kept in memory: zip archives are opened from a BytesIO,
+  so nothing is extracted to a temp folder.
+
+Archive base URLs can be overridden with NSE_FO_ARCHIVE_BASE /
+NSE_CASH_ARCHIVE_BASE (see Database/bhavcopy_stub_server.py for a
+local stand-in used to exercise this module).
+"""
+
+import io
+import json
+import os
+import socket
+import time
+import urllib.error
+import urllib.request
+import zipfile
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import date, datetime, timedelta
+from typing import Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+# ===========================================
+# 🔧 Configuration
+# ===========================================
+FO_ARCHIVE_BASE = os.getenv("NSE_FO_ARCHIVE_BASE", "https://archives.nseindia.com/content/fo")
+CASH_ARCHIVE_BASE = os.getenv("NSE_CASH_ARCHIVE_BASE", "https://nsearchives.nseindia.com/products/content")
+
+DEFAULT_WORKERS = int(os.getenv("BHAVCOPY_WORKERS", "6"))
+DEFAULT_TIMEOUT = 25
+DEFAULT_RETRIES = 3
+DEFAULT_BACKOFF = 1.5  # seconds, doubled per attempt
+
+HOLIDAY_API = "https://www.nseindia.com/api/holiday-master?type=trading"
+HOLIDAY_CACHE_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "nse_trading_holidays.json")
+
+_HEADERS = {
+    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36",
+    "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8",
+}
+
+
+# ===========================================
+# 📅 Trading days
+# ===========================================
+def _load_holiday_cache() -> Dict[str, List[str]]:
+    try:
+        with open(HOLIDAY_CACHE_FILE, "r") as f:
+            return json.load(f)
+    except Exception:
+        return {}
+
+
+def _fetch_holidays_from_nse() -> Set[date]:
+    """Current-year trading holidays (CM segment) from NSE's holiday master."""
+    import requests
+
+    session = requests.Session()
+    session.headers.update({**_HEADERS, "Referer": "https://www.nseindia.com/"})
+    try:
+        session.get("https://www.nseindia.com/", timeout=8)
+    except Exception:
+        pass
+    resp = session.get(HOLIDAY_API, timeout=10)
+    resp.raise_for_status()
+    holidays = set()
+    for item in resp.json().get("CM", []):
+        try:
+            holidays.add(datetime.strptime(item["tradingDate"], "%d-%b-%Y").date())
+        except (KeyError, ValueError):
+            continue
+    return holidays
+
+
+def get_nse_holidays(years: Iterable[int]) -> Set[date]:
+    """
+    NSE trading holidays for the given years.
+    Uses the JSON cache next to this file; the current year is refreshed
+    from NSE when missing. Returns an empty set if nothing is available
+    (weekend skipping still applies).
+    """
+    cache = _load_holiday_cache()
+    years = set(years)
+    current_year = datetime.now().year
+
+    if current_year in years and str(current_year) not in cache:
+        try:
+            fetched = _fetch_holidays_from_nse()
+            for d in fetched:
+                cache.setdefault(str(d.year), [])
+                if d.isoformat() not in cache[str(d.year)]:
+                    cache[str(d.year)].append(d.isoformat())
+            with open(HOLIDAY_CACHE_FILE, "w") as f:
+                json.dump(cache, f, indent=2, sort_keys=True)
+        except Exception as e:
+            print(f"⚠️  Could not fetch NSE holiday list ({str(e)[:60]}). Skipping weekends only.")
+
+    holidays = set()
+    for y in years:
+        for d in cache.get(str(y), []):
+            holidays.add(date.fromisoformat(d))
+    return holidays
+
+
+def trading_days_between(start: date, end: date, holidays: Optional[Set[date]] = None) -> List[date]:
+    """Weekdays in [start, end] that are not NSE holidays."""
+    if start > end:
+        return []
+    if holidays is None:
+        holidays = get_nse_holidays(range(start.year, end.year + 1))
+    days = []
+    d = start
+    while d <= end:
+        if d.weekday() < 5 and d not in holidays:
+            days.append(d)
+        d += timedelta(days=1)
+    return days
+
+
+# ===========================================
+# 🌐 Fetch with retry / backoff
+# ===========================================
+def fetch_bytes(url: str, timeout: int = DEFAULT_TIMEOUT, retries: int = DEFAULT_RETRIES, backoff: float = DEFAULT_BACKOFF):
+    """
+    Return the response body, or None if the file is not published (404).
+    Raises the last error after `retries` failed attempts.
+    """
+    last_error = None
+    for attempt in range(retries + 1):
+        if attempt:
+            time.sleep(backoff * (2 ** (attempt - 1)))
+        try:
+            req = urllib.request.Request(url, headers=_HEADERS)
+            with urllib.request.urlopen(req, timeout=timeout) as response:
+                return response.read()
+        except urllib.error.HTTPError as e:
+            if e.code == 404:
+                return None
+            last_error = Exception(f"HTTP Error {e.code}")
+        except (socket.timeout, TimeoutError):
+            last_error = TimeoutError(f"Download timeout after {timeout}s")
+        except Exception as e:
+            last_error = e
+    raise last_error
+
+
+def read_zip_csv(payload: bytes) -> Tuple[str, bytes]:
+    """Return (member name, bytes) of the first CSV inside an in-memory zip."""
+    with zipfile.ZipFile(io.BytesIO(payload)) as z:
+        name = next(n for n in z.namelist() if n.lower().endswith(".csv"))
+        return name, z.read(name)
+
+
+# ===========================================
+# 📥 Concurrent download
+# ===========================================
+def fo_archive_url(d: date) -> str:
+    return f"{FO_ARCHIVE_BASE}/BhavCopy_NSE_FO_0_0_0_{d.strftime('%Y%m%d')}_F_0000.csv.zip"
+
+
+def cash_archive_url(d: date) -> str:
+    return f"{CASH_ARCHIVE_BASE}/sec_bhavdata_full_{d.strftime('%d%m%Y')}.csv"
+
+
+def download_bhavcopies(
+    dates: List[date],
+    url_for_date: Callable[[date], str],
+    handle_payload: Callable[[date, bytes], None],
+    max_workers: int = DEFAULT_WORKERS,
+    timeout: int = DEFAULT_TIMEOUT,
+    retries: int = DEFAULT_RETRIES,
+    backoff: float = DEFAULT_BACKOFF,
+) -> Dict[str, list]:
+    """
+    Download every date concurrently and hand each payload to
+    handle_payload(date, bytes) (called from the worker thread).
+
+    Returns {"downloaded": [dates], "missing": [dates], "failed": [(date, error)]}.
+    """
+    summary = {"downloaded": [], "missing": [], "failed": []}
+    if not dates:
+        return summary
+
+    def _job(d):
+        payload = fetch_bytes(url_for_date(d), timeout=timeout, retries=retries, backoff=backoff)
+        if payload is None:
+            return d, False
+        handle_payload(d, payload)
+        return d, True
+
+    with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(dates)))) as pool:
+        futures = {pool.submit(_job, d): d for d in dates}
+        for future in as_completed(futures):
+            d = futures[future]
+            try:
+                _, ok = future.result()
+                if ok:
+                    summary["downloaded"].append(d)
+                    print(f"   ✅ {d} downloaded")
+                else:
+                    summary["missing"].append(d)
+                    print(f"   ⚠️  Skipped {d} (not published)")
+            except Exception as e:
+                summary["failed"].append((d, str(e)[:60]))
+                print(f"   ❌ {d} failed: {str(e)[:60]}")
+
+    for key in ("downloaded", "missing"):
+        summary[key].sort()
+    summary["failed"].sort()
+    return summary
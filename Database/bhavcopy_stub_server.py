@@ -0,0 +1,217 @@
+"""
+BHAVCOPY STUB SERVER
+====================
+Local HTTP stand-in for the NSE archives, used to exercise
+Database/bhavcopy_downloader.py without hitting NSE.
+
+Serves synthetic sample archives on the same paths as NSE:
+    /content/fo/BhavCopy_NSE_FO_0_0_0_YYYYMMDD_F_0000.csv.zip   (zip)
+    /products/content/sec_bhavdata_full_DDMMYYYY.csv            (csv)
+
+Weekends and --holidays return 404. --fail-rate makes a fraction of
+first attempts return 503 so retry/backoff is exercised; --delay adds
+per-request latency so concurrency is visible.
+
+Usage:
+    # Run the server and point the pipelines at it
+    python Database/bhavcopy_stub_server.py --port 8765
+    NSE_FO_ARCHIVE_BASE=http://127.0.0.1:8765/content/fo \\
+    NSE_CASH_ARCHIVE_BASE=http://127.0.0.1:8765/products/content \\
+        python Database/FO/fo_update_database.py
+
+    # Self-check: start the server, download a date range, verify results
+    python Database/bhavcopy_stub_server.py --self-check
+"""
+
+import argparse
+import io
+import os
+import random
+import re
+import sys
+import tempfile
+import threading
+import time
+import zipfile
+from datetime import date, datetime, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+FO_PATH = re.compile(r"^/content/fo/BhavCopy_NSE_FO_0_0_0_(\d{8})_F_0000\.csv\.zip$")
+CASH_PATH = re.compile(r"^/products/content/sec_bhavdata_full_(\d{8})\.csv$")
+
+FO_HEADER = (
+    "TradDt,BizDt,Sgmt,Src,FinInstrmTp,FinInstrmId,ISIN,TckrSymb,SctySrs,XpryDt,FininstrmActlXpryDt,"
+    "StrkPric,OptnTp,FinInstrmNm,OpnPric,HghPric,LwPric,ClsPric,LastPric,PrvsClsgPric,UndrlygPric,"
+    "SttlmPric,OpnIntrst,ChngInOpnIntrst,TtlTradgVol,TtlTrfVal,TtlNbOfTxsExctd,SsnId,NewBrdLotQty"
+)
+CASH_HEADER = (
+    "SYMBOL, SERIES, DATE1, PREV_CLOSE, OPEN_PRICE, HIGH_PRICE, LOW_PRICE, LAST_PRICE, CLOSE_PRICE, "
+    "AVG_PRICE, TTL_TRD_QNTY, TURNOVER_LACS, NO_OF_TRADES, DELIV_QTY, DELIV_PER"
+)
+SAMPLE_SYMBOLS = ["NIFTY", "BANKNIFTY", "RELIANCE", "TCS", "INFY"]
+
+
+# ===========================================
+# 📄 Sample archives
+# ===========================================
+def sample_fo_zip(d: date) -> bytes:
+    iso = d.isoformat()
+    expiry = (d + timedelta(days=(3 - d.weekday()) % 7 or 7)).isoformat()
+    rows = [FO_HEADER]
+    for i, sym in enumerate(SAMPLE_SYMBOLS):
+        spot = 1000.0 * (i + 1)
+        for opt in ("CE", "PE"):
+            rows.append(
+                f"{iso},{iso},FO,NSE,STO,{i},,{sym},,{expiry},{expiry},{spot:.2f},{opt},{sym}{opt},"
+                f"10,12,9,11,11,10,{spot:.2f},11,1000,50,200,22000,40,F1,50"
+            )
+    buf = io.BytesIO()
+    name = f"BhavCopy_NSE_FO_0_0_0_{d.strftime('%Y%m%d')}_F_0000.csv"
+    with zipfile.ZipFile(buf, "w", zipfile.ZIP_DEFLATED) as z:
+        z.writestr(name, "\n".join(rows) + "\n")
+    return buf.getvalue()
+
+
+def sample_cash_csv(d: date) -> bytes:
+    stamp = d.strftime("%d-%b-%Y")
+    rows = [CASH_HEADER]
+    for i, sym in enumerate(SAMPLE_SYMBOLS[2:]):
+        px = 100.0 * (i + 1)
+        rows.append(f"{sym}, EQ, {stamp}, {px}, {px}, {px + 2}, {px - 2}, {px + 1}, {px + 1}, {px}, 1000, 10.5, 50, 600, 60.00")
+    return ("\n".join(rows) + "\n").encode()
+
+
+# ===========================================
+# 🌐 Server
+# ===========================================
+class StubState:
+    def __init__(self, holidays=(), fail_rate=0.0, delay=0.0):
+        self.holidays = set(holidays)
+        self.fail_rate = fail_rate
+        self.delay = delay
+        self.failed_once = set()
+        self.requests = 0
+        self.lock = threading.Lock()
+
+
+def make_handler(state: StubState):
+    class Handler(BaseHTTPRequestHandler):
+        def log_message(self, fmt, *args):
+            pass
+
+        def do_GET(self):
+            with state.lock:
+                state.requests += 1
+            if state.delay:
+                time.sleep(state.delay)
+
+            m_fo, m_cash = FO_PATH.match(self.path), CASH_PATH.match(self.path)
+            if m_fo:
+                d = datetime.strptime(m_fo.group(1), "%Y%m%d").date()
+            elif m_cash:
+                d = datetime.strptime(m_cash.group(1), "%d%m%Y").date()
+            else:
+                return self._send(404, b"")
+
+            if d.weekday() >= 5 or d in state.holidays:
+                return self._send(404, b"")
+
+            with state.lock:
+                should_fail = self.path not in state.failed_once and random.random() < state.fail_rate
+                if should_fail:
+                    state.failed_once.add(self.path)
+            if should_fail:
+                return self._send(503, b"")
+
+            body = sample_fo_zip(d) if m_fo else sample_cash_csv(d)
+            self._send(200, body, "application/zip" if m_fo else "text/csv")
+
+        def _send(self, code, body, ctype="application/octet-stream"):
+            self.send_response(code)
+            self.send_header("Content-Type", ctype)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+    return Handler
+
+
+def start_server(port=0, **kwargs):
+    state = StubState(**kwargs)
+    server = ThreadingHTTPServer(("127.0.0.1", port), make_handler(state))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, state
+
+
+# ===========================================
+# ✅ Self-check
+# ===========================================
+def self_check():
+    from Database import bhavcopy_downloader as bd
+
+    start, end = date(2024, 3, 20), date(2024, 4, 2)
+    holiday = date(2024, 3, 25)  # Holi
+    server, state = start_server(holidays=[holiday], fail_rate=0.3, delay=0.2)
+    base = f"http://127.0.0.1:{server.server_address[1]}"
+
+    # Calendar without the holiday so one 404 path is exercised as well
+    dates = bd.trading_days_between(start, end, holidays=set())
+    expected = [d for d in dates if d != holiday]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        def save_fo(d, payload):
+            _, csv_bytes = bd.read_zip_csv(payload)
+            with open(os.path.join(tmp, f"{d.isoformat()}-NSE-FO.csv"), "wb") as f:
+                f.write(csv_bytes)
+
+        t0 = time.time()
+        summary = bd.download_bhavcopies(
+            dates, lambda d: f"{base}/content/fo/BhavCopy_NSE_FO_0_0_0_{d.strftime('%Y%m%d')}_F_0000.csv.zip",
+            save_fo, max_workers=6, timeout=5, retries=2, backoff=0.1,
+        )
+        elapsed = time.time() - t0
+        written = sorted(os.listdir(tmp))
+
+    server.shutdown()
+
+    assert summary["downloaded"] == expected, summary
+    assert summary["missing"] == [holiday], summary
+    assert not summary["failed"], summary
+    assert written == [f"{d.isoformat()}-NSE-FO.csv" for d in expected], written
+    assert all(d.weekday() < 5 for d in dates)
+
+    print(f"\n✅ Self-check passed: {len(expected)} files, 1 holiday 404, "
+          f"{state.requests} requests, {elapsed:.2f}s (serial would be ≥ {0.2 * len(dates):.2f}s)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local NSE bhavcopy archive stand-in")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--holidays", nargs="*", default=[], help="YYYY-MM-DD dates that return 404")
+    parser.add_argument("--fail-rate", type=float, default=0.0, help="Fraction of first requests answered with 503")
+    parser.add_argument("--delay", type=float, default=0.0, help="Seconds of latency per request")
+    parser.add_argument("--self-check", action="store_true", help="Run the downloader against the stub and exit")
+    args = parser.parse_args()
+
+    if args.self_check:
+        self_check()
+        return
+
+    server, _ = start_server(
+        args.port,
+        holidays=[date.fromisoformat(h) for h in args.holidays],
+        fail_rate=args.fail_rate,
+        delay=args.delay,
+    )
+    print(f"🌐 Bhavcopy stub serving on http://127.0.0.1:{server.server_address[1]} (Ctrl+C to stop)")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,344 @@
+"""
+EOD ARCHIVE - Columnar (Parquet) copy of normalized EOD rows
+============================================================
+Date-partitioned, zstd-compressed Parquet archive written by the F&O and
+Cash ingestion steps, next to the raw CSV folders:
+
+    {EOD_ARCHIVE_PATH}/fo/date=YYYY-MM-DD/part-0.parquet     (base-table columns)
+    {EOD_ARCHIVE_PATH}/cash/date=YYYY-MM-DD/part-0.parquet   (cash_eod_data columns + series)
+
+Cache builders can rebuild from here ("--from-archive") instead of going
+back through the per-ticker Postgres tables: partitions are opened with
+memory_map=True and only the requested columns are decoded, so a full
+historical recompute runs at disk speed and does not load the database.
+
+pyarrow is optional. Without it every write is a no-op and
+read_archive() raises, so the pipelines keep working unchanged.
+
+Usage:
+    # Backfill the archive from the CSV folders already on disk
+    python Database/eod_archive.py --backfill fo
+    python Database/eod_archive.py --backfill cash
+"""
+
+import argparse
+import os
+import sys
+from datetime import datetime
+from typing import Iterable, List, Optional
+
+import pandas as pd
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+try:
+    import pyarrow as pa
+    import pyarrow.compute as pc
+    import pyarrow.parquet as pq
+
+    PYARROW_AVAILABLE = True
+except ImportError:
+    PYARROW_AVAILABLE = False
+    print("⚠️ pyarrow not installed. EOD Parquet archive disabled. Install with: pip install pyarrow")
+
+# ===========================================
+# 🔧 Configuration
+# ===========================================
+ARCHIVE_ROOT = os.getenv("EOD_ARCHIVE_PATH", "data_eod_archive")
+COMPRESSION = "zstd"
+SEGMENTS = ("fo", "cash")
+
+# Series kept in cash_eod_data (same filter as the cash pipeline)
+CASH_EOD_SERIES = ["EQ", "ST", "SM", "BE"]
+
+FO_STRING_COLUMNS = ["Sgmt", "FinInstrmTp", "TckrSymb", "OptnTp", "FinInstrmNm"]
+FO_FLOAT_COLUMNS = [
+    "StrkPric", "OpnPric", "HghPric", "LwPric", "ClsPric", "LastPric",
+    "PrvsClsgPric", "UndrlygPric", "SttlmPric", "TtlTrfVal",
+]
+FO_INT_COLUMNS = ["OpnIntrst", "ChngInOpnIntrst", "TtlTradgVol", "TtlNbOfTxsExctd", "NewBrdLotQty"]
+FO_COLUMNS = [
+    "BizDt", "Sgmt", "FinInstrmTp", "TckrSymb", "FininstrmActlXpryDt", "StrkPric", "OptnTp",
+    "FinInstrmNm", "OpnPric", "HghPric", "LwPric", "ClsPric", "LastPric", "PrvsClsgPric",
+    "UndrlygPric", "SttlmPric", "OpnIntrst", "ChngInOpnIntrst", "TtlTradgVol", "TtlTrfVal",
+    "TtlNbOfTxsExctd", "NewBrdLotQty",
+]
+
+CASH_COLUMNS = [
+    "trade_date", "symbol", "series", "open", "high", "low", "close", "prev_close",
+    "volume", "turnover", "deliverable_qty", "delivery_pct",
+]
+
+if PYARROW_AVAILABLE:
+    FO_SCHEMA = pa.schema(
+        [("BizDt", pa.date32())]
+        + [
+            (c, pa.date32() if c == "FininstrmActlXpryDt"
+             else pa.string() if c in FO_STRING_COLUMNS
+             else pa.int64() if c in FO_INT_COLUMNS
+             else pa.float64())
+            for c in FO_COLUMNS[1:]
+        ]
+    )
+    CASH_SCHEMA = pa.schema(
+        [
+            ("trade_date", pa.date32()),
+            ("symbol", pa.string()),
+            ("series", pa.string()),
+            ("open", pa.float64()),
+            ("high", pa.float64()),
+            ("low", pa.float64()),
+            ("close", pa.float64()),
+            ("prev_close", pa.float64()),
+            ("volume", pa.int64()),
+            ("turnover", pa.float64()),
+            ("deliverable_qty", pa.int64()),
+            ("delivery_pct", pa.float64()),
+        ]
+    )
+    SCHEMAS = {"fo": FO_SCHEMA, "cash": CASH_SCHEMA}
+
+
+# ===========================================
+# 🧹 Normalization
+# ===========================================
+def _to_date(series: pd.Series) -> pd.Series:
+    return pd.to_datetime(series, errors="coerce").dt.date
+
+
+def normalize_fo_rows(df: pd.DataFrame) -> pd.DataFrame:
+    """Raw F&O bhavcopy rows -> base-table columns with fixed dtypes."""
+    out = pd.DataFrame(index=df.index)
+    for col in FO_COLUMNS:
+        src = df[col] if col in df.columns else pd.Series(None, index=df.index, dtype="object")
+        if col in ("BizDt", "FininstrmActlXpryDt"):
+            out[col] = _to_date(src)
+        elif col in FO_STRING_COLUMNS:
+            out[col] = src.where(pd.notnull(src), None).map(lambda v: None if v is None else str(v).strip())
+        elif col in FO_INT_COLUMNS:
+            out[col] = pd.to_numeric(src, errors="coerce").round().astype("Int64")
+        else:
+            out[col] = pd.to_numeric(src, errors="coerce").astype("float64")
+    return out.reset_index(drop=True)
+
+
+def normalize_cash_rows(df: pd.DataFrame) -> pd.DataFrame:
+    """Raw sec_bhavdata_full rows (with BizDt) -> cash_eod_data columns + series."""
+
+    def num(col, fallback=None):
+        src = df.get(col, df.get(fallback) if fallback else None)
+        if src is None:
+            return pd.Series(float("nan"), index=df.index)
+        return pd.to_numeric(src, errors="coerce")
+
+    out = pd.DataFrame(index=df.index)
+    out["trade_date"] = _to_date(df["BizDt"])
+    out["symbol"] = df["SYMBOL"].astype(str).str.strip()
+    out["series"] = df.get("SERIES", pd.Series("EQ", index=df.index)).astype(str).str.strip()
+    out["open"] = num("OPEN_PRICE")
+    out["high"] = num("HIGH_PRICE")
+    out["low"] = num("LOW_PRICE")
+    out["close"] = num("CLOSE_PRICE")
+    out["prev_close"] = num("PREV_CLOSE")
+    out["volume"] = num("TTL_TRD_QNTY").round().astype("Int64")
+    out["turnover"] = num("TURNOVER_LACS", "TTL_TRD_VAL")
+    out["deliverable_qty"] = num("DELIV_QTY").round().astype("Int64")
+    out["delivery_pct"] = num("DELIV_PER")
+    return out.reset_index(drop=True)
+
+
+# ===========================================
+# 💾 Write
+# ===========================================
+def _segment_dir(segment: str) -> str:
+    if segment not in SEGMENTS:
+        raise ValueError(f"Unknown archive segment: {segment}")
+    return os.path.join(ARCHIVE_ROOT, segment)
+
+
+def _partition_path(segment: str, trade_date: str) -> str:
+    return os.path.join(_segment_dir(segment), f"date={trade_date}", "part-0.parquet")
+
+
+def write_partition(segment: str, trade_date, normalized: pd.DataFrame) -> Optional[str]:
+    """
+    Write (replace) one date partition. The file is written next to the
+    target and renamed into place, so readers never see a partial file.
+    """
+    if not PYARROW_AVAILABLE or normalized.empty:
+        return None
+
+    trade_date = str(trade_date)[:10]
+    path = _partition_path(segment, trade_date)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+
+    table = pa.Table.from_pandas(normalized, schema=SCHEMAS[segment], preserve_index=False)
+    tmp_path = f"{path}.tmp"
+    pq.write_table(table, tmp_path, compression=COMPRESSION)
+    os.replace(tmp_path, path)
+    return path
+
+
+def _write_by_date(segment: str, normalized: pd.DataFrame, date_col: str) -> int:
+    written = 0
+    for d, part in normalized.groupby(date_col, sort=True):
+        if write_partition(segment, d, part):
+            written += 1
+    return written
+
+
+def archive_fo_rows(df: pd.DataFrame) -> int:
+    """Archive raw F&O rows, one partition per BizDt. Never raises."""
+    if not PYARROW_AVAILABLE or df is None or df.empty:
+        return 0
+    try:
+        return _write_by_date("fo", normalize_fo_rows(df), "BizDt")
+    except Exception as e:
+        print(f"   ⚠️ F&O archive write failed: {str(e)[:80]}")
+        return 0
+
+
+def archive_cash_rows(df: pd.DataFrame) -> int:
+    """Archive raw cash bhavcopy rows, one partition per BizDt. Never raises."""
+    if not PYARROW_AVAILABLE or df is None or df.empty:
+        return 0
+    try:
+        return _write_by_date("cash", normalize_cash_rows(df), "trade_date")
+    except Exception as e:
+        print(f"   ⚠️ Cash archive write failed: {str(e)[:80]}")
+        return 0
+
+
+# ===========================================
+# 📖 Read (memory-mapped)
+# ===========================================
+def archive_dates(segment: str) -> List[str]:
+    """Archived trade dates (YYYY-MM-DD), ascending."""
+    root = _segment_dir(segment)
+    if not os.path.isdir(root):
+        return []
+    dates = []
+    for name in os.listdir(root):
+        if name.startswith("date=") and os.path.exists(os.path.join(root, name, "part-0.parquet")):
+            dates.append(name[5:])
+    return sorted(dates)
+
+
+def read_archive(
+    segment: str,
+    start: Optional[str] = None,
+    end: Optional[str] = None,
+    columns: Optional[List[str]] = None,
+    symbols: Optional[Iterable[str]] = None,
+    dates: Optional[Iterable[str]] = None,
+) -> pd.DataFrame:
+    """
+    Load archived rows for [start, end] (or an explicit list of dates) as
+    one DataFrame. Each partition is memory-mapped and only `columns` are
+    decoded; `symbols` filters on TckrSymb / symbol before conversion.
+    """
+    if not PYARROW_AVAILABLE:
+        raise RuntimeError("pyarrow is required to read the EOD archive")
+
+    schema = SCHEMAS[segment]
+    wanted = set(str(d)[:10] for d in dates) if dates is not None else None
+    selected = [
+        d for d in archive_dates(segment)
+        if (wanted is None or d in wanted) and (not start or d >= str(start)) and (not end or d <= str(end))
+    ]
+    if not selected:
+        return pd.DataFrame(columns=columns or schema.names)
+
+    symbol_col = "TckrSymb" if segment == "fo" else "symbol"
+    read_cols = list(columns) if columns else None
+    if read_cols and symbols is not None and symbol_col not in read_cols:
+        read_cols.append(symbol_col)
+    symbol_set = pa.array(sorted(set(symbols)), type=pa.string()) if symbols is not None else None
+
+    tables = []
+    for d in selected:
+        table = pq.read_table(_partition_path(segment, d), columns=read_cols, memory_map=True)
+        if symbol_set is not None:
+            table = table.filter(pc.is_in(table[symbol_col], value_set=symbol_set))
+        tables.append(table)
+
+    df = pa.concat_tables(tables).to_pandas()
+    if columns:
+        df = df[list(columns)]
+    return df
+
+
+def read_archive_by_symbol(segment: str, **kwargs) -> dict:
+    """read_archive() grouped into {symbol: DataFrame}."""
+    df = read_archive(segment, **kwargs)
+    symbol_col = "TckrSymb" if segment == "fo" else "symbol"
+    if df.empty or symbol_col not in df.columns:
+        return {}
+    return {sym: part.reset_index(drop=True) for sym, part in df.groupby(symbol_col, sort=False)}
+
+
+# ===========================================
+# 🔁 Backfill from raw CSV folders
+# ===========================================
+def backfill_fo(folder: Optional[str] = None) -> int:
+    folder = folder or os.getenv("FO_DATA_PATH", "data_fo_eod")
+    done = set(archive_dates("fo"))
+    written = 0
+    for name in sorted(f for f in os.listdir(folder) if f.endswith(".csv")):
+        try:
+            df = pd.read_csv(os.path.join(folder, name))
+            if "BizDt" not in df.columns:
+                continue
+            df["BizDt"] = _to_date(df["BizDt"])
+            df = df[~df["BizDt"].astype(str).isin(done)]
+            n = archive_fo_rows(df)
+            written += n
+            print(f"   ✅ {name}: {n} partition(s)")
+        except Exception as e:
+            print(f"   ❌ {name}: {str(e)[:60]}")
+    return written
+
+
+def backfill_cash(folder: Optional[str] = None) -> int:
+    folder = folder or os.getenv("CASH_DATA_PATH", "data_cash_eod")
+    done = set(archive_dates("cash"))
+    written = 0
+    for name in sorted(f for f in os.listdir(folder) if f.startswith("sec_bhavdata_full_") and f.endswith(".csv")):
+        try:
+            file_date = datetime.strptime(name[len("sec_bhavdata_full_"):-4], "%d%m%Y").date()
+            if file_date.isoformat() in done:
+                continue
+            df = pd.read_csv(os.path.join(folder, name))
+            df.columns = df.columns.str.strip()
+            df["BizDt"] = file_date
+            n = archive_cash_rows(df)
+            written += n
+            print(f"   ✅ {name}: {n} partition(s)")
+        except Exception as e:
+            print(f"   ❌ {name}: {str(e)[:60]}")
+    return written
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Parquet archive of normalized EOD rows")
+    parser.add_argument("--backfill", choices=SEGMENTS, help="Archive the CSVs already in the raw data folder")
+    parser.add_argument("--folder", help="Override the raw CSV folder for --backfill")
+    args = parser.parse_args()
+
+    if not PYARROW_AVAILABLE:
+        return False
+
+    if args.backfill:
+        print(f"\n📦 Backfilling {args.backfill} archive into {_segment_dir(args.backfill)}")
+        n = backfill_fo(args.folder) if args.backfill == "fo" else backfill_cash(args.folder)
+        print(f"\n✅ {n} partition(s) written")
+
+    for segment in SEGMENTS:
+        dates = archive_dates(segment)
+        span = f"{dates[0]} → {dates[-1]}" if dates else "empty"
+        print(f"📊 {segment}: {len(dates)} date(s) ({span})")
+    return True
+
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
@@ -0,0 +1,68 @@
+"""
+PG BULK - COPY-based upsert shared by the cache builders
+========================================================
+copy_upsert() streams a DataFrame into a temp staging table with
+COPY ... FROM STDIN (CSV), then merges it into the target with one
+INSERT ... SELECT ... ON CONFLICT DO UPDATE. A year of cache rows goes in
+as a single round trip instead of one executemany parameter set per row.
+"""
+
+import io
+from typing import List, Optional
+
+import pandas as pd
+
+
+def _quote(name: str) -> str:
+    return '"' + name.replace('"', '""') + '"'
+
+
+def copy_upsert(
+    engine_instance,
+    df: pd.DataFrame,
+    table: str,
+    key_columns: List[str],
+    update_columns: Optional[List[str]] = None,
+) -> int:
+    """
+    Upsert df into public.<table> on key_columns (which must match a
+    unique index). update_columns defaults to every non-key column.
+    Returns the number of rows inserted or updated.
+    """
+    if df is None or df.empty:
+        return 0
+
+    df = df.drop_duplicates(subset=key_columns, keep="last")
+    columns = list(df.columns)
+    if update_columns is None:
+        update_columns = [c for c in columns if c not in key_columns]
+
+    col_list = ", ".join(_quote(c) for c in columns)
+    key_list = ", ".join(_quote(c) for c in key_columns)
+    staging = _quote(f"_stage_{table}")
+
+    if update_columns:
+        set_clause = ", ".join(f"{_quote(c)} = EXCLUDED.{_quote(c)}" for c in update_columns)
+        conflict = f"ON CONFLICT ({key_list}) DO UPDATE SET {set_clause}"
+    else:
+        conflict = f"ON CONFLICT ({key_list}) DO NOTHING"
+
+    buf = io.StringIO()
+    df.to_csv(buf, index=False, header=False)
+    buf.seek(0)
+
+    raw = engine_instance.raw_connection()
+    try:
+        cur = raw.cursor()
+        cur.execute(f"CREATE TEMP TABLE {staging} (LIKE public.{_quote(table)} INCLUDING DEFAULTS) ON COMMIT DROP")
+        cur.copy_expert(f"COPY {staging} ({col_list}) FROM STDIN WITH (FORMAT csv)", buf)
+        cur.execute(f"INSERT INTO public.{_quote(table)} ({col_list}) SELECT {col_list} FROM {staging} {conflict}")
+        affected = cur.rowcount
+        raw.commit()
+        cur.close()
+        return affected
+    except Exception:
+        raw.rollback()
+        raise
+    finally:
+        raw.close()
@@ -0,0 +1,442 @@
+"""
+PIPELINE DAG - dependency-aware step runner with checkpoints
+============================================================
+Steps declare what they depend on; run_pipeline() starts each step as
+soon as all of its dependencies have succeeded, so independent steps
+(e.g. the cache builders once the DERIVED tables are ready) run in
+parallel on a thread pool. A failed step blocks only its dependents.
+
+Checkpoints: after a successful step its watermark (e.g. the latest
+BizDt it covers) is stored in pipeline_step_state together with the
+watermarks of its dependencies. On the next run a step whose dependency
+watermarks are unchanged since its last success is skipped, so a rerun
+after a failure resumes at the failed step instead of starting over.
+Steps marked always=True (downloads) run every time - they are
+incremental on their own.
+
+Run ledger: every step of every run gets a row in pipeline_run_ledger
+(status, start / end, duration, rows and rows added, watermark, error).
+
+    python Database/pipeline_dag.py fo          # last run of the "fo" pipeline
+"""
+
+import json
+import os
+import sys
+import threading
+import time
+import traceback
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from datetime import date, datetime
+from typing import Callable, Dict, Iterable, List, Optional
+
+from sqlalchemy import text
+
+DEFAULT_WORKERS = int(os.getenv("PIPELINE_WORKERS", "4"))
+
+_tables_ready = set()
+_tables_lock = threading.Lock()
+
+
+class Step:
+    """
+    One node of the pipeline.
+
+    fn         runs the step; returning False (or raising) marks it failed
+    deps       names of steps that must succeed first
+    watermark  called after success; defaults to the newest dependency watermark
+               (root steps: the finish time, so their dependents always rerun)
+    rows       called before and after the step to record rows / rows added
+    always     run even when the dependency watermarks are unchanged
+    """
+
+    def __init__(
+        self,
+        name: str,
+        fn: Callable[[], object],
+        deps: Iterable[str] = (),
+        watermark: Optional[Callable[[], object]] = None,
+        rows: Optional[Callable[[], int]] = None,
+        always: bool = False,
+    ):
+        self.name = name
+        self.fn = fn
+        self.deps = tuple(deps)
+        self.watermark = watermark
+        self.rows = rows
+        self.always = always
+
+
+# ===========================================
+# 🗄️ State / ledger tables
+# ===========================================
+def ensure_tables(engine):
+    with _tables_lock:
+        if id(engine) in _tables_ready:
+            return
+        with engine.begin() as conn:
+            conn.execute(text("""
+                CREATE TABLE IF NOT EXISTS public.pipeline_step_state (
+                    pipeline VARCHAR(50) NOT NULL,
+                    step VARCHAR(100) NOT NULL,
+                    status VARCHAR(20) NOT NULL,
+                    watermark VARCHAR(50),
+                    input_key TEXT,
+                    updated_at TIMESTAMP NOT NULL,
+                    PRIMARY KEY (pipeline, step)
+                )
+            """))
+            conn.execute(text("""
+                CREATE TABLE IF NOT EXISTS public.pipeline_run_ledger (
+                    id BIGSERIAL PRIMARY KEY,
+                    run_id VARCHAR(40) NOT NULL,
+                    pipeline VARCHAR(50) NOT NULL,
+                    step VARCHAR(100) NOT NULL,
+                    status VARCHAR(20) NOT NULL,
+                    started_at TIMESTAMP,
+                    finished_at TIMESTAMP,
+                    duration_s DOUBLE PRECISION,
+                    rows_total BIGINT,
+                    rows_added BIGINT,
+                    watermark VARCHAR(50),
+                    error TEXT
+                )
+            """))
+            conn.execute(text(
+                "CREATE INDEX IF NOT EXISTS idx_pipeline_run_ledger_run ON public.pipeline_run_ledger (pipeline, run_id)"
+            ))
+        _tables_ready.add(id(engine))
+
+
+def load_state(engine, pipeline: str) -> Dict[str, Dict]:
+    with engine.connect() as conn:
+        rows = conn.execute(
+            text("SELECT step, status, watermark, input_key FROM public.pipeline_step_state WHERE pipeline = :p"),
+            {"p": pipeline},
+        ).fetchall()
+    return {r[0]: {"status": r[1], "watermark": r[2], "input_key": r[3]} for r in rows}
+
+
+def save_state(engine, pipeline, step, status, watermark, input_key):
+    with engine.begin() as conn:
+        conn.execute(text("""
+            INSERT INTO public.pipeline_step_state (pipeline, step, status, watermark, input_key, updated_at)
+            VALUES (:p, :s, :status, :wm, :key, :now)
+            ON CONFLICT (pipeline, step) DO UPDATE SET
+                status = EXCLUDED.status,
+                watermark = COALESCE(EXCLUDED.watermark, pipeline_step_state.watermark),
+                input_key = CASE WHEN EXCLUDED.status = 'success'
+                                 THEN EXCLUDED.input_key ELSE pipeline_step_state.input_key END,
+                updated_at = EXCLUDED.updated_at
+        """), {"p": pipeline, "s": step, "status": status, "wm": watermark, "key": input_key, "now": datetime.now()})
+
+
+def record_ledger(engine, run_id, pipeline, entry):
+    with engine.begin() as conn:
+        conn.execute(text("""
+            INSERT INTO public.pipeline_run_ledger
+                (run_id, pipeline, step, status, started_at, finished_at, duration_s,
+                 rows_total, rows_added, watermark, error)
+            VALUES (:run_id, :pipeline, :step, :status, :started_at, :finished_at, :duration_s,
+                    :rows_total, :rows_added, :watermark, :error)
+        """), {
+            "run_id": run_id,
+            "pipeline": pipeline,
+            "step": entry["step"],
+            "status": entry["status"],
+            "started_at": entry.get("started_at"),
+            "finished_at": entry.get("finished_at"),
+            "duration_s": entry.get("duration_s"),
+            "rows_total": entry.get("rows_total"),
+            "rows_added": entry.get("rows_added"),
+            "watermark": entry.get("watermark"),
+            "error": entry.get("error"),
+        })
+
+
+# ===========================================
+# 📏 Row counts / watermarks for Step(rows=..., watermark=...)
+# ===========================================
+def table_rows(engine, table: str) -> Callable[[], Optional[int]]:
+    """Exact COUNT(*) of one table (None while it does not exist yet)."""
+    def count():
+        with engine.connect() as conn:
+            if conn.execute(text("SELECT to_regclass(:t)"), {"t": f'public."{table}"'}).scalar() is None:
+                return None
+            return conn.execute(text(f'SELECT COUNT(*) FROM public."{table}"')).scalar()
+    return count
+
+
+def estimated_rows(engine, table: str) -> Callable[[], Optional[int]]:
+    """Live-tuple estimate of one large table (cash_eod_data, index_historical_data)."""
+    def count():
+        with engine.connect() as conn:
+            return conn.execute(
+                text("SELECT n_live_tup FROM pg_stat_user_tables WHERE schemaname = 'public' AND relname = :t"),
+                {"t": table},
+            ).scalar()
+    return count
+
+
+def family_rows(engine, prefix: str = "TBL_", suffix: str = "") -> Callable[[], Optional[int]]:
+    """
+    Live-tuple estimate over a per-ticker table family (e.g. every
+    TBL_*_DERIVED) from pg_stat_user_tables - exact COUNT(*) over
+    hundreds of tables would cost more than some of the steps.
+    """
+    def count():
+        with engine.connect() as conn:
+            rows = conn.execute(text(
+                "SELECT relname, n_live_tup FROM pg_stat_user_tables WHERE schemaname = 'public'"
+            )).fetchall()
+        return sum(
+            n for name, n in rows
+            if name.startswith(prefix)
+            and (name.endswith(suffix) if suffix else not name.endswith("_DERIVED"))
+        )
+    return count
+
+
+def max_value(engine, table: str, column: str, where: str = "") -> Callable[[], object]:
+    """MAX(column) of a table as a watermark (None while the table does not exist)."""
+    def latest():
+        with engine.connect() as conn:
+            if conn.execute(text("SELECT to_regclass(:t)"), {"t": f'public."{table}"'}).scalar() is None:
+                return None
+            return conn.execute(text(f'SELECT MAX("{column}") FROM public."{table}" {where}')).scalar()
+    return latest
+
+
+# ===========================================
+# 🔀 Graph
+# ===========================================
+def topological_order(steps: List[Step]) -> List[str]:
+    """Step names in dependency order (declaration order among equals). Raises on unknown deps / cycles."""
+    by_name = {s.name: s for s in steps}
+    for s in steps:
+        missing = [d for d in s.deps if d not in by_name]
+        if missing:
+            raise ValueError(f"Step '{s.name}' depends on unknown step(s): {missing}")
+
+    order, done, visiting = [], set(), set()
+
+    def visit(name):
+        if name in done:
+            return
+        if name in visiting:
+            raise ValueError(f"Dependency cycle through '{name}'")
+        visiting.add(name)
+        for dep in by_name[name].deps:
+            visit(dep)
+        visiting.discard(name)
+        done.add(name)
+        order.append(name)
+
+    for s in steps:
+        visit(s.name)
+    return order
+
+
+def _as_watermark(value) -> Optional[str]:
+    if value is None:
+        return None
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    return str(value)
+
+
+def _count(fn):
+    if fn is None:
+        return None
+    try:
+        value = fn()
+        return int(value) if value is not None else None
+    except Exception as e:
+        print(f"   ⚠️ Row count failed: {str(e)[:80]}")
+        return None
+
+
+def _execute(step: Step) -> Dict:
+    """Run one step on a worker thread; never raises."""
+    entry = {"step": step.name, "started_at": datetime.now()}
+    rows_before = _count(step.rows)
+    start = time.perf_counter()
+    try:
+        result = step.fn()
+        entry["status"] = "failed" if result is False else "success"
+        if result is False:
+            entry["error"] = "step returned False"
+    except Exception as e:
+        entry["status"] = "failed"
+        entry["error"] = f"{type(e).__name__}: {e}"
+        traceback.print_exc()
+    entry["duration_s"] = round(time.perf_counter() - start, 3)
+    entry["finished_at"] = datetime.now()
+
+    rows_after = _count(step.rows)
+    entry["rows_total"] = rows_after
+    if rows_after is not None and rows_before is not None:
+        entry["rows_added"] = rows_after - rows_before
+
+    if entry["status"] == "success" and step.watermark is not None:
+        try:
+            entry["watermark"] = _as_watermark(step.watermark())
+        except Exception as e:
+            print(f"   ⚠️ Watermark for {step.name} failed: {str(e)[:80]}")
+    return entry
+
+
+# ===========================================
+# 🚀 Runner
+# ===========================================
+def run_pipeline(
+    pipeline: str,
+    steps: List[Step],
+    engine,
+    max_workers: int = DEFAULT_WORKERS,
+    force: bool = False,
+    dry_run: bool = False,
+    summary: bool = True,
+) -> bool:
+    """
+    Run `steps` in dependency order, independent steps in parallel.
+    force=True ignores checkpoints. Returns True if no step failed.
+    """
+    by_name = {s.name: s for s in steps}
+    order = topological_order(steps)
+    ensure_tables(engine)
+    state = load_state(engine, pipeline)
+
+    if dry_run:
+        print(f"📋 Pipeline '{pipeline}' ({len(order)} steps):")
+        for name in order:
+            s, prev = by_name[name], state.get(name, {})
+            deps = ", ".join(s.deps) or "-"
+            print(f"   {name:<28} after: {deps:<40} last: {prev.get('status', 'never')}"
+                  f" @ {prev.get('watermark') or '-'}{'  (always)' if s.always else ''}")
+        return True
+
+    run_id = f"{datetime.now():%Y%m%d-%H%M%S}-{os.getpid()}"
+    status: Dict[str, str] = {}
+    watermarks: Dict[str, Optional[str]] = {}
+    ledger: List[Dict] = []
+    pending = list(order)
+    running = {}
+    run_start = time.perf_counter()
+
+    print(f"🧭 Pipeline '{pipeline}' run {run_id}: {len(order)} steps, {max_workers} workers")
+
+    def finish(entry, input_key=None):
+        name = entry["step"]
+        status[name] = entry["status"]
+        if entry["status"] == "success":
+            if not entry.get("watermark"):
+                deps_wm = [watermarks[d] for d in by_name[name].deps if watermarks.get(d)]
+                # A root step without a watermark of its own counts as changed on every run
+                entry["watermark"] = max(deps_wm) if deps_wm else entry["finished_at"].isoformat(timespec="seconds")
+        watermarks[name] = entry.get("watermark")
+        if entry["status"] in ("success", "failed"):
+            save_state(engine, pipeline, name, entry["status"], entry.get("watermark"), input_key)
+        record_ledger(engine, run_id, pipeline, entry)
+        ledger.append(entry)
+
+        if entry["status"] == "success":
+            rows = f", {entry['rows_total']:,} rows" if entry.get("rows_total") is not None else ""
+            added = f" (+{entry['rows_added']:,})" if entry.get("rows_added") else ""
+            print(f"✅ [{name}] done in {entry['duration_s']:.1f}s{rows}{added} → {entry['watermark']}")
+        elif entry["status"] == "failed":
+            print(f"❌ [{name}] FAILED after {entry['duration_s']:.1f}s: {entry.get('error')}")
+        elif entry["status"] == "skipped":
+            print(f"⏭ [{name}] up to date @ {entry.get('watermark')}")
+        else:
+            print(f"⛔ [{name}] blocked by {entry.get('error')}")
+
+    with ThreadPoolExecutor(max_workers=max(1, max_workers), thread_name_prefix=f"{pipeline}-step") as pool:
+        while pending or running:
+            # Schedule / skip / block everything whose dependencies are settled
+            for name in list(pending):
+                step = by_name[name]
+                dep_status = [status.get(d) for d in step.deps]
+                if any(s in ("failed", "blocked") for s in dep_status):
+                    bad = [d for d in step.deps if status.get(d) in ("failed", "blocked")]
+                    pending.remove(name)
+                    finish({"step": name, "status": "blocked", "error": ", ".join(bad)})
+                    continue
+                if not all(s in ("success", "skipped") for s in dep_status):
+                    continue
+
+                pending.remove(name)
+                input_key = json.dumps({d: watermarks.get(d) for d in step.deps}, sort_keys=True)
+                prev = state.get(name)
+                if (
+                    not force
+                    and not step.always
+                    and prev
+                    and prev["status"] == "success"
+                    and prev["input_key"] == input_key
+                ):
+                    finish({"step": name, "status": "skipped", "watermark": prev["watermark"]})
+                    continue
+
+                print(f"▶ [{name}] starting")
+                running[pool.submit(_execute, step)] = (name, input_key)
+
+            if not running:
+                if pending:
+                    # Unreachable with a validated DAG; guard against spinning
+                    for name in pending:
+                        finish({"step": name, "status": "blocked", "error": "unresolved dependencies"})
+                    pending.clear()
+                break
+
+            done, _ = wait(list(running), return_when=FIRST_COMPLETED)
+            for future in done:
+                name, input_key = running.pop(future)
+                finish(future.result(), input_key)
+
+    if summary:
+        print_summary(pipeline, ledger, time.perf_counter() - run_start)
+    return not any(e["status"] in ("failed", "blocked") for e in ledger)
+
+
+def print_summary(pipeline, ledger, total_s=None):
+    print("\n" + "=" * 80)
+    header = f"📊 PIPELINE '{pipeline.upper()}' SUMMARY"
+    print(header + (f" (Total Time: {total_s:.1f}s)" if total_s is not None else ""))
+    print("=" * 80)
+    icons = {"success": "✅", "skipped": "⏭", "failed": "❌", "blocked": "⛔"}
+    for e in ledger:
+        rows = f"{e['rows_total']:>12,}" if e.get("rows_total") is not None else f"{'-':>12}"
+        added = f"+{e['rows_added']:,}" if e.get("rows_added") else ""
+        duration = f"{e['duration_s']:>8.1f}s" if e.get("duration_s") is not None else f"{'-':>9}"
+        print(f"{icons.get(e['status'], '?')} {e['step']:<28}{duration}{rows} {added:<10} {e.get('watermark') or ''}")
+        if e.get("error") and e["status"] == "failed":
+            print(f"     {e['error'][:150]}")
+    print("=" * 80)
+
+
+def get_last_run(engine, pipeline: str) -> List[Dict]:
+    """Ledger rows of the most recent run of `pipeline`."""
+    ensure_tables(engine)
+    with engine.connect() as conn:
+        rows = conn.execute(text("""
+            SELECT step, status, started_at, finished_at, duration_s, rows_total, rows_added, watermark, error
+            FROM public.pipeline_run_ledger
+            WHERE pipeline = :p AND run_id = (
+                SELECT run_id FROM public.pipeline_run_ledger WHERE pipeline = :p ORDER BY id DESC LIMIT 1
+            )
+            ORDER BY id
+        """), {"p": pipeline}).mappings().all()
+    return [dict(r) for r in rows]
+
+
+if __name__ == "__main__":
+    sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+    from Analysis_Tools.app.models.db_config import engine
+
+    name = sys.argv[1] if len(sys.argv) > 1 else "fo"
+    last = get_last_run(engine, name)
+    if not last:
+        print(f"No runs recorded for pipeline '{name}'")
+    else:
+        print_summary(name, last)
@@ -1,22 +1,67 @@
-
 import sys
 import os
 import time
+import argparse
+import statistics
 
 # Add project root to path
 sys.path.append(os.getcwd())
 
-from Analysis_Tools.app.models.index_model import get_index_stocks_with_data
+from Analysis_Tools.app.models.index_model import (
+    fetch_index_constituents,
+    get_index_stocks_with_data,
+    get_stocks_data_from_db,
+)
+
+# Latency budgets (seconds, median of --runs); override with --budget / --stocks-budget
+DEFAULT_BUDGET = float(os.getenv("BENCH_INDEX_BUDGET", "1.0"))
+DEFAULT_STOCKS_BUDGET = float(os.getenv("BENCH_INDEX_STOCKS_BUDGET", "0.25"))
+
+
+def _time_runs(fn, runs):
+    timings = []
+    result = None
+    for _ in range(runs):
+        start_time = time.perf_counter()
+        result = fn()
+        timings.append(time.perf_counter() - start_time)
+    return timings, result
+
 
-def benchmark_full():
-    print("Benchmarking get_index_stocks_with_data('nifty50')...")
+def _report(label, timings, items, budget):
+    median = statistics.median(timings)
+    print(f"{label}: median {median:.4f}s, min {min(timings):.4f}s, max {max(timings):.4f}s "
+          f"(budget {budget:.2f}s), items: {items}")
+    return median
 
-    start_time = time.time()
-    data = get_index_stocks_with_data("nifty50")
-    end_time = time.time()
 
-    print(f"Total time: {end_time - start_time:.4f} seconds")
-    print(f"Items returned: {len(data)}")
+def benchmark_full(index_key="nifty50", runs=5, budget=DEFAULT_BUDGET, stocks_budget=DEFAULT_STOCKS_BUDGET):
+    print(f"Benchmarking get_index_stocks_with_data('{index_key}') x {runs}...")
+
+    # Price / previous-close lookup on its own (one windowed query)
+    tickers = fetch_index_constituents(index_key)
+    timings, df = _time_runs(lambda: get_stocks_data_from_db(tickers), runs)
+    stocks_median = _report("get_stocks_data_from_db", timings, len(df), stocks_budget)
+
+    timings, data = _time_runs(lambda: get_index_stocks_with_data(index_key), runs)
+    full_median = _report("get_index_stocks_with_data", timings, len(data), budget)
+
+    assert len(data) > 0, f"No data returned for {index_key}"
+    assert stocks_median <= stocks_budget, (
+        f"get_stocks_data_from_db median {stocks_median:.4f}s exceeds budget {stocks_budget:.2f}s"
+    )
+    assert full_median <= budget, (
+        f"get_index_stocks_with_data median {full_median:.4f}s exceeds budget {budget:.2f}s"
+    )
+    print("Latency budget OK")
+
 
 if __name__ == "__main__":
-    benchmark_full()
+    parser = argparse.ArgumentParser(description="Index screener latency benchmark")
+    parser.add_argument("--index", default="nifty50")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--budget", type=float, default=DEFAULT_BUDGET)
+    parser.add_argument("--stocks-budget", type=float, default=DEFAULT_STOCKS_BUDGET)
+    args = parser.parse_args()
+
+    benchmark_full(args.index, args.runs, args.budget, args.stocks_budget)
@@ -0,0 +1,6 @@
+"""
+BENCHMARKS
+==========
+Reproducible end-to-end timings of the EOD pipeline and the web APIs on
+synthetic NSE data (see benchmarks/run_benchmarks.py).
+"""
@@ -0,0 +1,169 @@
+"""
+JSON PAYLOAD BENCHMARK
+======================
+Serialization time and wire size of the large tabular API payloads,
+without a database: synthetic rows shaped like
+
+    signal_scanner   /scanner/signal-scanner/api/scan      10,000 x 35 keys
+    technical        /scanner/technical-indicators/api/data 2,000 x 30 keys
+    heatmap          /neev/api/heatmap                      2,500 x 12 keys
+    dashboard        /dashboard/api/dashboard_data            220 x 25 keys
+
+are encoded through
+
+    flask      Flask's default provider (stdlib json, the old jsonify)
+    rows       utils/json_provider.FastJSONProvider (orjson when installed)
+    columns    the same with ?shape=columns
+
+and each body is then gzip / brotli compressed with the settings in
+utils/compression.py. Median of --runs encodes per case.
+
+Usage:
+    python -m benchmarks.json_payloads
+    python -m benchmarks.json_payloads --runs 20 --out json_payloads.json
+"""
+
+import argparse
+import importlib.util
+import json
+import os
+import random
+import statistics
+import sys
+import time
+from datetime import date, timedelta
+
+from flask import Flask
+from flask.json.provider import DefaultJSONProvider
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+UTILS_DIR = os.path.join(PROJECT_ROOT, "Analysis_Tools", "app", "utils")
+
+
+def load_util(name):
+    """Import an app utility by path (importing the package would open DB connections)."""
+    spec = importlib.util.spec_from_file_location(f"bench_{name}", os.path.join(UTILS_DIR, f"{name}.py"))
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[spec.name] = module
+    spec.loader.exec_module(module)
+    return module
+
+
+# ===========================================
+# 🧪 Synthetic payloads
+# ===========================================
+def _rows(rng, n, n_keys, symbols):
+    day = date(2025, 1, 1)
+    rows = []
+    for i in range(n):
+        row = {
+            "symbol": rng.choice(symbols),
+            "signal_date": (day + timedelta(days=i % 250)).isoformat(),
+            "option_type": rng.choice(("CE", "PE")),
+            "signal_type": rng.choice(("BULLISH", "BEARISH", "NEUTRAL")),
+            "strike": float(rng.randrange(100, 5000, 5)),
+        }
+        for k in range(n_keys - len(row)):
+            row[f"metric_{k:02d}"] = round(rng.uniform(-500, 5000), 2) if k % 4 else rng.randrange(0, 10**7)
+        rows.append(row)
+    return rows
+
+
+def build_payloads(seed=42):
+    rng = random.Random(seed)
+    symbols = [f"SYM{i:03d}" for i in range(220)]
+    return {
+        "signal_scanner": {"success": True, "start_date": "2025-01-01",
+                           "signals": _rows(rng, 10_000, 35, symbols), "total_count": 10_000},
+        "technical": {"success": True, "date": "2025-06-30", "data": _rows(rng, 2_000, 30, symbols)},
+        "heatmap": {"success": True, "date": "2025-06-30", "stocks": _rows(rng, 2_500, 12, symbols)},
+        "dashboard": {"data": _rows(rng, 220, 25, symbols), "recordsTotal": 220, "recordsFiltered": 220},
+    }
+
+
+# ===========================================
+# ⏱ Measure
+# ===========================================
+def _median_ms(fn, runs):
+    timings = []
+    result = None
+    for _ in range(runs):
+        start = time.perf_counter()
+        result = fn()
+        timings.append((time.perf_counter() - start) * 1000)
+    return round(statistics.median(timings), 2), result
+
+
+def measure(runs=10, seed=42):
+    json_provider = load_util("json_provider")
+    compression = load_util("compression")
+
+    flask_app = Flask("bench_flask")
+    flask_app.json = DefaultJSONProvider(flask_app)
+    fast_app = Flask("bench_fast")
+    fast_app.json = json_provider.FastJSONProvider(fast_app)
+
+    encoders = [
+        ("flask", flask_app, "/"),
+        ("rows", fast_app, "/"),
+        ("columns", fast_app, "/?shape=columns"),
+    ]
+    encodings = ["gzip"] + (["br"] if compression.BROTLI_AVAILABLE else [])
+
+    results = []
+    for name, payload in build_payloads(seed).items():
+        for label, app, url in encoders:
+            with app.test_request_context(url):
+                ms, response = _median_ms(lambda: app.json.response(payload), runs)
+            body = response.get_data()
+            entry = {"payload": name, "encoder": label, "bytes": len(body), "encode_ms": ms}
+            for enc in encodings:
+                enc_ms, packed = _median_ms(lambda: compression.compress_body(body, enc), max(1, runs // 2))
+                entry[f"{enc}_bytes"] = len(packed)
+                entry[f"{enc}_ms"] = enc_ms
+            results.append(entry)
+    return {"orjson": json_provider.ORJSON_AVAILABLE, "brotli": compression.BROTLI_AVAILABLE, "results": results}
+
+
+def print_report(report):
+    encodings = ["gzip"] + (["br"] if report["brotli"] else [])
+    print(f"\norjson: {'yes' if report['orjson'] else 'no (stdlib fallback)'}, "
+          f"brotli: {'yes' if report['brotli'] else 'no'}\n")
+    header = f"{'payload':<16}{'encoder':<9}{'bytes':>12}{'encode ms':>11}"
+    for enc in encodings:
+        header += f"{enc + ' bytes':>13}{enc + ' ms':>9}"
+    print(header)
+    print("-" * len(header))
+
+    baseline = {}
+    for r in report["results"]:
+        if r["encoder"] == "flask":
+            baseline[r["payload"]] = r
+        line = f"{r['payload']:<16}{r['encoder']:<9}{r['bytes']:>12,}{r['encode_ms']:>11.2f}"
+        for enc in encodings:
+            line += f"{r[enc + '_bytes']:>13,}{r[enc + '_ms']:>9.2f}"
+        base = baseline[r["payload"]]
+        if r is not base:
+            wire = r[encodings[-1] + "_bytes"]
+            line += (f"   ({base['encode_ms'] / max(r['encode_ms'], 0.01):.1f}x faster, "
+                     f"{wire / base['bytes'] * 100:.1f}% of the old wire size)")
+        print(line)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="JSON serialization / compression benchmark for the tabular APIs")
+    parser.add_argument("--runs", type=int, default=10, help="Encodes per case (median reported)")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--out", default=None, help="Write results JSON here")
+    args = parser.parse_args()
+
+    report = measure(args.runs, args.seed)
+    print_report(report)
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"\n📝 Results written to {args.out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,179 @@
+"""
+THROWAWAY POSTGRES
+==================
+Two ways to get empty F&O / cash databases for a benchmark run:
+
+    EphemeralCluster   initdb + pg_ctl in a temp dir on a free port, removed
+                       on stop. Needs the PostgreSQL server binaries (PATH,
+                       PG_BIN, or `pg_config --bindir`).
+    ExistingServer     CREATE DATABASE bench_fo_<pid> / bench_cash_<pid> on a
+                       server you point at (--pg-url / BENCH_PG_URL), dropped
+                       on stop.
+
+Either way, apply_env() exports DB_HOST / DB_PORT / DB_USER / DB_PASSWORD /
+DB_NAME / DB_NAME_CASH so db_config builds its engines against the
+throwaway databases - call it before importing any app or Database module.
+"""
+
+import os
+import shutil
+import socket
+import subprocess
+import tempfile
+from urllib.parse import quote_plus, unquote, urlparse
+
+from sqlalchemy import create_engine, text
+
+# Durability off: the cluster is disposable and fsync noise swamps the timings
+EPHEMERAL_SETTINGS = {
+    "fsync": "off",
+    "synchronous_commit": "off",
+    "full_page_writes": "off",
+    "shared_buffers": "256MB",
+    "max_connections": "50",
+}
+
+
+def find_pg_bin():
+    """Directory with initdb / pg_ctl, or None."""
+    candidates = [os.getenv("PG_BIN")]
+    initdb = shutil.which("initdb")
+    if initdb:
+        candidates.append(os.path.dirname(initdb))
+    try:
+        candidates.append(subprocess.check_output(["pg_config", "--bindir"], text=True).strip())
+    except (OSError, subprocess.CalledProcessError):
+        pass
+    for c in candidates:
+        if c and os.path.exists(os.path.join(c, "initdb")) and os.path.exists(os.path.join(c, "pg_ctl")):
+            return c
+    return None
+
+
+def _free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+class _Databases:
+    """Shared CREATE / DROP of the two benchmark databases."""
+
+    host = "127.0.0.1"
+    port = 5432
+    user = "postgres"
+    password = ""
+
+    def __init__(self):
+        suffix = os.getpid()
+        self.db_fo = f"bench_fo_{suffix}"
+        self.db_cash = f"bench_cash_{suffix}"
+
+    def _admin_engine(self):
+        return create_engine(
+            f"postgresql+psycopg2://{self.user}:{quote_plus(self.password)}@{self.host}:{self.port}/postgres",
+            isolation_level="AUTOCOMMIT",
+        )
+
+    def create_databases(self):
+        eng = self._admin_engine()
+        with eng.connect() as conn:
+            for name in (self.db_fo, self.db_cash):
+                conn.execute(text(f'DROP DATABASE IF EXISTS "{name}"'))
+                conn.execute(text(f'CREATE DATABASE "{name}"'))
+        eng.dispose()
+
+    def drop_databases(self):
+        eng = self._admin_engine()
+        with eng.connect() as conn:
+            for name in (self.db_fo, self.db_cash):
+                conn.execute(text(
+                    "SELECT pg_terminate_backend(pid) FROM pg_stat_activity "
+                    "WHERE datname = :db AND pid <> pg_backend_pid()"
+                ), {"db": name})
+                conn.execute(text(f'DROP DATABASE IF EXISTS "{name}"'))
+        eng.dispose()
+
+    def apply_env(self):
+        os.environ.update({
+            "DB_HOST": self.host,
+            "DB_PORT": str(self.port),
+            "DB_USER": self.user,
+            "DB_PASSWORD": self.password,
+            "DB_NAME": self.db_fo,
+            "DB_NAME_CASH": self.db_cash,
+        })
+
+    def describe(self):
+        return {"host": self.host, "port": self.port, "db_fo": self.db_fo, "db_cash": self.db_cash}
+
+    def server_version(self):
+        eng = self._admin_engine()
+        with eng.connect() as conn:
+            version = conn.execute(text("SHOW server_version")).scalar()
+        eng.dispose()
+        return version
+
+
+class EphemeralCluster(_Databases):
+    def __init__(self, pg_bin=None, keep=False):
+        super().__init__()
+        self.pg_bin = pg_bin or find_pg_bin()
+        if not self.pg_bin:
+            raise RuntimeError("PostgreSQL server binaries not found (set PG_BIN or use --pg-url)")
+        self.keep = keep
+        self.root = tempfile.mkdtemp(prefix="bench_pg_")
+        self.data_dir = os.path.join(self.root, "data")
+        self.port = _free_port()
+
+    def _run(self, *args):
+        subprocess.run([os.path.join(self.pg_bin, args[0]), *args[1:]], check=True,
+                       stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+
+    def start(self):
+        self._run("initdb", "-D", self.data_dir, "-U", self.user, "-A", "trust", "-E", "UTF8", "--no-locale")
+        options = " ".join(f"-c {k}={v}" for k, v in EPHEMERAL_SETTINGS.items())
+        self._run(
+            "pg_ctl", "-D", self.data_dir, "-l", os.path.join(self.root, "postgres.log"), "-w",
+            "-o", f"-p {self.port} -k {self.root} -c listen_addresses={self.host} {options}", "start",
+        )
+        self.create_databases()
+        return self
+
+    def stop(self):
+        try:
+            self._run("pg_ctl", "-D", self.data_dir, "-m", "fast", "-w", "stop")
+        except subprocess.CalledProcessError as e:
+            print(f"[WARN] pg_ctl stop failed: {e.stderr.decode(errors='replace').strip()}")
+        if self.keep:
+            print(f"[INFO] Cluster kept at {self.data_dir}")
+        else:
+            shutil.rmtree(self.root, ignore_errors=True)
+
+
+class ExistingServer(_Databases):
+    def __init__(self, url, keep=False):
+        super().__init__()
+        parsed = urlparse(url)
+        self.host = parsed.hostname or "127.0.0.1"
+        self.port = parsed.port or 5432
+        self.user = unquote(parsed.username or "postgres")
+        self.password = unquote(parsed.password or "")
+        self.keep = keep
+
+    def start(self):
+        self.create_databases()
+        return self
+
+    def stop(self):
+        if self.keep:
+            print(f"[INFO] Databases kept: {self.db_fo}, {self.db_cash}")
+        else:
+            self.drop_databases()
+
+
+def open_fixture(pg_url=None, keep=False):
+    """Started fixture: existing server if a URL is given (or BENCH_PG_URL), else an ephemeral cluster."""
+    url = pg_url or os.getenv("BENCH_PG_URL")
+    fixture = ExistingServer(url, keep) if url else EphemeralCluster(keep=keep)
+    return fixture.start()
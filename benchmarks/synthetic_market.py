@@ -0,0 +1,401 @@
+"""
+SYNTHETIC MARKET DATA
+=====================
+Deterministic NSE-format bhavcopies for benchmarks: the same seed and
+scale always produce byte-identical files.
+
+Writes, for the last N weekdays up to --end-date:
+    fo/YYYY-MM-DD-NSE-FO.csv              F&O UDiFF bhavcopy (as downloaded by fo_update_database.py)
+    cash/sec_bhavdata_full_DDMMYYYY.csv   Cash bhavcopy (as downloaded by cash_update_database.py)
+    index_history.csv                     index_historical_data rows (RS matrix)
+    index_constituents.csv                index_constituents rows (RS matrix / index screener)
+    manifest.json                         scale, seed, dates, row counts
+
+Prices follow a market + sector + stock factor random walk, so sector
+indices and stocks are correlated like the real thing. Option premiums
+are Black-Scholes prices (6% rate, calendar-day time, same as
+calculate_greeks) on a smile, so implied volatility solves for every
+strike that is not at the 0.05 tick floor. Open interest carries over
+day to day per contract.
+
+Usage:
+    python -m benchmarks.synthetic_market --out /tmp/bench_data --scale small
+    python -m benchmarks.synthetic_market --out /tmp/bench_data --tickers 80 --strikes 20 --days 120
+"""
+
+import argparse
+import json
+import math
+import os
+import sys
+from datetime import date, timedelta
+
+import numpy as np
+import pandas as pd
+from scipy.special import ndtr
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from Database.bhavcopy_stub_server import CASH_HEADER, FO_HEADER
+
+RISK_FREE_RATE = 0.06  # Must match calculate_greeks
+
+# tickers: F&O stocks | strikes: per side of ATM, per expiry | expiries: stock monthlies
+# cash_only: extra cash-market symbols without derivatives
+SCALES = {
+    "small": {"tickers": 20, "strikes": 8, "expiries": 2, "days": 60, "cash_only": 30},  # technical caches need 50 days
+    "medium": {"tickers": 50, "strikes": 15, "expiries": 3, "days": 90, "cash_only": 150},
+    "large": {"tickers": 180, "strikes": 25, "expiries": 3, "days": 260, "cash_only": 1800},
+}
+
+# (symbol, sector, price, lot) - real names so sector / index lookups behave
+STOCK_UNIVERSE = [
+    ("RELIANCE", "ENERGY", 1400, 500), ("HDFCBANK", "BANK", 1000, 550), ("ICICIBANK", "BANK", 1400, 700),
+    ("INFY", "IT", 1500, 400), ("TCS", "IT", 3100, 175), ("SBIN", "PSUBANK", 820, 750),
+    ("BHARTIARTL", "TELECOM", 1900, 475), ("ITC", "FMCG", 410, 1600), ("LT", "INFRA", 3600, 175),
+    ("KOTAKBANK", "BANK", 2100, 400), ("AXISBANK", "BANK", 1150, 625), ("HINDUNILVR", "FMCG", 2500, 300),
+    ("BAJFINANCE", "FINANCIAL", 980, 750), ("MARUTI", "AUTO", 15000, 50), ("SUNPHARMA", "PHARMA", 1650, 350),
+    ("M&M", "AUTO", 3300, 200), ("HCLTECH", "IT", 1500, 350), ("TATASTEEL", "METAL", 165, 5500),
+    ("NTPC", "ENERGY", 340, 1500), ("POWERGRID", "ENERGY", 290, 1900), ("TITAN", "CONSUMER", 3500, 175),
+    ("ULTRACEMCO", "CEMENT", 12000, 50), ("ONGC", "ENERGY", 240, 2250), ("ASIANPAINT", "CONSUMER", 2400, 250),
+    ("WIPRO", "IT", 250, 3000), ("TECHM", "IT", 1500, 600), ("HINDALCO", "METAL", 750, 1400),
+    ("JSWSTEEL", "METAL", 1100, 675), ("COALINDIA", "ENERGY", 390, 1350), ("NESTLEIND", "FMCG", 1200, 500),
+    ("BAJAJ-AUTO", "AUTO", 8500, 75), ("EICHERMOT", "AUTO", 6500, 175), ("DRREDDY", "PHARMA", 1250, 625),
+    ("CIPLA", "PHARMA", 1500, 375), ("DIVISLAB", "PHARMA", 6000, 100), ("BRITANNIA", "FMCG", 5800, 125),
+    ("HDFCLIFE", "FINANCIAL", 750, 1100), ("SBILIFE", "FINANCIAL", 1800, 375), ("VEDL", "METAL", 450, 1150),
+    ("TATAMOTORS", "AUTO", 700, 800), ("BANKBARODA", "PSUBANK", 240, 2925), ("PNB", "PSUBANK", 105, 8000),
+    ("CANBK", "PSUBANK", 110, 6750), ("INDUSINDBK", "BANK", 780, 700), ("GRASIM", "CEMENT", 2800, 250),
+    ("ADANIPORTS", "INFRA", 1400, 475), ("TATAPOWER", "ENERGY", 390, 1450), ("DLF", "REALTY", 780, 825),
+    ("GODREJPROP", "REALTY", 2200, 275), ("LUPIN", "PHARMA", 1950, 425),
+]
+SYNTHETIC_SECTORS = ["IT", "BANK", "AUTO", "PHARMA", "METAL", "FMCG", "ENERGY", "FINANCIAL", "INFRA", "CONSUMER"]
+
+# Sector index name (index_historical_data / index_constituents) -> (key, base level, sectors)
+SECTOR_INDICES = {
+    "NIFTY BANK": ("niftybank", 56000, {"BANK", "PSUBANK"}),
+    "NIFTY IT": ("niftyit", 36000, {"IT"}),
+    "NIFTY PHARMA": ("niftypharma", 22000, {"PHARMA"}),
+    "NIFTY AUTO": ("niftyauto", 25000, {"AUTO"}),
+    "NIFTY METAL": ("niftymetal", 9500, {"METAL"}),
+    "NIFTY FMCG": ("niftyfmcg", 56000, {"FMCG"}),
+    "NIFTY ENERGY": ("niftyenergy", 35000, {"ENERGY"}),
+    "NIFTY PSU BANK": ("niftypsubank", 7000, {"PSUBANK"}),
+    "NIFTY FINANCIAL SERVICES": ("niftyfinancial", 26000, {"BANK", "FINANCIAL"}),
+    "NIFTY REALTY": ("niftyrealty", 900, {"REALTY"}),
+}
+BROAD_INDICES = {"NIFTY 50": ("nifty50", 25000, 50), "NIFTY NEXT 50": ("niftynext50", 68000, 100)}
+
+# F&O index underlyings: (symbol, index name, lot, strike step, weekly expiries)
+INDEX_UNDERLYINGS = [("NIFTY", "NIFTY 50", 75, 50, True), ("BANKNIFTY", "NIFTY BANK", 35, 100, False)]
+
+
+# ===========================================
+# 📅 Calendar
+# ===========================================
+def trading_days(end: date, n: int):
+    """Last n weekdays up to and including `end` (no holiday calendar)."""
+    days, d = [], end
+    while len(days) < n:
+        if d.weekday() < 5:
+            days.append(d)
+        d -= timedelta(days=1)
+    return days[::-1]
+
+
+def last_weekday_of_month(year, month, weekday=1):
+    """Last <weekday> (0=Mon, 1=Tue) of the month - NSE monthly expiry day."""
+    nxt = date(year + (month == 12), month % 12 + 1, 1)
+    d = nxt - timedelta(days=1)
+    return d - timedelta(days=(d.weekday() - weekday) % 7)
+
+
+def monthly_expiries(day: date, n: int):
+    out, y, m = [], day.year, day.month
+    while len(out) < n:
+        e = last_weekday_of_month(y, m)
+        if e >= day:
+            out.append(e)
+        y, m = (y + 1, 1) if m == 12 else (y, m + 1)
+    return out
+
+
+def weekly_expiries(day: date, n: int):
+    first = day + timedelta(days=(1 - day.weekday()) % 7)  # Next Tuesday (or today)
+    return [first + timedelta(weeks=i) for i in range(n)]
+
+
+# ===========================================
+# 📈 Price paths
+# ===========================================
+def strike_step(price):
+    for limit, step in ((100, 1), (250, 2.5), (500, 5), (1000, 10), (2500, 20), (5000, 50)):
+        if price < limit:
+            return step
+    return 100
+
+
+def build_universe(n_tickers, n_cash_only, rng):
+    """[(symbol, sector, price, lot, is_fo)] - real names first, then SYNxxxx fillers."""
+    universe = [(s, sec, p, lot, True) for s, sec, p, lot in STOCK_UNIVERSE[:n_tickers]]
+    for i in range(len(universe), n_tickers):
+        price = float(np.round(np.exp(rng.uniform(np.log(80), np.log(6000))), 0))
+        lot = int(max(25, round(600000 / price / 25) * 25))
+        universe.append((f"SYNFO{i:04d}", SYNTHETIC_SECTORS[i % len(SYNTHETIC_SECTORS)], price, lot, True))
+    for i in range(n_cash_only):
+        price = float(np.round(np.exp(rng.uniform(np.log(15), np.log(4000))), 1))
+        universe.append((f"SYNEQ{i:04d}", SYNTHETIC_SECTORS[i % len(SYNTHETIC_SECTORS)], price, 0, False))
+    return universe
+
+
+def simulate_paths(universe, n_days, rng):
+    """Daily OHLC per symbol from market + sector + idiosyncratic returns. Returns ({sym: DataFrame}, returns)."""
+    sectors = sorted({u[1] for u in universe})
+    market = rng.normal(0.0003, 0.009, n_days)
+    sector_ret = {s: rng.normal(0.0, 0.007, n_days) for s in sectors}
+
+    paths, returns = {}, {}
+    for sym, sector, price, _, _ in universe:
+        beta = rng.uniform(0.7, 1.3)
+        ret = beta * market + sector_ret[sector] + rng.normal(0.0, 0.013, n_days)
+        ret[0] = 0.0
+        close = price * np.cumprod(1 + ret)
+        prev = np.concatenate([[price], close[:-1]])
+        opn = prev * (1 + rng.normal(0, 0.004, n_days))
+        high = np.maximum(opn, close) * (1 + np.abs(rng.normal(0, 0.006, n_days)))
+        low = np.minimum(opn, close) * (1 - np.abs(rng.normal(0, 0.006, n_days)))
+        paths[sym] = pd.DataFrame({"prev": prev, "open": opn, "high": high, "low": low, "close": close})
+        returns[sym] = ret
+    return paths, returns
+
+
+def index_levels(members, returns, base, n_days):
+    """Equal-weight index level from member returns."""
+    if not members:
+        return np.full(n_days, float(base))
+    mean_ret = np.mean([returns[m] for m in members], axis=0)
+    return base * np.cumprod(1 + mean_ret)
+
+
+# ===========================================
+# 💹 Options
+# ===========================================
+def bs_price(spot, strikes, t, iv, is_call, rate=RISK_FREE_RATE):
+    """Vectorized Black-Scholes premium."""
+    sqrt_t = np.sqrt(t)
+    d1 = (np.log(spot / strikes) + (rate + 0.5 * iv**2) * t) / (iv * sqrt_t)
+    d2 = d1 - iv * sqrt_t
+    disc = np.exp(-rate * t)
+    if is_call:
+        return spot * ndtr(d1) - strikes * disc * ndtr(d2)
+    return strikes * disc * ndtr(-d2) - spot * ndtr(-d1)
+
+
+def to_tick(values, tick=0.05):
+    return np.maximum(np.round(np.asarray(values) / tick) * tick, tick).round(2)
+
+
+def contract_name(symbol, expiry, strike=None, opt=None):
+    stem = f"{symbol}{expiry:%y}{expiry:%b}".upper()
+    return f"{stem}FUT" if opt is None else f"{stem}{strike:g}{opt}"
+
+
+class FoDayWriter:
+    """Builds one F&O bhavcopy per day, carrying open interest / previous close per contract."""
+
+    def __init__(self, rng, n_strikes):
+        self.rng = rng
+        self.n_strikes = n_strikes
+        self.state = {}  # (symbol, expiry, strike, opt) -> (oi, close)
+        self.next_id = 100000
+
+    def _carry(self, key, base_oi, close):
+        prev = self.state.get(key)
+        if prev is None:
+            oi, prev_close = base_oi, close
+        else:
+            oi = max(0, int(prev[0] * (1 + self.rng.normal(0.02, 0.08))))
+            prev_close = prev[1]
+        self.state[key] = (oi, close)
+        return oi, (oi - prev[0]) if prev else oi, prev_close
+
+    def rows(self, day, symbol, spot, lot, step, expiries, instr, base_iv, fut_expiries=None):
+        rng = self.rng
+        out = []
+        iso = day.isoformat()
+        atm = round(spot / step) * step
+        strikes = atm + step * np.arange(-self.n_strikes, self.n_strikes + 1)
+        strikes = strikes[strikes > 0]
+
+        for n, expiry in enumerate(expiries):
+            t = max((expiry - day).days, 0) / 365.0
+            e_iso = expiry.isoformat()
+
+            # Future (weekly index expiries are options-only)
+            if fut_expiries is None or expiry in fut_expiries:
+                fut = float(round(spot * math.exp(RISK_FREE_RATE * t) * (1 + rng.normal(0, 0.0005)), 2))
+                base_oi = int(lot * rng.uniform(3000, 9000) / (n + 1))
+                oi, chg, prev_close = self._carry((symbol, expiry, None, None), base_oi, fut)
+                contracts = max(1, int(oi / lot * rng.uniform(0.1, 0.6)))
+                out.append(self._row(iso, e_iso, f"{instr}F", symbol, None, None, contract_name(symbol, expiry),
+                                     fut, prev_close, spot, oi, chg, contracts, lot, noise=0.004))
+
+            if t <= 0:
+                continue
+            # Options on a smile: higher IV away from the money, puts skewed up
+            m = np.log(strikes / spot)
+            for opt, is_call in (("CE", True), ("PE", False)):
+                iv = base_iv * (1 + 2.5 * m**2 + (0.0 if is_call else -0.6 * m)) * (1 + rng.normal(0, 0.03, len(m)))
+                premium = to_tick(bs_price(spot, strikes, t, np.clip(iv, 0.05, 2.0), is_call))
+                weight = np.exp(-np.abs(m) * 12) / (n + 1)
+                for k, px, w in zip(strikes, premium, weight):
+                    base_oi = int(lot * max(1, rng.uniform(200, 1500) * w))
+                    oi, chg, prev_close = self._carry((symbol, expiry, float(k), opt), base_oi, float(px))
+                    contracts = int(oi / lot * rng.uniform(0.2, 2.0))
+                    out.append(self._row(iso, e_iso, f"{instr}O", symbol, float(k), opt,
+                                         contract_name(symbol, expiry, float(k), opt),
+                                         float(px), prev_close, spot, oi, chg, contracts, lot))
+        return out
+
+    def _row(self, iso, e_iso, tp, symbol, strike, opt, name, close, prev_close, spot, oi, chg, contracts, lot,
+             noise=0.02):
+        rng = self.rng
+        self.next_id += 1
+        opn = close * (1 + rng.normal(0, noise))
+        high = max(opn, close) * (1 + abs(rng.normal(0, noise * 0.75)))
+        low = min(opn, close) * (1 - abs(rng.normal(0, noise * 0.75)))
+        qty = contracts * lot
+        return [
+            iso, iso, "FO", "NSE", tp, self.next_id, "", symbol, "", e_iso, e_iso,
+            "" if strike is None else f"{strike:g}", opt or "", name,
+            f"{max(opn, 0.05):.2f}", f"{max(high, 0.05):.2f}", f"{max(low, 0.05):.2f}", f"{close:.2f}", f"{close:.2f}",
+            f"{prev_close:.2f}", f"{spot:.2f}", f"{close:.2f}", oi, chg, qty, f"{qty * close:.2f}",
+            max(1, contracts // 3), "F1", lot,
+        ]
+
+
+# ===========================================
+# 📝 Writer
+# ===========================================
+def generate(out_dir, tickers, strikes, expiries, days, cash_only=0, seed=42, end_date=None):
+    """Write the full fixture set to out_dir. Returns the manifest dict."""
+    rng = np.random.default_rng(seed)
+    end = end_date or (date.today() - timedelta(days=1))
+    dates = trading_days(end, days)
+
+    fo_dir, cash_dir = os.path.join(out_dir, "fo"), os.path.join(out_dir, "cash")
+    os.makedirs(fo_dir, exist_ok=True)
+    os.makedirs(cash_dir, exist_ok=True)
+
+    universe = build_universe(tickers, cash_only, rng)
+    paths, returns = simulate_paths(universe, len(dates), rng)
+    by_sector = {}
+    for sym, sector, *_ in universe:
+        by_sector.setdefault(sector, []).append(sym)
+
+    # Indices: levels + constituents
+    index_members = {}
+    real_fo = [u[0] for u in universe if u[4]]
+    for name, (key, base, size) in BROAD_INDICES.items():
+        lo = 0 if key == "nifty50" else 50
+        index_members[name] = (key, base, "Broad Market Indices", real_fo[lo:size])
+    for name, (key, base, sectors) in SECTOR_INDICES.items():
+        members = [s for sec in sorted(sectors) for s in by_sector.get(sec, [])]
+        index_members[name] = (key, base, "Sectoral Indices", members)
+
+    levels, history, constituents = {}, [], []
+    for name, (key, base, category, members) in index_members.items():
+        lv = index_levels(members, returns, base, len(dates))
+        levels[name] = lv
+        for i, d in enumerate(dates):
+            o = lv[i - 1] if i else lv[i]
+            history.append([d.isoformat(), name, round(o, 2), round(max(o, lv[i]) * 1.003, 2),
+                            round(min(o, lv[i]) * 0.997, 2), round(lv[i], 2)])
+        constituents += [[key, name, sym, category] for sym in members]
+
+    pd.DataFrame(history, columns=["date", "index_name", "open", "high", "low", "close"]).to_csv(
+        os.path.join(out_dir, "index_history.csv"), index=False)
+    pd.DataFrame(constituents, columns=["index_key", "index_name", "symbol", "index_category"]).to_csv(
+        os.path.join(out_dir, "index_constituents.csv"), index=False)
+
+    fo = FoDayWriter(rng, strikes)
+    fo_rows = cash_rows = 0
+    stock_iv = {u[0]: rng.uniform(0.2, 0.45) for u in universe if u[4]}
+    for i, d in enumerate(dates):
+        rows = []
+        for sym, index_name, lot, step, weekly in INDEX_UNDERLYINGS:
+            monthly = monthly_expiries(d, expiries)
+            exps = sorted(set(weekly_expiries(d, expiries) if weekly else []) | set(monthly))
+            rows += fo.rows(d, sym, float(round(levels[index_name][i], 2)), lot, step, exps, "ID", 0.13, set(monthly))
+        stock_exps = monthly_expiries(d, expiries)
+        for sym, _, _, lot, is_fo in universe:
+            if is_fo:
+                spot = float(round(paths[sym]["close"].iat[i], 2))
+                rows += fo.rows(d, sym, spot, lot, strike_step(spot), stock_exps, "ST", stock_iv[sym])
+        with open(os.path.join(fo_dir, f"{d.isoformat()}-NSE-FO.csv"), "w", encoding="utf-8") as f:
+            f.write(FO_HEADER + "\n")
+            f.writelines(",".join(map(str, r)) + "\n" for r in rows)
+        fo_rows += len(rows)
+
+        stamp = d.strftime("%d-%b-%Y")
+        lines = [CASH_HEADER]
+        for sym, *_ in universe:
+            p = paths[sym].iloc[i]
+            qty = int(rng.lognormal(13, 1))
+            deliv = int(qty * rng.uniform(0.2, 0.8))
+            avg = (p["high"] + p["low"] + p["close"]) / 3
+            lines.append(
+                f"{sym}, EQ, {stamp}, {p['prev']:.2f}, {p['open']:.2f}, {p['high']:.2f}, {p['low']:.2f}, "
+                f"{p['close']:.2f}, {p['close']:.2f}, {avg:.2f}, {qty}, {qty * avg / 1e5:.2f}, "
+                f"{max(1, qty // 150)}, {deliv}, {100 * deliv / qty:.2f}"
+            )
+        with open(os.path.join(cash_dir, f"sec_bhavdata_full_{d:%d%m%Y}.csv"), "w", encoding="utf-8") as f:
+            f.write("\n".join(lines) + "\n")
+        cash_rows += len(lines) - 1
+
+    manifest = {
+        "seed": seed,
+        "tickers": tickers,
+        "strikes": strikes,
+        "expiries": expiries,
+        "days": days,
+        "cash_only": cash_only,
+        "first_date": dates[0].isoformat(),
+        "last_date": dates[-1].isoformat(),
+        "fo_symbols": [u[0] for u in INDEX_UNDERLYINGS] + real_fo,
+        "fo_rows": fo_rows,
+        "cash_symbols": len(universe),
+        "cash_rows": cash_rows,
+        "index_rows": len(history),
+    }
+    with open(os.path.join(out_dir, "manifest.json"), "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2)
+    return manifest
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate synthetic NSE F&O / cash bhavcopies")
+    parser.add_argument("--out", required=True, help="Output directory")
+    parser.add_argument("--scale", choices=sorted(SCALES), default="small")
+    parser.add_argument("--tickers", type=int, help="F&O stocks (overrides --scale)")
+    parser.add_argument("--strikes", type=int, help="Strikes per side of ATM, per expiry")
+    parser.add_argument("--expiries", type=int, help="Monthly expiries per stock")
+    parser.add_argument("--days", type=int, help="Trading days")
+    parser.add_argument("--cash-only", type=int, help="Extra cash-only symbols")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--end-date", default=None, help="Last trading day (YYYY-MM-DD, default yesterday)")
+    args = parser.parse_args()
+
+    params = dict(SCALES[args.scale])
+    for key in params:
+        value = getattr(args, key)
+        if value is not None:
+            params[key] = value
+    end = date.fromisoformat(args.end_date) if args.end_date else None
+
+    print(f"⚙  Generating {params} (seed {args.seed}) → {args.out}")
+    manifest = generate(args.out, seed=args.seed, end_date=end, **params)
+    print(f"✓ {manifest['first_date']} → {manifest['last_date']}: {manifest['fo_rows']:,} F&O rows, "
+          f"{manifest['cash_rows']:,} cash rows, {manifest['index_rows']:,} index rows")
+
+
+if __name__ == "__main__":
+    main()
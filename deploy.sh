@@ -134,6 +134,10 @@ pip install -r requirements.txt || {
     fi
     exit 1
 }
+
+# Minify, fingerprint and precompress static assets
+log "Building static assets..."
+python "${DEPLOY_DIR}/current/Analysis_Tools/build_static.py" || warn "Static build failed - serving unhashed assets"
 deactivate
 
 # Run database migrations (if any)
@@ -0,0 +1,203 @@
+"""
+FEED REPLAY BENCHMARK
+=====================
+Drives live_indices_streamer.process_message offline from a recording
+of raw websocket frames, at N x real time, and reports throughput and
+per-tick latency.
+
+Recordings come from the streamer itself:
+    python spot_data/live_indices_streamer.py --quiet --record feed.bin
+or are synthesized from the History files (one FeedResponse per second):
+    python spot_data/feed_replay.py --synthesize feed.bin [--date 2026-10-16]
+
+Replay (history / tick bus go to scratch paths unless --live):
+    python spot_data/feed_replay.py feed.bin --speed 50
+    python spot_data/feed_replay.py feed.bin --speed 0 --decoder dict   # old MessageToDict path
+    python spot_data/feed_replay.py feed.bin --speed 100 --console
+
+--speed 0 replays as fast as possible (pure decode + write cost).
+"""
+
+import argparse
+import os
+import statistics
+import struct
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+SPOT_DATA_PATH = os.path.dirname(os.path.abspath(__file__))
+RECORD_HEADER = struct.Struct("<QI")  # Must match live_indices_streamer.RECORD_HEADER
+
+
+# =============================================================
+# RECORDINGS
+# =============================================================
+
+
+def read_recording(path):
+    """[(receive_ns, frame_bytes)] from a --record file (a truncated last frame is dropped)."""
+    frames = []
+    with open(path, "rb") as f:
+        data = f.read()
+    pos = 0
+    while pos + RECORD_HEADER.size <= len(data):
+        recv_ns, length = RECORD_HEADER.unpack_from(data, pos)
+        pos += RECORD_HEADER.size
+        if pos + length > len(data):
+            break
+        frames.append((recv_ns, data[pos : pos + length]))
+        pos += length
+    return frames
+
+
+def synthesize_recording(path, session=None):
+    """Build a recording from the History files: one live_feed FeedResponse per second."""
+    import MarketDataFeedV3_pb2 as pb
+    from tick_replay import load_recorded_feed
+
+    from spot_data.tick_bus import INSTRUMENTS
+
+    feed_key = dict(INSTRUMENTS)
+    ticks = load_recorded_feed(session=session)
+    if not ticks:
+        print("✗ No History ticks to synthesize from")
+        return 0
+
+    by_second = {}
+    for ts_ms, index_key, ltp in ticks:
+        by_second.setdefault(ts_ms // 1000, []).append((feed_key[index_key], ts_ms, ltp))
+
+    with open(path, "wb") as f:
+        for second in sorted(by_second):
+            msg = pb.FeedResponse(type=pb.live_feed, currentTs=second * 1000)
+            for instrument, ts_ms, ltp in by_second[second]:
+                ltpc = msg.feeds[instrument].fullFeed.indexFF.ltpc
+                ltpc.ltp = ltp
+                ltpc.ltt = ts_ms
+            frame = msg.SerializeToString()
+            f.write(RECORD_HEADER.pack(second * 1_000_000_000, len(frame)))
+            f.write(frame)
+    print(f"✓ Synthesized {len(by_second)} frames / {len(ticks)} ticks → {path}")
+    return len(by_second)
+
+
+# =============================================================
+# REPLAY
+# =============================================================
+
+
+def _legacy_process(streamer, message):
+    """The pre-fast-path per-frame work (MessageToDict + strftime/strptime per tick), as a baseline."""
+    from time import localtime, strftime
+
+    from google.protobuf.json_format import MessageToDict
+
+    data_dict = MessageToDict(streamer.decode_protobuf(message))
+    count = 0
+    for instrument, ltp, ltt_ms in streamer.extract_index_ticks_dict(data_dict):
+        formatted_time = strftime("%Y-%m-%d %H:%M:%S", localtime(ltt_ms / 1000))
+        datetime.strptime(formatted_time, "%Y-%m-%d %H:%M:%S").time()
+        streamer.write_spot_data(instrument, ltp, ltt_ms)
+        count += 1
+    return count
+
+
+def _pct(sorted_values, q):
+    return sorted_values[min(len(sorted_values) - 1, int(len(sorted_values) * q))]
+
+
+def replay(path, speed=50.0, decoder="fast", console=False, live=False):
+    frames = read_recording(path)
+    if not frames:
+        print(f"✗ No frames in {path}")
+        return None
+
+    import live_indices_streamer as streamer
+
+    scratch = None
+    if not live:
+        # Keep the real History files and tick bus untouched
+        scratch = tempfile.mkdtemp(prefix="feed_replay_")
+        streamer.DATA_PATH = scratch
+        if streamer.TICK_BUS_AVAILABLE:
+            streamer._tick_bus = streamer.TickBusWriter(os.path.join(scratch, "tick_bus"))
+
+    previous_values = {} if console else None
+    process = (lambda m: streamer.process_message(m, previous_values)) if decoder == "fast" else (
+        lambda m: _legacy_process(streamer, m)
+    )
+
+    first_ns = frames[0][0]
+    span_s = (frames[-1][0] - first_ns) / 1e9
+    print("=" * 70)
+    print("FEED REPLAY BENCHMARK")
+    print("=" * 70)
+    print(f"📂 {path}: {len(frames)} frames over {span_s:,.0f}s of feed")
+    print(f"⚙  Decoder: {decoder} | Speed: {'max' if speed <= 0 else f'{speed:g}x'} | Output: {scratch or streamer.DATA_PATH}")
+
+    frame_lat, tick_lat, lag = [], [], []
+    total_ticks = 0
+    wall_start = time.perf_counter()
+    for recv_ns, frame in frames:
+        due = wall_start + ((recv_ns - first_ns) / 1e9 / speed if speed > 0 else 0)
+        now = time.perf_counter()
+        if due > now:
+            time.sleep(due - now)
+        t0 = time.perf_counter()
+        n = process(frame)
+        t1 = time.perf_counter()
+        total_ticks += n
+        frame_lat.append(t1 - t0)
+        if n:
+            tick_lat.extend([(t1 - t0) / n] * n)
+        if speed > 0:
+            lag.append(t1 - due)
+    elapsed = time.perf_counter() - wall_start
+    busy = sum(frame_lat)
+
+    frame_us = sorted(x * 1e6 for x in frame_lat)
+    tick_us = sorted(x * 1e6 for x in tick_lat) or [0.0]
+    stats = {
+        "frames": len(frames),
+        "ticks": total_ticks,
+        "elapsed_s": round(elapsed, 3),
+        "ticks_per_sec": round(total_ticks / elapsed, 1) if elapsed else 0.0,
+        "decode_ticks_per_sec": round(total_ticks / busy, 1) if busy else 0.0,
+        "tick_latency_us": {"p50": round(statistics.median(tick_us), 1), "p99": round(_pct(tick_us, 0.99), 1)},
+        "frame_latency_us": {
+            "p50": round(statistics.median(frame_us), 1),
+            "p99": round(_pct(frame_us, 0.99), 1),
+            "max": round(frame_us[-1], 1),
+        },
+    }
+
+    print(f"✓ {total_ticks} ticks in {elapsed:.2f}s → {stats['ticks_per_sec']:,.0f} ticks/sec "
+          f"(decode+write capacity {stats['decode_ticks_per_sec']:,.0f} ticks/sec)")
+    print(f"⏱  Per tick: p50 {stats['tick_latency_us']['p50']:.1f}µs, p99 {stats['tick_latency_us']['p99']:.1f}µs")
+    print(f"⏱  Per frame: p50 {stats['frame_latency_us']['p50']:.1f}µs, p99 {stats['frame_latency_us']['p99']:.1f}µs, "
+          f"max {stats['frame_latency_us']['max']:.1f}µs")
+    if lag:
+        lag_ms = sorted(x * 1e3 for x in lag)
+        stats["schedule_lag_ms_p99"] = round(_pct(lag_ms, 0.99), 3)
+        print(f"⏱  Behind schedule: p99 {stats['schedule_lag_ms_p99']:.3f}ms")
+    return stats
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Replay a recorded Upstox feed through the indices streamer")
+    parser.add_argument("recording", help="Recording file (live_indices_streamer.py --record)")
+    parser.add_argument("--speed", type=float, default=50.0, help="Multiple of real time (0 = as fast as possible)")
+    parser.add_argument("--decoder", choices=["fast", "dict"], default="fast", help="dict = old MessageToDict path")
+    parser.add_argument("--console", action="store_true", help="Print ticks as the streamer does")
+    parser.add_argument("--live", action="store_true", help="Write to the real History files / tick bus")
+    parser.add_argument("--synthesize", action="store_true", help="Build the recording from the History files first")
+    parser.add_argument("--date", default=None, help="Session for --synthesize (YYYY-MM-DD, 'all'; default latest)")
+    args = parser.parse_args()
+
+    if args.synthesize:
+        sys.path.append(os.path.dirname(SPOT_DATA_PATH))
+        if not synthesize_recording(args.recording, args.date):
+            sys.exit(1)
+    sys.exit(0 if replay(args.recording, args.speed, args.decoder, args.console, args.live) else 1)
@@ -1,17 +1,19 @@
+import argparse
 import asyncio
 import json
 import os
 import ssl
+import struct
+import sys
 import uuid
 from datetime import datetime, time
-from time import localtime, strftime
+from time import localtime, strftime, time_ns
 
 import MarketDataFeedV3_pb2 as pb  # noqa: E402 - local protobuf module
 import requests
 import websockets
 from colorama import Fore, Style, init
 from dotenv import load_dotenv
-from google.protobuf.json_format import MessageToDict
 
 # Initialize colorama
 init(autoreset=True)
@@ -30,6 +32,22 @@ DATA_PATH = os.path.join(SPOT_DATA_PATH, "Data")
 # === Ensure data directory exists ===
 os.makedirs(DATA_PATH, exist_ok=True)
 
+# === Shared-memory tick bus (read by the Flask workers) ===
+sys.path.append(PROJECT_ROOT)
+try:
+    from spot_data.tick_bus import INSTRUMENT_ID_BY_FEED_KEY, TickBusWriter
+
+    TICK_BUS_AVAILABLE = True
+except Exception as e:  # Streamer keeps working on files alone
+    print(f"Tick bus disabled: {e}")
+    INSTRUMENT_ID_BY_FEED_KEY = {}
+    TickBusWriter = None
+    TICK_BUS_AVAILABLE = False
+
+_tick_bus = None
+_history_handles = {}
+_spot_written_s = {}
+
 # === Instrument Keys for Home Page Indices ===
 INSTRUMENTS = {
     "NSE_INDEX|Nifty 50": {
@@ -73,6 +91,30 @@ INSTRUMENTS = {
 market_open = time(9, 10)
 market_close = time(15, 35)
 
+# Same window as seconds since local midnight, compared against epoch ltt directly
+_UTC_OFFSET_S = int(datetime.now().astimezone().utcoffset().total_seconds())
+_OPEN_S = market_open.hour * 3600 + market_open.minute * 60 + market_open.second
+_CLOSE_S = market_close.hour * 3600 + market_close.minute * 60 + market_close.second
+
+# === Feed recording (raw websocket frames, replayed by feed_replay.py) ===
+RECORD_HEADER = struct.Struct("<QI")  # receive time (epoch ns), frame length
+
+
+def in_market_hours(epoch_s):
+    """market_open <= local time <= market_close, on integer epoch seconds."""
+    return _OPEN_S <= (epoch_s + _UTC_OFFSET_S) % 86400 <= _CLOSE_S
+
+
+_ts_cache = [None, ""]
+
+
+def format_epoch(epoch_s):
+    """'YYYY-MM-DD HH:MM:SS' for the history file, formatted once per second."""
+    if _ts_cache[0] != epoch_s:
+        _ts_cache[0] = epoch_s
+        _ts_cache[1] = strftime("%Y-%m-%d %H:%M:%S", localtime(epoch_s))
+    return _ts_cache[1]
+
 
 # === Utility Functions ===
 def read_access_token():
@@ -101,38 +143,142 @@ def decode_protobuf(buffer):
     return feed_response
 
 
-def write_spot_data(instrument_key, ltp, formatted_time, msg_time):
-    """Write spot and history data for an instrument."""
-    if instrument_key not in INSTRUMENTS:
-        return
+def extract_index_ticks(feed_response):
+    """
+    (instrument_key, ltp, ltt_ms) for every index full feed, read straight
+    off the protobuf objects. Zero ltp / ltt count as missing, as they did
+    when MessageToDict dropped default-valued fields.
+    """
+    if feed_response.type == pb.market_info:
+        return []
+    ticks = []
+    for instrument, feed in feed_response.feeds.items():
+        if feed.WhichOneof("FeedUnion") != "fullFeed" or feed.fullFeed.WhichOneof("FullFeedUnion") != "indexFF":
+            continue
+        ltpc = feed.fullFeed.indexFF.ltpc
+        if ltpc.ltp and ltpc.ltt:
+            ticks.append((instrument, ltpc.ltp, ltpc.ltt))
+    return ticks
+
+
+def extract_index_ticks_dict(data_dict):
+    """Same as extract_index_ticks for a decoded dict (JSON frames / MessageToDict output)."""
+    if data_dict.get("type") == "market_info":
+        return []
+    ticks = []
+    for instrument, feed in (data_dict.get("feeds") or {}).items():
+        ltpc = feed.get("fullFeed", {}).get("indexFF", {}).get("ltpc", {})
+        ltp = ltpc.get("ltp")
+        ts = ltpc.get("ltt")
+        if ltp is None or ts is None:
+            continue
+        ticks.append((instrument, ltp, int(ts)))
+    return ticks
+
+
+def decode_ticks(message):
+    """Raw websocket frame -> index ticks (protobuf fast path, JSON fallback)."""
+    try:
+        return extract_index_ticks(decode_protobuf(message))
+    except Exception:
+        try:
+            return extract_index_ticks_dict(json.loads(message))
+        except Exception:
+            return []
 
-    config = INSTRUMENTS[instrument_key]
-    spot_path = os.path.join(DATA_PATH, config["spot_file"])
-    history_path = os.path.join(DATA_PATH, config["history_file"])
 
-    # Write to files only during market hours
-    if market_open <= msg_time <= market_close:
-        # Write spot (current value)
-        with open(spot_path, "w") as f:
+def get_tick_bus():
+    """Open (or reattach to) the shared-memory tick bus once per process."""
+    global _tick_bus, TICK_BUS_AVAILABLE
+    if _tick_bus is None and TICK_BUS_AVAILABLE:
+        try:
+            _tick_bus = TickBusWriter()
+        except Exception as e:
+            print(f"Tick bus disabled: {e}")
+            TICK_BUS_AVAILABLE = False
+    return _tick_bus
+
+
+def _history_handle(history_path):
+    """Append handle kept open for the session (line buffered) instead of reopening per tick."""
+    f = _history_handles.get(history_path)
+    if f is None or f.closed:
+        f = _history_handles[history_path] = open(history_path, "a", buffering=1)
+    return f
+
+
+def write_spot_data(instrument_key, ltp, epoch_ms):
+    """Publish a tick to the bus and append it to the history file for an instrument."""
+    config = INSTRUMENTS.get(instrument_key)
+    if config is None:
+        return False
+
+    # Write only during market hours
+    epoch_s = epoch_ms // 1000
+    if not in_market_hours(epoch_s):
+        return False
+
+    bus = get_tick_bus()
+    instrument_id = INSTRUMENT_ID_BY_FEED_KEY.get(instrument_key)
+    if bus is not None and instrument_id is not None:
+        bus.publish(instrument_id, epoch_ms, ltp)
+        # Readers that can't see the bus (e.g. the web container, which only
+        # mounts spot_data/) still use the spot file: refresh it once a second
+        write_spot = _spot_written_s.get(instrument_key) != epoch_s
+    else:
+        write_spot = True
+    if write_spot:
+        _spot_written_s[instrument_key] = epoch_s
+        with open(os.path.join(DATA_PATH, config["spot_file"]), "w") as f:
             f.write(str(ltp))
 
-        # Append to history
-        with open(history_path, "a") as f:
-            f.write(f"{formatted_time},{ltp}\n")
+    # Append to history (chart series + recorded feed for tick_replay.py)
+    _history_handle(os.path.join(DATA_PATH, config["history_file"])).write(f"{format_epoch(epoch_s)},{ltp}\n")
+    return True
+
+
+def print_tick(instrument_key, ltp, epoch_ms, previous_values):
+    """Colour-coded console line (skipped entirely with --quiet)."""
+    config = INSTRUMENTS.get(instrument_key)
+    if config is None:
+        return
+    prev = previous_values.get(instrument_key)
+    color = Fore.WHITE
+    if prev is not None:
+        color = Fore.GREEN if ltp > prev else (Fore.RED if ltp < prev else Fore.WHITE)
+    previous_values[instrument_key] = ltp
+    print(f"{format_epoch(epoch_ms // 1000)} | {Fore.YELLOW}{config['name']:15}{Style.RESET_ALL} | {color}{ltp:,.2f}{Style.RESET_ALL}")
+
+
+def process_message(message, previous_values=None):
+    """
+    Decode one websocket frame and write its ticks. Returns the number of
+    ticks decoded. previous_values=None disables console output.
+    """
+    ticks = decode_ticks(message)
+    for instrument, ltp, ltt_ms in ticks:
+        write_spot_data(instrument, ltp, ltt_ms)
+        if previous_values is not None:
+            print_tick(instrument, ltp, ltt_ms, previous_values)
+    return len(ticks)
 
 
 # === Main Async Function ===
-async def fetch_market_data():
+async def fetch_market_data(console=True, record_path=None):
     ssl_context = ssl.create_default_context()
     ssl_context.check_hostname = False
     ssl_context.verify_mode = ssl.CERT_NONE
 
-    os.system("cls" if os.name == "nt" else "clear")
+    if console:
+        os.system("cls" if os.name == "nt" else "clear")
     print(f"{Fore.CYAN}===== GOLDMINE LIVE INDICES STREAMER ====={Style.RESET_ALL}\n")
     print(f"{Fore.CYAN}Streaming: NIFTY 50, BANK NIFTY, SENSEX, NIFTY FIN, NIFTY NEXT 50, NIFTY 100, INDIA VIX{Style.RESET_ALL}\n")
     print(f"{Fore.YELLOW}Data Path: {DATA_PATH}{Style.RESET_ALL}\n")
 
-    previous_values = {}
+    previous_values = {} if console else None
+    recorder = open(record_path, "ab") if record_path else None
+    if recorder:
+        print(f"{Fore.YELLOW}Recording raw feed to: {record_path}{Style.RESET_ALL}\n")
 
     while True:
         try:
@@ -156,66 +302,28 @@ async def fetch_market_data():
                 # Main data processing loop
                 while True:
                     message = await websocket.recv()
-
-                    try:
-                        # Decode protobuf
-                        decoded_data = decode_protobuf(message)
-                        data_dict = MessageToDict(decoded_data)
-                    except Exception:
-                        try:
-                            data_dict = json.loads(message)
-                        except Exception:
-                            continue
-
-                    if data_dict.get("type") == "market_info":
-                        continue
-
-                    feeds = data_dict.get("feeds", {})
-                    if not feeds:
-                        continue
-
-                    for instrument, feed in feeds.items():
-                        # Handle index feeds
-                        fullfeed = feed.get("fullFeed", {}).get("indexFF", {})
-                        if not fullfeed:
-                            continue
-
-                        ltpc = fullfeed.get("ltpc", {})
-                        ltp = ltpc.get("ltp")
-                        ts = ltpc.get("ltt")
-
-                        if ltp is None or ts is None:
-                            continue
-
-                        epoch_time = int(ts) / 1000
-                        formatted_time = strftime("%Y-%m-%d %H:%M:%S", localtime(epoch_time))
-                        msg_time = datetime.strptime(formatted_time, "%Y-%m-%d %H:%M:%S").time()
-
-                        # Write data to files
-                        write_spot_data(instrument, ltp, formatted_time, msg_time)
-
-                        # Console output with color coding
-                        if instrument in INSTRUMENTS:
-                            config = INSTRUMENTS[instrument]
-                            prev = previous_values.get(instrument)
-                            color = Fore.WHITE
-                            if prev is not None:
-                                color = Fore.GREEN if ltp > prev else (Fore.RED if ltp < prev else Fore.WHITE)
-                            previous_values[instrument] = ltp
-
-                            print(
-                                f"{formatted_time} | {Fore.YELLOW}{config['name']:15}{Style.RESET_ALL} | {color}{ltp:,.2f}{Style.RESET_ALL}"
-                            )
+                    if recorder:
+                        frame = message if isinstance(message, bytes) else message.encode("utf-8")
+                        recorder.write(RECORD_HEADER.pack(time_ns(), len(frame)))
+                        recorder.write(frame)
+                    process_message(message, previous_values)
 
         except Exception as e:
             print(f"{Fore.RED}Error: {e}{Style.RESET_ALL}")
             print(f"{Fore.YELLOW}Reconnecting in 5 seconds...{Style.RESET_ALL}\n")
+            if recorder:
+                recorder.flush()
             await asyncio.sleep(5)
 
 
 # === Run with Graceful Exit ===
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Upstox live indices streamer")
+    parser.add_argument("--quiet", action="store_true", help="No per-tick console output")
+    parser.add_argument("--record", metavar="PATH", help="Append raw websocket frames to PATH (for feed_replay.py)")
+    args = parser.parse_args()
+
     try:
-        asyncio.run(fetch_market_data())
+        asyncio.run(fetch_market_data(console=not args.quiet, record_path=args.record))
     except KeyboardInterrupt:
         print(f"\n{Fore.CYAN}Shutdown Requested. Exiting...{Style.RESET_ALL}")
@@ -0,0 +1,250 @@
+"""
+NSE INDEX API STUB SERVER
+=========================
+Local HTTP stand-in for the NSE endpoints used by
+Analysis_Tools/app/models/nse_indices_model.py, so its
+stale-while-revalidate cache can be exercised without hitting NSE.
+
+Serves:
+    /                                                       (sets a cookie)
+    /api/NextApi/apiClient?functionName=getIndexData&type=All
+    /api/NextApi/apiClient?functionName=getGraphChart&type=NIFTY%2050&flag=1D
+
+Prices drift on every request so refreshes are visible. --delay adds
+per-request latency; --fail makes the API answer 503 (toggle at runtime
+with GET /__fail/on and /__fail/off); /__stats returns request counts.
+
+Usage:
+    # Run the server and point the web app at it
+    python spot_data/nse_api_stub_server.py --port 8766 --delay 0.5
+    NSE_API_BASE=http://127.0.0.1:8766 python run.py
+
+    # Self-check: cold single-flight, stale-while-revalidate, failure counts
+    python spot_data/nse_api_stub_server.py --self-check
+"""
+
+import argparse
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+
+BASE_LEVELS = {
+    "NIFTY 50": 24850.0,
+    "NIFTY BANK": 54100.0,
+    "NIFTY FINANCIAL SERVICES": 26300.0,
+    "NIFTY NEXT 50": 68900.0,
+    "NIFTY 100": 25400.0,
+    "India VIX": 13.2,
+}
+# Graph API "type" parameter → index name
+GRAPH_NAMES = {
+    "NIFTY 50": "NIFTY 50",
+    "NIFTY BANK": "NIFTY BANK",
+    "NIFTY FIN SERVICE": "NIFTY FINANCIAL SERVICES",
+    "NIFTY NEXT 50": "NIFTY NEXT 50",
+    "NIFTY 100": "NIFTY 100",
+    "India VIX": "India VIX",
+}
+
+
+# ===========================================
+# 📈 Payloads
+# ===========================================
+def index_payload(tick: int) -> dict:
+    rows = []
+    for name, base in BASE_LEVELS.items():
+        last = round(base * (1 + 0.0005 * tick), 2)
+        rows.append({
+            "indexName": name,
+            "last": last,
+            "previousClose": base,
+            "open": base,
+            "high": max(base, last),
+            "low": min(base, last),
+            "percChange": round((last - base) / base * 100, 2),
+        })
+    return {"data": rows}
+
+
+def graph_payload(name: str, tick: int) -> dict:
+    """One point per minute 09:15-15:30 on today's date (NSE epochs are IST-as-UTC)."""
+    base = BASE_LEVELS[name]
+    day = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
+    midnight_ms = int((day - datetime(1970, 1, 1)).total_seconds() * 1000)
+    points = []
+    for i, minute in enumerate(range(9 * 60 + 15, 15 * 60 + 31)):
+        price = round(base * (1 + 0.0001 * ((i % 40) - 20) + 0.0005 * tick), 2)
+        points.append([midnight_ms + minute * 60_000, price, "NM"])
+    points.append([midnight_ms + 16 * 60 * 60_000, base, "PO"])  # post-market, filtered out
+    return {"data": {"grapthData": points}}
+
+
+# ===========================================
+# 🌐 Server
+# ===========================================
+class StubState:
+    def __init__(self, delay=0.0, fail=False):
+        self.delay = delay
+        self.fail = fail
+        self.counts = {"home": 0, "index": 0, "graph": 0}
+        self.lock = threading.Lock()
+
+    def count(self, kind: str) -> int:
+        with self.lock:
+            self.counts[kind] += 1
+            return sum(self.counts.values())
+
+
+def make_handler(state: StubState):
+    class Handler(BaseHTTPRequestHandler):
+        def log_message(self, fmt, *args):
+            pass
+
+        def do_GET(self):
+            url = urlparse(self.path)
+            if url.path == "/__stats":
+                with state.lock:
+                    return self._send(200, dict(state.counts))
+            if url.path.startswith("/__fail/"):
+                state.fail = url.path.endswith("/on")
+                return self._send(200, {"fail": state.fail})
+            if url.path == "/":
+                state.count("home")
+                return self._send(200, b"<html></html>", "text/html", cookie=True)
+            if url.path != "/api/NextApi/apiClient":
+                return self._send(404, b"")
+
+            params = parse_qs(url.query)
+            fn = params.get("functionName", [""])[0]
+            kind = "index" if fn == "getIndexData" else "graph" if fn == "getGraphChart" else None
+            if kind is None:
+                return self._send(404, b"")
+            tick = state.count(kind)
+            if state.delay:
+                time.sleep(state.delay)
+            if state.fail:
+                return self._send(503, b"")
+
+            if kind == "index":
+                return self._send(200, index_payload(tick))
+            name = GRAPH_NAMES.get(params.get("type", [""])[0])
+            if name is None:
+                return self._send(404, b"")
+            self._send(200, graph_payload(name, tick))
+
+        def _send(self, code, body, ctype="application/json", cookie=False):
+            if isinstance(body, dict):
+                body = json.dumps(body).encode()
+            self.send_response(code)
+            self.send_header("Content-Type", ctype)
+            self.send_header("Content-Length", str(len(body)))
+            if cookie:
+                self.send_header("Set-Cookie", "nsit=stub; Path=/")
+            self.end_headers()
+            self.wfile.write(body)
+
+    return Handler
+
+
+def start_server(port=0, **kwargs):
+    state = StubState(**kwargs)
+    server = ThreadingHTTPServer(("127.0.0.1", port), make_handler(state))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, state
+
+
+# ===========================================
+# ✅ Self-check
+# ===========================================
+def self_check():
+    server, state = start_server(delay=0.3)
+    os.environ["NSE_API_BASE"] = f"http://127.0.0.1:{server.server_address[1]}"
+    os.environ["NSE_CACHE_LOCK_DIR"] = tempfile.mkdtemp(prefix="nse_swr_")
+
+    sys.path.append(PROJECT_ROOT)
+    from Analysis_Tools.app.models import nse_indices_model as nse
+
+    nse._price_cache.ttl = 0.5
+    nse._BACKOFF_BASE = 1.0
+
+    # 1. Cold: 20 concurrent requests, one upstream call
+    with ThreadPoolExecutor(max_workers=20) as pool:
+        results = list(pool.map(lambda _: nse.get_nse_index_data(), range(20)))
+    assert all(r and r == results[0] for r in results), "cold requests disagree"
+    assert state.counts["index"] == 1, state.counts
+    first = results[0]["nifty50"]["value"]
+
+    # 2. Stale: served instantly while one background refresh runs
+    time.sleep(0.6)
+    t0 = time.perf_counter()
+    stale = [nse.get_nse_index_data() for _ in range(50)]
+    stale_ms = (time.perf_counter() - t0) * 1000
+    assert stale_ms < 100, f"stale reads blocked for {stale_ms:.0f}ms"
+    assert all(r["nifty50"]["value"] == first for r in stale)
+    time.sleep(0.5)
+    assert state.counts["index"] == 2, state.counts
+    assert nse.get_nse_index_data()["nifty50"]["value"] != first, "refresh did not land"
+
+    # 3. Failure: stale value kept, failures counted
+    state.fail = True
+    time.sleep(0.6)
+    assert nse.get_nse_index_data()["nifty50"]["value"] != first
+    time.sleep(0.5)
+    stats = nse.get_refresh_stats()["prices"]["all"]
+    assert stats["failures"] == 1 and stats["consecutive_failures"] == 1, stats
+
+    # 4. Backoff: no refresh until the delay has passed, stale value still served
+    calls = state.counts["index"]
+    assert all(nse.get_nse_index_data()["nifty50"]["value"] != first for _ in range(20))
+    time.sleep(0.2)
+    stats = nse.get_refresh_stats()["prices"]["all"]
+    assert state.counts["index"] == calls and stats["backoff_skips"] >= 20, (state.counts, stats)
+    state.fail = False
+    time.sleep(1.0)
+    nse.get_nse_index_data()
+    time.sleep(0.5)
+    stats = nse.get_refresh_stats()["prices"]["all"]
+    assert state.counts["index"] == calls + 1 and stats["consecutive_failures"] == 0, (state.counts, stats)
+
+    # 5. Chart series through the same cache
+    chart = nse.get_nse_chart_data("nifty50")
+    assert len(chart["series"]) == 376 and "error" not in chart, chart.keys()
+    assert nse.get_nse_chart_data("unknown")["error"].startswith("Unknown index key")
+
+    server.shutdown()
+    print(f"\n✅ Self-check passed: 20 cold requests → 1 fetch, 50 stale reads in {stale_ms:.1f}ms, "
+          f"refresh avg {stats['avg_ms']}ms, failures backed off; upstream calls {state.counts}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local NSE index API stand-in")
+    parser.add_argument("--port", type=int, default=8766)
+    parser.add_argument("--delay", type=float, default=0.0, help="Seconds of latency per API request")
+    parser.add_argument("--fail", action="store_true", help="Answer API requests with 503")
+    parser.add_argument("--self-check", action="store_true", help="Run the index model against the stub and exit")
+    args = parser.parse_args()
+
+    if args.self_check:
+        self_check()
+        return
+
+    server, _ = start_server(args.port, delay=args.delay, fail=args.fail)
+    print(f"🌐 NSE API stub serving on http://127.0.0.1:{server.server_address[1]} (Ctrl+C to stop)")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
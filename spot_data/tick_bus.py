@@ -0,0 +1,313 @@
+# =============================================================
+#  TICK BUS MODULE
+#  Purpose: Shared-memory hand-off of live index ticks from the
+#           Upstox streamer to every Flask worker
+#
+#  The streamer (spot_data/live_indices_streamer.py) owns one
+#  TickBusWriter and publishes each tick once. Workers map the same
+#  file read-only and read without locks or syscalls per tick.
+#
+#  Lives in spot_data (not Analysis_Tools.app) so the streamer and the
+#  replay tools import it without loading the Flask app package.
+#
+#  Layout (little endian, one file, default /dev/shm):
+#    header  64 B   magic, version, capacity, slots, generation, head
+#    latest  SLOTS x 64 B   last tick per instrument
+#    ring    capacity x 64 B   every tick, slot = (seq - 1) % capacity
+#
+#  Record: seq u64, instrument u16, ts_ms i64, ltp, open, high, low.
+#  The writer zeroes a record's seq, writes the payload and stores the
+#  seq last (seqlock); a reader accepts a record only when the seq it
+#  read before and after the payload is the one it expected, so torn
+#  or overwritten records are skipped instead of returned.
+#
+#  Stdlib only. When the bus file does not exist (streamer not
+#  running), get_tick_reader() returns None and callers keep using the
+#  spot / history text files.
+# =============================================================
+
+import mmap
+import os
+import struct
+import threading
+import time
+from collections import namedtuple
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+# =============================================================
+# CONFIGURATION
+# =============================================================
+
+_SPOT_DATA_PATH = os.path.dirname(os.path.abspath(__file__))
+_DEFAULT_DIR = "/dev/shm" if os.path.isdir("/dev/shm") else os.path.join(_SPOT_DATA_PATH, "Data")
+TICK_BUS_PATH = os.getenv("TICK_BUS_PATH", os.path.join(_DEFAULT_DIR, "goldmine_tick_bus"))
+TICK_BUS_CAPACITY = int(os.getenv("TICK_BUS_CAPACITY", "65536"))  # ~4 MB, several sessions of index ticks
+REOPEN_CHECK_SECONDS = 1.0  # How often readers stat the path for a recreated bus
+
+# Instrument id = position. Append only: ids are baked into existing bus files.
+INSTRUMENTS = (
+    ("nifty50", "NSE_INDEX|Nifty 50"),
+    ("banknifty", "NSE_INDEX|Nifty Bank"),
+    ("sensex", "BSE_INDEX|SENSEX"),
+    ("niftyfin", "NSE_INDEX|Nifty Financial Services"),
+    ("niftynext50", "NSE_INDEX|Nifty Next 50"),
+    ("nifty100", "NSE_INDEX|NIFTY 100"),
+    ("indiavix", "NSE_INDEX|India VIX"),
+)
+INSTRUMENT_ID_BY_KEY = {key: i for i, (key, _) in enumerate(INSTRUMENTS)}
+INSTRUMENT_ID_BY_FEED_KEY = {feed_key: i for i, (_, feed_key) in enumerate(INSTRUMENTS)}
+
+MAGIC = b"GMTB"
+VERSION = 1
+MAX_INSTRUMENTS = 16
+
+HEADER_FMT = "<4sIIIQQ"  # magic, version, capacity, slots, generation, head
+HEADER_SIZE = 64
+HEAD_OFFSET = struct.calcsize("<4sIIIQ")
+RECORD_FMT = "<QH6xqdddd"  # seq, instrument, ts_ms, ltp, open, high, low
+RECORD_SIZE = 64
+SEQ_FMT = "<Q"
+LATEST_OFFSET = HEADER_SIZE
+RING_OFFSET = LATEST_OFFSET + MAX_INSTRUMENTS * RECORD_SIZE
+
+Tick = namedtuple("Tick", ["seq", "instrument", "ts_ms", "ltp", "open", "high", "low"])
+
+_UTC_OFFSET_MS = int(datetime.now().astimezone().utcoffset().total_seconds() * 1000)
+
+
+def _session_day(ts_ms: int) -> int:
+    """Local calendar day number of an epoch-ms timestamp (no strftime per tick)."""
+    return (ts_ms + _UTC_OFFSET_MS) // 86_400_000
+
+
+def _file_size(capacity: int) -> int:
+    return RING_OFFSET + capacity * RECORD_SIZE
+
+
+def format_ts(ts_ms: int) -> str:
+    """Epoch ms -> 'YYYY-MM-DD HH:MM:SS' (the history-file timestamp format)."""
+    return time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(ts_ms / 1000))
+
+
+def tick_to_dict(tick: Tick) -> Dict:
+    """JSON-ready tick in the /api/live-indices field names."""
+    return {
+        "seq": tick.seq,
+        "timestamp": format_ts(tick.ts_ms),
+        "value": round(tick.ltp, 2),
+        "open": round(tick.open, 2),
+        "high": round(tick.high, 2),
+        "low": round(tick.low, 2),
+    }
+
+
+# =============================================================
+# WRITER (streamer process only - single producer)
+# =============================================================
+
+
+class TickBusWriter:
+    """Single-producer side of the bus; keeps session open/high/low per instrument."""
+
+    def __init__(self, path: Optional[str] = None, capacity: int = TICK_BUS_CAPACITY):
+        self.path = path or TICK_BUS_PATH
+        self.capacity = capacity
+        self._session: Dict[int, list] = {}  # id -> [day, open, high, low]
+
+        if not self._attach():
+            self._create()
+        self.head = struct.unpack_from(SEQ_FMT, self._mm, HEAD_OFFSET)[0]
+        self._restore_sessions()
+
+    def _attach(self) -> bool:
+        """Reuse an existing bus with the same layout so readers keep their position."""
+        try:
+            if os.path.getsize(self.path) != _file_size(self.capacity):
+                return False
+            f = open(self.path, "r+b")
+        except OSError:
+            return False
+        mm = mmap.mmap(f.fileno(), _file_size(self.capacity))
+        magic, version, capacity, slots, _, _ = struct.unpack_from(HEADER_FMT, mm, 0)
+        if (magic, version, capacity, slots) != (MAGIC, VERSION, self.capacity, MAX_INSTRUMENTS):
+            mm.close()
+            f.close()
+            return False
+        self._file, self._mm = f, mm
+        return True
+
+    def _create(self):
+        """Build a fresh bus next to the target and rename it into place."""
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.truncate(_file_size(self.capacity))
+            f.write(struct.pack(HEADER_FMT, MAGIC, VERSION, self.capacity, MAX_INSTRUMENTS, time.time_ns(), 0))
+        os.replace(tmp_path, self.path)
+        self._file = open(self.path, "r+b")
+        self._mm = mmap.mmap(self._file.fileno(), _file_size(self.capacity))
+
+    def _restore_sessions(self):
+        """After a streamer restart, continue today's open/high/low from the latest slots."""
+        today = _session_day(int(time.time() * 1000))
+        for instrument_id in range(len(INSTRUMENTS)):
+            seq, _, ts_ms, _, o, h, l = struct.unpack_from(
+                RECORD_FMT, self._mm, LATEST_OFFSET + instrument_id * RECORD_SIZE
+            )
+            if seq and _session_day(ts_ms) == today:
+                self._session[instrument_id] = [today, o, h, l]
+
+    def _write_record(self, offset: int, seq: int, instrument_id: int, ts_ms: int, ltp, o, h, l):
+        struct.pack_into(SEQ_FMT, self._mm, offset, 0)
+        struct.pack_into(RECORD_FMT, self._mm, offset, 0, instrument_id, ts_ms, ltp, o, h, l)
+        struct.pack_into(SEQ_FMT, self._mm, offset, seq)
+
+    def publish(self, instrument_id: int, ts_ms: int, ltp: float) -> int:
+        """Append one tick (ring + latest slot) and advance head; returns its seq."""
+        ltp = float(ltp)
+        day = _session_day(ts_ms)
+        session = self._session.get(instrument_id)
+        if session is None or session[0] != day:
+            session = self._session[instrument_id] = [day, ltp, ltp, ltp]
+        else:
+            if ltp > session[2]:
+                session[2] = ltp
+            if ltp < session[3]:
+                session[3] = ltp
+
+        seq = self.head + 1
+        _, o, h, l = session
+        self._write_record(RING_OFFSET + ((seq - 1) % self.capacity) * RECORD_SIZE, seq, instrument_id, ts_ms, ltp, o, h, l)
+        self._write_record(LATEST_OFFSET + instrument_id * RECORD_SIZE, seq, instrument_id, ts_ms, ltp, o, h, l)
+        struct.pack_into(SEQ_FMT, self._mm, HEAD_OFFSET, seq)
+        self.head = seq
+        return seq
+
+    def close(self):
+        try:
+            self._mm.close()
+            self._file.close()
+        except Exception:
+            pass
+
+
+# =============================================================
+# READER (any number of processes, lock-free)
+# =============================================================
+
+
+class TickBusReader:
+    """Read-only view of the bus; re-maps itself when the writer recreates the file."""
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = path or TICK_BUS_PATH
+        self._mm = None
+        self._inode = None
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+        self._open()
+
+    def _open(self):
+        st = os.stat(self.path)
+        with open(self.path, "rb") as f:
+            mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, capacity, slots, generation, _ = struct.unpack_from(HEADER_FMT, mm, 0)
+        if magic != MAGIC or version != VERSION or slots != MAX_INSTRUMENTS:
+            mm.close()
+            raise ValueError(f"{self.path} is not a tick bus (version {version})")
+        old, self._mm = self._mm, mm
+        self.capacity = capacity
+        self.generation = generation
+        self._inode = st.st_ino
+        if old is not None:
+            old.close()
+
+    def _refresh(self):
+        now = time.monotonic()
+        if now - self._checked_at < REOPEN_CHECK_SECONDS:
+            return
+        with self._lock:
+            self._checked_at = now
+            try:
+                if os.stat(self.path).st_ino != self._inode:
+                    self._open()
+            except (OSError, ValueError):
+                pass
+
+    def head(self) -> int:
+        self._refresh()
+        return struct.unpack_from(SEQ_FMT, self._mm, HEAD_OFFSET)[0]
+
+    def _read_record(self, offset: int, expected: Optional[int] = None) -> Optional[Tick]:
+        for _ in range(3):
+            rec = struct.unpack_from(RECORD_FMT, self._mm, offset)
+            seq_after = struct.unpack_from(SEQ_FMT, self._mm, offset)[0]
+            if rec[0] and rec[0] == seq_after:
+                if expected is not None and rec[0] != expected:
+                    return None  # Overwritten by a newer lap of the ring
+                seq, instrument_id, ts_ms, ltp, o, h, l = rec
+                if instrument_id >= len(INSTRUMENTS):
+                    return None
+                return Tick(seq, INSTRUMENTS[instrument_id][0], ts_ms, ltp, o, h, l)
+        return None
+
+    def latest(self, index_key: str) -> Optional[Tick]:
+        instrument_id = INSTRUMENT_ID_BY_KEY.get(index_key)
+        if instrument_id is None:
+            return None
+        self._refresh()
+        return self._read_record(LATEST_OFFSET + instrument_id * RECORD_SIZE)
+
+    def latest_all(self) -> Dict[str, Tick]:
+        self._refresh()
+        result = {}
+        for instrument_id, (key, _) in enumerate(INSTRUMENTS):
+            tick = self._read_record(LATEST_OFFSET + instrument_id * RECORD_SIZE)
+            if tick is not None:
+                result[key] = tick
+        return result
+
+    def read_since(self, seq: int, limit: Optional[int] = None) -> Tuple[int, List[Tick]]:
+        """
+        Ticks published after `seq`, oldest first, and the seq to pass next
+        time. A reader that fell more than one ring behind resumes at the
+        oldest tick still in the ring. A head below `seq` (bus recreated)
+        restarts from the current ring.
+        """
+        head = self.head()
+        if head < seq:
+            seq = 0
+        start = max(seq, head - self.capacity)
+        if limit is not None:
+            head = min(head, start + limit)
+        ticks = []
+        for n in range(start + 1, head + 1):
+            tick = self._read_record(RING_OFFSET + ((n - 1) % self.capacity) * RECORD_SIZE, expected=n)
+            if tick is not None:
+                ticks.append(tick)
+        return head, ticks
+
+    def close(self):
+        if self._mm is not None:
+            self._mm.close()
+            self._mm = None
+
+
+_reader: Optional[TickBusReader] = None
+_reader_lock = threading.Lock()
+
+
+def get_tick_reader() -> Optional[TickBusReader]:
+    """Process-wide reader, or None while no streamer has created the bus."""
+    global _reader
+
+    if _reader is not None:
+        return _reader
+    with _reader_lock:
+        if _reader is None and os.path.exists(TICK_BUS_PATH):
+            try:
+                _reader = TickBusReader(TICK_BUS_PATH)
+            except Exception as e:
+                print(f"[WARN] Tick bus unavailable: {e}")
+        return _reader
@@ -0,0 +1,173 @@
+"""
+TICK BUS REPLAYER
+=================
+Replays the recorded feed (the per-index History files the streamer
+appends to) through the shared-memory tick bus, merged across indices in
+timestamp order, at a chosen speed.
+
+--verify runs a TickBusReader in a second thread and checks that every
+published tick arrives once, in order, with the same instrument / ltp,
+then reports throughput and publish -> read latency.
+
+By default the replay goes to a scratch bus so a running streamer is not
+disturbed; --bus live targets TICK_BUS_PATH so the home page SSE stream
+can be watched end to end with the market closed.
+
+Usage:
+    python spot_data/tick_replay.py [--speed 60] [--date 2026-10-16] [--verify]
+    python spot_data/tick_replay.py --speed 0 --verify       # as fast as possible
+    python spot_data/tick_replay.py --bus live --speed 10    # drive the web app
+"""
+
+import argparse
+import importlib.util
+import os
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime
+
+SPOT_DATA_PATH = os.path.dirname(os.path.abspath(__file__))
+PROJECT_ROOT = os.path.dirname(SPOT_DATA_PATH)
+DATA_PATH = os.path.join(SPOT_DATA_PATH, "Data")
+
+sys.path.append(PROJECT_ROOT)
+from spot_data.tick_bus import (
+    INSTRUMENT_ID_BY_KEY,
+    TICK_BUS_PATH,
+    TickBusReader,
+    TickBusWriter,
+)
+
+
+def _load_live_indices_model():
+    """Import live_indices_model by path (importing Analysis_Tools.app builds the whole app)."""
+    path = os.path.join(PROJECT_ROOT, "Analysis_Tools", "app", "models", "live_indices_model.py")
+    spec = importlib.util.spec_from_file_location("replay_live_indices_model", path)
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[spec.name] = module
+    spec.loader.exec_module(module)
+    return module
+
+
+LiveIndicesReader = _load_live_indices_model().LiveIndicesReader
+
+
+def load_recorded_feed(data_path=DATA_PATH, session=None):
+    """
+    [(epoch_ms, index_key, ltp)] from every History file, sorted by time.
+    session: 'YYYY-MM-DD', 'all', or None for the latest session found.
+    """
+    ticks = []
+    for index_key, files in LiveIndicesReader.FILES.items():
+        path = os.path.join(data_path, files["history"])
+        if not os.path.exists(path):
+            continue
+        with open(path, "r", encoding="utf-8", errors="replace") as f:
+            for line in f:
+                parts = line.strip().split(",")
+                if len(parts) < 2:
+                    continue
+                try:
+                    ts = datetime.strptime(parts[0], "%Y-%m-%d %H:%M:%S")
+                    ticks.append((int(ts.timestamp() * 1000), index_key, float(parts[1])))
+                except ValueError:
+                    continue
+
+    if ticks and session != "all":
+        day = session or max(datetime.fromtimestamp(t[0] / 1000).strftime("%Y-%m-%d") for t in ticks)
+        ticks = [t for t in ticks if datetime.fromtimestamp(t[0] / 1000).strftime("%Y-%m-%d") == day]
+    ticks.sort(key=lambda t: t[0])  # Stable: same-second ticks keep file order
+    return ticks
+
+
+def _verify_loop(bus_path, start_seq, expected, received, published_at, stop):
+    """Reader thread: drain the bus until every expected tick arrived (or stop is set)."""
+    reader = TickBusReader(bus_path)
+    seq = start_seq
+    while len(received) < expected and not stop.is_set():
+        seq, ticks = reader.read_since(seq)
+        now = time.perf_counter()
+        for tick in ticks:
+            received.append((tick, now - published_at.get(tick.seq, now)))
+        if not ticks:
+            time.sleep(0.0005)
+    reader.close()
+
+
+def replay(speed=60.0, session=None, bus_path=None, verify=False):
+    feed = load_recorded_feed(session=session)
+    if not feed:
+        print("✗ No recorded ticks found in", DATA_PATH)
+        return False
+
+    bus_path = bus_path or os.path.join(tempfile.gettempdir(), f"tick_replay_{os.getpid()}")
+    writer = TickBusWriter(bus_path)
+    start_seq = writer.head
+    first = datetime.fromtimestamp(feed[0][0] / 1000)
+    last = datetime.fromtimestamp(feed[-1][0] / 1000)
+
+    print("=" * 70)
+    print("TICK BUS REPLAY")
+    print("=" * 70)
+    print(f"📂 Feed: {len(feed)} ticks | {first:%Y-%m-%d %H:%M:%S} → {last:%H:%M:%S}")
+    print(f"🚌 Bus: {bus_path} | Speed: {'max' if speed <= 0 else f'{speed:g}x'}")
+
+    received, published_at = [], {}
+    stop = threading.Event()
+    verifier = None
+    if verify:
+        verifier = threading.Thread(
+            target=_verify_loop, args=(bus_path, start_seq, len(feed), received, published_at, stop), daemon=True
+        )
+        verifier.start()
+
+    wall_start = time.perf_counter()
+    feed_start = feed[0][0]
+    for ts_ms, index_key, ltp in feed:
+        if speed > 0:
+            delay = (ts_ms - feed_start) / 1000 / speed - (time.perf_counter() - wall_start)
+            if delay > 0:
+                time.sleep(delay)
+        published_at[writer.head + 1] = time.perf_counter()
+        writer.publish(INSTRUMENT_ID_BY_KEY[index_key], ts_ms, ltp)
+    elapsed = time.perf_counter() - wall_start
+    print(f"✓ Published {len(feed)} ticks in {elapsed:.2f}s ({len(feed) / max(elapsed, 1e-9):,.0f} ticks/sec)")
+
+    ok = True
+    if verifier is not None:
+        verifier.join(timeout=5)
+        stop.set()
+        got = [(t.instrument, t.ts_ms, t.ltp) for t, _ in received]
+        want = [(k, ts, ltp) for ts, k, ltp in feed]
+        ok = got == want
+        latencies = sorted(lat * 1e6 for _, lat in received)
+        if latencies:
+            p99 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))]
+            print(
+                f"⏱  Publish → read latency: median {statistics.median(latencies):.0f}µs, "
+                f"p99 {p99:.0f}µs, max {latencies[-1]:.0f}µs"
+            )
+        if ok:
+            print(f"✓ Verified: {len(got)} ticks received in order, no gaps")
+        else:
+            print(f"✗ Mismatch: received {len(got)} of {len(want)} ticks")
+
+    writer.close()
+    if bus_path != TICK_BUS_PATH:
+        os.remove(bus_path)
+    return ok
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Replay recorded index ticks through the tick bus")
+    parser.add_argument("--speed", type=float, default=60.0, help="Replay speed multiplier (0 = as fast as possible)")
+    parser.add_argument("--date", default=None, help="Session to replay (YYYY-MM-DD, 'all'; default latest)")
+    parser.add_argument("--bus", default=None, help="Bus file path, or 'live' for TICK_BUS_PATH (default: scratch)")
+    parser.add_argument("--verify", action="store_true", help="Check every tick arrives in order and report latency")
+    args = parser.parse_args()
+
+    bus = TICK_BUS_PATH if args.bus == "live" else args.bus
+    sys.exit(0 if replay(args.speed, args.date, bus, args.verify) else 1)
@@ -2,7 +2,6 @@ import subprocess
 import sys
 import os
 import time
-from concurrent.futures import ThreadPoolExecutor, as_completed
 
 try:
     sys.stdout.reconfigure(encoding='utf-8')
@@ -82,35 +81,60 @@ def run_script(name, script_path, args=None):
         print(f"[{name}] 🔴 EXCEPTION: {str(e)}")
         return {"name": name, "success": False, "output": [str(e)], "duration": duration}
 
-def main():
+def subprocess_step(results, name, script_path, args=None):
+    """Pipeline step that runs a script via run_script() and fails on a non-zero exit."""
+    def run():
+        res = run_script(name, script_path, args)
+        results[name] = res
+        return res.get("success", False)
+    return run
+
+
+def main(force=False, dry_run=False):
     base_dir = os.path.dirname(os.path.abspath(__file__))
+    sys.path.append(base_dir)
+
+    from Analysis_Tools.app.models.data_epoch import bump_data_epoch
+    from Analysis_Tools.app.models.db_config import engine, engine_cash
+    from Database.pipeline_dag import Step, estimated_rows, get_last_run, max_value, run_pipeline
 
+    # (step, display name, script, args, watermark, rows)
     tasks = [
         (
-            "Index True OHLC",
+            "index_ohlc", "Index True OHLC",
             os.path.join(base_dir, "Database", "FO", "index_ohlc_scraper.py"),
-            []
+            [],
+            max_value(engine_cash, "index_historical_data", "date"),
+            estimated_rows(engine_cash, "index_historical_data"),
         ),
         (
-            "F&O Database",
+            "fo", "F&O Database",
             os.path.join(base_dir, "Database", "FO", "fo_update_database.py"),
-            []
+            [],
+            max_value(engine, "TBL_NIFTY", "BizDt"),
+            None,
         ),
         (
-            "Cash Database",
+            "cash", "Cash Database",
             os.path.join(base_dir, "Database", "Cash", "cash_update_database.py"),
-            []
+            [],
+            max_value(engine_cash, "cash_eod_data", "trade_date"),
+            estimated_rows(engine_cash, "cash_eod_data"),
         ),
         (
-            "FII/DII Historical",
+            "fii_dii_historical", "FII/DII Historical",
             os.path.join(base_dir, "Database", "FII_DII", "fii_dii_update_database.py"),
-            ["historical"]
+            ["historical"],
+            None,
+            None,
         ),
         (
-            "FII/DII Historical Cash",
+            "fii_dii_historical_cash", "FII/DII Historical Cash",
             os.path.join(base_dir, "Database", "FII_DII", "fii_dii_update_database.py"),
-            ["historical_cash"]
-        )
+            ["historical_cash"],
+            None,
+            None,
+        ),
     ]
 
     print("\n" + "="*80)
@@ -118,52 +142,62 @@ def main():
     print("="*80)
     print(f"Root Directory: {base_dir}")
     print("This utility will concurrently update:")
-    for task_name, _, _ in tasks:
+    for _, task_name, _, _, _, _ in tasks:
         print(f"  - {task_name}")
+    print("  - RS Matrix Cache (once Index OHLC and Cash are done, only if they moved)")
     print("="*80 + "\n")
 
     overall_start = time.time()
-    results = []
-
-    # Run all tasks concurrently
-    with ThreadPoolExecutor(max_workers=len(tasks)) as executor:
-        future_to_task = {
-            executor.submit(run_script, name, path, args): name
-            for name, path, args in tasks
-        }
-
-        for future in as_completed(future_to_task):
-            task_name = future_to_task[future]
-            try:
-                result = future.result()
-                results.append(result)
-            except Exception as exc:
-                print(f"[{task_name}] generated an exception: {exc}")
-                results.append({"name": task_name, "success": False, "duration": 0})
-
-    # Run RS Matrix Precomputation Synchronously AFTER downloads finish
-    print("\n" + "="*80)
-    print("       ⏳ PRECOMPUTING RS MATRICES (CACHE)")
-    print("="*80)
-    cache_script = os.path.join(base_dir, "Database", "Cache", "precompute_rs_matrices.py")
-    res = run_script("RS Matrix Cache", cache_script, [])
-    results.append(res)
+    results = {}
+
+    # Downloads run concurrently (always - each script is incremental on its own).
+    # The RS matrices read index_historical_data + the cash tables only, so they
+    # wait for those two and are skipped when neither watermark has moved.
+    steps = [
+        Step(step, subprocess_step(results, name, path, args), watermark=watermark, rows=rows, always=True)
+        for step, name, path, args, watermark, rows in tasks
+    ]
+    steps.append(Step(
+        "rs_matrix",
+        subprocess_step(results, "RS Matrix Cache", os.path.join(base_dir, "Database", "Cache", "precompute_rs_matrices.py")),
+        deps=["index_ohlc", "cash"],
+        rows=estimated_rows(engine_cash, "rs_matrix_cache"),
+    ))
+
+    run_pipeline("all", steps, engine, max_workers=len(steps), force=force, dry_run=dry_run, summary=False)
+    if dry_run:
+        return True
+
+    # The F&O and Cash scripts bump the data epoch themselves; index OHLC,
+    # FII/DII and the RS matrices do not, so bump once more at the end
+    bump_data_epoch(engine)
 
     overall_end = time.time()
 
+    names = {step: name for step, name, _, _, _, _ in tasks}
+    names["rs_matrix"] = "RS Matrix Cache"
+
     # Print Summary
     print("\n" + "="*80)
     print(f"📊 TASK SUMMARY (Total Time: {overall_end - overall_start:.1f}s)")
     print("="*80)
 
     all_success = True
-    for res in sorted(results, key=lambda x: x["name"]):
-        if res.get("success"):
+    for entry in sorted(get_last_run(engine, "all"), key=lambda e: names.get(e["step"], e["step"])):
+        name = names.get(entry["step"], entry["step"])
+        res = results.get(name, {})
+        if entry["status"] == "skipped":
+            print(f"⏭ SKIPPED (inputs unchanged @ {entry['watermark']}) - {name}")
+        elif entry["status"] == "blocked":
+            all_success = False
+            print(f"⛔ NOT RUN (blocked by {entry['error']}) - {name}")
+        elif entry["status"] == "success":
             status_msg = "🆕 NEW DATA ADDED" if res.get("new_data_added") else "✅ ALREADY UP TO DATE"
-            print(f"{status_msg} - {res['name']} ({res.get('duration', 0):.1f}s)")
+            rows = f", +{entry['rows_added']:,} rows" if entry.get("rows_added") else ""
+            print(f"{status_msg} - {name} ({res.get('duration', 0):.1f}s{rows})")
         else:
             all_success = False
-            print(f"❌ FAILED - {res['name']} ({res.get('duration', 0):.1f}s)")
+            print(f"❌ FAILED - {name} ({res.get('duration', 0):.1f}s)")
             if "error_code" in res:
                 print(f"   Exit Code: {res['error_code']}")
             elif "error" in res:
@@ -180,8 +214,11 @@ def main():
         print("🎉 ALL UPDATES COMPLETED SUCCESSFULLY!")
     else:
         print("⚠️ SOME UPDATES FAILED. Check the logs above.")
+    return all_success
 
 if __name__ == "__main__":
-    main()
+    # --force: rerun the RS matrices even if their inputs are unchanged
+    # --dry-run: show the step graph and the last checkpoint of each step
+    main(force="--force" in sys.argv, dry_run="--dry-run" in sys.argv)
     print("\n")
     input("Press Enter to exit...")